@@ -1,21 +1,34 @@
 """
 Harris Farm Hub — Agent Executor
-Polls agent_proposals for APPROVED tasks, routes them to real analysis
-functions, scores with the presentation rubric, stores results in
+Runs APPROVED agent_proposals: routes each to real analysis functions,
+scores with the presentation rubric, stores results in
 intelligence_reports, and marks the proposal COMPLETED.
 
+Approved proposals are jobs on the persistent job_queue (job_queue.py),
+one per proposal, keyed "proposal:<id>", of the kind of its first
+analysis type. A dispatcher claims jobs onto a pool of EXECUTOR_WORKERS
+threads, with at most ANALYSIS_CONCURRENCY[kind] of a heavy kind
+running at once (across every executor on the database). It sleeps until
+a job is enqueued (approval wakes it) rather than polling; POLL_INTERVAL
+is only the interval for re-checking agent_proposals for APPROVED rows
+that were inserted directly. A proposal whose execution raises is
+retried with backoff, then marked FAILED.
+
 Usage:
     python3 agent_executor.py              # foreground (Ctrl+C to stop)
-    python3 agent_executor.py --once       # single pass, no loop
+    python3 agent_executor.py --once       # run what is approved, then exit
 """
 
 import json
 import os
 import re
+import socket
 import sqlite3
 import sys
+import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -24,6 +37,7 @@ _here = Path(__file__).resolve().parent
 sys.path.insert(0, str(_here))
 
 from app import config
+from job_queue import LEASE_SECONDS, JobQueue, notify
 
 logger = logging.getLogger("agent_executor")
 logging.basicConfig(
@@ -33,6 +47,20 @@ logging.basicConfig(
 )
 
 POLL_INTERVAL = int(os.getenv("EXECUTOR_POLL_INTERVAL", "30"))
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", "8"))
+
+# Heavy analyses (full basket / customer scans) run one at a time;
+# other kinds may fill the pool
+ANALYSIS_CONCURRENCY = {
+    "basket_analysis": 1,
+    "halo_effect": 1,
+    "customer_analysis": 1,
+    "store_benchmark": 2,
+    "price_dispersion": 2,
+}
+
+# Job priority by task type: reviewer-facing work before self-review
+TASK_PRIORITY = {"ANALYSIS": 10, "REPORT": 10, "IMPROVEMENT": 0}
 
 # Map agent_name keywords → analysis_type(s)
 AGENT_ANALYSIS_MAP = {
@@ -72,6 +100,18 @@ def get_approved_proposals():
     return [dict(r) for r in rows]
 
 
+def get_proposal(proposal_id):
+    """Fetch one proposal (any status), or None."""
+    conn = _get_conn()
+    row = conn.execute(
+        "SELECT id, agent_name, task_type, description, proposed_changes, "
+        "risk_level, estimated_impact, status "
+        "FROM agent_proposals WHERE id = ?", (proposal_id,)
+    ).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
 def route_proposal(proposal):
     """Determine which analysis function(s) to run for a proposal.
 
@@ -394,36 +434,142 @@ def execute_proposal(proposal):
     check_improvement_trigger(agent_name)
 
 
+# ---------------------------------------------------------------------------
+# QUEUE
+# ---------------------------------------------------------------------------
+
+def enqueue_proposal(proposal, queue=None):
+    """Queue an approved proposal (dict or id) for execution; returns
+    the job id, or None if it is already queued."""
+    if not isinstance(proposal, dict):
+        proposal = get_proposal(proposal)
+        if proposal is None:
+            return None
+    kinds = route_proposal(proposal) or ["demand_pattern"]
+    queue = queue or JobQueue(config.HUB_DB)
+    return queue.enqueue(
+        kinds[0], {"proposal_id": proposal["id"]},
+        priority=TASK_PRIORITY.get(proposal.get("task_type"), 5),
+        key="proposal:{}".format(proposal["id"]))
+
+
+def enqueue_approved(queue=None):
+    """Queue every APPROVED proposal that has no job yet (approved
+    before the queue existed, or inserted as APPROVED). Returns count."""
+    queue = queue or JobQueue(config.HUB_DB)
+    known = queue.keys("proposal:")
+    added = 0
+    for proposal in get_approved_proposals():
+        if "proposal:{}".format(proposal["id"]) not in known:
+            if enqueue_proposal(proposal, queue):
+                added += 1
+    return added
+
+
+class ProposalExecutor:
+    """Dispatcher + bounded worker pool over the proposal job queue."""
+
+    def __init__(self, db_path=None, workers=None, limits=None):
+        self.queue = JobQueue(db_path or config.HUB_DB)
+        self.workers = workers or EXECUTOR_WORKERS
+        self.limits = ANALYSIS_CONCURRENCY if limits is None else limits
+        self.owner = "{}:{}:{}".format(socket.gethostname(), os.getpid(),
+                                       id(self))
+        self.executed = 0
+        self._lock = threading.Lock()
+
+    def _run_job(self, job):
+        """Worker thread: execute one claimed proposal job."""
+        pid = job["payload"].get("proposal_id")
+        try:
+            proposal = get_proposal(pid)
+            if not proposal or proposal["status"] != "APPROVED":
+                self.queue.complete(job["id"], self.owner,
+                                    "skipped: not approved")
+                return
+            execute_proposal(proposal)
+        except Exception as e:
+            status = self.queue.fail(job["id"], self.owner, e)
+            logger.error("Proposal #%s attempt %d failed (%s): %s",
+                         pid, job["attempts"], status, e)
+            if status == "failed":
+                mark_failed(pid, e)
+            return
+        self.queue.complete(job["id"], self.owner)
+        with self._lock:
+            self.executed += 1
+
+    def run(self, until_idle=False, stop=None):
+        """Execute jobs as they arrive. until_idle: return once nothing
+        is runnable or running. stop: a threading.Event to end the loop.
+        Returns the number of proposals executed."""
+        running = {}
+        last_sync = 0.0
+        last_renew = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="executor") as pool:
+            while not (stop and stop.is_set()):
+                generation = self.queue.generation()
+                if time.monotonic() - last_sync >= POLL_INTERVAL:
+                    enqueue_approved(self.queue)
+                    last_sync = time.monotonic()
+
+                for future in [f for f in running if f.done()]:
+                    running.pop(future)
+                while len(running) < self.workers:
+                    job = self.queue.claim(self.owner, self.limits,
+                                           default_limit=self.workers)
+                    if job is None:
+                        break
+                    future = pool.submit(self._run_job, job)
+                    future.add_done_callback(lambda _: notify())
+                    running[future] = job
+
+                if time.monotonic() - last_renew >= LEASE_SECONDS / 3:
+                    for job in running.values():
+                        self.queue.renew(job["id"], self.owner)
+                    last_renew = time.monotonic()
+
+                # due == 0: runnable but held back by a concurrency limit,
+                # so the next wake is a job finishing somewhere
+                due = self.queue.next_due()
+                if until_idle and not running and (due is None or due > 0):
+                    break
+                timeout = POLL_INTERVAL if not due else min(POLL_INTERVAL, due)
+                if self.queue.wait(generation, timeout):
+                    # New work may be APPROVED rows written elsewhere
+                    last_sync = 0.0
+        self.queue.close()
+        return self.executed
+
+
 def run_once():
-    """Single pass: execute all approved proposals."""
-    proposals = get_approved_proposals()
-    if not proposals:
+    """Execute everything approved now, concurrently; returns the count."""
+    executor = ProposalExecutor()
+    queued = enqueue_approved(executor.queue)
+    counts = executor.queue.counts()
+    if not queued and not counts.get("queued"):
         logger.info("No approved proposals to execute")
         return 0
 
-    logger.info("Found %d approved proposal(s) to execute", len(proposals))
-    for prop in proposals:
-        execute_proposal(prop)
-        time.sleep(0.5)  # Brief pause between proposals
-
-    return len(proposals)
+    logger.info("Executing %d queued proposal(s) with %d workers",
+                counts.get("queued", 0), executor.workers)
+    return executor.run(until_idle=True)
 
 
 def run_loop():
-    """Continuous polling loop."""
-    logger.info("Agent Executor started (poll every %ds)", POLL_INTERVAL)
+    """Event-driven executor: runs until interrupted."""
+    logger.info("Agent Executor started (%d workers, re-check approvals "
+                "every %ds)", EXECUTOR_WORKERS, POLL_INTERVAL)
     while True:
         try:
-            count = run_once()
-            if count > 0:
-                logger.info("Processed %d proposals this cycle", count)
+            ProposalExecutor().run()
         except KeyboardInterrupt:
             logger.info("Executor stopped by user")
             break
         except Exception as e:
             logger.error("Error in executor loop: %s", e)
-
-        time.sleep(POLL_INTERVAL)
+            time.sleep(POLL_INTERVAL)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,40 @@
 """
 Harris Farm Hub — Analytics Engine
 Page-view tracking and adoption metrics.
+
+Writes: log_page_view() only appends to an in-memory buffer, so a page
+load never waits on SQLite or contends for its write lock. A background
+thread flushes the buffer every FLUSH_SECONDS, or as soon as FLUSH_ROWS
+views are waiting, in one transaction per database that inserts the raw
+rows into page_views and folds them into page_view_daily. Views still
+buffered at exit are flushed by an atexit hook (and the API's shutdown).
+
+Reads: page_view_daily holds one row per (day, user, role, page) with its
+view count and latest timestamp. Every distinct count the reports need
+(users per page, per role, per day; pages per user) is exact at that
+grain, so the read APIs aggregate rollup rows instead of scanning every
+view. Their window is whole UTC days: the last N days plus today.
 """
 
+import atexit
+import logging
 import sqlite3
+import threading
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("hub_api")
+
+FLUSH_SECONDS = 2.0
+FLUSH_ROWS = 500
+MAX_BUFFERED = 50000  # per database, if flushes keep failing
+
+_LOCK = threading.Lock()
+_BUFFER: Dict[str, List[tuple]] = defaultdict(list)
+_WAKE = threading.Event()
+_FLUSHER: Optional[threading.Thread] = None
+_FLUSH_LOCK = threading.Lock()
 
 
 def init_analytics_tables(conn):
@@ -24,19 +53,156 @@ def init_analytics_tables(conn):
     c.execute("CREATE INDEX IF NOT EXISTS idx_pv_slug ON page_views(page_slug)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_pv_date ON page_views(created_at)")
 
+    c.execute("""CREATE TABLE IF NOT EXISTS page_view_daily (
+        day TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        user_role TEXT NOT NULL,
+        page_slug TEXT NOT NULL,
+        views INTEGER NOT NULL,
+        last_at TEXT NOT NULL,
+        user_email TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (day, user_id, user_role, page_slug)
+    )""")
+
+    # First run on an existing database: roll up the history
+    if (c.execute("SELECT 1 FROM page_view_daily LIMIT 1").fetchone() is None
+            and c.execute("SELECT 1 FROM page_views LIMIT 1").fetchone()):
+        rebuild_rollups(conn)
+
     conn.commit()
 
 
+def rebuild_rollups(conn):
+    """Recompute page_view_daily from page_views (the caller commits)."""
+    conn.execute("DELETE FROM page_view_daily")
+    # With a single MAX() aggregate SQLite takes bare columns (user_email)
+    # from the row holding the maximum, i.e. the latest view
+    conn.execute(
+        "INSERT INTO page_view_daily "
+        "(day, user_id, user_role, page_slug, views, last_at, user_email) "
+        "SELECT date(created_at), user_id, user_role, page_slug, COUNT(*), "
+        "MAX(created_at), user_email FROM page_views "
+        "GROUP BY date(created_at), user_id, user_role, page_slug")
+
+
+# ---------------------------------------------------------------------------
+# WRITE BUFFER
+# ---------------------------------------------------------------------------
+
 def log_page_view(db_path, user_id, user_email, page_slug, user_role="user"):
-    """Log a single page view. Lightweight — called on every page load."""
+    """Log a single page view. Lightweight — called on every page load.
+
+    The view is buffered with its timestamp and written by the next flush.
+    """
+    row = (user_id, user_email or "", page_slug, user_role or "user",
+           datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+    with _LOCK:
+        rows = _BUFFER[str(db_path)]
+        rows.append(row)
+        pending = len(rows)
+    _ensure_flusher()
+    if pending >= FLUSH_ROWS:
+        _WAKE.set()
+
+
+def pending_views(db_path=None) -> int:
+    """Views buffered but not yet written (for one database, or all)."""
+    with _LOCK:
+        if db_path is not None:
+            return len(_BUFFER.get(str(db_path), ()))
+        return sum(len(rows) for rows in _BUFFER.values())
+
+
+def flush(db_path=None) -> int:
+    """Write buffered views (of one database, or all) now.
+
+    Returns the number of views written. Views whose write fails go back
+    to the buffer for the next flush.
+    """
+    written = 0
+    with _FLUSH_LOCK:
+        with _LOCK:
+            paths = [str(db_path)] if db_path is not None else list(_BUFFER)
+            batches = {p: _BUFFER.pop(p) for p in paths if _BUFFER.get(p)}
+        for path, rows in batches.items():
+            try:
+                _write_batch(path, rows)
+                written += len(rows)
+            except sqlite3.Error as e:
+                logger.warning("Page-view flush failed (%d views kept): %s",
+                               len(rows), e)
+                with _LOCK:
+                    kept = rows + _BUFFER[path]
+                    _BUFFER[path] = kept[-MAX_BUFFERED:]
+    return written
+
+
+def _write_batch(db_path: str, rows: List[tuple]) -> None:
+    """Insert raw views and fold them into the daily rollup, atomically."""
+    rollup = {}
+    for user_id, email, slug, role, at in rows:
+        key = (at[:10], user_id, role, slug)
+        views, last_at, last_email = rollup.get(key, (0, "", ""))
+        if at >= last_at:
+            last_at, last_email = at, email
+        rollup[key] = (views + 1, last_at, last_email)
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO page_views "
+                "(user_id, user_email, page_slug, user_role, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT INTO page_view_daily "
+                "(day, user_id, user_role, page_slug, views, last_at, user_email) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, user_id, user_role, page_slug) DO UPDATE SET "
+                "views = views + excluded.views, "
+                "user_email = CASE WHEN excluded.last_at >= last_at "
+                "THEN excluded.user_email ELSE user_email END, "
+                "last_at = MAX(last_at, excluded.last_at)",
+                [key + value for key, value in rollup.items()])
+    finally:
+        conn.close()
+
+
+def _ensure_flusher() -> None:
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    with _LOCK:
+        if _FLUSHER is None or not _FLUSHER.is_alive():
+            _FLUSHER = threading.Thread(target=_flush_loop,
+                                        name="pageview-flush", daemon=True)
+            _FLUSHER.start()
+
+
+def _flush_loop() -> None:
+    while True:
+        _WAKE.wait(FLUSH_SECONDS)
+        _WAKE.clear()
+        try:
+            flush()
+        except Exception as e:  # keep the flusher alive
+            logger.warning("Page-view flusher error: %s", e)
+
+
+atexit.register(flush)
+
+
+# ---------------------------------------------------------------------------
+# REPORTS
+# ---------------------------------------------------------------------------
+
+def _open_for_read(db_path, days):
+    """Flush pending views so reports include them; connection + first day."""
+    flush(db_path)
     conn = sqlite3.connect(db_path)
-    conn.execute(
-        "INSERT INTO page_views (user_id, user_email, page_slug, user_role) "
-        "VALUES (?, ?, ?, ?)",
-        (user_id, user_email, page_slug, user_role),
-    )
-    conn.commit()
-    conn.close()
+    conn.row_factory = sqlite3.Row
+    first_day = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+    return conn, first_day
 
 
 def get_analytics_summary(db_path, days=30):
@@ -44,38 +210,31 @@ def get_analytics_summary(db_path, days=30):
     Aggregate analytics for the last N days.
     Returns: unique_users, total_views, top_pages, views_by_day, avg_pages_per_user.
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn, first_day = _open_for_read(db_path, days)
 
-    # Unique users
-    unique_users = conn.execute(
-        "SELECT COUNT(DISTINCT user_id) FROM page_views WHERE created_at >= ?",
-        (cutoff,),
-    ).fetchone()[0]
-
-    # Total views
-    total_views = conn.execute(
-        "SELECT COUNT(*) FROM page_views WHERE created_at >= ?",
-        (cutoff,),
-    ).fetchone()[0]
+    totals = conn.execute(
+        "SELECT COUNT(DISTINCT user_id) AS users, "
+        "COALESCE(SUM(views), 0) AS views "
+        "FROM page_view_daily WHERE day >= ?",
+        (first_day,),
+    ).fetchone()
+    unique_users, total_views = totals["users"], totals["views"]
 
     # Top pages
     rows = conn.execute(
-        "SELECT page_slug, COUNT(*) as views, COUNT(DISTINCT user_id) as users "
-        "FROM page_views WHERE created_at >= ? "
+        "SELECT page_slug, SUM(views) as views, COUNT(DISTINCT user_id) as users "
+        "FROM page_view_daily WHERE day >= ? "
         "GROUP BY page_slug ORDER BY views DESC LIMIT 15",
-        (cutoff,),
+        (first_day,),
     ).fetchall()
     top_pages = [{"slug": r["page_slug"], "views": r["views"], "users": r["users"]} for r in rows]
 
     # Views by day
     rows = conn.execute(
-        "SELECT date(created_at) as day, COUNT(*) as views, "
-        "COUNT(DISTINCT user_id) as users "
-        "FROM page_views WHERE created_at >= ? "
-        "GROUP BY date(created_at) ORDER BY day",
-        (cutoff,),
+        "SELECT day, SUM(views) as views, COUNT(DISTINCT user_id) as users "
+        "FROM page_view_daily WHERE day >= ? "
+        "GROUP BY day ORDER BY day",
+        (first_day,),
     ).fetchall()
     views_by_day = [{"day": r["day"], "views": r["views"], "users": r["users"]} for r in rows]
 
@@ -95,15 +254,13 @@ def get_analytics_summary(db_path, days=30):
 
 def get_analytics_by_role(db_path, days=30):
     """Usage broken down by hub_role."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn, first_day = _open_for_read(db_path, days)
 
     rows = conn.execute(
-        "SELECT user_role, COUNT(*) as views, COUNT(DISTINCT user_id) as users "
-        "FROM page_views WHERE created_at >= ? "
+        "SELECT user_role, SUM(views) as views, COUNT(DISTINCT user_id) as users "
+        "FROM page_view_daily WHERE day >= ? "
         "GROUP BY user_role ORDER BY views DESC",
-        (cutoff,),
+        (first_day,),
     ).fetchall()
     conn.close()
     return [{"role": r["user_role"], "views": r["views"], "users": r["users"]} for r in rows]
@@ -111,18 +268,18 @@ def get_analytics_by_role(db_path, days=30):
 
 def get_user_activity(db_path, days=30):
     """Per-user page counts and last active timestamp."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn, first_day = _open_for_read(db_path, days)
 
+    # Email and role come from the user's latest view (bare columns of a
+    # single-MAX() aggregate)
     rows = conn.execute(
         "SELECT user_id, user_email, user_role, "
-        "COUNT(*) as page_views, "
+        "SUM(views) as page_views, "
         "COUNT(DISTINCT page_slug) as unique_pages, "
-        "MAX(created_at) as last_active "
-        "FROM page_views WHERE created_at >= ? "
+        "MAX(last_at) as last_active "
+        "FROM page_view_daily WHERE day >= ? "
         "GROUP BY user_id ORDER BY page_views DESC",
-        (cutoff,),
+        (first_day,),
     ).fetchall()
     conn.close()
     return [
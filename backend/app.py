@@ -5,10 +5,9 @@ AI Centre of Excellence - Backend API
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Literal
-import anthropic
-import openai
 import httpx
 import asyncio
 from datetime import datetime, timedelta
@@ -28,6 +27,10 @@ _backend_dir = os.path.dirname(os.path.abspath(__file__))
 if _backend_dir not in sys.path:
     sys.path.insert(0, _backend_dir)
 
+import result_cache
+import startup_profile
+import telemetry
+
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
 logger = logging.getLogger("hub_api")
@@ -1371,15 +1374,105 @@ def seed_sustainability_kpis():
     conn.close()
 
 
+def _backfill_audit_scores():
+    from self_improvement import backfill_scores_from_audit
+    _backfilled = backfill_scores_from_audit()
+    if _backfilled:
+        print(f"  Backfilled {_backfilled} score entries from audit.log")
+
+
+def _seed_academy_challenges():
+    from academy_engine import seed_daily_challenges
+    _seeded = seed_daily_challenges(config.HUB_DB)
+    if _seeded:
+        print(f"  Seeded {_seeded} Academy daily challenges")
+
+
+def _ingest_store_pl():
+    from store_pl_service import ingest_to_sqlite as _pl_ingest, _CSV_PATH as _pl_csv
+    if _pl_csv.exists():
+        result = _pl_ingest()
+        print(f"✅ Store P&L: {result['detail_rows']:,} detail, {result['summary_rows']:,} summary rows")
+    else:
+        print("  Store P&L CSV not found — skipping")
+
+
+def _start_scheduled_analysis():
+    import threading
+    schedule_hours = int(os.getenv("ANALYSIS_SCHEDULE_HOURS", "168"))
+    if schedule_hours > 0:
+        def _scheduled_trigger():
+            try:
+                conn = sqlite3.connect(config.HUB_DB)
+                sched_tasks = [
+                    ("StockoutAnalyzer", "ANALYSIS", "Auto-scheduled: Stockout scan", "LOW", "Lost revenue"),
+                    ("BasketAnalyzer", "ANALYSIS", "Auto-scheduled: Cross-sell scan", "LOW", "Revenue growth"),
+                    ("DemandAnalyzer", "ANALYSIS", "Auto-scheduled: Demand pattern scan", "LOW", "Optimisation"),
+                    ("PriceAnalyzer", "ANALYSIS", "Auto-scheduled: Price dispersion scan", "LOW", "Margin recovery"),
+                    ("SlowMoverAnalyzer", "ANALYSIS", "Auto-scheduled: Slow mover review", "LOW", "Range optimisation"),
+                    ("HaloAnalyzer", "ANALYSIS", "Auto-scheduled: Halo effect scan", "LOW", "Basket growth"),
+                    ("SpecialsAnalyzer", "ANALYSIS", "Auto-scheduled: Specials uplift forecast", "LOW", "Ordering"),
+                    ("MarginAnalyzer", "ANALYSIS", "Auto-scheduled: Margin erosion scan", "LOW", "Margin recovery"),
+                    ("CustomerAnalyzer", "ANALYSIS", "Auto-scheduled: Customer segmentation", "LOW", "Retention"),
+                    ("StoreBenchmarkAnalyzer", "ANALYSIS", "Auto-scheduled: Store benchmark", "LOW", "Benchmarking"),
+                ]
+                for agent, ttype, desc, risk, impact in sched_tasks:
+                    conn.execute(
+                        "INSERT INTO agent_proposals (agent_name, task_type, description, "
+                        "risk_level, estimated_impact) VALUES (?,?,?,?,?)",
+                        (agent, ttype, desc, risk, impact),
+                    )
+                conn.commit()
+                conn.close()
+                print("Scheduled analysis cycle: {} proposals created".format(len(sched_tasks)))
+            except Exception as e:
+                print("Scheduled trigger failed: {}".format(e))
+            t = threading.Timer(schedule_hours * 3600, _scheduled_trigger)
+            t.daemon = True
+            t.start()
+
+        _timer = threading.Timer(300, _scheduled_trigger)
+        _timer.daemon = True
+        _timer.start()
+        print("Scheduled analysis: every {} hours (first run in 5 min)".format(schedule_hours))
+
+
+def _start_watchdog(app):
+    from watchdog_scheduler import WatchdogScheduler
+    watchdog_hours = int(os.getenv("WATCHDOG_INTERVAL_HOURS", "6"))
+    if watchdog_hours > 0:
+        app.state.watchdog = WatchdogScheduler(
+            interval_hours=watchdog_hours, db_path=config.HUB_DB
+        )
+        app.state.watchdog.start(delay=120)
+        print("🐕 WATCHDOG scheduler: every {}h (first run in 2 min)".format(watchdog_hours))
+
+
+def _start_monday_sync():
+    dashboards = str(Path(__file__).parent.parent / "dashboards")
+    if dashboards not in sys.path:
+        sys.path.insert(0, dashboards)
+    from shared.monday_sync import (SYNC_INTERVAL_SECONDS, is_configured,
+                                    start_sync_thread)
+    if is_configured() and SYNC_INTERVAL_SECONDS > 0:
+        start_sync_thread()
+        print("📋 Monday.com sync: every {}s".format(SYNC_INTERVAL_SECONDS))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup — each step wrapped so one failure doesn't kill the backend
+    # Startup — each step wrapped so one failure doesn't kill the backend.
+    # Only what requests depend on runs here; slow, non-critical work goes
+    # to the warm-up thread so the server answers health checks at once.
+    # Every step is timed (GET /api/admin/startup, startup_profile.py).
     import time as _time
     app.state.start_time = _time.time()
+    phase = startup_profile.phase
 
     # 1. Core database
     try:
-        init_hub_database()
+        with phase("hub_database"):
+            init_hub_database()
         print("✅ Hub database initialized")
     except Exception as e:
         print(f"❌ Hub database init failed: {e}")
@@ -1394,126 +1487,63 @@ async def lifespan(app: FastAPI):
         ("sustainability_kpis", seed_sustainability_kpis),
     ]:
         try:
-            seed_fn()
+            with phase("seed_" + seed_name):
+                seed_fn()
         except Exception as e:
             print(f"  Seed {seed_name} skipped: {e}")
 
-    # 3. Auto-ingest audit scores (non-critical)
+    # 3. Auth database
     try:
-        from self_improvement import backfill_scores_from_audit
-        _backfilled = backfill_scores_from_audit()
-        if _backfilled:
-            print(f"  Backfilled {_backfilled} score entries from audit.log")
-    except Exception:
-        pass
-
-    # 4. Seed Academy daily challenges (non-critical)
-    try:
-        from academy_engine import seed_daily_challenges
-        _seeded = seed_daily_challenges(config.HUB_DB)
-        if _seeded:
-            print(f"  Seeded {_seeded} Academy daily challenges")
-    except Exception as e:
-        print(f"  Academy challenge seeding skipped: {e}")
-
-    # 5. Auth database
-    try:
-        import auth as auth_module
-        auth_module.init_auth_db()
-        auth_module.cleanup_expired_sessions()
+        with phase("auth_database"):
+            import auth as auth_module
+            auth_module.init_auth_db()
+            auth_module.cleanup_expired_sessions()
         print(f"✅ Auth database initialized (enabled={auth_module.is_auth_enabled()})")
     except Exception as e:
         print(f"❌ Auth init failed: {e}")
 
-    # 5b. MDHE database tables
+    # 3b. MDHE database tables
     try:
-        from mdhe_db import init_mdhe_db
-        init_mdhe_db()
+        with phase("mdhe_database"):
+            from mdhe_db import init_mdhe_db
+            init_mdhe_db()
         print("✅ MDHE database initialized")
     except Exception as e:
         print(f"  MDHE init skipped: {e}")
 
-    # 6. Transaction store (DuckDB → parquet)
+    # 4. Transaction store (DuckDB → parquet; only checks the files exist)
     try:
-        from transaction_layer import TransactionStore
-        app.state.txn_store = TransactionStore()
+        with phase("transaction_store"):
+            from transaction_layer import TransactionStore
+            app.state.txn_store = TransactionStore()
         avail = list(app.state.txn_store.available_fys.keys())
         print(f"✅ Transaction store: {len(avail)} fiscal years ({', '.join(avail)})")
     except Exception as e:
         print(f"⚠️ Transaction store init failed (dashboards needing tx data won't work): {e}")
         app.state.txn_store = None
 
-    # 6b. Store P&L history (GL data)
-    try:
-        from store_pl_service import ingest_to_sqlite as _pl_ingest, _CSV_PATH as _pl_csv
-        if _pl_csv.exists():
-            result = _pl_ingest()
-            print(f"✅ Store P&L: {result['detail_rows']:,} detail, {result['summary_rows']:,} summary rows")
-        else:
-            print("  Store P&L CSV not found — skipping")
-    except Exception as e:
-        print(f"  Store P&L ingest skipped: {e}")
-
-    # 7. Scheduled analysis cycle
-    try:
-        import threading
-        schedule_hours = int(os.getenv("ANALYSIS_SCHEDULE_HOURS", "168"))
-        if schedule_hours > 0:
-            def _scheduled_trigger():
-                try:
-                    conn = sqlite3.connect(config.HUB_DB)
-                    sched_tasks = [
-                        ("StockoutAnalyzer", "ANALYSIS", "Auto-scheduled: Stockout scan", "LOW", "Lost revenue"),
-                        ("BasketAnalyzer", "ANALYSIS", "Auto-scheduled: Cross-sell scan", "LOW", "Revenue growth"),
-                        ("DemandAnalyzer", "ANALYSIS", "Auto-scheduled: Demand pattern scan", "LOW", "Optimisation"),
-                        ("PriceAnalyzer", "ANALYSIS", "Auto-scheduled: Price dispersion scan", "LOW", "Margin recovery"),
-                        ("SlowMoverAnalyzer", "ANALYSIS", "Auto-scheduled: Slow mover review", "LOW", "Range optimisation"),
-                        ("HaloAnalyzer", "ANALYSIS", "Auto-scheduled: Halo effect scan", "LOW", "Basket growth"),
-                        ("SpecialsAnalyzer", "ANALYSIS", "Auto-scheduled: Specials uplift forecast", "LOW", "Ordering"),
-                        ("MarginAnalyzer", "ANALYSIS", "Auto-scheduled: Margin erosion scan", "LOW", "Margin recovery"),
-                        ("CustomerAnalyzer", "ANALYSIS", "Auto-scheduled: Customer segmentation", "LOW", "Retention"),
-                        ("StoreBenchmarkAnalyzer", "ANALYSIS", "Auto-scheduled: Store benchmark", "LOW", "Benchmarking"),
-                    ]
-                    for agent, ttype, desc, risk, impact in sched_tasks:
-                        conn.execute(
-                            "INSERT INTO agent_proposals (agent_name, task_type, description, "
-                            "risk_level, estimated_impact) VALUES (?,?,?,?,?)",
-                            (agent, ttype, desc, risk, impact),
-                        )
-                    conn.commit()
-                    conn.close()
-                    print("Scheduled analysis cycle: {} proposals created".format(len(sched_tasks)))
-                except Exception as e:
-                    print("Scheduled trigger failed: {}".format(e))
-                t = threading.Timer(schedule_hours * 3600, _scheduled_trigger)
-                t.daemon = True
-                t.start()
-
-            _timer = threading.Timer(300, _scheduled_trigger)
-            _timer.daemon = True
-            _timer.start()
-            print("Scheduled analysis: every {} hours (first run in 5 min)".format(schedule_hours))
-    except Exception as e:
-        print(f"  Scheduled analysis setup skipped: {e}")
-
-    # 8. WATCHDOG background scheduler
-    try:
-        from watchdog_scheduler import WatchdogScheduler
-        watchdog_hours = int(os.getenv("WATCHDOG_INTERVAL_HOURS", "6"))
-        if watchdog_hours > 0:
-            app.state.watchdog = WatchdogScheduler(
-                interval_hours=watchdog_hours, db_path=config.HUB_DB
-            )
-            app.state.watchdog.start(delay=120)
-            print("🐕 WATCHDOG scheduler: every {}h (first run in 2 min)".format(watchdog_hours))
-    except Exception as e:
-        print(f"  WATCHDOG setup skipped: {e}")
-
+    # 5. Warm-up (background): audit score backfill, Academy daily
+    #    challenges, store P&L ingest (GL history, several seconds), then
+    #    the scheduled analysis cycle and the WATCHDOG scheduler
+    startup_profile.warm_up([
+        ("backfill_audit_scores", _backfill_audit_scores),
+        ("academy_challenges", _seed_academy_challenges),
+        ("store_pl_ingest", _ingest_store_pl),
+        ("scheduled_analysis", _start_scheduled_analysis),
+        ("watchdog", lambda: _start_watchdog(app)),
+        ("monday_sync", _start_monday_sync),
+    ])
+
+    startup_profile.mark("serving")
     print("✅ Backend startup complete")
     yield
     # Shutdown
     if hasattr(app.state, "watchdog"):
         app.state.watchdog.stop()
+    if "shared.monday_sync" in sys.modules:
+        sys.modules["shared.monday_sync"].stop_sync_thread()
+    from analytics_engine import flush as flush_page_views
+    flush_page_views()
     print("👋 Hub shutting down")
 
 # ============================================================================
@@ -1546,6 +1576,9 @@ app.add_middleware(
     allow_headers=["Content-Type", "X-Auth-Token"],
 )
 
+# Per-route latency histograms (GET /api/metrics)
+app.add_middleware(telemetry.TelemetryMiddleware)
+
 # MDHE API router
 try:
     from mdhe_api import router as mdhe_router
@@ -1612,12 +1645,53 @@ class ChatRequest(BaseModel):
 # THE RUBRIC - MULTI-LLM EVALUATION SYSTEM
 # ============================================================================
 
+class _LazyClient:
+    """LLM client attribute created on first access, so the anthropic /
+    openai SDKs (~0.6s of imports) load when first used, not at start-up.
+    Assigning to the attribute replaces the client (tests, key rotation)."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __set_name__(self, owner, name):
+        self.attr = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if self.attr not in obj.__dict__:
+            obj.__dict__[self.attr] = self.factory()
+        return obj.__dict__[self.attr]
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.attr] = value
+
+
+def _anthropic_client():
+    if not config.ANTHROPIC_API_KEY:
+        return None
+    import anthropic
+    client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
+    client.messages.create = telemetry.timed_call(
+        "llm", "anthropic", client.messages.create)
+    return client
+
+
+def _openai_client():
+    if not config.OPENAI_API_KEY:
+        return None
+    import openai
+    client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
+    client.chat.completions.create = telemetry.timed_call(
+        "llm", "openai", client.chat.completions.create)
+    return client
+
+
 class RubricEvaluator:
     """Multi-LLM evaluation system"""
-    
-    def __init__(self):
-        self.claude_client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY) if config.ANTHROPIC_API_KEY else None
-        self.openai_client = openai.OpenAI(api_key=config.OPENAI_API_KEY) if config.OPENAI_API_KEY else None
+
+    claude_client = _LazyClient(_anthropic_client)
+    openai_client = _LazyClient(_openai_client)
     
     async def query_claude(self, prompt: str, context: str = "") -> Dict[str, Any]:
         if not self.claude_client:
@@ -1696,22 +1770,23 @@ class RubricEvaluator:
         start = datetime.now()
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.x.ai/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {config.GROK_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "grok-beta",
-                        "messages": [
-                            {"role": "system", "content": context or "You are Grok."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "max_tokens": 4000
-                    },
-                    timeout=60.0
-                )
+                with telemetry.timed("llm", "xai:grok-beta"):
+                    response = await client.post(
+                        "https://api.x.ai/v1/chat/completions",
+                        headers={
+                            "Authorization": f"Bearer {config.GROK_API_KEY}",
+                            "Content-Type": "application/json"
+                        },
+                        json={
+                            "model": "grok-beta",
+                            "messages": [
+                                {"role": "system", "content": context or "You are Grok."},
+                                {"role": "user", "content": prompt}
+                            ],
+                            "max_tokens": 4000
+                        },
+                        timeout=60.0
+                    )
                 
                 result = response.json()
                 latency = (datetime.now() - start).total_seconds() * 1000
@@ -1777,11 +1852,9 @@ class QueryGenerator:
         "ATTACH", "DETACH", "COPY", "IMPORT", "LOAD", "PRAGMA",
     }
 
+    claude_client = _LazyClient(_anthropic_client)
+
     def __init__(self):
-        self.claude_client = (
-            anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
-            if config.ANTHROPIC_API_KEY else None
-        )
         # Path to the main business database
         self._harris_db = os.path.join(
             os.path.dirname(__file__), "..", "data", "harris_farm.db"
@@ -1895,7 +1968,7 @@ class QueryGenerator:
 
     def _execute_sqlite(self, sql: str) -> List[Dict]:
         """Execute read-only SQL against harris_farm.db."""
-        conn = sqlite3.connect(self._harris_db)
+        conn = telemetry.connect(self._harris_db)
         conn.row_factory = sqlite3.Row
         try:
             cursor = conn.execute(sql)
@@ -2095,9 +2168,36 @@ async def health_check():
     return {
         "status": "healthy" if all_ok else "degraded",
         "checks": checks,
+        "warm_up": startup_profile.warm_up_state()["state"],
         "uptime_seconds": int(time.time() - app.state.start_time) if hasattr(app.state, "start_time") else None,
     }
 
+
+@app.get("/api/admin/startup")
+async def startup_report():
+    """Start-up profile of this worker: milestones and the timed lifespan
+    and warm-up phases (import costs: python backend/startup_profile.py app)."""
+    return startup_profile.report()
+
+@app.get("/api/metrics")
+async def metrics():
+    """Request, query and LLM latency histograms of this worker in the
+    Prometheus text format."""
+    return PlainTextResponse(telemetry.prometheus_text(),
+                             media_type="text/plain; version=0.0.4")
+
+@app.get("/api/admin/telemetry")
+async def telemetry_report(window_minutes: int = 60, kind: Optional[str] = None,
+                           slow_limit: int = 20):
+    """p50/p95/p99 per endpoint, query template and LLM model over the
+    last window_minutes (every worker, from the telemetry ring buffer),
+    plus the latest sampled slow queries with their plans."""
+    series = await asyncio.to_thread(
+        telemetry.summary, None, window_minutes * 60, kind)
+    slow = await asyncio.to_thread(telemetry.slow_queries, None, slow_limit)
+    return {"window_minutes": window_minutes, "series": series,
+            "slow_queries": slow}
+
 @app.post("/api/query")
 async def natural_language_query(request: NaturalLanguageQuery):
     """
@@ -2724,16 +2824,17 @@ async def _chat_grok(system_prompt: str, messages: list) -> dict:
     start = datetime.now()
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.x.ai/v1/chat/completions",
-                headers={"Authorization": f"Bearer {config.GROK_API_KEY}", "Content-Type": "application/json"},
-                json={
-                    "model": "grok-beta",
-                    "messages": [{"role": "system", "content": system_prompt}] + messages,
-                    "max_tokens": 4000
-                },
-                timeout=60.0
-            )
+            with telemetry.timed("llm", "xai:grok-beta"):
+                response = await client.post(
+                    "https://api.x.ai/v1/chat/completions",
+                    headers={"Authorization": f"Bearer {config.GROK_API_KEY}", "Content-Type": "application/json"},
+                    json={
+                        "model": "grok-beta",
+                        "messages": [{"role": "system", "content": system_prompt}] + messages,
+                        "max_tokens": 4000
+                    },
+                    timeout=60.0
+                )
             result = response.json()
             latency = (datetime.now() - start).total_seconds() * 1000
             return {
@@ -3246,6 +3347,14 @@ async def transactions_query_catalog():
     return {"queries": get_query_catalog(), "count": len(get_query_catalog())}
 
 
+@result_cache.cached(namespace="transaction_queries.run_query",
+                     version=lambda: app.state.txn_store.data_version())
+def _cached_run_query(query_name, **kwargs):
+    """run_query through the result cache shared with the dashboards."""
+    from transaction_queries import run_query
+    return run_query(app.state.txn_store, query_name, **kwargs)
+
+
 @app.get("/api/transactions/run/{query_name}")
 async def transactions_run_query(
     query_name: str,
@@ -3292,7 +3401,7 @@ async def transactions_run_query(
     if fin_year_2:
         kwargs["fin_year_2"] = fin_year_2
     try:
-        results = run_query(app.state.txn_store, query_name, **kwargs)
+        results = _cached_run_query(query_name, **kwargs)
         return {"query": query_name, "results": results, "count": len(results)}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -5497,6 +5606,14 @@ async def approve_agent_proposal(proposal_id: int, request: Request):
     )
     conn.commit()
     conn.close()
+
+    # Enqueue now so a waiting executor starts at once; if this fails the
+    # executor's approval re-check still picks the proposal up
+    try:
+        from agent_executor import enqueue_proposal
+        enqueue_proposal(proposal_id)
+    except Exception as e:
+        logger.warning("Could not enqueue proposal #%d: %s", proposal_id, e)
     return {"success": True, "message": "Proposal approved and queued for execution"}
 
 
@@ -5710,8 +5827,12 @@ async def executor_status():
     ).fetchall()
     conn.close()
 
+    from job_queue import JobQueue
+    jobs = JobQueue(config.HUB_DB).counts()
+
     return {
         "queue": counts,
+        "jobs": jobs,
         "approved_waiting": counts.get("APPROVED", 0),
         "completed_total": counts.get("COMPLETED", 0),
         "pending_total": counts.get("PENDING", 0),
@@ -6955,7 +7076,8 @@ class PageViewRequest(BaseModel):
 
 @app.post("/api/analytics/pageview")
 async def analytics_log_pageview(req: PageViewRequest):
-    """Log a single page view. Fire-and-forget from frontend."""
+    """Log a single page view. Fire-and-forget from frontend (buffered;
+    written in batches by analytics_engine's flusher)."""
     from analytics_engine import log_page_view
     log_page_view(config.HUB_DB, req.user_id, req.user_email,
                   req.page_slug, req.user_role)
@@ -7867,6 +7989,13 @@ async def skills_hipo_calculate(user_id: str):
     return {"user_id": user_id, "signals": signals}
 
 
+@app.post("/api/skills/hipo/refresh")
+async def skills_hipo_refresh(full: bool = False):
+    """Admin: Batch-rescore users into the hipo_scores table."""
+    from hipo_engine import refresh_hipo_scores
+    return refresh_hipo_scores(config.HUB_DB, full=full)
+
+
 # ==========================================================================
 # SKILLS ACADEMY v4 API
 # ==========================================================================
@@ -8229,6 +8358,13 @@ async def sa_v4_leaderboard(period: str = "all", limit: int = 50):
     return {"leaderboard": get_leaderboard(config.HUB_DB, period, limit)}
 
 
+@app.get("/api/skills-academy/leaderboard/rank/{user_id}")
+async def sa_v4_leaderboard_rank(user_id: str, period: str = "all"):
+    """Get a user's leaderboard position."""
+    from sa_v4_xp_engine import get_user_rank
+    return get_user_rank(config.HUB_DB, user_id, period)
+
+
 @app.post("/api/skills-academy/badges/{user_id}/check")
 async def sa_v4_badge_check(user_id: str):
     """Trigger badge check."""
@@ -8480,6 +8616,8 @@ async def sa_v4_admin_hipo():
         conn.close()
 
 
+startup_profile.mark("app imported")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,486 @@
+"""
+Harris Farm Hub — Sparse Basket Matrix
+Receipt x PLU incidence matrices for the cross-sell (basket) and halo
+analyses, so pair counts come from one sparse matrix product instead of a
+self-join of every POS line with every other line on the same receipt.
+
+A window is cut into calendar-month slices. Each slice is one CSR matrix
+(rows = receipts with a positive line in the slice, columns = PLUs, value
+1 when the receipt has a Quantity > 0 AND SalesIncGST > 0 line for the
+PLU) plus the receipt's basket value. Slices are cached on disk:
+
+    data/transactions/derived/basket_matrix/<scope>_<lo>_<hi>_<sig>.npz
+        scope  store ID, or "all" (receipts keyed by Store_ID x Reference2)
+        lo/hi  slice bounds (dates, hi exclusive)
+        sig    hash of the sizes / mtimes of the fiscal-year parquet files
+               that overlap the slice -- a daily load into FY26 only makes
+               FY26 slices stale, and each is replaced when next built
+
+Whole-month slices are shared by every window that covers the month, so a
+rolling 12-month network run only aggregates the edge months again, plus
+any month of a fiscal year whose file has been reloaded since.
+
+Pair statistics:
+    1. Item basket counts per slice (column sums), merged across slices.
+    2. Apriori pruning: a pair can only reach min_support if both items
+       do, so only those columns (and receipts with two or more of them)
+       are stacked into one matrix X.
+    3. Co-occurrence C = X^T X, computed a column block at a time over
+       the upper triangle; each block keeps only pairs >= min_support and
+       the running top-K by lift, so memory stays bounded network-wide.
+
+A receipt rung up across midnight UTC at the start of a month is split
+between two slices (two baskets); the SQL version counts it once.
+
+scipy is optional: available() is False without it and data_analysis
+falls back to the SQL self-join.
+
+    python backend/basket_matrix.py --start 2025-01-01 --end 2026-01-01
+"""
+
+import hashlib
+import logging
+import os
+import re
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+except ImportError:
+    sp = None
+
+logger = logging.getLogger("hub_api")
+
+CACHE_DIR = (Path(__file__).parent.parent / "data" / "transactions"
+             / "derived" / "basket_matrix")
+
+# Least recently used slices are evicted beyond this much disk
+MAX_CACHE_BYTES = 4 * 1024 ** 3
+
+# Columns per co-occurrence block (bounds the dense-ish intermediate)
+BLOCK_COLUMNS = 2048
+
+# Halo analysis excludes bulk / trade orders
+MAX_BASKET_VALUE = 5000
+
+NETWORK = "all"
+
+
+def available() -> bool:
+    """True if scipy is installed and the matrix engine can be used."""
+    return sp is not None
+
+
+# ---------------------------------------------------------------------------
+# SLICE CACHE
+# ---------------------------------------------------------------------------
+
+def _month_slices(start: date, end: date):
+    """[lo, hi) calendar-month pieces of [start, end)."""
+    lo = start
+    while lo < end:
+        nxt = (lo.replace(day=1) + timedelta(days=32)).replace(day=1)
+        hi = min(nxt, end)
+        yield lo, hi
+        lo = hi
+
+
+def _fy_bounds(fy: str):
+    """[start, end) of fiscal year "FY26" (July to June), padded a day each
+    side since SaleDate is UTC; None if the name is not FYnn."""
+    m = re.fullmatch(r"FY(\d{2})", fy)
+    if not m:
+        return None
+    year = 2000 + int(m.group(1))
+    return (date(year - 1, 7, 1) - timedelta(days=1),
+            date(year, 7, 1) + timedelta(days=1))
+
+
+def _source_signature(store, lo: date, hi: date) -> str:
+    """Hash of the source files that can hold sales in [lo, hi)."""
+    parts = []
+    for fy, path in sorted(store.available_fys.items()):
+        bounds = _fy_bounds(fy)
+        if bounds and (bounds[1] <= lo or hi <= bounds[0]):
+            continue
+        try:
+            st = Path(path).stat()
+        except OSError:
+            continue
+        parts.append("{}:{}:{}".format(fy, st.st_size, st.st_mtime_ns))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+
+def _slice_path(cache_dir: Path, scope: str, lo: date, hi: date,
+                sig: str) -> Path:
+    return cache_dir / "{}_{}_{}_{}.npz".format(
+        scope, lo.isoformat(), hi.isoformat(), sig)
+
+
+def _build_slice(conn, scope: str, lo: date, hi: date) -> dict:
+    """Receipt x PLU incidence for one slice, coded inside DuckDB so only
+    integer (row, column) pairs cross into Python."""
+    params = [lo.isoformat(), hi.isoformat()]
+    store_filter = ""
+    if scope != NETWORK:
+        store_filter = "AND Store_ID = ?"
+        params.append(scope)
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE _bm_lines AS
+        SELECT Store_ID, Reference2, PLUItem_ID, SalesIncGST
+        FROM transactions
+        WHERE SaleDate >= CAST(? AS TIMESTAMP)
+          AND SaleDate < CAST(? AS TIMESTAMP)
+          AND Quantity > 0
+          AND SalesIncGST > 0
+          {}
+    """.format(store_filter), params)
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE _bm_receipts AS
+        SELECT Store_ID, Reference2, basket_value,
+               ROW_NUMBER() OVER () - 1 AS r
+        FROM (SELECT Store_ID, Reference2, SUM(SalesIncGST) AS basket_value
+              FROM _bm_lines
+              GROUP BY Store_ID, Reference2)
+    """)
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE _bm_plus AS
+        SELECT PLUItem_ID, ROW_NUMBER() OVER (ORDER BY PLUItem_ID) - 1 AS c
+        FROM (SELECT DISTINCT PLUItem_ID FROM _bm_lines
+              WHERE PLUItem_ID IS NOT NULL)
+    """)
+    receipts = conn.execute(
+        "SELECT basket_value FROM _bm_receipts ORDER BY r").fetchnumpy()
+    plus = conn.execute(
+        "SELECT PLUItem_ID FROM _bm_plus ORDER BY c").fetchnumpy()
+    cells = conn.execute("""
+        SELECT DISTINCT r.r, p.c
+        FROM _bm_lines l
+        JOIN _bm_receipts r
+          ON l.Store_ID = r.Store_ID AND l.Reference2 = r.Reference2
+        JOIN _bm_plus p ON l.PLUItem_ID = p.PLUItem_ID
+        ORDER BY r.r, p.c
+    """).fetchnumpy()
+    for table in ("_bm_lines", "_bm_receipts", "_bm_plus"):
+        conn.execute("DROP TABLE {}".format(table))
+
+    n_rows = len(receipts["basket_value"])
+    rows = np.asarray(cells["r"], dtype=np.int64)
+    labels = np.asarray(plus["PLUItem_ID"])
+    if labels.dtype == object:
+        labels = labels.astype(str)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return {
+        "indptr": indptr,
+        "indices": np.asarray(cells["c"], dtype=np.int32),
+        "plus": labels,
+        "basket_value": np.asarray(receipts["basket_value"],
+                                   dtype=np.float64),
+    }
+
+
+def _save_slice(path: Path, data: dict) -> None:
+    tmp = path.with_name("{}.{}.tmp".format(path.name, uuid.uuid4().hex[:8]))
+    with open(tmp, "wb") as f:
+        np.savez(f, **data)
+    os.replace(tmp, path)
+
+
+def _load_slice(path: Path) -> dict:
+    with np.load(path, allow_pickle=False) as npz:
+        data = {k: npz[k] for k in npz.files}
+    os.utime(path)  # recency for eviction
+    return data
+
+
+def _evict(cache_dir: Path, built: list) -> None:
+    """Drop the older-data versions of the slices just built, then the
+    least recently used slices beyond MAX_CACHE_BYTES."""
+    current = {path.stem.rsplit("_", 1)[0]: path for path in built}
+    files = []
+    for path in cache_dir.glob("*.npz"):
+        key = path.stem.rsplit("_", 1)[0]
+        if key in current and path != current[key]:
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= MAX_CACHE_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def slice_paths(store, start, end, store_id: Optional[str] = None,
+                cache_dir: Optional[Path] = None) -> list:
+    """Cached slice files covering [start, end) (dates), building any that
+    are missing. store_id None means the whole network."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    scope = str(store_id) if store_id else NETWORK
+    paths, missing = [], []
+    for lo, hi in _month_slices(_to_date(start), _to_date(end)):
+        path = _slice_path(cache_dir, scope, lo, hi,
+                           _source_signature(store, lo, hi))
+        paths.append(path)
+        if not path.is_file():
+            missing.append((lo, hi, path))
+    if missing:
+        conn = store._get_connection()
+        try:
+            for lo, hi, path in missing:
+                _save_slice(path, _build_slice(conn, scope, lo, hi))
+                logger.info("Basket matrix slice built: %s", path.name)
+        finally:
+            conn.close()
+        _evict(cache_dir, [path for _, _, path in missing])
+    return paths
+
+
+def _matrix(data: dict, n_cols: Optional[int] = None):
+    n_rows = len(data["indptr"]) - 1
+    if n_cols is None:
+        n_cols = len(data["plus"])
+    values = np.ones(len(data["indices"]), dtype=np.int32)
+    return sp.csr_matrix((values, data["indices"], data["indptr"]),
+                         shape=(n_rows, n_cols))
+
+
+def _vocabulary(slices):
+    """Global sorted PLU labels and each slice's column -> label index."""
+    labels = np.unique(np.concatenate([s["plus"] for s in slices]))
+    return labels, [np.searchsorted(labels, s["plus"]) for s in slices]
+
+
+def _round(values, digits):
+    return np.round(np.asarray(values, dtype=np.float64), digits)
+
+
+# ---------------------------------------------------------------------------
+# PAIR STATISTICS
+# ---------------------------------------------------------------------------
+
+def pair_stats(store, start, end, store_id: Optional[str] = None,
+               min_support: int = 5, limit: int = 50,
+               cache_dir: Optional[Path] = None) -> list:
+    """Top `limit` product pairs by lift (then pair count).
+
+    Rows have the columns of the SQL basket analysis: item_a < item_b,
+    pair_count, count_a, count_b, total_baskets, support, conf_a_to_b,
+    conf_b_to_a and lift.
+    """
+    slices = [_load_slice(p)
+              for p in slice_paths(store, start, end, store_id, cache_dir)]
+    total_baskets = sum(len(s["basket_value"]) for s in slices)
+    if not total_baskets or not any(len(s["plus"]) for s in slices):
+        return []
+    labels, columns = _vocabulary(slices)
+
+    counts = np.zeros(len(labels), dtype=np.int64)
+    for s, cols in zip(slices, columns):
+        counts += np.bincount(cols[s["indices"]], minlength=len(labels))
+
+    # Apriori: only items that reach min_support on their own can pair
+    frequent = np.flatnonzero(counts >= max(min_support, 1))
+    if len(frequent) < 2:
+        return []
+    position = np.full(len(labels), -1, dtype=np.int64)
+    position[frequent] = np.arange(len(frequent))
+
+    pieces = []
+    for s, cols in zip(slices, columns):
+        local = position[cols]
+        keep = local >= 0
+        m = _matrix(s)[:, np.flatnonzero(keep)]
+        m = m[np.flatnonzero(np.diff(m.indptr) >= 2)]
+        if m.nnz:
+            # Local columns are in label order, so the mapping is monotone
+            m = sp.csr_matrix((m.data, local[keep][m.indices], m.indptr),
+                              shape=(m.shape[0], len(frequent)))
+            pieces.append(m)
+    del slices
+    if not pieces:
+        return []
+    x = sp.vstack(pieces, format="csc")
+    del pieces
+    xt = x.T.tocsr()
+
+    best = _top_pairs(xt, x, min_support, limit,
+                      counts[frequent], total_baskets)
+    rows = []
+    for a, b, pair in best:
+        count_a = int(counts[frequent[a]])
+        count_b = int(counts[frequent[b]])
+        rows.append({
+            "item_a": labels[frequent[a]].item(),
+            "item_b": labels[frequent[b]].item(),
+            "pair_count": int(pair),
+            "count_a": count_a,
+            "count_b": count_b,
+            "total_baskets": total_baskets,
+            "support": float(_round(pair * 1.0 / total_baskets, 6)),
+            "conf_a_to_b": float(_round(pair * 1.0 / count_a, 4)),
+            "conf_b_to_a": float(_round(pair * 1.0 / count_b, 4)),
+            "lift": float(_lift(pair, count_a, count_b, total_baskets)),
+        })
+    return rows
+
+
+def _lift(pair, count_a, count_b, total):
+    support = pair * 1.0 / total
+    return _round(support / ((count_a * 1.0 / total)
+                             * (count_b * 1.0 / total)), 2)
+
+
+def _top_pairs(xt, x, min_support, limit, counts, total):
+    """Upper-triangle co-occurrence a column block at a time, keeping
+    the best `limit` pairs by (lift desc, pair count desc, a, b)."""
+    keep_a = np.empty(0, dtype=np.int64)
+    keep_b = np.empty(0, dtype=np.int64)
+    keep_n = np.empty(0, dtype=np.int64)
+    n = x.shape[1]
+    for j in range(0, n, BLOCK_COLUMNS):
+        hi = min(j + BLOCK_COLUMNS, n)
+        block = (xt[:hi] @ x[:, j:hi]).tocoo()
+        b = block.col.astype(np.int64) + j
+        a = block.row.astype(np.int64)
+        mask = (a < b) & (block.data >= min_support)
+        keep_a = np.concatenate([keep_a, a[mask]])
+        keep_b = np.concatenate([keep_b, b[mask]])
+        keep_n = np.concatenate([keep_n, block.data[mask].astype(np.int64)])
+        if len(keep_n) > 4 * limit:
+            keep_a, keep_b, keep_n = _best(keep_a, keep_b, keep_n,
+                                           counts, total, limit)
+    keep_a, keep_b, keep_n = _best(keep_a, keep_b, keep_n,
+                                   counts, total, limit)
+    return list(zip(keep_a.tolist(), keep_b.tolist(), keep_n.tolist()))
+
+
+def _best(a, b, n, counts, total, limit):
+    lift = _lift(n, counts[a], counts[b], total)
+    if len(n) > limit:
+        # Every pair tied with the limit-th lift survives to the sort
+        cut = np.partition(lift, len(lift) - limit)[len(lift) - limit]
+        keep = lift >= cut
+        a, b, n, lift = a[keep], b[keep], n[keep], lift[keep]
+    order = np.lexsort((b, a, -n, -lift))[:limit]
+    return a[order], b[order], n[order]
+
+
+# ---------------------------------------------------------------------------
+# HALO STATISTICS
+# ---------------------------------------------------------------------------
+
+def halo_stats(store, start, end, store_id: Optional[str] = None,
+               min_baskets: int = 20, limit: int = 50,
+               cache_dir: Optional[Path] = None) -> list:
+    """Top `limit` products by basket value uplift when present.
+
+    Rows have the (lower-case) columns of the SQL halo analysis:
+    pluitem_id, baskets_with_product, avg_basket_when_present,
+    avg_items_when_present, network_avg_value, network_avg_items,
+    total_baskets, value_multiplier, value_uplift and items_uplift.
+    Baskets outside (0, MAX_BASKET_VALUE) are excluded throughout.
+    """
+    slices = [_load_slice(p)
+              for p in slice_paths(store, start, end, store_id, cache_dir)]
+    if not any(len(s["plus"]) for s in slices):
+        return []
+    labels, columns = _vocabulary(slices)
+
+    baskets = np.zeros(len(labels), dtype=np.int64)
+    value_sum = np.zeros(len(labels))
+    items_sum = np.zeros(len(labels))
+    total_baskets, total_value, total_items = 0, 0.0, 0
+    for s, cols in zip(slices, columns):
+        value = s["basket_value"]
+        rows = np.flatnonzero((value > 0) & (value < MAX_BASKET_VALUE))
+        if not len(rows):
+            continue
+        m = _matrix(s)[rows]
+        items = np.diff(m.indptr)
+        total_baskets += len(rows)
+        total_value += float(value[rows].sum())
+        total_items += int(items.sum())
+        # X^T 1, X^T value and X^T items, scattered into global columns
+        mt = m.T.tocsr()
+        baskets[cols] += np.diff(mt.indptr)
+        value_sum[cols] += mt @ value[rows]
+        items_sum[cols] += mt @ items.astype(np.float64)
+    if not total_baskets:
+        return []
+
+    avg_value = total_value / total_baskets
+    avg_items = total_items / total_baskets
+    found = np.flatnonzero(baskets >= min_baskets)
+    if not len(found):
+        return []
+    present_value = _round(value_sum[found] / baskets[found], 2)
+    present_items = _round(items_sum[found] / baskets[found], 1)
+    uplift = _round(present_value - avg_value, 2)
+    order = np.lexsort((labels[found], -uplift))[:limit]
+
+    rows = []
+    for i in order:
+        rows.append({
+            "pluitem_id": labels[found[i]].item(),
+            "baskets_with_product": int(baskets[found[i]]),
+            "avg_basket_when_present": float(present_value[i]),
+            "avg_items_when_present": float(present_items[i]),
+            "network_avg_value": avg_value,
+            "network_avg_items": avg_items,
+            "total_baskets": total_baskets,
+            "value_multiplier": (float(_round(present_value[i] / avg_value,
+                                              2))
+                                 if avg_value else None),
+            "value_uplift": float(uplift[i]),
+            "items_uplift": float(_round(present_items[i] - avg_items, 1)),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from transaction_layer import TransactionStore
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--start", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="YYYY-MM-DD (exclusive)")
+    parser.add_argument("--store", help="Store_ID (default: whole network)")
+    parser.add_argument("--min-support", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if not available():
+        parser.error("scipy is not installed")
+    began = time.perf_counter()
+    pairs = pair_stats(TransactionStore(), args.start, args.end,
+                       args.store, args.min_support, args.limit)
+    for row in pairs:
+        print("{item_a:>10} {item_b:>10} {pair_count:>8} "
+              "lift {lift:>7.2f}".format(**row))
+    print("{} pairs in {:.1f}s".format(len(pairs),
+                                        time.perf_counter() - began))
@@ -0,0 +1,226 @@
+"""
+Harris Farm Hub — Catchment Engine
+Vectorised distance helpers and a Huff gravity model of postcode -> store
+patronage, used for whitespace and cannibalisation "what if we open here"
+analysis.
+
+Huff model:
+    utility of store j for postcode i   U_ij = A_j / max(d_ij, d_min) ** beta
+    (zero beyond max_km). Each postcode also has an outside option U0_i
+    (competitors), calibrated so that sum_j U_ij / (sum_j U_ij + U0_i)
+    reproduces the observed HFM market share. Opening a site adds one more
+    utility term; the spend it captures comes partly from existing HFM
+    stores (transfer / cannibalisation) and partly from the outside option
+    (net new sales).
+
+All candidate sites are scored in one batched call: the only per-call work
+is an (n_postcodes x n_sites) distance matrix and two matrix products.
+
+Data: data/outputs/market_share/postcode_analysis.csv (market size + share)
+      data/postcode_coords.json (postcode centroids)
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_DATA = Path(__file__).resolve().parent.parent / "data"
+POSTCODE_ANALYSIS_PATH = str(_DATA / "outputs" / "market_share" / "postcode_analysis.csv")
+COORDS_PATH = str(_DATA / "postcode_coords.json")
+
+EARTH_RADIUS_KM = 6371.0
+
+# Model defaults
+DEFAULT_BETA = 2.0        # distance decay exponent
+DEFAULT_MAX_KM = 20.0     # beyond this a store gets no patronage (CLAUDE.md Rule 5)
+MIN_DISTANCE_KM = 0.5     # floor so a store in the same postcode is not infinite
+DEFAULT_SHARE_PCT = 1.0   # assumed HFM share where none is observed
+AFFECTED_LOSS_SHARE = 0.01  # store counts as affected if it loses >1% of sales
+
+
+# ---------------------------------------------------------------------------
+# Vectorised distance
+# ---------------------------------------------------------------------------
+
+def haversine_matrix(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distances in km between every point in set 1 and set 2.
+
+    Inputs are array-likes of degrees; returns an (len(lat1), len(lat2))
+    array.
+    """
+    la1 = np.radians(np.asarray(lat1, dtype=float))[:, None]
+    lo1 = np.radians(np.asarray(lon1, dtype=float))[:, None]
+    la2 = np.radians(np.asarray(lat2, dtype=float))[None, :]
+    lo2 = np.radians(np.asarray(lon2, dtype=float))[None, :]
+    a = (np.sin((la2 - la1) / 2) ** 2
+         + np.cos(la1) * np.cos(la2) * np.sin((lo2 - lo1) / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def nearest_points(lat1, lon1, lat2, lon2):
+    """For each point in set 1, the index of and distance to the nearest
+    point in set 2. Returns (indices, distances_km) arrays."""
+    dist = haversine_matrix(lat1, lon1, lat2, lon2)
+    if dist.shape[1] == 0:
+        n = dist.shape[0]
+        return np.full(n, -1), np.full(n, np.inf)
+    idx = dist.argmin(axis=1)
+    return idx, dist[np.arange(dist.shape[0]), idx]
+
+
+# ---------------------------------------------------------------------------
+# Demand loading
+# ---------------------------------------------------------------------------
+
+def load_postcode_demand(analysis_path: str = POSTCODE_ANALYSIS_PATH,
+                         coords_path: str = COORDS_PATH) -> pd.DataFrame:
+    """Postcode demand table: postcode, lat, lon, market_size, share_pct.
+
+    market_size is the modelled grocery market ($ per period) and
+    share_pct the observed HFM share. Postcodes without coordinates are
+    dropped. Returns an empty DataFrame if the inputs are missing.
+    """
+    if not (os.path.exists(analysis_path) and os.path.exists(coords_path)):
+        return pd.DataFrame(columns=["postcode", "lat", "lon",
+                                     "market_size", "share_pct"])
+    df = pd.read_csv(analysis_path)
+    df = df[pd.to_numeric(df["postcode"], errors="coerce").notna()].copy()
+    df["postcode"] = df["postcode"].astype(float).astype(int).astype(str)
+
+    with open(coords_path) as f:
+        coords = {str(k): v for k, v in json.load(f).items()}
+    coord_df = pd.DataFrame(
+        [(pc, c["lat"], c["lon"]) for pc, c in coords.items()],
+        columns=["postcode", "lat", "lon"],
+    )
+
+    out = df.merge(coord_df, on="postcode", how="inner")
+    out["market_size"] = pd.to_numeric(
+        out["market_size_dollars"], errors="coerce").fillna(0.0)
+    out["share_pct"] = pd.to_numeric(out["market_share_pct"], errors="coerce")
+    return out[["postcode", "lat", "lon", "market_size", "share_pct"]] \
+        .reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------------
+# Huff model
+# ---------------------------------------------------------------------------
+
+class CatchmentModel:
+    """Calibrated Huff gravity model over a fixed postcode demand set and
+    store network. Build once, then call ``simulate_sites`` as often as
+    needed."""
+
+    def __init__(self, demand: pd.DataFrame, stores: dict,
+                 beta: float = DEFAULT_BETA, max_km: float = DEFAULT_MAX_KM,
+                 attractiveness: dict = None):
+        """
+        Args:
+            demand: DataFrame with postcode, lat, lon, market_size and
+                (optional) share_pct columns, e.g. load_postcode_demand().
+            stores: {store_name: (lat, lon)} for the existing network.
+            attractiveness: optional {store_name: A_j}; default 1.0.
+        """
+        self.beta = float(beta)
+        self.max_km = float(max_km)
+        self.postcodes = demand["postcode"].astype(str).to_numpy()
+        self.lat = demand["lat"].to_numpy(dtype=float)
+        self.lon = demand["lon"].to_numpy(dtype=float)
+        self.spend = demand["market_size"].to_numpy(dtype=float)
+
+        self.store_names = list(stores)
+        store_lat = np.array([stores[s][0] for s in self.store_names], dtype=float)
+        store_lon = np.array([stores[s][1] for s in self.store_names], dtype=float)
+        attractiveness = attractiveness or {}
+        self.store_attr = np.array(
+            [attractiveness.get(s, 1.0) for s in self.store_names], dtype=float)
+
+        dist = haversine_matrix(self.lat, self.lon, store_lat, store_lon)
+        self.utility = self._utility(dist, self.store_attr[None, :])
+        self.network_utility = self.utility.sum(axis=1)
+
+        # Outside option: U0 = U_hfm * (1 - s) / s at the observed share
+        share = (demand["share_pct"].to_numpy(dtype=float) / 100.0
+                 if "share_pct" in demand else np.full(len(demand), np.nan))
+        observed = (share > 0) & (share < 1) & (self.network_utility > 0)
+        self.outside = np.empty(len(self.postcodes))
+        self.outside[observed] = (self.network_utility[observed]
+                                  * (1 - share[observed]) / share[observed])
+        if observed.any():
+            default = float(np.median(self.outside[observed]))
+        else:
+            # No calibration data: outside option worth DEFAULT_SHARE_PCT
+            # of a single store at the distance floor
+            s = DEFAULT_SHARE_PCT / 100.0
+            default = (1 - s) / s / MIN_DISTANCE_KM ** self.beta
+        self.outside[~observed] = default
+
+    def _utility(self, dist: np.ndarray, attr) -> np.ndarray:
+        util = attr / np.maximum(dist, MIN_DISTANCE_KM) ** self.beta
+        return np.where(dist <= self.max_km, util, 0.0)
+
+    def store_sales(self) -> pd.Series:
+        """Predicted sales per existing store ($ per demand period)."""
+        denom = self.network_utility + self.outside
+        sales = (self.spend / denom) @ self.utility
+        return pd.Series(sales, index=self.store_names, name="predicted_sales")
+
+    def simulate_sites(self, site_lat, site_lon, site_names=None,
+                       attractiveness=1.0):
+        """Score many candidate sites in one batched call.
+
+        Each site is evaluated independently against the current network
+        (not cumulatively).
+
+        Args:
+            site_lat, site_lon: array-likes of candidate coordinates.
+            site_names: labels for the result index (default 0..k-1).
+            attractiveness: scalar or per-site array of A for the new sites.
+
+        Returns:
+            (summary, transfer)
+            summary: DataFrame indexed by site with predicted_sales,
+                transfer (from existing stores), net_new_sales,
+                retention_pct and stores_affected (stores losing more
+                than 1% of their predicted sales).
+            transfer: DataFrame (sites x existing stores) of $ each store
+                is predicted to lose to each site.
+        """
+        site_lat = np.atleast_1d(np.asarray(site_lat, dtype=float))
+        site_lon = np.atleast_1d(np.asarray(site_lon, dtype=float))
+        index = (list(site_names) if site_names is not None
+                 else list(range(len(site_lat))))
+        attr = np.broadcast_to(
+            np.asarray(attractiveness, dtype=float), site_lat.shape)
+
+        dist = haversine_matrix(self.lat, self.lon, site_lat, site_lon)
+        u_new = self._utility(dist, attr[None, :])            # (n, k)
+
+        base = (self.network_utility + self.outside)[:, None]  # (n, 1)
+        after = base + u_new                                    # (n, k)
+
+        predicted = self.spend @ (u_new / after)                # (k,)
+        # Loss to store j = spend_i * U_ij * (1/base_i - 1/after_ik)
+        weight = self.spend[:, None] * (1.0 / base - 1.0 / after)
+        transfer = weight.T @ self.utility                      # (k, s)
+
+        total_transfer = transfer.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            retention = np.where(
+                predicted > 0,
+                (predicted - total_transfer) / predicted * 100, 0.0)
+
+        summary = pd.DataFrame({
+            "predicted_sales": predicted,
+            "transfer": total_transfer,
+            "net_new_sales": predicted - total_transfer,
+            "retention_pct": retention,
+            "stores_affected": (transfer > AFFECTED_LOSS_SHARE * np.maximum(
+                self.store_sales().to_numpy(), 1e-9)[None, :]).sum(axis=1),
+        }, index=index)
+        transfer_df = pd.DataFrame(transfer, index=index,
+                                   columns=self.store_names)
+        return summary, transfer_df
@@ -7,9 +7,12 @@ to agent proposals.
 
 import ast
 import hashlib
+import json
+import multiprocessing
 import os
 import re
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -66,151 +69,246 @@ SQL_FORMAT_PATTERNS = [
 
 
 # ============================================================================
-# 1A: CODE SAFETY AUDITOR
+# SOURCE RULES (one read, one parse, one traversal per file)
 # ============================================================================
 
-class CodeSafetyAuditor:
-    """AST + regex based code safety scanner."""
+SELECT_STAR = re.compile(
+    r'SELECT\s+\*\s+FROM\s+\w+(?!\s+.*LIMIT)', re.IGNORECASE)
+SELECT_LIMIT = re.compile(r'LIMIT\s+\d+', re.IGNORECASE)
 
-    def __init__(self, directories=None):
-        self.directories = directories or [BACKEND_DIR, DASHBOARDS_DIR]
 
-    def audit(self):
-        """Run all safety checks. Returns list of finding dicts."""
-        findings = []
-        for directory in self.directories:
-            for filepath in _py_files(directory):
-                findings.extend(self._scan_file(filepath))
-        return findings
+def _decode(raw):
+    """File bytes as text, the way open(..., errors="ignore") reads them."""
+    text = raw.decode("utf-8", errors="ignore")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
 
-    def _scan_file(self, filepath):
-        """Scan a single Python file."""
-        findings = []
-        rel = _relative(filepath)
 
-        # Read source
-        try:
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                source = f.read()
-                lines = source.split("\n")
-        except Exception:
-            return findings
+def _read_source(filepath):
+    """Return a file's text, or None if it cannot be read."""
+    try:
+        with open(filepath, "rb") as f:
+            return _decode(f.read())
+    except Exception:
+        return None
 
-        # File length check
-        if len(lines) > 500:
-            findings.append({
-                "category": "safety",
-                "severity": "low",
-                "file": rel,
-                "line": 1,
-                "title": "Large file ({} lines)".format(len(lines)),
-                "detail": "Files over 500 lines are harder to maintain.",
-                "recommendation": "Consider splitting into smaller modules.",
-            })
 
-        # AST analysis
-        try:
-            tree = ast.parse(source)
-        except SyntaxError:
-            return findings
+def _line_count(source):
+    """Lines as iterating the file counts them."""
+    return source.count("\n") + (1 if source and not source.endswith("\n")
+                                 else 0)
+
+
+def _has_docstring(node):
+    return (node.body
+            and isinstance(node.body[0], ast.Expr)
+            and isinstance(node.body[0].value, ast.Constant)
+            and isinstance(node.body[0].value.value, str))
+
 
-        findings.extend(self._ast_scan(tree, rel))
+def scan_source(rel, source, docstrings=False):
+    """Run every per-file rule over one source file.
 
+    The line rules share one pass over the lines and the AST rules share
+    one ast.walk(). Returns {"safety": [...], "documentation": [...],
+    "performance": [...]} with findings in the order the auditors have
+    always reported them. Missing-docstring checks only run when
+    `docstrings` is set (backend modules).
+    """
+    lines = source.split("\n")
+    large, ast_safety, credentials, sql = [], [], [], []
+    documentation, select_star, n_plus_one = [], [], []
+
+    # File length check
+    if len(lines) > 500:
+        large.append({
+            "category": "safety",
+            "severity": "low",
+            "file": rel,
+            "line": 1,
+            "title": "Large file ({} lines)".format(len(lines)),
+            "detail": "Files over 500 lines are harder to maintain.",
+            "recommendation": "Consider splitting into smaller modules.",
+        })
+
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        tree = None
+
+    for i, line in enumerate(lines, 1):
         # Regex: credentials
-        for i, line in enumerate(lines, 1):
-            for pattern in CREDENTIAL_PATTERNS:
-                if re.search(pattern, line, re.IGNORECASE):
-                    # Skip .env loading patterns and os.getenv
-                    if "os.getenv" in line or "load_dotenv" in line:
-                        continue
-                    findings.append({
-                        "category": "safety",
-                        "severity": "high",
-                        "file": rel,
-                        "line": i,
-                        "title": "Potential hardcoded credential",
-                        "detail": "Line may contain hardcoded secrets.",
-                        "recommendation": "Use environment variables via .env.",
-                    })
+        for pattern in CREDENTIAL_PATTERNS:
+            if re.search(pattern, line, re.IGNORECASE):
+                # Skip .env loading patterns and os.getenv
+                if "os.getenv" in line or "load_dotenv" in line:
+                    continue
+                credentials.append({
+                    "category": "safety",
+                    "severity": "high",
+                    "file": rel,
+                    "line": i,
+                    "title": "Potential hardcoded credential",
+                    "detail": "Line may contain hardcoded secrets.",
+                    "recommendation": "Use environment variables via .env.",
+                })
 
         # Regex: SQL string formatting
-        for i, line in enumerate(lines, 1):
-            for pattern in SQL_FORMAT_PATTERNS:
-                if re.search(pattern, line, re.IGNORECASE):
-                    findings.append({
-                        "category": "safety",
-                        "severity": "medium",
-                        "file": rel,
-                        "line": i,
-                        "title": "SQL string formatting detected",
-                        "detail": "SQL built with .format() or f-string.",
-                        "recommendation": "Use parameterized queries (?, ?).",
-                    })
+        for pattern in SQL_FORMAT_PATTERNS:
+            if re.search(pattern, line, re.IGNORECASE):
+                sql.append({
+                    "category": "safety",
+                    "severity": "medium",
+                    "file": rel,
+                    "line": i,
+                    "title": "SQL string formatting detected",
+                    "detail": "SQL built with .format() or f-string.",
+                    "recommendation": "Use parameterized queries (?, ?).",
+                })
 
-        return findings
+        # Unbounded SELECT * (skip if LIMIT appears later on same line)
+        if SELECT_STAR.search(line) and not SELECT_LIMIT.search(line):
+            select_star.append({
+                "category": "performance",
+                "severity": "medium",
+                "file": rel,
+                "line": i,
+                "title": "Unbounded SELECT *",
+                "detail": "SELECT * without LIMIT can return huge result sets.",
+                "recommendation": "Add LIMIT clause or select specific columns.",
+            })
 
-    def _ast_scan(self, tree, filepath):
-        """AST-based checks."""
-        findings = []
+    for node in ast.walk(tree) if tree is not None else ():
+        # eval/exec calls
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name) and func.id in ("eval", "exec"):
+                ast_safety.append({
+                    "category": "safety",
+                    "severity": "high",
+                    "file": rel,
+                    "line": node.lineno,
+                    "title": "{}() call detected".format(func.id),
+                    "detail": "Dangerous built-in that executes arbitrary code.",
+                    "recommendation": "Remove or replace with safe alternative.",
+                })
+            # os.system()
+            if (isinstance(func, ast.Attribute)
+                    and isinstance(func.value, ast.Name)
+                    and func.value.id == "os"
+                    and func.attr == "system"):
+                ast_safety.append({
+                    "category": "safety",
+                    "severity": "high",
+                    "file": rel,
+                    "line": node.lineno,
+                    "title": "os.system() call detected",
+                    "detail": "Shell command execution via os.system().",
+                    "recommendation": "Use subprocess.run() with shell=False.",
+                })
 
-        for node in ast.walk(tree):
-            # eval/exec calls
-            if isinstance(node, ast.Call):
-                func = node.func
-                if isinstance(func, ast.Name) and func.id in ("eval", "exec"):
-                    findings.append({
-                        "category": "safety",
-                        "severity": "high",
-                        "file": filepath,
-                        "line": node.lineno,
-                        "title": "{}() call detected".format(func.id),
-                        "detail": "Dangerous built-in that executes arbitrary code.",
-                        "recommendation": "Remove or replace with safe alternative.",
-                    })
-                # os.system()
-                if (isinstance(func, ast.Attribute)
-                        and isinstance(func.value, ast.Name)
-                        and func.value.id == "os"
-                        and func.attr == "system"):
-                    findings.append({
-                        "category": "safety",
-                        "severity": "high",
-                        "file": filepath,
-                        "line": node.lineno,
-                        "title": "os.system() call detected",
-                        "detail": "Shell command execution via os.system().",
-                        "recommendation": "Use subprocess.run() with shell=False.",
-                    })
+        # Bare except
+        elif isinstance(node, ast.ExceptHandler) and node.type is None:
+            ast_safety.append({
+                "category": "safety",
+                "severity": "low",
+                "file": rel,
+                "line": node.lineno,
+                "title": "Bare except clause",
+                "detail": "Catches all exceptions including SystemExit.",
+                "recommendation": "Catch specific exceptions (e.g. Exception).",
+            })
 
-            # Bare except
-            if isinstance(node, ast.ExceptHandler) and node.type is None:
-                findings.append({
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # Long functions
+            func_lines = node.end_lineno - node.lineno + 1
+            if func_lines > 100:
+                ast_safety.append({
                     "category": "safety",
                     "severity": "low",
-                    "file": filepath,
+                    "file": rel,
+                    "line": node.lineno,
+                    "title": "Long function: {} ({} lines)".format(
+                        node.name, func_lines),
+                    "detail": "Functions over 100 lines are hard to test.",
+                    "recommendation": "Extract helper functions.",
+                })
+            # Public functions without docstrings
+            if (docstrings and not node.name.startswith("_")
+                    and not _has_docstring(node)):
+                documentation.append({
+                    "category": "documentation",
+                    "severity": "low",
+                    "file": rel,
                     "line": node.lineno,
-                    "title": "Bare except clause",
-                    "detail": "Catches all exceptions including SystemExit.",
-                    "recommendation": "Catch specific exceptions (e.g. Exception).",
+                    "title": "Missing docstring: {}()".format(node.name),
+                    "detail": "Public function lacks documentation.",
+                    "recommendation": "Add a docstring explaining purpose and args.",
                 })
 
-            # Long functions
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                func_lines = node.end_lineno - node.lineno + 1
-                if func_lines > 100:
-                    findings.append({
-                        "category": "safety",
-                        "severity": "low",
-                        "file": filepath,
+        # N+1 pattern: loop with DB execute (one finding per loop)
+        elif isinstance(node, ast.For):
+            for child in ast.walk(node):
+                if (isinstance(child, ast.Call)
+                        and isinstance(child.func, ast.Attribute)
+                        and child.func.attr == "execute"):
+                    n_plus_one.append({
+                        "category": "performance",
+                        "severity": "medium",
+                        "file": rel,
                         "line": node.lineno,
-                        "title": "Long function: {} ({} lines)".format(
-                            node.name, func_lines),
-                        "detail": "Functions over 100 lines are hard to test.",
-                        "recommendation": "Extract helper functions.",
+                        "title": "Potential N+1 query pattern",
+                        "detail": "Database execute() inside a for loop.",
+                        "recommendation": "Batch queries or use JOINs instead.",
                     })
+                    break
+
+    # A file that does not parse only gets the length check for safety
+    # and no docstring or N+1 checks, as before
+    return {
+        "safety": large + (ast_safety + credentials + sql if tree else []),
+        "documentation": documentation,
+        "performance": select_star + n_plus_one,
+    }
+
+
+def _scan_task(task):
+    """Process-pool worker: (path, rel, docstrings) -> (path, digest,
+    line count, findings). The file is read here, not pickled over."""
+    path, rel, docstrings = task
+    with open(path, "rb") as f:
+        raw = f.read()
+    source = _decode(raw)
+    findings = (scan_source(rel, source, docstrings)
+                if not os.path.basename(path).startswith("__")
+                else {"safety": [], "documentation": [], "performance": []})
+    return path, hashlib.sha256(raw).hexdigest(), _line_count(source), findings
+
 
+# ============================================================================
+# 1A: CODE SAFETY AUDITOR
+# ============================================================================
+
+class CodeSafetyAuditor:
+    """AST + regex based code safety scanner."""
+
+    def __init__(self, directories=None):
+        self.directories = directories or [BACKEND_DIR, DASHBOARDS_DIR]
+
+    def audit(self):
+        """Run all safety checks. Returns list of finding dicts."""
+        findings = []
+        for directory in self.directories:
+            for filepath in _py_files(directory):
+                findings.extend(self._scan_file(filepath))
         return findings
 
+    def _scan_file(self, filepath):
+        """Scan a single Python file."""
+        source = _read_source(filepath)
+        if source is None:
+            return []
+        return scan_source(_relative(filepath), source)["safety"]
+
 
 # ============================================================================
 # 1B: DOCUMENTATION AUDITOR
@@ -263,35 +361,11 @@ class DocumentationAuditor:
         """Scan backend modules for public functions without docstrings."""
         findings = []
         for filepath in _py_files(self.backend_dir):
-            rel = _relative(filepath)
-            try:
-                with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                    source = f.read()
-                tree = ast.parse(source)
-            except Exception:
+            source = _read_source(filepath)
+            if source is None:
                 continue
-
-            for node in ast.walk(tree):
-                if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    continue
-                # Skip private functions
-                if node.name.startswith("_"):
-                    continue
-                # Check for docstring
-                if (node.body
-                        and isinstance(node.body[0], ast.Expr)
-                        and isinstance(node.body[0].value, ast.Constant)
-                        and isinstance(node.body[0].value.value, str)):
-                    continue
-                findings.append({
-                    "category": "documentation",
-                    "severity": "low",
-                    "file": rel,
-                    "line": node.lineno,
-                    "title": "Missing docstring: {}()".format(node.name),
-                    "detail": "Public function lacks documentation.",
-                    "recommendation": "Add a docstring explaining purpose and args.",
-                })
+            findings.extend(scan_source(_relative(filepath), source,
+                                        docstrings=True)["documentation"])
         return findings
 
     def _check_broken_links(self):
@@ -358,67 +432,10 @@ class PerformanceAuditor:
 
     def _scan_file(self, filepath):
         """Scan a single Python file for performance issues."""
-        findings = []
-        rel = _relative(filepath)
-
-        try:
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                source = f.read()
-                lines = source.split("\n")
-        except Exception:
-            return findings
-
-        # Unbounded SELECT *
-        select_star = re.compile(
-            r'SELECT\s+\*\s+FROM\s+\w+(?!\s+.*LIMIT)', re.IGNORECASE)
-        for i, line in enumerate(lines, 1):
-            if select_star.search(line):
-                # Skip if LIMIT appears later on same line
-                if re.search(r'LIMIT\s+\d+', line, re.IGNORECASE):
-                    continue
-                findings.append({
-                    "category": "performance",
-                    "severity": "medium",
-                    "file": rel,
-                    "line": i,
-                    "title": "Unbounded SELECT *",
-                    "detail": "SELECT * without LIMIT can return huge result sets.",
-                    "recommendation": "Add LIMIT clause or select specific columns.",
-                })
-
-        # N+1 pattern: loop with DB execute
-        try:
-            tree = ast.parse(source)
-            findings.extend(self._check_n_plus_one(tree, rel))
-        except SyntaxError:
-            pass
-
-        return findings
-
-    def _check_n_plus_one(self, tree, filepath):
-        """Detect for loops containing database execute calls."""
-        findings = []
-        for node in ast.walk(tree):
-            if not isinstance(node, ast.For):
-                continue
-            for child in ast.walk(node):
-                if not isinstance(child, ast.Call):
-                    continue
-                func = child.func
-                if (isinstance(func, ast.Attribute)
-                        and func.attr == "execute"
-                        and child is not node):
-                    findings.append({
-                        "category": "performance",
-                        "severity": "medium",
-                        "file": filepath,
-                        "line": node.lineno,
-                        "title": "Potential N+1 query pattern",
-                        "detail": "Database execute() inside a for loop.",
-                        "recommendation": "Batch queries or use JOINs instead.",
-                    })
-                    break  # One finding per loop
-        return findings
+        source = _read_source(filepath)
+        if source is None:
+            return []
+        return scan_source(_relative(filepath), source)["performance"]
 
 
 # ============================================================================
@@ -432,13 +449,15 @@ class HealthMetricsCollector:
         self.project_root = project_root or PROJECT_ROOT
         self.db_path = db_path or HUB_DB
 
-    def collect(self):
-        """Return dict of health metrics."""
+    def collect(self, total_lines=None):
+        """Return dict of health metrics. `total_lines` may be passed in
+        when an AuditEngine run has already counted them."""
         return {
             "file_counts": self._count_files(),
             "test_count": self._count_tests(),
             "table_count": self._count_tables(),
-            "total_lines": self._count_lines(),
+            "total_lines": (self._count_lines() if total_lines is None
+                            else total_lines),
             "endpoint_count": self._count_endpoints(),
             "last_audit": self._last_audit_timestamp(),
             "collected_at": datetime.now().isoformat(),
@@ -743,25 +762,172 @@ class PageQualityAuditor:
 
 
 # ============================================================================
-# 1F: FULL AUDIT ORCHESTRATOR
+# 1F: INCREMENTAL AUDIT ENGINE
+# ============================================================================
+
+_RULES_HASH = None
+
+
+def _rules_hash():
+    """Hash of this module: editing a rule re-audits every file."""
+    global _RULES_HASH
+    if _RULES_HASH is None:
+        with open(__file__, "rb") as f:
+            _RULES_HASH = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _RULES_HASH
+
+
+class AuditEngine:
+    """Single-pass, incremental source audit for run_full_audit().
+
+    Every .py file under the audited directories is read, hashed and
+    parsed once, and all safety, docstring and performance rules run in
+    one traversal (scan_source). Per-file line counts and findings are
+    kept in audit_file_cache, keyed by path + mtime + size + SHA-256, so a
+    file whose stat is unchanged is not even opened, and a touched but
+    identical file is not re-parsed. Changed files go to a process pool
+    when there are enough of them to pay for starting it.
+    """
+
+    POOL_MIN_FILES = 8
+
+    def __init__(self, db_path=None, directories=None, docstring_dirs=None,
+                 workers=None):
+        self.db_path = db_path or HUB_DB
+        self.directories = directories or [BACKEND_DIR, DASHBOARDS_DIR]
+        self.docstring_dirs = docstring_dirs or [BACKEND_DIR]
+        self.workers = workers
+
+    def _ensure_table(self, conn):
+        conn.execute("""CREATE TABLE IF NOT EXISTS audit_file_cache (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            rules TEXT NOT NULL,
+            line_count INTEGER NOT NULL,
+            findings TEXT NOT NULL
+        )""")
+
+    def _files(self):
+        """Every .py file. __init__-style files are not audited but count
+        towards total lines, as the health metrics always did."""
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".py"):
+                    yield os.path.join(directory, name)
+
+    def _scan(self, tasks):
+        """Scan changed files, on a process pool when worthwhile."""
+        if len(tasks) >= self.POOL_MIN_FILES and self.workers != 1:
+            try:
+                # spawn: forking a threaded API process is not safe
+                with ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")) as pool:
+                    return list(pool.map(_scan_task, tasks, chunksize=4))
+            except (OSError, RuntimeError):
+                pass  # No subprocesses available: scan inline
+        return [_scan_task(task) for task in tasks]
+
+    def run(self):
+        """Audit all files. Returns {"safety", "documentation",
+        "performance": findings in file order, "total_lines",
+        "files", "scanned"}."""
+        rules = _rules_hash()
+        docstring_dirs = {os.path.normpath(d) for d in self.docstring_dirs}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._ensure_table(conn)
+            cached = {row[0]: row for row in conn.execute(
+                "SELECT path, mtime_ns, size, sha256, rules, line_count, "
+                "findings FROM audit_file_cache")}
+
+            results, stats, tasks, touched = {}, {}, [], []
+            files = list(self._files())
+            for path in files:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stats[path] = st
+                row = cached.get(path)
+                if row and row[4] == rules:
+                    if (row[1], row[2]) == (st.st_mtime_ns, st.st_size):
+                        results[path] = (row[5], json.loads(row[6]))
+                        continue
+                    with open(path, "rb") as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                    if digest == row[3]:
+                        results[path] = (row[5], json.loads(row[6]))
+                        touched.append((st.st_mtime_ns, st.st_size, path))
+                        continue
+                docstrings = os.path.normpath(
+                    os.path.dirname(path)) in docstring_dirs
+                tasks.append((path, _relative(path), docstrings))
+
+            scanned = self._scan(tasks)
+            for path, digest, line_count, findings in scanned:
+                results[path] = (line_count, findings)
+                st = stats[path]
+                conn.execute(
+                    "INSERT OR REPLACE INTO audit_file_cache VALUES "
+                    "(?,?,?,?,?,?,?)",
+                    (path, st.st_mtime_ns, st.st_size, digest, rules,
+                     line_count, json.dumps(findings)))
+            conn.executemany(
+                "UPDATE audit_file_cache SET mtime_ns = ?, size = ? "
+                "WHERE path = ?", touched)
+            # Forget deleted files in the audited directories
+            audited = {os.path.normpath(d) for d in self.directories}
+            gone = [(p,) for p in cached if p not in results
+                    and os.path.normpath(os.path.dirname(p)) in audited]
+            conn.executemany("DELETE FROM audit_file_cache WHERE path = ?",
+                             gone)
+            conn.commit()
+        finally:
+            conn.close()
+
+        out = {"safety": [], "documentation": [], "performance": [],
+               "total_lines": 0, "files": len(results),
+               "scanned": len(scanned)}
+        for path in files:
+            if path not in results:
+                continue
+            line_count, findings = results[path]
+            out["total_lines"] += line_count
+            for category in ("safety", "documentation", "performance"):
+                out[category].extend(findings[category])
+        return out
+
+
+# ============================================================================
+# 1G: FULL AUDIT ORCHESTRATOR
 # ============================================================================
 
 def run_full_audit(db_path=None):
-    """Run all auditors and store findings. Returns summary dict."""
-    safety = CodeSafetyAuditor()
+    """Run all auditors and store findings. Returns summary dict.
+
+    Source files go through one incremental AuditEngine pass; findings
+    come out in the same order the separate auditors produced them.
+    """
+    source = AuditEngine(db_path=db_path).run()
     docs = DocumentationAuditor()
-    perf = PerformanceAuditor()
     health = HealthMetricsCollector()
 
     page_quality = PageQualityAuditor(db_path=db_path)
 
     all_findings = []
-    all_findings.extend(safety.audit())
-    all_findings.extend(docs.audit())
-    all_findings.extend(perf.audit())
+    all_findings.extend(source["safety"])
+    all_findings.extend(docs._check_staleness())
+    all_findings.extend(source["documentation"])
+    all_findings.extend(docs._check_broken_links())
+    all_findings.extend(source["performance"])
     all_findings.extend(page_quality.audit())
 
-    health_metrics = health.collect()
+    health_metrics = health.collect(total_lines=source["total_lines"])
 
     # Store findings
     manager = FindingsManager(db_path=db_path)
@@ -783,5 +949,6 @@ def run_full_audit(db_path=None):
         "by_severity": by_severity,
         "health_metrics": health_metrics,
         "new_findings": new_count,
+        "files_scanned": source["scanned"],
         "findings": all_findings,
     }
@@ -15,6 +15,11 @@ try:
 except ImportError:
     get_product_by_plu = None
 
+try:
+    import basket_matrix
+except ImportError:
+    basket_matrix = None
+
 logger = logging.getLogger("data_analysis")
 
 # ---------------------------------------------------------------------------
@@ -109,10 +114,17 @@ def _enrich_with_product_names(rows, plu_key="PLUItem_ID"):
 
 
 def _store_name(store_id):
-    """Get display name for a store ID."""
+    """Get display name for a store ID (None: the whole network)."""
+    if store_id is None:
+        return "All Stores"
     return STORE_NAMES.get(str(store_id), "Store {}".format(store_id))
 
 
+def _use_basket_matrix():
+    """True if basket / halo analysis can use the sparse matrix engine."""
+    return basket_matrix is not None and basket_matrix.available()
+
+
 def _build_result(analysis_type, title, executive_summary, findings,
                   evidence_tables, financial_impact, recommendations,
                   methodology, confidence):
@@ -135,17 +147,23 @@ def _build_result(analysis_type, title, executive_summary, findings,
 # ANALYSIS A: BASKET / CROSS-SELL
 # ---------------------------------------------------------------------------
 
-def run_basket_analysis(store_id=None, days=30, min_support=5, limit=50):
+def run_basket_analysis(store_id=None, days=30, min_support=5, limit=50,
+                        network=False):
     """Find products frequently purchased together using real transaction data.
 
-    Scoped to 1 store + N days to keep the self-join fast.
+    Pairs come from the sparse receipt x PLU matrix (basket_matrix.py),
+    which also makes network=True (every store) practical. Without scipy
+    the SQL self-join is used, scoped to 1 store + N days to keep it fast.
     """
     start, end = _get_date_range(days)
-    if not store_id:
+    if network:
+        store_id = None
+    elif not store_id:
         store_id = "28"  # Default to Mosman (high-volume store)
 
     store_display = _store_name(store_id)
     ts = TransactionStore()
+    use_matrix = _use_basket_matrix()
 
     sql = """
         WITH baskets AS (
@@ -202,8 +220,14 @@ def run_basket_analysis(store_id=None, days=30, min_support=5, limit=50):
     """
 
     try:
-        results = ts.query(sql, [store_id, start, end, min_support, limit],
-                           timeout_seconds=60, max_rows=limit)
+        if use_matrix:
+            results = basket_matrix.pair_stats(ts, start, end, store_id,
+                                               min_support, limit)
+        elif network:
+            raise RuntimeError("Network-wide basket analysis needs scipy")
+        else:
+            results = ts.query(sql, [store_id, start, end, min_support, limit],
+                               timeout_seconds=60, max_rows=limit)
     except Exception as e:
         logger.error("Basket analysis failed: %s", e)
         return _build_result(
@@ -222,7 +246,8 @@ def run_basket_analysis(store_id=None, days=30, min_support=5, limit=50):
             [], [], {}, [],
             {"data_source": "POS Transactions", "query_window": "{} to {}".format(start, end),
              "records_analyzed": 0, "limitations": ["No pairs above threshold"],
-             "sql_used": "basket self-join"},
+             "sql_used": ("sparse basket matrix" if use_matrix
+                          else "basket self-join")},
             0.0,
         )
 
@@ -299,13 +324,19 @@ def run_basket_analysis(store_id=None, days=30, min_support=5, limit=50):
             "data_source": "POS Transactions (DuckDB/Parquet)",
             "query_window": "{} to {}".format(start, end),
             "records_analyzed": total_baskets,
-            "limitations": [
+            "limitations": ([
                 "Single store analysis (not network-wide)",
+            ] if store_id else []) + [
                 "Support threshold of {} may exclude rare but valuable pairs".format(min_support),
                 "Lift does not account for promotional effects",
                 "Transaction-level grouping by Reference2 (receipt ID)",
             ],
-            "sql_used": "Self-join on Reference2, CTE-based pair counting with lift calculation",
+            "sql_used": (
+                "Sparse receipt x PLU matrix (month slices), co-occurrence "
+                "X^T X over items meeting min support, top pairs by lift"
+                if use_matrix else
+                "Self-join on Reference2, CTE-based pair counting with lift calculation"
+            ),
         },
         min(0.85, 0.5 + (len(results) / 100.0)),
     )
@@ -326,16 +357,12 @@ def run_stockout_detection(store_id=None, days=60, min_velocity=5.0, limit=50):
 
     sql = """
         WITH daily_sales AS (
-            SELECT PLUItem_ID,
-                   CAST(SaleDate AS DATE) AS sale_date,
-                   SUM(Quantity) AS daily_qty,
-                   SUM(SalesIncGST) AS daily_revenue
-            FROM transactions
+            SELECT PLUItem_ID, sale_date,
+                   sold_qty AS daily_qty,
+                   sold_rev AS daily_revenue
+            FROM plu_daily(CAST(? AS DATE), CAST(? AS DATE))
             WHERE Store_ID = ?
-              AND SaleDate >= CAST(? AS TIMESTAMP)
-              AND SaleDate < CAST(? AS TIMESTAMP)
-              AND Quantity > 0
-            GROUP BY PLUItem_ID, CAST(SaleDate AS DATE)
+              AND sold_qty > 0
         ),
         velocity AS (
             SELECT PLUItem_ID,
@@ -380,7 +407,7 @@ def run_stockout_detection(store_id=None, days=60, min_velocity=5.0, limit=50):
 
     try:
         results = ts.query(
-            sql, [store_id, start, end, min_velocity, start, end, limit],
+            sql, [start, end, store_id, min_velocity, start, end, limit],
             timeout_seconds=60, max_rows=limit,
         )
     except Exception as e:
@@ -1081,19 +1108,25 @@ def run_intraday_stockout(store_id=None, days=14, min_daily_txns=10, limit=50):
 # ANALYSIS G: HALO EFFECT / BASKET GROWTH
 # ---------------------------------------------------------------------------
 
-def run_halo_effect(store_id=None, days=30, min_baskets=20, limit=50):
+def run_halo_effect(store_id=None, days=30, min_baskets=20, limit=50,
+                    network=False):
     """Identify products that lift basket value when present.
 
     For each product, compares the average basket value of transactions
     containing that product vs the store average. Products with high
     'value uplift' are halo products that draw bigger-spending trips.
+    Uses the sparse basket matrix when scipy is installed (required for
+    network=True), otherwise the SQL CTE chain for one store.
     """
     start, end = _get_date_range(days)
-    if not store_id:
+    if network:
+        store_id = None
+    elif not store_id:
         store_id = "28"
 
     store_display = _store_name(store_id)
     ts = TransactionStore()
+    use_matrix = _use_basket_matrix()
 
     sql = """
         WITH product_baskets AS (
@@ -1154,11 +1187,17 @@ def run_halo_effect(store_id=None, days=30, min_baskets=20, limit=50):
     """
 
     try:
-        results = ts.query(
-            sql,
-            [store_id, start, end, store_id, start, end, min_baskets, limit],
-            timeout_seconds=60, max_rows=limit,
-        )
+        if use_matrix:
+            results = basket_matrix.halo_stats(ts, start, end, store_id,
+                                               min_baskets, limit)
+        elif network:
+            raise RuntimeError("Network-wide halo analysis needs scipy")
+        else:
+            results = ts.query(
+                sql,
+                [store_id, start, end, store_id, start, end, min_baskets, limit],
+                timeout_seconds=60, max_rows=limit,
+            )
     except Exception as e:
         logger.error("Halo effect analysis failed: %s", e)
         return _build_result(
@@ -1180,7 +1219,8 @@ def run_halo_effect(store_id=None, days=30, min_baskets=20, limit=50):
              "query_window": "{} to {}".format(start, end),
              "records_analyzed": 0,
              "limitations": ["No products above threshold"],
-             "sql_used": "halo CTE chain"}, 0.0,
+             "sql_used": ("sparse basket matrix" if use_matrix
+                          else "halo CTE chain")}, 0.0,
         )
 
     results = _enrich_with_product_names(results)
@@ -1260,14 +1300,21 @@ def run_halo_effect(store_id=None, days=30, min_baskets=20, limit=50):
             "records_analyzed": total_baskets,
             "limitations": [
                 "Correlation not causation — high-value shoppers may simply buy premium items",
+            ] + ([
                 "Single store analysis (not network-wide)",
+            ] if store_id else []) + [
                 "Baskets capped at $5,000 to exclude bulk/trade orders",
                 "Minimum {} baskets per product to reduce noise".format(min_baskets),
                 "Does not account for promotional effects on basket composition",
                 "Returns and zero-sale lines excluded (Quantity > 0, SalesIncGST > 0)",
             ],
-            "sql_used": "CTE: product_baskets -> overall -> product_presence -> halo "
-                        "-> value/items uplift",
+            "sql_used": (
+                "Sparse receipt x PLU matrix: X^T basket value / items per "
+                "product -> value/items uplift"
+                if use_matrix else
+                "CTE: product_baskets -> overall -> product_presence -> halo "
+                "-> value/items uplift"
+            ),
         },
         min(0.80, 0.4 + (len(results) / 100.0)),
     )
@@ -1697,39 +1744,26 @@ def run_customer_analysis(store_id=None, days=90, limit=50):
     start, end = _get_date_range(days)
     ts = TransactionStore()
 
+    # Baskets come from the materialised customer table (customer_summary.py);
+    # pos_spend keeps only Quantity > 0 AND SalesIncGST > 0 lines.
     store_clause = ""
     params_base = [start, end]
     if store_id:
-        store_clause = "AND t.Store_ID = ?"
+        store_clause = "AND Store_ID = ?"
         params_base.append(str(store_id))
 
     # Query 1: Segment summary
     segment_sql = """
-        WITH customer_txns AS (
-            SELECT t.CustomerCode,
-                   t.Reference2,
-                   CAST(t.SaleDate AS DATE) AS sale_date,
-                   t.Store_ID,
-                   t.SalesIncGST
-            FROM transactions t
-            WHERE t.CustomerCode IS NOT NULL
-              AND CAST(t.CustomerCode AS VARCHAR) != 'NULL'
-              AND CAST(t.CustomerCode AS VARCHAR) != ''
-              AND LENGTH(CAST(t.CustomerCode AS VARCHAR)) > 4
-              AND t.Quantity > 0
-              AND t.SalesIncGST > 0
-              AND CAST(t.SaleDate AS DATE) >= CAST(? AS DATE)
-              AND CAST(t.SaleDate AS DATE) <= CAST(? AS DATE)
-              {store_clause}
-        ),
-        baskets AS (
+        WITH baskets AS (
             SELECT CustomerCode,
                    Reference2,
                    sale_date,
                    Store_ID,
-                   SUM(SalesIncGST) AS basket_value
-            FROM customer_txns
-            GROUP BY CustomerCode, Reference2, sale_date, Store_ID
+                   pos_spend AS basket_value
+            FROM customer_baskets(CAST(? AS DATE),
+                                  CAST(? AS DATE) + INTERVAL 1 DAY)
+            WHERE pos_lines > 0
+              {store_clause}
         ),
         rfm AS (
             SELECT CustomerCode,
@@ -1791,31 +1825,16 @@ def run_customer_analysis(store_id=None, days=90, limit=50):
 
     # Query 2: Top individual customers
     top_sql = """
-        WITH customer_txns AS (
-            SELECT t.CustomerCode,
-                   t.Reference2,
-                   CAST(t.SaleDate AS DATE) AS sale_date,
-                   t.Store_ID,
-                   t.SalesIncGST
-            FROM transactions t
-            WHERE t.CustomerCode IS NOT NULL
-              AND CAST(t.CustomerCode AS VARCHAR) != 'NULL'
-              AND CAST(t.CustomerCode AS VARCHAR) != ''
-              AND LENGTH(CAST(t.CustomerCode AS VARCHAR)) > 4
-              AND t.Quantity > 0
-              AND t.SalesIncGST > 0
-              AND CAST(t.SaleDate AS DATE) >= CAST(? AS DATE)
-              AND CAST(t.SaleDate AS DATE) <= CAST(? AS DATE)
-              {store_clause}
-        ),
-        baskets AS (
+        WITH baskets AS (
             SELECT CustomerCode,
                    Reference2,
                    sale_date,
                    Store_ID,
-                   SUM(SalesIncGST) AS basket_value
-            FROM customer_txns
-            GROUP BY CustomerCode, Reference2, sale_date, Store_ID
+                   pos_spend AS basket_value
+            FROM customer_baskets(CAST(? AS DATE),
+                                  CAST(? AS DATE) + INTERVAL 1 DAY)
+            WHERE pos_lines > 0
+              {store_clause}
         ),
         rfm AS (
             SELECT CustomerCode,
@@ -1961,7 +1980,7 @@ def run_customer_analysis(store_id=None, days=90, limit=50):
                 "Monetary value includes GST — not a margin metric",
                 "Minimum 2 transactions required — single-visit customers excluded",
             ],
-            "sql_used": "CTE: customer_txns -> baskets (Reference2) -> rfm "
+            "sql_used": "CTE: customer_baskets() (materialised) -> rfm "
                         "(recency/frequency/monetary) -> segmented (CASE thresholds)",
         },
         min(0.75, 0.35 + (total_customers / 500.0)),
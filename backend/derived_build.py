@@ -0,0 +1,130 @@
+"""
+Harris Farm Hub — Derived Build Helpers
+Shared plumbing for the offline builds that materialise files next to
+their sources (sales_presence.py, customer_summary.py,
+transaction_enrichment.py, query_preview.py and dashboards/shared/
+bq_mirror.py).
+
+Each build commits by rewriting a small JSON meta file that lists the
+files it produced and the signatures of the sources it read. Readers only
+trust files listed there, so the meta write is the one step that has to
+be atomic: it goes to a uniquely named temp file first and is renamed
+over the old meta, so a CLI build and a scheduled one never share a temp
+file and a reader never sees a partial meta.
+
+The first build of each scans the full transaction history (or, for the
+BigQuery mirror, pulls whole tables), so they run outside the API
+process: render_start.sh and start.sh run this module niced from a
+background loop, once a day by default (DERIVED_BUILD_INTERVAL seconds).
+    python backend/derived_build.py              # every build
+    python backend/derived_build.py presence     # just one
+(WATCHDOG_DERIVED_BUILDS=1 also runs them in the API's WATCHDOG cycle.)
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("hub_api")
+
+# name -> (module, function), run in this order
+BUILDS = {
+    "presence": ("sales_presence", "refresh_sales_presence"),
+    "enriched": ("transaction_enrichment", "build_enriched"),
+    "customers": ("customer_summary", "refresh_customer_summary"),
+    "preview": ("query_preview", "build_preview_sample"),
+    "bq_mirror": ("shared.bq_mirror", "sync_from_bigquery"),
+}
+
+_DASHBOARDS = str(Path(__file__).resolve().parent.parent / "dashboards")
+
+
+def read_meta(path: Path, version: Optional[int] = None) -> Optional[dict]:
+    """A build's meta, or None if it is missing, unreadable or (when
+    ``version`` is given) written by another layout version."""
+    try:
+        with open(path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict):
+        return None
+    if version is not None and meta.get("version") != version:
+        return None
+    return meta
+
+
+def write_meta(path: Path, meta: dict) -> None:
+    """Atomically replace the meta file at ``path``."""
+    path = Path(path)
+    tmp = path.with_name("{}.{}.tmp".format(path.name, uuid.uuid4().hex[:8]))
+    try:
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def signature(path: Path) -> Optional[list]:
+    """[size, mtime_ns] of a file, or None if it does not exist."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def sql_path(path: Path) -> str:
+    """A file path as a quoted DuckDB string literal."""
+    return "'{}'".format(str(path).replace("'", "''"))
+
+
+def sql_list(paths) -> str:
+    """File paths as a DuckDB list literal (for read_parquet)."""
+    return "[{}]".format(", ".join(sql_path(p) for p in paths))
+
+
+# ---------------------------------------------------------------------------
+# BUILD RUNNER
+# ---------------------------------------------------------------------------
+
+def run_builds(names: Optional[list] = None) -> dict:
+    """Run the derived builds (all of BUILDS by default) one at a time.
+
+    A build that raises is reported as {"error": ...} and the rest still
+    run. Returns {name: result}.
+    """
+    if _DASHBOARDS not in sys.path:
+        sys.path.append(_DASHBOARDS)  # shared.* builds
+    results = {}
+    for name, (module, func) in BUILDS.items():
+        if names and name not in names:
+            continue
+        try:
+            results[name] = getattr(importlib.import_module(module), func)()
+        except Exception as e:
+            logger.warning("Derived build %s failed: %s", name, e)
+            results[name] = {"error": str(e)}
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run the derived data builds")
+    parser.add_argument("builds", nargs="*",
+                        help="Builds to run: {} (default: all)".format(
+                            ", ".join(BUILDS)))
+    args = parser.parse_args()
+    unknown = set(args.builds) - set(BUILDS)
+    if unknown:
+        parser.error("unknown build(s): {}".format(", ".join(sorted(unknown))))
+    print(json.dumps(run_builds(args.builds or None), indent=2, default=str))
@@ -65,18 +65,37 @@ SIGNAL_DEFINITIONS = {
     },
 }
 
+# Hub tools counted by the proactive_usage signal
+_PROACTIVE_PAGES = ["Prompt Engine", "Analytics Engine", "Hub Assistant"]
+
 QUADRANT_THRESHOLDS = {
     "skill_high": 4,   # level_index >= 4 (Cultivator+)
     "hipo_high": 6.0,  # composite score >= 6.0
 }
 
+# Activity tables (and their user columns) that feed the 9 signals.
+# Triggers on these queue affected users in hipo_dirty_users so that
+# refresh_hipo_scores() only rescores users whose activity changed. The
+# triggers are installed by the refresh job, never on a read.
+_ACTIVITY_SOURCES = {
+    "academy_xp_log": ("user_id",),
+    "skills_assessments": ("user_id",),
+    "paddock_attempts": ("user_id",),
+    "sa_exercise_state": ("user_id",),
+    "sa_peer_battles": ("challenger_id", "opponent_id"),
+    "analytics_pageviews": ("user_id",),
+    "sa_verification_status": ("user_id",),
+    "auth_users": ("user_id",),
+}
+
 
 # ---------------------------------------------------------------------------
 # TABLE INIT
 # ---------------------------------------------------------------------------
 
 def init_hipo_tables(conn):
-    """Create sa_hipo_signals table. Safe to call repeatedly."""
+    """Create sa_hipo_signals, the materialised hipo_scores table and the
+    dirty-user queue. Safe to call repeatedly."""
     conn.execute("""
         CREATE TABLE IF NOT EXISTS sa_hipo_signals (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -92,9 +111,77 @@ def init_hipo_tables(conn):
         CREATE INDEX IF NOT EXISTS idx_hipo_user
         ON sa_hipo_signals(user_id)
     """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hipo_scores (
+            user_id TEXT PRIMARY KEY,
+            display_name TEXT,
+            composite_score REAL DEFAULT 0.0,
+            level_index INTEGER DEFAULT 0,
+            level_name TEXT DEFAULT 'Seed',
+            total_xp INTEGER DEFAULT 0,
+            quadrant TEXT DEFAULT 'Early Stage',
+            top_signals_json TEXT DEFAULT '[]',
+            calculated_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hipo_scores_rank
+        ON hipo_scores(composite_score DESC)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hipo_scores_quadrant
+        ON hipo_scores(quadrant, composite_score DESC)
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hipo_dirty_users (
+            user_id TEXT PRIMARY KEY
+        )
+    """)
     conn.commit()
 
 
+def _install_activity_triggers(conn):
+    """Queue users in hipo_dirty_users whenever their activity rows change.
+
+    Only tables (and columns) that exist get a trigger; tables created
+    later are picked up on the next call. When a trigger is first
+    installed, every user already in that table is queued so activity
+    recorded before the trigger existed is still scored.
+    """
+    existing = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+        "AND name LIKE 'trg_hipo_%'"
+    ).fetchall()}
+    for table, user_cols in _ACTIVITY_SOURCES.items():
+        table_cols = {r[1] for r in conn.execute(
+            "PRAGMA table_info({})".format(table)
+        ).fetchall()}
+        cols = [c for c in user_cols if c in table_cols]
+        if not cols or "trg_hipo_{}_ins".format(table) in existing:
+            continue
+
+        for event, refs in (("INSERT", ("NEW",)),
+                            ("UPDATE", ("NEW", "OLD")),
+                            ("DELETE", ("OLD",))):
+            body = " ".join(
+                "INSERT OR REPLACE INTO hipo_dirty_users (user_id) "
+                "SELECT {ref}.{col} WHERE {ref}.{col} IS NOT NULL;".format(
+                    ref=ref, col=col)
+                for ref in refs for col in cols
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS trg_hipo_{}_{} AFTER {} ON {} "
+                "BEGIN {} END".format(
+                    table, event[:3].lower(), event, table, body)
+            )
+        for col in cols:
+            conn.execute(
+                "INSERT OR REPLACE INTO hipo_dirty_users (user_id) "
+                "SELECT DISTINCT {col} FROM {table} "
+                "WHERE {col} IS NOT NULL".format(col=col, table=table)
+            )
+
+
 # ---------------------------------------------------------------------------
 # HELPER: safe query for tables that may not exist yet
 # ---------------------------------------------------------------------------
@@ -140,20 +227,6 @@ def calculate_velocity(db_path, user_id):
         (user_id,),
     )
 
-    total_xp = 0
-    days_active = 1
-    first_at = None
-    if row and row["total_xp"]:
-        total_xp = row["total_xp"]
-        first_at = row["first_at"]
-        if row["first_at"] and row["last_at"]:
-            try:
-                d1 = datetime.fromisoformat(row["first_at"][:10])
-                d2 = datetime.fromisoformat(row["last_at"][:10])
-                days_active = max((d2 - d1).days, 1)
-            except (ValueError, TypeError):
-                days_active = 1
-
     # Assessment pass count
     pass_row = _safe_fetchone(
         conn,
@@ -165,6 +238,26 @@ def calculate_velocity(db_path, user_id):
 
     conn.close()
 
+    if row:
+        return _score_velocity(row["total_xp"], row["first_at"],
+                               row["last_at"], pass_count)
+    return _score_velocity(0, None, None, pass_count)
+
+
+def _score_velocity(total_xp, first_at, last_at, pass_count):
+    """Velocity score from XP totals, first/last XP dates and passes."""
+    days_active = 1
+    if total_xp:
+        if first_at and last_at:
+            try:
+                d1 = datetime.fromisoformat(first_at[:10])
+                d2 = datetime.fromisoformat(last_at[:10])
+                days_active = max((d2 - d1).days, 1)
+            except (ValueError, TypeError):
+                days_active = 1
+    else:
+        total_xp = 0
+
     # XP per day — 50 XP/day = score 10
     xp_per_day = total_xp / days_active if days_active > 0 else 0
     xp_score = _clamp(xp_per_day / 5.0)  # 50 XP/day -> 10
@@ -216,7 +309,11 @@ def calculate_curiosity(db_path, user_id):
     paddock_topics = paddock_rows[0]["cnt"] if paddock_rows else 0
 
     conn.close()
+    return _score_curiosity(distinct_modules, practice_count, paddock_topics)
 
+
+def _score_curiosity(distinct_modules, practice_count, paddock_topics):
+    """Curiosity score from module variety, practice use and Paddock topics."""
     # 10 distinct modules = full score on that dimension
     module_score = _clamp(distinct_modules / 10.0 * 10.0)
     practice_score = _clamp(practice_count * 2.0)  # 5 practice sessions = 10
@@ -265,7 +362,11 @@ def calculate_ambition(db_path, user_id):
     l6_count = l6_rows[0]["cnt"] if l6_rows else 0
 
     conn.close()
+    return _score_ambition(stretch_count, elite_count, l6_count)
+
 
+def _score_ambition(stretch_count, elite_count, l6_count):
+    """Ambition score from stretch/elite completions and L6 attempts."""
     # 5 stretch = 5 pts, 3 elite = 3 pts, L6 attempt = 2 pts
     stretch_score = min(stretch_count, 5)
     elite_score = min(elite_count * 1.5, 4.0)
@@ -294,17 +395,20 @@ def calculate_iteration(db_path, user_id):
         (user_id,),
     )
     conn.close()
+    return _score_iteration([(r["module_code"], r["score"]) for r in rows])
 
+
+def _score_iteration(rows):
+    """Iteration score from (module_code, score) pairs in submission order."""
     if not rows:
         return (0.0, {"modules_resubmitted": 0, "improvements": 0, "total_submissions": 0})
 
     # Group by module
     modules = {}  # type: dict
-    for r in rows:
-        code = r["module_code"]
+    for code, score in rows:
         if code not in modules:
             modules[code] = []
-        modules[code].append(r["score"] if r["score"] is not None else 0)
+        modules[code].append(score if score is not None else 0)
 
     resubmitted = 0
     improvements = 0
@@ -342,12 +446,16 @@ def calculate_cross_pollination(db_path, user_id):
         (user_id,),
     )
     conn.close()
+    return _score_cross_pollination([r["module_code"] for r in rows])
 
+
+def _score_cross_pollination(module_codes):
+    """Cross-pollination score from the distinct module codes attempted."""
     l_series = set()
     d_series = set()
     other = set()
-    for r in rows:
-        code = r["module_code"] or ""
+    for code in module_codes:
+        code = code or ""
         if code.upper().startswith("L"):
             l_series.add(code)
         elif code.upper().startswith("D"):
@@ -401,7 +509,11 @@ def calculate_teaching(db_path, user_id):
     battle_wins = battle_rows[0]["wins"] if battle_rows and battle_rows[0]["wins"] else 0
 
     conn.close()
+    return _score_teaching(avg_score, assessment_count, battle_total, battle_wins)
+
 
+def _score_teaching(avg_score, assessment_count, battle_total, battle_wins):
+    """Teaching score from assessment mastery and peer battle record."""
     # High avg score (>20/25 = good, 25/25 = perfect)
     if assessment_count == 0:
         mastery_score = 0.0
@@ -438,14 +550,18 @@ def calculate_process_thinking(db_path, user_id):
         (user_id,),
     )
     conn.close()
+    return _score_process_thinking([r["rubric_scores_json"] for r in rows])
 
-    if not rows:
+
+def _score_process_thinking(rubric_jsons):
+    """Process-thinking score from rubric JSON blobs (low spread = high)."""
+    if not rubric_jsons:
         return (0.0, {"assessments_analysed": 0, "avg_std_dev": None})
 
     std_devs = []
-    for r in rows:
+    for rubric_json in rubric_jsons:
         try:
-            rubric = json.loads(r["rubric_scores_json"])
+            rubric = json.loads(rubric_json)
             if isinstance(rubric, dict) and rubric:
                 values = [float(v) for v in rubric.values() if v is not None]
                 if len(values) >= 2:
@@ -476,26 +592,25 @@ def calculate_proactive_usage(db_path, user_id):
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
 
-    target_pages = ["Prompt Engine", "Analytics Engine", "Hub Assistant"]
-
     # analytics_pageviews may not exist yet
-    total_visits = 0
-    distinct_tools = 0
     tool_visits = {}  # type: dict
-    for page in target_pages:
+    for page in _PROACTIVE_PAGES:
         rows = _safe_query(
             conn,
             "SELECT COUNT(*) AS cnt FROM analytics_pageviews "
             "WHERE user_id = ? AND page_name = ?",
             (user_id, page),
         )
-        cnt = rows[0]["cnt"] if rows else 0
-        tool_visits[page] = cnt
-        total_visits += cnt
-        if cnt > 0:
-            distinct_tools += 1
+        tool_visits[page] = rows[0]["cnt"] if rows else 0
 
     conn.close()
+    return _score_proactive_usage(tool_visits)
+
+
+def _score_proactive_usage(tool_visits):
+    """Proactive-usage score from {page_name: visit count} for Hub tools."""
+    total_visits = sum(tool_visits.values())
+    distinct_tools = sum(1 for cnt in tool_visits.values() if cnt > 0)
 
     # 3 tools used = 4 pts, each 5 visits = 1 pt (up to 6 pts)
     breadth_score = distinct_tools * (4.0 / 3.0)  # 3 tools = 4
@@ -526,9 +641,13 @@ def calculate_verification_strength(db_path, user_id):
         "ORDER BY level_number DESC LIMIT 1",
         (user_id,),
     )
+    conn.close()
+    return _score_verification_strength(row)
+
 
+def _score_verification_strength(row):
+    """Verification score from the user's latest sa_verification_status row."""
     if not row:
-        conn.close()
         return (0.0, {"has_verification": False})
 
     foundation = row["foundation_score"] or 0.0
@@ -537,8 +656,6 @@ def calculate_verification_strength(db_path, user_id):
     application = row["application_passed"] or 0
     status = row["level_status"] or "provisional"
 
-    conn.close()
-
     # Score each dimension (0-2.5 each, proportional to target)
     foundation_pts = min(foundation / 0.80, 1.0) * 2.5   # target 80%
     breadth_pts = min(breadth / 5.0, 1.0) * 2.5           # target 5 contexts
@@ -589,33 +706,20 @@ _CALCULATORS = {
 
 def calculate_all_signals(db_path, user_id):
     """Compute all 9 signals and upsert into sa_hipo_signals.
+    Also refreshes the user's hipo_scores row.
     Returns list of {signal_type, score, evidence}."""
     conn = sqlite3.connect(str(db_path))
-    init_hipo_tables(conn)
-    conn.close()
-
-    results = []
-    for signal_type, calc_fn in _CALCULATORS.items():
-        score, evidence = calc_fn(db_path, user_id)
-        results.append({
-            "signal_type": signal_type,
-            "score": score,
-            "evidence": evidence,
-        })
-        # Upsert into sa_hipo_signals
-        conn = sqlite3.connect(str(db_path))
-        conn.execute(
-            "INSERT INTO sa_hipo_signals (user_id, signal_type, score, "
-            "evidence_json, calculated_at) VALUES (?, ?, ?, ?, datetime('now')) "
-            "ON CONFLICT(user_id, signal_type) DO UPDATE SET "
-            "score=excluded.score, evidence_json=excluded.evidence_json, "
-            "calculated_at=excluded.calculated_at",
-            (user_id, signal_type, score, json.dumps(evidence)),
-        )
+    try:
+        init_hipo_tables(conn)
+        _set_targets(conn, [user_id])
+        scored = _score_users(conn, scoped=True)
+        _write_scores(conn, scored)
+        conn.execute("DELETE FROM hipo_dirty_users WHERE user_id = ?",
+                     (user_id,))
         conn.commit()
+    finally:
         conn.close()
-
-    return results
+    return scored[user_id]["signals"]
 
 
 # ---------------------------------------------------------------------------
@@ -651,6 +755,282 @@ def _get_quadrant(level_index, composite_score):
         return "Early Stage"
 
 
+# ---------------------------------------------------------------------------
+# BATCH SCORING (set-based) + MATERIALISED hipo_scores
+# ---------------------------------------------------------------------------
+
+def _set_targets(conn, user_ids):
+    """Load the users to score into a temp table used by _score_users."""
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS _hipo_targets "
+        "(user_id TEXT PRIMARY KEY)"
+    )
+    conn.execute("DELETE FROM temp._hipo_targets")
+    conn.executemany(
+        "INSERT OR IGNORE INTO temp._hipo_targets (user_id) VALUES (?)",
+        [(uid,) for uid in user_ids],
+    )
+
+
+def _where(scoped, *conditions, col="user_id"):
+    """WHERE clause combining conditions with the optional target scope."""
+    conds = list(conditions)
+    if scoped:
+        conds.append("{} IN (SELECT user_id FROM temp._hipo_targets)".format(col))
+    return "WHERE " + " AND ".join(conds) if conds else ""
+
+
+def _level_lookup():
+    """Return academy_engine.get_level_for_xp, or a Seed-level fallback."""
+    try:
+        from academy_engine import get_level_for_xp
+    except ImportError:
+        try:
+            from backend.academy_engine import get_level_for_xp
+        except ImportError:
+            return lambda total_xp: {"level_index": 0, "name": "Seed"}
+    return get_level_for_xp
+
+
+def _score_users(conn, scoped=False):
+    """Compute all 9 signals for many users with one grouped query per
+    signal input (instead of nine queries per user).
+
+    Each query mirrors its per-user calculate_* counterpart and fails
+    independently (missing table/column -> that input is zero), so batch
+    and per-user scores are identical. When ``scoped`` is True only the
+    users in temp._hipo_targets are scored.
+
+    Returns {user_id: {"signals": [...], "total_xp": int,
+    "display_name": str}}.
+    """
+    conn.row_factory = sqlite3.Row
+    users = set()
+
+    def grouped(sql, params=(), col="user_id"):
+        rows = _safe_query(conn, sql, params)
+        users.update(r[col] for r in rows if r[col] is not None)
+        return rows
+
+    xp = {r["user_id"]: r for r in grouped(
+        "SELECT user_id, COALESCE(SUM(xp_amount), 0) AS total_xp, "
+        "MIN(created_at) AS first_at, MAX(created_at) AS last_at "
+        "FROM academy_xp_log {} GROUP BY user_id".format(_where(scoped)))}
+    passes = {r["user_id"]: r["cnt"] for r in grouped(
+        "SELECT user_id, COUNT(*) AS cnt FROM skills_assessments "
+        "{} GROUP BY user_id".format(_where(scoped, "passed = 1")))}
+
+    # One row per (user, module): drives curiosity, ambition (L6) and
+    # cross-pollination.
+    modules = {}  # type: dict
+    for r in grouped(
+            "SELECT user_id, module_code, COUNT(*) AS cnt "
+            "FROM skills_assessments {} GROUP BY user_id, module_code".format(
+                _where(scoped))):
+        modules.setdefault(r["user_id"], []).append((r["module_code"], r["cnt"]))
+
+    paddock = {r["user_id"]: r["cnt"] for r in grouped(
+        "SELECT user_id, COUNT(DISTINCT topic) AS cnt FROM paddock_attempts "
+        "{} GROUP BY user_id".format(_where(scoped)))}
+    tiers = {r["user_id"]: r for r in grouped(
+        "SELECT user_id, "
+        "SUM(CASE WHEN tier = 'stretch' AND status = 'complete' "
+        "THEN 1 ELSE 0 END) AS stretch, "
+        "SUM(CASE WHEN tier = 'elite' AND status = 'complete' "
+        "THEN 1 ELSE 0 END) AS elite "
+        "FROM sa_exercise_state {} GROUP BY user_id".format(_where(scoped)))}
+
+    submissions = {}  # type: dict
+    for r in grouped(
+            "SELECT user_id, module_code, score FROM skills_assessments "
+            "{} ORDER BY user_id, module_code, submitted_at".format(
+                _where(scoped))):
+        submissions.setdefault(r["user_id"], []).append(
+            (r["module_code"], r["score"]))
+
+    mastery = {r["user_id"]: r for r in grouped(
+        "SELECT user_id, AVG(score) AS avg_score, COUNT(*) AS cnt "
+        "FROM skills_assessments {} GROUP BY user_id".format(_where(scoped)))}
+    battles = {r["uid"]: r for r in grouped(
+        "SELECT uid, COUNT(*) AS total, "
+        "SUM(CASE WHEN winner_id = uid THEN 1 ELSE 0 END) AS wins "
+        "FROM (SELECT id, challenger_id AS uid, winner_id FROM sa_peer_battles "
+        "      UNION "
+        "      SELECT id, opponent_id AS uid, winner_id FROM sa_peer_battles) "
+        "{} GROUP BY uid".format(_where(scoped, "uid IS NOT NULL", col="uid")),
+        col="uid")}
+
+    rubrics = {}  # type: dict
+    for r in grouped(
+            "SELECT user_id, rubric_scores_json FROM skills_assessments "
+            "{}".format(_where(scoped, "rubric_scores_json IS NOT NULL"))):
+        rubrics.setdefault(r["user_id"], []).append(r["rubric_scores_json"])
+
+    visits = {}  # type: dict
+    for r in grouped(
+            "SELECT user_id, page_name, COUNT(*) AS cnt "
+            "FROM analytics_pageviews {} GROUP BY user_id, page_name".format(
+                _where(scoped, "page_name IN ({})".format(
+                    ", ".join("?" * len(_PROACTIVE_PAGES))))),
+            tuple(_PROACTIVE_PAGES)):
+        visits.setdefault(r["user_id"], {})[r["page_name"]] = r["cnt"]
+
+    verification = {r["user_id"]: r for r in grouped(
+        "SELECT * FROM ("
+        "  SELECT user_id, level_number, level_status, foundation_score, "
+        "  breadth_count, depth_count, application_passed, "
+        "  ROW_NUMBER() OVER (PARTITION BY user_id "
+        "                     ORDER BY level_number DESC) AS rn "
+        "  FROM sa_verification_status {}"
+        ") WHERE rn = 1".format(_where(scoped)))}
+
+    names = {r["user_id"]: r["display_name"] for r in _safe_query(
+        conn, "SELECT user_id, display_name FROM auth_users {}".format(
+            _where(scoped)))}
+
+    if scoped:
+        users = {r[0] for r in conn.execute(
+            "SELECT user_id FROM temp._hipo_targets").fetchall()}
+    else:
+        for table in ("sa_hipo_signals", "hipo_scores"):
+            users.update(r[0] for r in _safe_query(
+                conn, "SELECT DISTINCT user_id FROM {}".format(table)))
+
+    level_for_xp = _level_lookup()
+    results = {}
+    for uid in users:
+        xp_row = xp.get(uid)
+        user_modules = modules.get(uid, [])
+        codes = [code for code, _ in user_modules]
+        tier_row = tiers.get(uid)
+        mastery_row = mastery.get(uid)
+        battle_row = battles.get(uid)
+        tool_visits = {page: visits.get(uid, {}).get(page, 0)
+                       for page in _PROACTIVE_PAGES}
+
+        scores = {
+            "velocity": _score_velocity(
+                xp_row["total_xp"] if xp_row else 0,
+                xp_row["first_at"] if xp_row else None,
+                xp_row["last_at"] if xp_row else None,
+                passes.get(uid, 0)),
+            "curiosity": _score_curiosity(
+                sum(1 for code in codes if code is not None),
+                sum(cnt for code, cnt in user_modules if code == "practice"),
+                paddock.get(uid, 0)),
+            "ambition": _score_ambition(
+                (tier_row["stretch"] or 0) if tier_row else 0,
+                (tier_row["elite"] or 0) if tier_row else 0,
+                sum(cnt for code, cnt in user_modules
+                    if code and code.upper().startswith("L6"))),
+            "iteration": _score_iteration(submissions.get(uid, [])),
+            "cross_pollination": _score_cross_pollination(codes),
+            "teaching": _score_teaching(
+                (mastery_row["avg_score"] or 0) if mastery_row else 0,
+                mastery_row["cnt"] if mastery_row else 0,
+                battle_row["total"] if battle_row else 0,
+                (battle_row["wins"] or 0) if battle_row else 0),
+            "process_thinking": _score_process_thinking(rubrics.get(uid, [])),
+            "proactive_usage": _score_proactive_usage(tool_visits),
+            "verification_strength": _score_verification_strength(
+                verification.get(uid)),
+        }
+        total_xp = xp_row["total_xp"] if xp_row else 0
+        results[uid] = {
+            "signals": [
+                {"signal_type": st, "score": scores[st][0],
+                 "evidence": scores[st][1]}
+                for st in _CALCULATORS
+            ],
+            "total_xp": total_xp,
+            "level": level_for_xp(total_xp),
+            "display_name": names.get(uid, uid),
+        }
+    return results
+
+
+def _write_scores(conn, scored):
+    """Upsert batch results into sa_hipo_signals and hipo_scores."""
+    signal_rows = []
+    score_rows = []
+    for uid, data in scored.items():
+        signals = data["signals"]
+        for sig in signals:
+            signal_rows.append((uid, sig["signal_type"], sig["score"],
+                                json.dumps(sig["evidence"])))
+        composite = _compute_composite(signals)
+        level = data["level"]
+        level_index = level.get("level_index", 0)
+        top_signals = [
+            {"signal_type": sig["signal_type"], "score": sig["score"]}
+            for sig in sorted(signals, key=lambda x: x["score"], reverse=True)[:3]
+        ]
+        score_rows.append((
+            uid, data["display_name"], composite, level_index,
+            level.get("name", "Seed"), data["total_xp"],
+            _get_quadrant(level_index, composite), json.dumps(top_signals),
+        ))
+
+    conn.executemany(
+        "INSERT INTO sa_hipo_signals (user_id, signal_type, score, "
+        "evidence_json, calculated_at) VALUES (?, ?, ?, ?, datetime('now')) "
+        "ON CONFLICT(user_id, signal_type) DO UPDATE SET "
+        "score=excluded.score, evidence_json=excluded.evidence_json, "
+        "calculated_at=excluded.calculated_at",
+        signal_rows,
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO hipo_scores (user_id, display_name, "
+        "composite_score, level_index, level_name, total_xp, quadrant, "
+        "top_signals_json, calculated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))",
+        score_rows,
+    )
+
+
+def refresh_hipo_scores(db_path, full=False):
+    """Batch job: rescore users into the materialised hipo_scores table.
+
+    Incremental by default -- only users queued in hipo_dirty_users by
+    the activity triggers are rescored, so a refresh with no new activity
+    is a single-row check. ``full=True`` (or an empty hipo_scores table)
+    rescores every known user.
+    Returns {"mode": "full"|"incremental", "scored": int}.
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        init_hipo_tables(conn)
+        _install_activity_triggers(conn)
+        # Users queued after this point stay queued for the next refresh
+        high_water = conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM hipo_dirty_users"
+        ).fetchone()[0]
+        empty = conn.execute(
+            "SELECT 1 FROM hipo_scores LIMIT 1"
+        ).fetchone() is None
+
+        if full or empty:
+            mode = "full"
+            scored = _score_users(conn)
+        elif high_water:
+            mode = "incremental"
+            _set_targets(conn, [r[0] for r in conn.execute(
+                "SELECT user_id FROM hipo_dirty_users WHERE rowid <= ?",
+                (high_water,),
+            ).fetchall()])
+            scored = _score_users(conn, scoped=True)
+        else:
+            return {"mode": "incremental", "scored": 0}
+
+        _write_scores(conn, scored)
+        conn.execute("DELETE FROM hipo_dirty_users WHERE rowid <= ?",
+                     (high_water,))
+        conn.commit()
+        return {"mode": mode, "scored": len(scored)}
+    finally:
+        conn.close()
+
+
 def get_user_hipo(db_path, user_id):
     """Return all 9 signals + weighted composite score for a user.
     Returns: {signals: [...], composite_score: float, quadrant: str}"""
@@ -703,51 +1083,28 @@ def get_user_hipo(db_path, user_id):
 
 def get_hipo_leaderboard(db_path, limit=50):
     """Admin: Get users ranked by composite HiPo score.
-    Returns list of {user_id, composite_score, top_signals}."""
+    Reads the materialised hipo_scores table as of the last
+    refresh_hipo_scores() run (empty until the first one).
+    Returns list of {user_id, display_name, composite_score, top_signals}."""
     conn = sqlite3.connect(str(db_path))
-    init_hipo_tables(conn)
     conn.row_factory = sqlite3.Row
-
-    # Get all users who have signals
-    user_rows = conn.execute(
-        "SELECT DISTINCT user_id FROM sa_hipo_signals"
-    ).fetchall()
-
-    users = []
-    for ur in user_rows:
-        uid = ur["user_id"]
-        signal_rows = conn.execute(
-            "SELECT signal_type, score FROM sa_hipo_signals WHERE user_id = ?",
-            (uid,),
-        ).fetchall()
-
-        signals = [{"signal_type": r["signal_type"], "score": r["score"]}
-                   for r in signal_rows]
-        composite = _compute_composite(signals)
-
-        # Top 3 signals by score
-        sorted_signals = sorted(signals, key=lambda s: s["score"], reverse=True)
-        top_signals = sorted_signals[:3]
-
-        # Get display name from auth users table
-        name_row = _safe_fetchone(
-            conn,
-            "SELECT display_name FROM auth_users WHERE user_id = ?",
-            (uid,),
-        )
-        display_name = name_row["display_name"] if name_row else uid
-
-        users.append({
-            "user_id": uid,
-            "display_name": display_name,
-            "composite_score": composite,
-            "top_signals": top_signals,
-        })
-
+    rows = _safe_query(
+        conn,
+        "SELECT user_id, display_name, composite_score, top_signals_json "
+        "FROM hipo_scores ORDER BY composite_score DESC LIMIT ?",
+        (limit,),
+    )
     conn.close()
 
-    users.sort(key=lambda u: u["composite_score"], reverse=True)
-    return users[:limit]
+    return [
+        {
+            "user_id": r["user_id"],
+            "display_name": r["display_name"],
+            "composite_score": r["composite_score"],
+            "top_signals": json.loads(r["top_signals_json"] or "[]"),
+        }
+        for r in rows
+    ]
 
 
 def get_hipo_matrix(db_path):
@@ -757,20 +1114,18 @@ def get_hipo_matrix(db_path):
     - Hidden Gems: low skill (level < 4) + high HiPo (>= 6.0)
     - Solid Practitioners: high skill (level >= 4) + low HiPo (< 6.0)
     - Early Stage: low skill (level < 4) + low HiPo (< 6.0)
+    Reads the materialised hipo_scores table as of the last
+    refresh_hipo_scores() run (empty until the first one).
     Returns: {quadrants: {name: [users]}, summary: {counts}}"""
-    try:
-        from backend.academy_engine import get_user_xp
-    except ImportError:
-        # Fallback: cannot determine levels without academy_engine
-        return {"quadrants": {}, "summary": {}}
-
     conn = sqlite3.connect(str(db_path))
-    init_hipo_tables(conn)
     conn.row_factory = sqlite3.Row
-
-    user_rows = conn.execute(
-        "SELECT DISTINCT user_id FROM sa_hipo_signals"
-    ).fetchall()
+    rows = _safe_query(
+        conn,
+        "SELECT user_id, display_name, composite_score, level_index, "
+        "level_name, total_xp, quadrant FROM hipo_scores "
+        "ORDER BY quadrant, composite_score DESC",
+    )
+    conn.close()
 
     quadrants = {
         "AI Leaders": [],
@@ -778,50 +1133,15 @@ def get_hipo_matrix(db_path):
         "Solid Practitioners": [],
         "Early Stage": [],
     }
-
-    for ur in user_rows:
-        uid = ur["user_id"]
-
-        # Get composite score
-        signal_rows = conn.execute(
-            "SELECT signal_type, score FROM sa_hipo_signals WHERE user_id = ?",
-            (uid,),
-        ).fetchall()
-        signals = [{"signal_type": r["signal_type"], "score": r["score"]}
-                   for r in signal_rows]
-        composite = _compute_composite(signals)
-
-        # Get skill level
-        try:
-            xp_data = get_user_xp(db_path, uid)
-            level_index = xp_data.get("level_index", 0)
-            level_name = xp_data.get("name", "Seed")
-            total_xp = xp_data.get("total_xp", 0)
-        except Exception:
-            level_index = 0
-            level_name = "Seed"
-            total_xp = 0
-
-        # Display name
-        name_row = _safe_fetchone(
-            conn,
-            "SELECT display_name FROM auth_users WHERE user_id = ?",
-            (uid,),
-        )
-        display_name = name_row["display_name"] if name_row else uid
-
-        quadrant = _get_quadrant(level_index, composite)
-        user_data = {
-            "user_id": uid,
-            "display_name": display_name,
-            "composite_score": composite,
-            "level_index": level_index,
-            "level_name": level_name,
-            "total_xp": total_xp,
-        }
-        quadrants[quadrant].append(user_data)
-
-    conn.close()
+    for r in rows:
+        quadrants.setdefault(r["quadrant"], []).append({
+            "user_id": r["user_id"],
+            "display_name": r["display_name"],
+            "composite_score": r["composite_score"],
+            "level_index": r["level_index"],
+            "level_name": r["level_name"],
+            "total_xp": r["total_xp"],
+        })
 
     summary = {q: len(users) for q, users in quadrants.items()}
     summary["total"] = sum(summary.values())
@@ -0,0 +1,306 @@
+"""
+Harris Farm Hub — Job Queue
+Persistent SQLite-backed queue for background work (agent proposal
+execution). Jobs survive restarts, and any number of workers, in one
+process or several, can share a queue:
+
+    queue = JobQueue(config.HUB_DB)
+    queue.enqueue("basket_analysis", {"proposal_id": 12}, priority=10,
+                  key="proposal:12")
+    job = queue.claim("executor-1", limits={"basket_analysis": 1})
+    ...
+    queue.complete(job["id"], "executor-1", "done")   # or queue.fail(...)
+
+Claims run in a BEGIN IMMEDIATE transaction, so two workers never take
+the same job. A claim is a lease: a job whose worker died becomes
+claimable again once lease_expires passes (renew() extends it for long
+jobs). Jobs are claimed highest priority first, then oldest first,
+skipping kinds already at their concurrency limit. fail() re-queues
+with exponential backoff (RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+until max_attempts, then leaves the job 'failed'.
+
+wait() blocks until there may be work: enqueue() in this process wakes
+waiters at once, and a commit from another process (PRAGMA data_version,
+a per-connection counter that costs no query) is noticed within
+WAKE_CHECK_SECONDS.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+LEASE_SECONDS = 1800
+RETRY_BASE_SECONDS = 30
+WAKE_CHECK_SECONDS = 1.0
+
+_WAKE = threading.Condition()
+_generation = 0
+
+
+def notify():
+    """Wake every wait() in this process."""
+    global _generation
+    with _WAKE:
+        _generation += 1
+        _WAKE.notify_all()
+
+
+def init_job_tables(conn: sqlite3.Connection):
+    """Create the job_queue table (idempotent)."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS job_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL DEFAULT '{}',
+        dedupe_key TEXT UNIQUE,
+        priority INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        available_at REAL NOT NULL,
+        lease_owner TEXT,
+        lease_expires REAL,
+        last_error TEXT,
+        result TEXT,
+        created_at REAL NOT NULL,
+        finished_at REAL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jq_claim "
+                 "ON job_queue(status, priority DESC, available_at)")
+    conn.commit()
+
+
+class JobQueue:
+    """A persistent job queue in a SQLite database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._watch = None
+        self._data_version = None
+        conn = self._connect()
+        try:
+            init_job_tables(conn)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30,
+                               isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # -----------------------------------------------------------------------
+    # PRODUCERS
+    # -----------------------------------------------------------------------
+
+    def enqueue(self, kind: str, payload: Optional[dict] = None,
+                priority: int = 0, key: Optional[str] = None,
+                max_attempts: int = 3) -> Optional[int]:
+        """Add a job; returns its id, or None if a job with this
+        dedupe key already exists."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO job_queue (kind, payload, dedupe_key, "
+                "priority, max_attempts, available_at, created_at) "
+                "VALUES (?,?,?,?,?,?,?)",
+                (kind, json.dumps(payload or {}, default=str), key, priority,
+                 max_attempts, now, now))
+            job_id = cur.lastrowid if cur.rowcount else None
+        finally:
+            conn.close()
+        if job_id:
+            notify()
+        return job_id
+
+    def keys(self, prefix: str) -> set:
+        """Dedupe keys already queued under a prefix (any status)."""
+        conn = self._connect()
+        try:
+            return {r[0] for r in conn.execute(
+                "SELECT dedupe_key FROM job_queue WHERE dedupe_key LIKE ?",
+                (prefix + "%",))}
+        finally:
+            conn.close()
+
+    # -----------------------------------------------------------------------
+    # WORKERS
+    # -----------------------------------------------------------------------
+
+    def claim(self, owner: str, limits: Optional[dict] = None,
+              default_limit: Optional[int] = None,
+              lease_seconds: float = LEASE_SECONDS) -> Optional[dict]:
+        """Lease the next runnable job to `owner`, or return None.
+
+        limits maps kind -> maximum jobs of that kind running at once
+        (across every worker on this database); kinds not listed are
+        capped at default_limit (None: no cap).
+        """
+        limits = limits or {}
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            running = dict(conn.execute(
+                "SELECT kind, COUNT(*) FROM job_queue WHERE status = 'running' "
+                "AND lease_expires > ? GROUP BY kind", (now,)).fetchall())
+            candidates = conn.execute(
+                "SELECT * FROM job_queue "
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "   OR (status = 'running' AND lease_expires <= ?) "
+                "ORDER BY priority DESC, available_at, id",
+                (now, now)).fetchall()
+            job = None
+            for row in candidates:
+                if row["attempts"] >= row["max_attempts"]:
+                    # Lease ran out on its last attempt
+                    conn.execute(
+                        "UPDATE job_queue SET status = 'failed', "
+                        "last_error = 'lease expired', finished_at = ?, "
+                        "lease_owner = NULL WHERE id = ?", (now, row["id"]))
+                    continue
+                cap = limits.get(row["kind"], default_limit)
+                if cap is not None and running.get(row["kind"], 0) >= cap:
+                    continue
+                conn.execute(
+                    "UPDATE job_queue SET status = 'running', lease_owner = ?, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (owner, now + lease_seconds, row["id"]))
+                job = dict(row, status="running", lease_owner=owner,
+                           attempts=row["attempts"] + 1,
+                           payload=json.loads(row["payload"]))
+                break
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self, job_id: int, owner: str,
+              lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Extend a lease; False if the job is no longer ours."""
+        return self._update(
+            "UPDATE job_queue SET lease_expires = ? WHERE id = ? "
+            "AND lease_owner = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, owner))
+
+    def complete(self, job_id: int, owner: str, result=None) -> bool:
+        """Mark a leased job done; False if the lease was lost."""
+        done = self._update(
+            "UPDATE job_queue SET status = 'done', result = ?, "
+            "finished_at = ?, lease_owner = NULL WHERE id = ? "
+            "AND lease_owner = ? AND status = 'running'",
+            (None if result is None else str(result)[:2000], time.time(),
+             job_id, owner))
+        notify()
+        return done
+
+    def fail(self, job_id: int, owner: str, error) -> Optional[str]:
+        """Record a failed attempt. Returns the job's new status:
+        'queued' (will retry after backoff), 'failed' (out of attempts)
+        or None if the lease was lost."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM job_queue WHERE id = ? "
+                "AND lease_owner = ? AND status = 'running'",
+                (job_id, owner)).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] < row["max_attempts"]:
+                status = "queued"
+                conn.execute(
+                    "UPDATE job_queue SET status = 'queued', available_at = ?, "
+                    "last_error = ?, lease_owner = NULL, lease_expires = NULL "
+                    "WHERE id = ?",
+                    (now + RETRY_BASE_SECONDS * 2 ** (row["attempts"] - 1),
+                     str(error)[:500], job_id))
+            else:
+                status = "failed"
+                conn.execute(
+                    "UPDATE job_queue SET status = 'failed', last_error = ?, "
+                    "finished_at = ?, lease_owner = NULL WHERE id = ?",
+                    (str(error)[:500], now, job_id))
+        finally:
+            conn.close()
+        notify()
+        return status
+
+    def _update(self, sql, params) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount > 0
+        finally:
+            conn.close()
+
+    # -----------------------------------------------------------------------
+    # WAITING
+    # -----------------------------------------------------------------------
+
+    def counts(self) -> dict:
+        """Jobs by status."""
+        conn = self._connect()
+        try:
+            return dict(conn.execute(
+                "SELECT status, COUNT(*) FROM job_queue GROUP BY status"
+            ).fetchall())
+        finally:
+            conn.close()
+
+    def next_due(self) -> Optional[float]:
+        """Seconds until the earliest queued job (retry backoff) or
+        running lease becomes claimable; None if nothing is pending."""
+        conn = self._connect()
+        try:
+            due = conn.execute(
+                "SELECT MIN(CASE status WHEN 'queued' THEN available_at "
+                "ELSE lease_expires END) FROM job_queue "
+                "WHERE status IN ('queued', 'running')").fetchone()[0]
+        finally:
+            conn.close()
+        return None if due is None else max(0.0, due - time.time())
+
+    @staticmethod
+    def generation() -> int:
+        """In-process wake counter; read it before claiming and pass it
+        to wait() so a job enqueued in between is not slept through."""
+        return _generation
+
+    def _changed_elsewhere(self) -> bool:
+        if self._watch is None:
+            self._watch = sqlite3.connect(self.db_path,
+                                          check_same_thread=False)
+        version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        changed = (self._data_version is not None
+                   and version != self._data_version)
+        self._data_version = version
+        return changed
+
+    def wait(self, generation: int, timeout: float) -> bool:
+        """Block until a job may be available or `timeout` seconds pass.
+        Returns True when woken by new work. Meant for one dispatcher
+        thread per JobQueue."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with _WAKE:
+                if _generation != generation:
+                    return True
+                _WAKE.wait(min(remaining, WAKE_CHECK_SECONDS))
+                if _generation != generation:
+                    return True
+            if self._changed_elsewhere():
+                return True
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
@@ -0,0 +1,387 @@
+"""
+Harris Farm Hub — Load Test
+Replays a weighted mix of typical requests from N concurrent virtual
+users against the synthetic fixtures (synthetic_data.py) and reports
+throughput and tail latency per request and overall.
+
+Mixes:
+    api        the GETs the dashboards and agents send to the FastAPI
+               app: in-process (the app's routes over an ASGI transport,
+               with the fixtures swapped in for the data files) or a
+               running server (--url). In-process, DuckDB calls block the
+               event loop exactly as they do in one uvicorn worker.
+    dashboard  the data-layer calls behind the Streamlit pages
+               (transaction_queries templates, TransactionStore methods,
+               plu_layer), uncached, one thread per virtual user like
+               Streamlit sessions.
+
+Each virtual user loops: pick a request by weight, fill its parameters
+(a random store, a 4-week window inside the fixture's fiscal years, a
+PLU from the popular end of the catalogue, ...), time it, then think for
+an exponential --think seconds. Samples from the first --warmup seconds
+are dropped.
+
+Usage:
+    python backend/synthetic_data.py /tmp/fixtures
+    python backend/load_test.py /tmp/fixtures                       # api mix
+    python backend/load_test.py /tmp/fixtures --mix dashboard -c 16
+    python backend/load_test.py /tmp/fixtures --url http://localhost:8000
+    python backend/load_test.py /tmp/fixtures --save load.json      # baseline
+    python backend/load_test.py /tmp/fixtures --baseline load.json  # exit 1 on regression
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+import plu_layer
+from synthetic_data import DEFAULT_SEED, FISCAL_YEARS, load_catalogue
+from transaction_layer import STORE_NAMES, TransactionStore
+from transaction_queries import run_query
+
+logger = logging.getLogger("hub_api")
+
+WINDOW_DAYS = 28
+POPULAR_PLUS = 500
+
+# Regression thresholds
+LATENCY_TOLERANCE = 0.5     # p95 50% slower ...
+LATENCY_FLOOR_MS = 10.0     # ... and at least 10ms slower
+THROUGHPUT_TOLERANCE = 0.25
+
+# (name, weight, path) -- {placeholders} are filled per request
+API_MIX = [
+    ("transactions/summary", 4, "/api/transactions/summary"),
+    ("transactions/stores", 6, "/api/transactions/stores"),
+    ("transactions/top-items", 14,
+     "/api/transactions/top-items?start={start}&end={end}"
+     "&store_id={store_id}&limit=20"),
+    ("transactions/store-trend", 14,
+     "/api/transactions/store-trend?store_id={store_id}"
+     "&start={start}&end={end}"),
+    ("transactions/plu", 8,
+     "/api/transactions/plu/{plu_id}?start={start}&end={end}"),
+    ("run/department_revenue", 10,
+     "/api/transactions/run/department_revenue?start={start}&end={end}"),
+    ("run/store_daily_trend", 8,
+     "/api/transactions/run/store_daily_trend?store_id={store_id}"
+     "&start={start}&end={end}"),
+    ("run/avg_basket_by_store", 6,
+     "/api/transactions/run/avg_basket_by_store?start={start}&end={end}"),
+    ("run/hourly_pattern_aest", 6,
+     "/api/transactions/run/hourly_pattern_aest?store_id={store_id}"
+     "&start={start}&end={end}"),
+    ("run/top_customers_by_spend", 3,
+     "/api/transactions/run/top_customers_by_spend?start={start}"
+     "&end={end}&limit=20"),
+    ("hierarchy/departments", 4, "/api/hierarchy/departments"),
+    ("hierarchy/search", 5, "/api/hierarchy/search?q={term}"),
+    ("analytics/summary", 3, "/api/analytics/summary?days=30"),
+]
+
+# (name, weight, fn(store, params)) -- the calls behind each page
+DASHBOARD_MIX = [
+    ("sales: department_revenue", 12, lambda store, p: run_query(
+        store, "department_revenue", start=p["start"], end=p["end"])),
+    ("sales: store_daily_trend", 10, lambda store, p: run_query(
+        store, "store_daily_trend", store_id=p["store_id"],
+        start=p["start"], end=p["end"])),
+    ("sales: top_items", 10, lambda store, p: store.top_items(
+        p["start"], p["end"], store_id=p["store_id"])),
+    ("customers: avg_basket_by_store", 6, lambda store, p: run_query(
+        store, "avg_basket_by_store", start=p["start"], end=p["end"])),
+    ("customers: top_customers_by_spend", 4, lambda store, p: run_query(
+        store, "top_customers_by_spend", start=p["start"], end=p["end"],
+        limit=20)),
+    ("store-ops: hourly_pattern_aest", 8, lambda store, p: run_query(
+        store, "hourly_pattern_aest", store_id=p["store_id"],
+        start=p["start"], end=p["end"])),
+    ("store-ops: top_plus_by_stocktake", 4, lambda store, p:
+        plu_layer.top_plus_by_stocktake(p["fiscal_year"])),
+    ("product-intel: plu_across_stores", 8, lambda store, p: run_query(
+        store, "plu_across_stores", plu_id=p["plu_id"], start=p["start"],
+        end=p["end"])),
+    ("product-intel: plu_weekly_trend", 6, lambda store, p:
+        plu_layer.plu_weekly_trend(p["plu_id"])),
+    ("plu-intel: department_summary", 6, lambda store, p:
+        plu_layer.department_summary(p["fiscal_year"])),
+    ("plu-intel: store_performance", 4, lambda store, p:
+        plu_layer.store_performance(p["fiscal_year"])),
+    ("profitability: top_plus_by_wastage", 6, lambda store, p:
+        plu_layer.top_plus_by_wastage(p["fiscal_year"])),
+    ("plu-intel: search_plu", 4, lambda store, p:
+        plu_layer.search_plu(p["term"])),
+]
+
+MIXES = {"api": API_MIX, "dashboard": DASHBOARD_MIX}
+
+
+# ---------------------------------------------------------------------------
+# FIXTURE & PARAMETERS
+# ---------------------------------------------------------------------------
+
+class RequestParams:
+    """Draws realistic parameters from what the fixture contains."""
+
+    def __init__(self, fixture_dir: Path, seed: int = DEFAULT_SEED):
+        self.files = {
+            fy: Path(fixture_dir) / "transactions" / "{}.parquet".format(fy)
+            for fy in FISCAL_YEARS
+            if (Path(fixture_dir) / "transactions" / "{}.parquet".format(fy)
+                ).exists()}
+        cat = load_catalogue(seed).head(POPULAR_PLUS)
+        self.plus = list(cat["plu"])
+        self.terms = sorted({w for d in cat["description"]
+                             for w in d.split()[:1] if len(w) >= 3
+                             and w.isalpha()}) or ["APPLE"]
+        self.stores = list(STORE_NAMES)
+
+    def draw(self, rng: random.Random) -> dict:
+        fy = rng.choice(sorted(self.files) or sorted(FISCAL_YEARS))
+        first, days, _ = FISCAL_YEARS[fy]
+        start = first + timedelta(
+            days=rng.randrange(max(1, days - WINDOW_DAYS)))
+        # Pareto rank: most lookups hit the best sellers
+        rank = min(int(rng.paretovariate(1.0)) - 1, len(self.plus) - 1)
+        return {
+            "start": start.isoformat(),
+            "end": (start + timedelta(days=WINDOW_DAYS)).isoformat(),
+            "store_id": rng.choice(self.stores),
+            "plu_id": self.plus[rank],
+            "term": rng.choice(self.terms),
+            "fiscal_year": 2000 + int(fy[2:]),
+        }
+
+
+@contextmanager
+def _patched(*settings):
+    """Temporarily set (object, attribute, value) triples."""
+    saved = [(obj, attr, getattr(obj, attr, None))
+             for obj, attr, _ in settings]
+    for obj, attr, value in settings:
+        setattr(obj, attr, value)
+    try:
+        yield
+    finally:
+        for obj, attr, value in saved:
+            setattr(obj, attr, value)
+
+
+def _fixture_store(params: RequestParams, work: Path) -> TransactionStore:
+    # Derived builds go to the scratch directory, not data/
+    return TransactionStore(parquet_files=params.files,
+                            presence_dir=work / "derived",
+                            enriched_dir=work / "enriched",
+                            customer_dir=work / "customers",
+                            preview_dir=work / "preview")
+
+
+# ---------------------------------------------------------------------------
+# DRIVER
+# ---------------------------------------------------------------------------
+
+async def _drive(send, mix: list, params: RequestParams, concurrency: int,
+                 duration: float, warmup: float, think: float,
+                 seed: int) -> list:
+    """Run the virtual users; returns (name, seconds, ok) samples."""
+    weights = [w for _, w, _ in mix]
+    measure_from = time.monotonic() + warmup
+    stop = measure_from + duration
+    samples = []
+
+    async def user(n):
+        rng = random.Random(seed * 1000 + n)
+        while time.monotonic() < stop:
+            name, _, spec = rng.choices(mix, weights)[0]
+            started = time.monotonic()
+            try:
+                ok = await send(spec, params.draw(rng))
+            except Exception as e:
+                logger.debug("Load test %s failed: %s", name, e)
+                ok = False
+            if started >= measure_from:
+                samples.append((name, time.monotonic() - started, ok))
+            if think:
+                await asyncio.sleep(rng.expovariate(1 / think))
+
+    await asyncio.gather(*(user(n) for n in range(concurrency)))
+    return samples
+
+
+async def _run_api(params, client, **kwargs):
+    async def send(path, p):
+        response = await client.get(path.format(
+            **{k: quote(str(v)) for k, v in p.items()}))
+        return response.status_code < 400
+
+    async with client:
+        return await _drive(send, API_MIX, params, **kwargs)
+
+
+async def _run_dashboard(params, store, concurrency, **kwargs):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def send(fn, p):
+            await loop.run_in_executor(pool, fn, store, p)
+            return True
+
+        return await _drive(send, DASHBOARD_MIX, params,
+                            concurrency=concurrency, **kwargs)
+
+
+def run_load(fixture_dir: Path, mix: str = "api", concurrency: int = 8,
+             duration: float = 30.0, warmup: float = 5.0, think: float = 0.0,
+             url: Optional[str] = None, seed: int = DEFAULT_SEED) -> dict:
+    """Replay `mix` against the fixtures in fixture_dir (or the server
+    at `url`). Returns {request name: metrics, "ALL": metrics}."""
+    import httpx
+
+    fixture_dir = Path(fixture_dir)
+    params = RequestParams(fixture_dir, seed)
+    kwargs = dict(concurrency=concurrency, duration=duration, warmup=warmup,
+                  think=think, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        with _patched((plu_layer, "PLU_DB",
+                       str(fixture_dir / "harris_farm_plu.db"))):
+            if mix == "dashboard":
+                samples = asyncio.run(_run_dashboard(
+                    params, _fixture_store(params, work), **kwargs))
+            elif url:
+                samples = asyncio.run(_run_api(
+                    params, httpx.AsyncClient(base_url=url, timeout=120),
+                    **kwargs))
+            else:
+                import app as hub_app
+                import result_cache
+
+                with _patched(
+                        (hub_app.config, "HUB_DB",
+                         str(fixture_dir / "hub_data.db")),
+                        (result_cache, "CACHE_DIR", work / "cache"),
+                        (hub_app.app.state, "txn_store",
+                         _fixture_store(params, work))):
+                    client = httpx.AsyncClient(
+                        transport=httpx.ASGITransport(app=hub_app.app),
+                        base_url="http://load-test", timeout=120)
+                    samples = asyncio.run(_run_api(params, client, **kwargs))
+    return summarise(samples, duration)
+
+
+# ---------------------------------------------------------------------------
+# REPORTING
+# ---------------------------------------------------------------------------
+
+def _percentile(ordered: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarise(samples: list, duration: float) -> dict:
+    """Per-request and overall count, errors, req/s and latency (ms)."""
+    groups = defaultdict(list)
+    for name, seconds, ok in samples:
+        groups[name].append((seconds, ok))
+        groups["ALL"].append((seconds, ok))
+    results = {}
+    for name in sorted(groups, key=lambda n: (n == "ALL", n)):
+        ordered = sorted(s * 1000 for s, _ in groups[name])
+        results[name] = {
+            "count": len(ordered),
+            "errors": sum(1 for _, ok in groups[name] if not ok),
+            "rps": round(len(ordered) / duration, 2),
+            "p50_ms": round(_percentile(ordered, 0.50), 1),
+            "p95_ms": round(_percentile(ordered, 0.95), 1),
+            "p99_ms": round(_percentile(ordered, 0.99), 1),
+            "max_ms": round(ordered[-1], 1),
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Regressions of results against a saved baseline."""
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if cur["errors"] / cur["count"] > base["errors"] / base["count"]:
+            problems.append("{}: error rate {:.1%} (was {:.1%})".format(
+                name, cur["errors"] / cur["count"],
+                base["errors"] / base["count"]))
+        slower = cur["p95_ms"] - base["p95_ms"]
+        if (slower > LATENCY_FLOOR_MS
+                and cur["p95_ms"] > base["p95_ms"] * (1 + LATENCY_TOLERANCE)):
+            problems.append("{}: p95 {:.1f}ms (was {:.1f}ms)".format(
+                name, cur["p95_ms"], base["p95_ms"]))
+    total, base = results.get("ALL"), baseline.get("ALL")
+    if total and base and total["rps"] < base["rps"] * (1 - THROUGHPUT_TOLERANCE):
+        problems.append("ALL: {:.1f} req/s (was {:.1f})".format(
+            total["rps"], base["rps"]))
+    return problems
+
+
+def format_report(results: dict) -> str:
+    lines = ["{:<36} {:>7} {:>6} {:>8} {:>9} {:>9} {:>9} {:>9}".format(
+        "request", "count", "errors", "req/s", "p50", "p95", "p99", "max")]
+    for name, r in results.items():
+        lines.append(
+            "{:<36} {:>7} {:>6} {:>8.2f} {:>7.1f}ms {:>7.1f}ms {:>7.1f}ms "
+            "{:>7.1f}ms".format(name, r["count"], r["errors"], r["rps"],
+                                r["p50_ms"], r["p95_ms"], r["p99_ms"],
+                                r["max_ms"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("fixture_dir",
+                        help="Fixtures written by synthetic_data.py")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="api")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0,
+                        help="Seconds run before measuring")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="Mean think time between a user's requests (s)")
+    parser.add_argument("--url", help="Running server to load (api mix)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--save", help="Write results JSON (baseline)")
+    parser.add_argument("--baseline", help="Compare against a saved baseline")
+    args = parser.parse_args()
+
+    results = run_load(Path(args.fixture_dir), mix=args.mix,
+                       concurrency=args.concurrency, duration=args.duration,
+                       warmup=args.warmup, think=args.think, url=args.url,
+                       seed=args.seed)
+    print(format_report(results))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"generated_at": datetime.now().isoformat(),
+                       "config": {k: v for k, v in vars(args).items()
+                                  if k not in ("save", "baseline")},
+                       "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f)["results"])
+        for p in problems:
+            print("REGRESSION " + p)
+        sys.exit(1 if problems else 0)
@@ -13,6 +13,8 @@ import os
 import sqlite3
 from pathlib import Path
 
+import telemetry
+
 DB_PATH = str(Path(__file__).resolve().parent.parent / "data" / "harris_farm.db")
 COORDS_PATH = str(Path(__file__).resolve().parent.parent / "data" / "postcode_coords.json")
 
@@ -57,7 +59,7 @@ STORE_LOCATIONS = {
 
 
 def _get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    conn = telemetry.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -9,11 +9,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+import telemetry
+
 DB_PATH = str(Path(__file__).resolve().parent / "hub_data.db")
 
 
 def _get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    conn = telemetry.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     return conn
@@ -8,11 +8,13 @@ import os
 import sqlite3
 from pathlib import Path
 
+import telemetry
+
 PLU_DB = str(Path(__file__).resolve().parent.parent / "data" / "harris_farm_plu.db")
 
 
 def _get_conn():
-    conn = sqlite3.connect(PLU_DB)
+    conn = telemetry.connect(PLU_DB)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     return conn
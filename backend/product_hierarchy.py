@@ -6,12 +6,25 @@ search, and statistics functions.
 Source: Product Hierarchy 20260215.xlsx → data/product_hierarchy.parquet
 Hierarchy: Department (9) → Major Group (30) → Minor Group (405) →
            HFM Item (4,465) → Product/SKU (72,911)
+
+Browsing and search are served from a HierarchyIndex built once per
+hierarchy version (parquet mtime + size): a precomputed department →
+major → minor → HFM item → product tree for O(1) child lookups, a
+bigram/trigram inverted index over product and level names, and a sorted
+PLU list for prefix matches. The index also lists every distinct level
+and product name with its hierarchy codes (entities) for the NL query
+entity recogniser in dashboards/shared/schema_context.py.
 """
 
 import logging
-from functools import lru_cache
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import cached_property, lru_cache
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger("hub_api")
@@ -40,6 +53,319 @@ def load_hierarchy() -> pd.DataFrame:
     return df
 
 
+# ---------------------------------------------------------------------------
+# SEARCH INDEX + TREE
+# ---------------------------------------------------------------------------
+
+_EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+# Hierarchy level name columns matched by search_hierarchy()
+_LEVEL_COLUMNS = ["DepartmentDesc", "MajorGroupDesc", "MinorGroupDesc",
+                  "HFMItemDesc"]
+
+# search_hierarchy() result key -> hierarchy column
+_RECORD_COLUMNS = {
+    "product_number": "ProductNumber",
+    "product_name": "ProductName",
+    "dept_code": "DepartmentCode",
+    "dept_name": "DepartmentDesc",
+    "major_code": "MajorGroupCode",
+    "major_name": "MajorGroupDesc",
+    "minor_code": "MinorGroupCode",
+    "minor_name": "MinorGroupDesc",
+    "hfm_item_code": "HFMItem",
+    "hfm_item_name": "HFMItemDesc",
+    "lifecycle": "ProductLifecycleStateId",
+}
+
+
+# Levels listed by HierarchyIndex.entities, broadest first:
+# (level, name column, {search_hierarchy() code key: code column})
+_ENTITY_LEVELS = [
+    ("department", "DepartmentDesc", {"dept_code": "DepartmentCode"}),
+    ("major_group", "MajorGroupDesc", {"dept_code": "DepartmentCode",
+                                       "major_code": "MajorGroupCode"}),
+    ("minor_group", "MinorGroupDesc", {"dept_code": "DepartmentCode",
+                                       "major_code": "MajorGroupCode",
+                                       "minor_code": "MinorGroupCode"}),
+    ("hfm_item", "HFMItemDesc", {"dept_code": "DepartmentCode",
+                                 "major_code": "MajorGroupCode",
+                                 "minor_code": "MinorGroupCode",
+                                 "hfm_item_code": "HFMItem"}),
+    ("product", "ProductName", {"product_number": "ProductNumber"}),
+]
+
+_LEVEL_CODE_PREFIX = re.compile(r"^\d+\s*-\s*")
+_EACH_SUFFIX = re.compile(r"\s*-\s*EA(?:CH)?$", re.IGNORECASE)
+
+
+def entity_name(desc: str) -> str:
+    """Level description without its code or unit: "31 - BANANAS - EA"
+    -> "BANANAS"."""
+    return _EACH_SUFFIX.sub("", _LEVEL_CODE_PREFIX.sub("", desc.strip()))
+
+
+class _NgramIndex:
+    """Bigram + trigram inverted index over lowercase strings.
+
+    Grams are packed into integers (21 bits per code point) so the whole
+    index is built with numpy rather than a Python loop per character.
+    search() returns the ascending ids of every text containing the query
+    as a literal substring.
+    """
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.postings = {2: {}, 3: {}}
+        if not texts:
+            return
+        chars = np.array(texts, dtype=str)
+        width = chars.dtype.itemsize // 4
+        if width < 2:
+            return
+        chars = chars.view(np.uint32).reshape(len(texts), width) \
+            .astype(np.uint64)
+        lengths = (chars > 0).sum(axis=1)
+        rows = np.arange(len(texts))
+        for n in (2, 3):
+            if width < n:
+                continue
+            codes = np.zeros((len(texts), width - n + 1), dtype=np.uint64)
+            for j in range(n):
+                codes = (codes << np.uint64(21)) | chars[:, j:width - n + 1 + j]
+            valid = (np.arange(width - n + 1)[None, :]
+                     <= (lengths - n)[:, None])
+            codes = codes[valid]
+            ids = np.broadcast_to(rows[:, None], valid.shape)[valid]
+            # Stable sort keeps ids ascending within each gram
+            order = np.argsort(codes, kind="stable")
+            codes, ids = codes[order], ids[order]
+            keep = np.ones(len(codes), dtype=bool)
+            keep[1:] = (codes[1:] != codes[:-1]) | (ids[1:] != ids[:-1])
+            codes, ids = codes[keep], ids[keep]
+            bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+            starts = np.concatenate([[0], bounds]) if len(codes) else bounds
+            self.postings[n] = dict(zip(codes[starts].tolist(),
+                                        np.split(ids, bounds)))
+
+    @staticmethod
+    def _code(gram: str) -> int:
+        code = 0
+        for ch in gram:
+            code = (code << 21) | ord(ch)
+        return code
+
+    def search(self, q: str) -> np.ndarray:
+        if len(q) < 2:
+            # Too short for a gram -- plain scan
+            return np.asarray([i for i, t in enumerate(self.texts) if q in t],
+                              dtype=np.int64)
+        n = 2 if len(q) == 2 else 3
+        postings = self.postings[n]
+        lists = []
+        for gram in {q[j:j + n] for j in range(len(q) - n + 1)}:
+            ids = postings.get(self._code(gram))
+            if ids is None:
+                return _EMPTY_IDS
+            lists.append(ids)
+        lists.sort(key=len)
+        candidates = lists[0]
+        if len(lists) > 1:
+            candidates = np.intersect1d(candidates, lists[1],
+                                        assume_unique=True)
+        if len(q) <= 3:
+            return candidates
+        texts = self.texts
+        return np.asarray([i for i in candidates if q in texts[i]],
+                          dtype=np.int64)
+
+
+def _group_list(sizes: pd.Series, parent_levels: int, name_key: str = None):
+    """Turn groupby sizes keyed (*parent codes, code, name) into
+    {parent key: [{code, name, total_products}]} sorted like the original
+    per-call groupbys (by count desc, or by name)."""
+    children = defaultdict(list)
+    for key, count in sizes.items():
+        parent = tuple(str(k) for k in key[:parent_levels])
+        children[parent].append({
+            "code": str(key[parent_levels]),
+            "name": str(key[parent_levels + 1]),
+            "total_products": int(count),
+        })
+    for items in children.values():
+        if name_key:
+            items.sort(key=lambda d: d[name_key])
+        else:
+            items.sort(key=lambda d: d["total_products"], reverse=True)
+    return dict(children)
+
+
+class HierarchyIndex:
+    """Immutable search index and browse tree over one hierarchy version."""
+
+    def __init__(self, df: pd.DataFrame, version=None):
+        self.version = version
+        self.df = df
+        self.departments = []
+        self.majors, self.minors, self.hfm_items, self.products = {}, {}, {}, {}
+        self.plu_rows = {}
+        if df.empty:
+            self.active = np.zeros(0, dtype=bool)
+            self._plu_sorted, self._plu_order = [], _EMPTY_IDS
+            self.names = _NgramIndex([])
+            self.levels, self._level_rows = _NgramIndex([]), []
+            return
+
+        self._columns = {
+            key: df[col].astype(str).tolist()
+            for key, col in _RECORD_COLUMNS.items()
+        }
+        self.active = (df["ProductLifecycleStateId"] == "Active").to_numpy()
+        self._build_tree(df[self.active])
+
+        plu = df["ProductNumber"].to_numpy(dtype=object)
+        for i in range(len(plu) - 1, -1, -1):
+            self.plu_rows[plu[i]] = i
+        self._plu_order = np.argsort(plu, kind="stable")
+        self._plu_sorted = plu[self._plu_order].tolist()
+
+        self.names = _NgramIndex(
+            df["ProductName"].fillna("").str.lower().tolist())
+        level_texts, self._level_rows = [], []
+        for col in _LEVEL_COLUMNS:
+            for desc, rows in df.groupby(col, sort=False).indices.items():
+                level_texts.append(str(desc).lower())
+                self._level_rows.append(rows)
+        self.levels = _NgramIndex(level_texts)
+
+    def _build_tree(self, active: pd.DataFrame) -> None:
+        dept = ["DepartmentCode"]
+        major = dept + ["MajorGroupCode"]
+        minor = major + ["MinorGroupCode"]
+
+        depts = _group_list(
+            active.groupby(dept + ["DepartmentDesc"]).size(), 0)
+        self.departments = [
+            dict(d, active_products=d["total_products"], deleted_products=0,
+                 new_inactive=0, derange=0)
+            for d in depts.get((), [])
+        ]
+        self.majors = {
+            k: [dict(m, active_products=m["total_products"]) for m in v]
+            for k, v in _group_list(
+                active.groupby(major + ["MajorGroupDesc"]).size(), 1).items()
+        }
+        self.minors = _group_list(
+            active.groupby(minor + ["MinorGroupDesc"]).size(), 2)
+        self.hfm_items = _group_list(
+            active.groupby(minor + ["HFMItem", "HFMItemDesc"]).size(), 3,
+            name_key="name")
+
+        numbers = active["ProductNumber"].astype(str).tolist()
+        names = active["ProductName"].astype(str).tolist()
+        lifecycles = active["ProductLifecycleStateId"].astype(str).tolist()
+        for key, rows in active.groupby(minor + ["HFMItem"]).indices.items():
+            self.products[tuple(str(k) for k in key)] = sorted(
+                (
+                    {"product_number": numbers[i],
+                     "product_name": names[i],
+                     "lifecycle": lifecycles[i]}
+                    for i in rows
+                ),
+                key=lambda d: d["product_name"],
+            )
+
+    @cached_property
+    def entities(self) -> list[tuple]:
+        """(name, level, [codes]) for every distinct department, major
+        group, minor group, HFM item and product name, broadest level
+        first. codes holds one dict of search_hierarchy() code keys per
+        hierarchy position carrying the name ("BANANAS" is a minor group
+        under both Fruit and Dried Fruit). Built on first use."""
+        out = []
+        if self.df.empty:
+            return out
+        for level, name_col, code_cols in _ENTITY_LEVELS:
+            frame = self.df[[name_col, *code_cols.values()]].dropna() \
+                .drop_duplicates().astype(str)
+            positions = defaultdict(list)
+            for name, *codes in frame.itertuples(index=False, name=None):
+                positions[entity_name(name)].append(
+                    dict(zip(code_cols, codes)))
+            out.extend((name, level, codes)
+                       for name, codes in positions.items() if name)
+        return out
+
+    def record(self, i: int) -> dict:
+        """search_hierarchy() result dict for row i."""
+        return {key: values[i] for key, values in self._columns.items()}
+
+    # -- search ---------------------------------------------------------
+
+    def _plu_prefix_rows(self, q: str) -> np.ndarray:
+        lo = bisect_left(self._plu_sorted, q)
+        hi = bisect_left(self._plu_sorted, q + "\uffff", lo)
+        return np.sort(self._plu_order[lo:hi])
+
+    def _level_match_rows(self, q: str) -> np.ndarray:
+        matched = self.levels.search(q)
+        if not len(matched):
+            return _EMPTY_IDS
+        return np.unique(np.concatenate(
+            [self._level_rows[i] for i in matched]))
+
+    def search(self, query: str, limit: int = 50,
+               active_only: bool = True) -> list[int]:
+        """Row ids ranked exact PLU > PLU prefix > product name >
+        hierarchy level name, in hierarchy order within each tier."""
+        q = query.strip()
+        ql = q.lower()
+        tiers = [
+            lambda: [self.plu_rows[q]] if q in self.plu_rows else [],
+            lambda: self._plu_prefix_rows(q),
+            lambda: self.names.search(ql),
+            lambda: self._level_match_rows(ql),
+        ]
+        out, seen = [], set()
+        for tier in tiers:
+            for i in tier():
+                i = int(i)
+                if i in seen or (active_only and not self.active[i]):
+                    continue
+                seen.add(i)
+                out.append(i)
+                if len(out) >= limit:
+                    return out
+        return out
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _hierarchy_version():
+    try:
+        stat = HIERARCHY_PARQUET.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_hierarchy_index() -> HierarchyIndex:
+    """Shared HierarchyIndex, rebuilt when the hierarchy parquet changes."""
+    global _index
+    version = _hierarchy_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            if _index is not None:
+                load_hierarchy.cache_clear()
+            _index = HierarchyIndex(load_hierarchy(), version)
+        return _index
+
+
 # ---------------------------------------------------------------------------
 # HIERARCHY BROWSING
 # ---------------------------------------------------------------------------
@@ -50,129 +376,35 @@ def get_departments() -> list[dict]:
     Returns list of dicts with: code, name, total_products (active only),
     active_products, deleted_products.
     """
-    df = load_hierarchy()
-    if df.empty:
-        return []
-
-    active_df = df[df["ProductLifecycleStateId"] == "Active"]
-    if active_df.empty:
-        return []
-
-    result = []
-    for (code, name), group in active_df.groupby(["DepartmentCode", "DepartmentDesc"]):
-        result.append({
-            "code": str(code),
-            "name": str(name),
-            "total_products": len(group),
-            "active_products": len(group),
-            "deleted_products": 0,
-            "new_inactive": 0,
-            "derange": 0,
-        })
-    return sorted(result, key=lambda d: d["total_products"], reverse=True)
+    return [dict(d) for d in get_hierarchy_index().departments]
 
 
 def get_major_groups(dept_code: str) -> list[dict]:
     """Return major groups within a department that have active products."""
-    df = load_hierarchy()
-    if df.empty:
-        return []
-
-    dept_df = df[
-        (df["DepartmentCode"] == str(dept_code))
-        & (df["ProductLifecycleStateId"] == "Active")
-    ]
-    if dept_df.empty:
-        return []
-
-    result = []
-    for (code, name), group in dept_df.groupby(
-        ["MajorGroupCode", "MajorGroupDesc"]
-    ):
-        result.append({
-            "code": str(code),
-            "name": str(name),
-            "total_products": len(group),
-            "active_products": len(group),
-        })
-    return sorted(result, key=lambda d: d["total_products"], reverse=True)
+    majors = get_hierarchy_index().majors
+    return [dict(m) for m in majors.get((str(dept_code),), [])]
 
 
 def get_minor_groups(dept_code: str, major_code: str) -> list[dict]:
     """Return minor groups within a major group that have active products."""
-    df = load_hierarchy()
-    if df.empty:
-        return []
-
-    filtered = df[
-        (df["DepartmentCode"] == str(dept_code))
-        & (df["MajorGroupCode"] == str(major_code))
-        & (df["ProductLifecycleStateId"] == "Active")
-    ]
-    if filtered.empty:
-        return []
-
-    result = []
-    for (code, name), group in filtered.groupby(
-        ["MinorGroupCode", "MinorGroupDesc"]
-    ):
-        result.append({
-            "code": str(code),
-            "name": str(name),
-            "total_products": len(group),
-        })
-    return sorted(result, key=lambda d: d["total_products"], reverse=True)
+    minors = get_hierarchy_index().minors
+    return [dict(m) for m in
+            minors.get((str(dept_code), str(major_code)), [])]
 
 
 def get_hfm_items(dept_code, major_code, minor_code):
     """Return HFM Items within a minor group that have active products."""
-    df = load_hierarchy()
-    if df.empty:
-        return []
-
-    filtered = df[
-        (df["DepartmentCode"] == str(dept_code))
-        & (df["MajorGroupCode"] == str(major_code))
-        & (df["MinorGroupCode"] == str(minor_code))
-        & (df["ProductLifecycleStateId"] == "Active")
-    ]
-    if filtered.empty:
-        return []
-
-    result = []
-    for (code, name), group in filtered.groupby(["HFMItem", "HFMItemDesc"]):
-        result.append({
-            "code": str(code),
-            "name": str(name),
-            "total_products": len(group),
-        })
-    return sorted(result, key=lambda d: d["name"])
+    items = get_hierarchy_index().hfm_items
+    key = (str(dept_code), str(major_code), str(minor_code))
+    return [dict(h) for h in items.get(key, [])]
 
 
 def get_products_in_hfm_item(dept_code, major_code, minor_code, hfm_item_code):
     """Return active products/SKUs within an HFM item."""
-    df = load_hierarchy()
-    if df.empty:
-        return []
-
-    filtered = df[
-        (df["DepartmentCode"] == str(dept_code))
-        & (df["MajorGroupCode"] == str(major_code))
-        & (df["MinorGroupCode"] == str(minor_code))
-        & (df["HFMItem"] == str(hfm_item_code))
-        & (df["ProductLifecycleStateId"] == "Active")
-    ]
-    if filtered.empty:
-        return []
-
-    result = []
-    for _, row in filtered.iterrows():
-        result.append({
-            "product_number": str(row.ProductNumber),
-            "product_name": str(row.ProductName),
-            "lifecycle": str(row.ProductLifecycleStateId),
-        })
-    return sorted(result, key=lambda d: d["product_name"])
+    products = get_hierarchy_index().products
+    key = (str(dept_code), str(major_code), str(minor_code),
+           str(hfm_item_code))
+    return [dict(p) for p in products.get(key, [])]
 
 
 def get_products(
@@ -207,12 +439,12 @@ def search_products(query: str, limit: int = 20) -> list[dict]:
     Returns list of dicts with ProductNumber, ProductName,
     DepartmentDesc, MajorGroupDesc, lifecycle.
     """
-    df = load_hierarchy()
-    if df.empty:
+    index = get_hierarchy_index()
+    if index.df.empty:
         return []
 
-    mask = df["ProductName"].str.contains(query, case=False, na=False)
-    matches = df[mask].head(limit)
+    rows = index.names.search(query.lower())[:limit]
+    matches = index.df.iloc[rows]
 
     return [
         {
@@ -237,61 +469,10 @@ def search_hierarchy(query, limit=50):
 
     Returns list of dicts with all hierarchy codes needed for filter dict.
     """
-    df = load_hierarchy()
-    if df.empty or len(query.strip()) < 2:
+    if len(query.strip()) < 2:
         return []
-
-    df = df[df["ProductLifecycleStateId"] == "Active"]
-    if df.empty:
-        return []
-
-    q = query.strip()
-
-    # Exact PLU match first (highest priority)
-    plu_mask = df["ProductNumber"] == q
-
-    # Substring match across name and hierarchy levels
-    text_mask = (
-        df["ProductName"].str.contains(q, case=False, na=False)
-        | df["DepartmentDesc"].str.contains(q, case=False, na=False)
-        | df["MajorGroupDesc"].str.contains(q, case=False, na=False)
-        | df["MinorGroupDesc"].str.contains(q, case=False, na=False)
-        | df["HFMItemDesc"].str.contains(q, case=False, na=False)
-    )
-
-    # PLU prefix match (e.g., "123" matches "12345")
-    plu_prefix_mask = df["ProductNumber"].str.startswith(q, na=False)
-
-    # Combine: exact PLU first, then PLU prefix, then text matches
-    combined = df[plu_mask | text_mask | plu_prefix_mask].copy()
-
-    # Priority sort: exact PLU > PLU prefix > name match > hierarchy match
-    combined["_priority"] = 3  # default: hierarchy match
-    combined.loc[
-        combined["ProductName"].str.contains(q, case=False, na=False),
-        "_priority"] = 2
-    combined.loc[
-        combined["ProductNumber"].str.startswith(q, na=False),
-        "_priority"] = 1
-    combined.loc[combined["ProductNumber"] == q, "_priority"] = 0
-    combined = combined.sort_values("_priority").head(limit)
-
-    results = []
-    for _, row in combined.iterrows():
-        results.append({
-            "product_number": str(row.ProductNumber),
-            "product_name": str(row.ProductName),
-            "dept_code": str(row.DepartmentCode),
-            "dept_name": str(row.DepartmentDesc),
-            "major_code": str(row.MajorGroupCode),
-            "major_name": str(row.MajorGroupDesc),
-            "minor_code": str(row.MinorGroupCode),
-            "minor_name": str(row.MinorGroupDesc),
-            "hfm_item_code": str(row.HFMItem),
-            "hfm_item_name": str(row.HFMItemDesc),
-            "lifecycle": str(row.ProductLifecycleStateId),
-        })
-    return results
+    index = get_hierarchy_index()
+    return [index.record(i) for i in index.search(query, limit)]
 
 
 def get_product_by_plu(plu_id: str):
@@ -304,29 +485,29 @@ def get_product_by_plu(plu_id: str):
 
     Returns dict with full hierarchy info, or None if not found.
     """
-    df = load_hierarchy()
-    if df.empty:
+    index = get_hierarchy_index()
+    if index.df.empty:
         return None
 
     plu = str(plu_id).strip()
 
     # Try exact match first
-    match = df[df["ProductNumber"] == plu]
+    row_id = index.plu_rows.get(plu)
 
     # Fallback: truncate trailing digits (check digit / price suffix)
-    if match.empty and len(plu) >= 5:
+    if row_id is None and len(plu) >= 5:
         for trim in range(1, 3):  # try removing 1 then 2 digits
             truncated = plu[: len(plu) - trim]
             if len(truncated) < 4:
                 break
-            match = df[df["ProductNumber"] == truncated]
-            if not match.empty:
+            row_id = index.plu_rows.get(truncated)
+            if row_id is not None:
                 break
 
-    if match.empty:
+    if row_id is None:
         return None
 
-    row = match.iloc[0]
+    row = index.df.iloc[row_id]
     return {
         "product_number": row.ProductNumber,
         "product_name": row.ProductName,
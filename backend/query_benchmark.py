@@ -0,0 +1,359 @@
+"""
+Harris Farm Hub — Query Catalog Benchmark
+Runs every transaction_queries.QUERIES template against a synthetic local
+parquet fixture under DuckDB's JSON profiler and reports, per query:
+latency, rows returned, and parquet row groups scanned vs. total (from
+the SaleDate filters DuckDB pushed into each scan, checked against the
+fixture's row-group min/max statistics).
+
+The fixture is sorted by SaleDate with small row groups, like the
+production export, so a template that filters on a timestamp range
+should scan only the row groups covering that range. --enrich builds the
+enriched layout (transaction_enrichment.py) from the fixture first, so
+transactions_enriched reads it instead of joining the dimensions live;
+--customers likewise builds the customer summary (customer_summary.py).
+
+Usage:
+    python backend/query_benchmark.py                          # report
+    python backend/query_benchmark.py --save bench.json        # baseline
+    python backend/query_benchmark.py --baseline bench.json    # exit 1 on regression
+    python backend/query_benchmark.py --no-rewrite             # raw templates
+    python backend/query_benchmark.py --enrich                 # enriched layout
+    python backend/query_benchmark.py --customers              # customer tables
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from customer_summary import refresh_customer_summary
+from query_rewriter import rewrite_sargable
+from transaction_enrichment import build_enriched, fresh_files
+from transaction_layer import STORE_NAMES, TransactionStore
+from transaction_queries import QUERIES, build_query
+
+logger = logging.getLogger("hub_api")
+
+HIERARCHY_PARQUET = Path(__file__).parent.parent / "data" / "product_hierarchy.parquet"
+
+# FY2024 - FY2026 (fiscal calendar: 2023-07-03 .. 2026-06-28)
+FIXTURE_START = date(2023, 7, 3)
+FIXTURE_DAYS = 1092
+FIXTURE_ROWS = 900_000
+ROW_GROUP_SIZE = 8_192
+
+# Params that bound a template in time -- without them a full scan is expected
+_DATE_PARAMS = {"start", "end", "prior_start", "prior_end", "fin_year"}
+
+# Regression thresholds
+LATENCY_TOLERANCE = 0.5     # 50% slower ...
+LATENCY_FLOOR_MS = 5.0      # ... and at least 5ms slower
+
+_SCAN_FILTER = re.compile(
+    r"SaleDate\s*(>=|<=|>|<|=)\s*'([^']+)'::TIMESTAMP")
+
+
+# ---------------------------------------------------------------------------
+# FIXTURE
+# ---------------------------------------------------------------------------
+
+def _fixture_plus(n: int = 400) -> list[str]:
+    """Active PLUs from the hierarchy, so hierarchy joins find rows."""
+    if HIERARCHY_PARQUET.exists():
+        df = pd.read_parquet(HIERARCHY_PARQUET,
+                             columns=["ProductNumber", "ProductLifecycleStateId"])
+        active = df.loc[df["ProductLifecycleStateId"] == "Active",
+                        "ProductNumber"].astype(str)
+        if len(active):
+            return active.sample(min(n, len(active)), random_state=1).tolist()
+    return [str(1000 + i) for i in range(n)]
+
+
+def build_fixture(path: Path, rows: int = FIXTURE_ROWS,
+                  start: date = FIXTURE_START, days: int = FIXTURE_DAYS,
+                  row_group_size: int = ROW_GROUP_SIZE, seed: int = 7) -> Path:
+    """Write a synthetic transactions parquet sorted by SaleDate."""
+    rng = np.random.default_rng(seed)
+    stores = list(STORE_NAMES)[:8]
+    plus = np.array(_fixture_plus(), dtype=object)
+
+    # Trading 21:00-09:00 UTC (08:00-20:00 AEDT), ordered by time
+    day = np.sort(rng.integers(0, days, rows))
+    seconds = rng.integers(0, 12 * 3600, rows)
+    sale_ts = (np.datetime64(start.isoformat())
+               + (day * 86400 - 3 * 3600 + seconds).astype("timedelta64[s]"))
+    order = np.argsort(sale_ts, kind="stable")
+    sale_ts = sale_ts[order]
+
+    store = np.array(stores, dtype=object)[rng.integers(0, len(stores), rows)]
+    basket = np.arange(rows) // 4
+    reference = np.char.add(store.astype(str), np.char.add(
+        "-", basket.astype(str))).astype(object)
+    customer = np.where(
+        rng.random(rows) < 0.4, "",
+        np.char.add("C", rng.integers(0, 5_000, rows).astype(str)),
+    ).astype(object)
+    quantity = rng.integers(1, 4, rows).astype(float)
+    quantity[rng.random(rows) < 0.02] *= -1
+    sales = np.round(quantity * rng.uniform(1.5, 12.0, rows), 2)
+
+    table = pa.table({
+        "Store_ID": store,
+        "PLUItem_ID": plus[rng.integers(0, len(plus), rows)],
+        "SaleDate": pa.array(sale_ts.astype("datetime64[us]")),
+        "Reference2": reference,
+        "CustomerCode": customer,
+        "Quantity": quantity,
+        "SalesIncGST": sales,
+        "GST": np.round(np.where(rng.random(rows) < 0.3, sales / 11, 0.0), 2),
+        "EstimatedCOGS": np.round(-sales * rng.uniform(0.5, 0.75, rows), 2),
+    })
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path, row_group_size=row_group_size,
+                   compression="zstd")
+    return path
+
+
+def default_params(start: date = FIXTURE_START) -> dict:
+    """Representative parameters for every catalog param key: a 4-week
+    window in the middle of FY2026, the prior 4 weeks, one store / PLU /
+    customer, and FY2026 vs FY2025."""
+    window = start + timedelta(days=728 + 189)
+    return {
+        "start": window.isoformat(),
+        "end": (window + timedelta(days=28)).isoformat(),
+        "prior_start": (window - timedelta(days=28)).isoformat(),
+        "prior_end": window.isoformat(),
+        "store_id": list(STORE_NAMES)[1],
+        "plu_id": _fixture_plus()[0],
+        "customer_code": "C42",
+        "dept_code": "10",
+        "major_code": "1",
+        "fin_year": 2026,
+        "fin_year_2": 2025,
+        "limit": 20,
+        "threshold": 10,
+    }
+
+
+# ---------------------------------------------------------------------------
+# PROFILING
+# ---------------------------------------------------------------------------
+
+def _row_group_ranges(conn, path: Path) -> list[tuple]:
+    rows = conn.execute(
+        "SELECT stats_min, stats_max FROM parquet_metadata(?) "
+        "WHERE path_in_schema = 'SaleDate' ORDER BY row_group_id",
+        [str(path)],
+    ).fetchall()
+    return [(pd.Timestamp(lo), pd.Timestamp(hi)) for lo, hi in rows]
+
+
+def _scan_nodes(node: dict):
+    if node.get("operator_type") == "TABLE_SCAN" or \
+            node.get("operator_name") == "READ_PARQUET":
+        yield node
+    for child in node.get("children", []):
+        yield from _scan_nodes(child)
+
+
+def _groups_matching(filters: str, ranges: list[tuple]) -> int:
+    """Row groups whose SaleDate [min, max] can satisfy the scan filters."""
+    lo, hi = pd.Timestamp.min, pd.Timestamp.max
+    for op, value in _SCAN_FILTER.findall(filters):
+        try:
+            ts = pd.Timestamp(value)
+        except ValueError:  # 'infinity' bounds do not narrow the scan
+            continue
+        if op in (">=", ">", "="):
+            lo = max(lo, ts)
+        if op in ("<=", "<", "="):
+            hi = min(hi, ts)
+    return sum(1 for rg_lo, rg_hi in ranges if rg_hi >= lo and rg_lo <= hi)
+
+
+def profile_query(conn, sql: str, params: list, ranges: dict,
+                  repeat: int = 3) -> dict:
+    """Run sql `repeat` times under the JSON profiler; keep the fastest.
+
+    ranges maps each transaction parquet path to its row-group SaleDate
+    ranges; scans of other files (dimensions, derived tables) are ignored.
+    """
+    fd, prof_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        conn.execute("PRAGMA enable_profiling='json'")
+        conn.execute("SET profiling_output='{}'".format(
+            prof_path.replace("'", "''")))
+        best = None
+        for _ in range(repeat):
+            result = conn.execute(sql, params).fetchall()
+            with open(prof_path) as f:
+                profile = json.load(f)
+            if best is None or profile["latency"] < best["latency"]:
+                best = profile
+        conn.execute("PRAGMA disable_profiling")
+    finally:
+        os.unlink(prof_path)
+
+    scanned = total = 0
+    for scan in _scan_nodes(best):
+        info = scan.get("extra_info", {})
+        files = json.dumps(info.get("Filename(s)", ""))
+        groups = next((r for path, r in ranges.items() if path in files), None)
+        if groups is None:
+            continue
+        filters = info.get("Filters", "")
+        if isinstance(filters, list):
+            filters = "\n".join(filters)
+        scanned += _groups_matching(filters, groups)
+        total += len(groups)
+
+    return {
+        "latency_ms": round(best["latency"] * 1000, 2),
+        "rows_returned": len(result),
+        "row_groups_scanned": scanned,
+        "row_groups_total": total,
+    }
+
+
+def _is_unpruned(name: str, metrics: dict) -> bool:
+    """A date-bounded template that still read every row group."""
+    return (bool(_DATE_PARAMS & set(QUERIES[name]["params"]))
+            and metrics["row_groups_total"] > 0
+            and metrics["row_groups_scanned"] >= metrics["row_groups_total"])
+
+
+def run_benchmark(fixture: Optional[Path] = None, rewrite: bool = True,
+                  repeat: int = 3, queries: Optional[list] = None,
+                  enrich: bool = False, customers: bool = False) -> dict:
+    """Profile every catalog query. Returns {query_name: metrics}."""
+    work = tempfile.TemporaryDirectory()
+    if fixture is None:
+        fixture = build_fixture(Path(work.name) / "FY26.parquet")
+    fixture = Path(fixture)
+    # No presence build (raw OOS macros); enriched layout and customer
+    # tables only if asked
+    store = TransactionStore(parquet_files={"FY26": fixture},
+                             presence_dir=Path(work.name) / "derived",
+                             enriched_dir=Path(work.name) / "enriched",
+                             customer_dir=Path(work.name) / "customers")
+    if enrich:
+        build_enriched(store, enriched_dir=Path(work.name) / "enriched")
+    if customers:
+        refresh_customer_summary(store, derived_dir=Path(work.name) / "customers")
+    params = default_params()
+
+    results = {}
+    conn = store._get_connection()
+    try:
+        files = [fixture] + list(fresh_files(
+            store.available_fys, Path(work.name) / "enriched").values())
+        ranges = {str(path): _row_group_ranges(conn, path) for path in files}
+        for name in queries or QUERIES:
+            try:
+                sql, args = build_query(name, sargable=rewrite, **params)
+                if rewrite:
+                    sql = rewrite_sargable(sql)
+                results[name] = profile_query(conn, sql, args, ranges,
+                                              repeat)
+                results[name]["unpruned"] = _is_unpruned(name, results[name])
+            except Exception as e:
+                results[name] = {"error": str(e).splitlines()[0]}
+    finally:
+        conn.close()
+        work.cleanup()
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Regressions of results against a saved baseline."""
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if "error" in cur and "error" not in base:
+            problems.append("{}: now fails ({})".format(name, cur["error"]))
+            continue
+        if "error" in cur or "error" in base:
+            continue
+        if cur.get("unpruned") and not base.get("unpruned"):
+            problems.append("{}: no longer prunes row groups".format(name))
+        elif cur["row_groups_scanned"] > base["row_groups_scanned"]:
+            problems.append("{}: scans {} row groups (was {})".format(
+                name, cur["row_groups_scanned"], base["row_groups_scanned"]))
+        slower = cur["latency_ms"] - base["latency_ms"]
+        if (slower > LATENCY_FLOOR_MS
+                and cur["latency_ms"] > base["latency_ms"] * (1 + LATENCY_TOLERANCE)):
+            problems.append("{}: {:.1f}ms (was {:.1f}ms)".format(
+                name, cur["latency_ms"], base["latency_ms"]))
+    return problems
+
+
+def format_report(results: dict) -> str:
+    lines = ["{:<34} {:>10} {:>8} {:>14}".format(
+        "query", "latency", "rows", "row groups")]
+    for name, r in results.items():
+        if "error" in r:
+            lines.append("{:<34} ERROR {}".format(name, r["error"]))
+            continue
+        flag = "  UNPRUNED" if r.get("unpruned") else ""
+        lines.append("{:<34} {:>8.1f}ms {:>8} {:>6}/{:<7}{}".format(
+            name, r["latency_ms"], r["rows_returned"],
+            r["row_groups_scanned"], r["row_groups_total"], flag))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--fixture", help="Existing parquet to benchmark")
+    parser.add_argument("--rows", type=int, default=FIXTURE_ROWS,
+                        help="Rows in the generated fixture")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-rewrite", action="store_true",
+                        help="Run templates without the sargable rewrites")
+    parser.add_argument("--enrich", action="store_true",
+                        help="Build and query the enriched layout")
+    parser.add_argument("--customers", action="store_true",
+                        help="Build and query the customer summary tables")
+    parser.add_argument("--save", help="Write results JSON (baseline)")
+    parser.add_argument("--baseline", help="Compare against a saved baseline")
+    parser.add_argument("queries", nargs="*", help="Subset of query names")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixture = (Path(args.fixture) if args.fixture else build_fixture(
+            Path(tmp_dir) / "FY26.parquet", rows=args.rows))
+        results = run_benchmark(fixture, rewrite=not args.no_rewrite,
+                                repeat=args.repeat,
+                                queries=args.queries or None,
+                                enrich=args.enrich,
+                                customers=args.customers)
+    print(format_report(results))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"generated_at": datetime.now().isoformat(),
+                       "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f)["results"])
+        for p in problems:
+            print("REGRESSION " + p)
+        sys.exit(1 if problems else 0)
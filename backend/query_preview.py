@@ -0,0 +1,347 @@
+"""
+Harris Farm Hub — Preview Sample and Approximate Queries
+Fast approximate answers for interactive dashboards: a page draws a
+preview at once and replaces it with the exact result when that lands
+(shared/progressive.py).
+
+TransactionStore.query(sql, params, preview=...) / run_query(...,
+preview=True) run in preview mode. Queries that declare how their columns
+scale (the "preview" entry of a transaction_queries template, or a spec
+dict) run against a materialised sample instead of every POS line:
+
+    Receipts are sampled whole: a line is kept when a salted hash of
+    Store_ID x Reference2 % MODULUS < REPLICATES, i.e. SAMPLE_RATE
+    (2%) of receipts as REPLICATES independent sub-samples. The query
+    runs once per sub-sample; additive columns (line counts, sums,
+    distinct receipts) are scaled by MODULUS and averaged, and the spread
+    between sub-samples gives a 95% margin of error per column
+    (<column>_moe in each row). Other numeric columns (averages, ratios)
+    are averaged across sub-samples; "omit" columns (e.g. distinct PLUs,
+    which do not scale) are None.
+
+Derived files (data/transactions/derived/preview_sample/):
+    <FY>-<id>.parquet
+        Every transaction column plus _replicate (0..REPLICATES-1) for the
+        sampled receipts, sorted by _replicate then SaleDate so each
+        sub-sample is a contiguous run of row groups.
+    preview_meta.json
+        Per FY: file and the size / mtime of the source parquet it was
+        built from -- the commit point.
+
+Other queries, or any query without a fresh sample for every fiscal year,
+run on the full data with one rewrite:
+
+    COUNT(DISTINCT x)  ->  APPROX_COUNT_DISTINCT(x)
+
+DuckDB's HyperLogLog roughly halves the time of a distinct-count scan but
+is only good to ~5-10%, so it is not applied to the (small) sample, where
+exact distinct counts are cheap and the margin of error covers them. It
+is still a full scan, so pages that go on to run the exact query skip the
+preview when TransactionStore.has_preview_sample() is False.
+
+Rebuild fiscal years whose source changed:
+    python backend/query_preview.py            # nightly
+    python backend/query_preview.py --force    # rebuild all
+"""
+
+import json
+import logging
+import math
+import re
+import uuid
+from datetime import datetime
+from numbers import Number
+from pathlib import Path
+from typing import Optional
+
+from derived_build import read_meta, signature, sql_path, write_meta
+
+logger = logging.getLogger("hub_api")
+
+PREVIEW_DIR = (Path(__file__).parent.parent / "data" / "transactions"
+               / "derived" / "preview_sample")
+
+# Bump when the sampling scheme changes -- older builds become stale
+LAYOUT_VERSION = 1
+
+REPLICATES = 4
+MODULUS = 200
+SAMPLE_RATE = REPLICATES / MODULUS
+
+# Two-sided 95% Student t quantile for REPLICATES - 1 degrees of freedom
+_T95 = 3.182
+
+ROW_GROUP_SIZE = 122_880
+
+# Salted, so the sampled receipts' hashes are unrelated to the ones
+# APPROX_COUNT_DISTINCT(Reference2) uses to pick its registers
+_BUCKET_SQL = ("hash(CONCAT('preview|', Store_ID, '|', Reference2)) % {}"
+               .format(MODULUS))
+
+
+# ---------------------------------------------------------------------------
+# APPROXIMATE DISTINCT COUNTS
+# ---------------------------------------------------------------------------
+
+_COUNT_DISTINCT = re.compile(r"(?<![\w.])COUNT\s*\(\s*DISTINCT\s+",
+                             re.IGNORECASE)
+
+
+def _close_paren(sql: str, pos: int):
+    """(index after the ')' closing an open paren before pos, whether a
+    top-level comma was seen), or (None, _) if unbalanced."""
+    depth, comma = 1, False
+    while pos < len(sql):
+        ch = sql[pos]
+        if ch == "'":
+            end = sql.find("'", pos + 1)
+            if end < 0:
+                return None, comma
+            pos = end
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if not depth:
+                return pos + 1, comma
+        elif ch == "," and depth == 1:
+            comma = True
+        pos += 1
+    return None, comma
+
+
+def approximate_distinct(sql: str) -> str:
+    """Rewrite single-argument COUNT(DISTINCT x) to APPROX_COUNT_DISTINCT(x)."""
+    out, pos = [], 0
+    for m in _COUNT_DISTINCT.finditer(sql):
+        if m.start() < pos:
+            continue
+        end, comma = _close_paren(sql, m.end())
+        if end is None or comma:
+            continue
+        out.append(sql[pos:m.start()])
+        out.append("APPROX_COUNT_DISTINCT(" + sql[m.end():end])
+        pos = end
+    out.append(sql[pos:])
+    return "".join(out)
+
+
+# ---------------------------------------------------------------------------
+# METADATA
+# ---------------------------------------------------------------------------
+
+def _meta_path(preview_dir: Path) -> Path:
+    return Path(preview_dir) / "preview_meta.json"
+
+
+def load_meta(preview_dir: Optional[Path] = None) -> dict:
+    """Build metadata ({fys: {FY: entry}}), empty if there is none."""
+    meta = read_meta(_meta_path(Path(preview_dir or PREVIEW_DIR)),
+                     version=LAYOUT_VERSION)
+    if meta is None:
+        return {"fys": {}}
+    meta.setdefault("fys", {})
+    return meta
+
+
+def sample_files(available_fys: dict,
+                 preview_dir: Optional[Path] = None) -> Optional[dict]:
+    """{FY: sample parquet} if every fiscal year has a sample built from
+    its current source, else None."""
+    if not available_fys:
+        return None
+    preview_dir = Path(preview_dir or PREVIEW_DIR)
+    entries = load_meta(preview_dir)["fys"]
+    files = {}
+    for fy, source in available_fys.items():
+        entry = entries.get(fy)
+        if not entry or entry.get("source_sig") != signature(source):
+            return None
+        path = preview_dir / entry["file"]
+        if not path.is_file():
+            return None
+        files[fy] = path
+    return files
+
+
+def replicate_scan(path: Path, replicate: int) -> str:
+    """Relation SQL for one sub-sample of a sample file."""
+    return ("(SELECT * EXCLUDE (_replicate) FROM read_parquet({}) "
+            "WHERE _replicate = {})".format(sql_path(path), int(replicate)))
+
+
+# ---------------------------------------------------------------------------
+# PREVIEW EXECUTION
+# ---------------------------------------------------------------------------
+
+def _number(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def merge_replicates(results: list, keys, scale, omit=()) -> list:
+    """Combine per-sub-sample rows into estimates with margins of error.
+
+    Rows are matched on the key columns. Scale columns are multiplied by
+    MODULUS (a key missing from a sub-sample contributes 0) and get a
+    <column>_moe; other numeric columns are averaged where present.
+    """
+    keys, scale, omit = list(keys), list(scale), set(omit)
+    merged, ranks = {}, {}
+    for r, rows in enumerate(results):
+        for i, row in enumerate(rows):
+            key = tuple(row.get(k) for k in keys)
+            entry = merged.setdefault(key, {"rows": {}, "first": row})
+            entry["rows"][r] = row
+            ranks.setdefault(key, []).append(i / max(len(rows), 1))
+
+    out = []
+    for key, entry in merged.items():
+        row = dict(entry["first"])
+        for col, value in list(row.items()):
+            if col in keys:
+                continue
+            if col in omit:
+                row[col] = None
+            elif col in scale:
+                values = []
+                for r in range(len(results)):
+                    v = entry["rows"].get(r, {}).get(col)
+                    values.append(float(v) * MODULUS if v is not None
+                                  else 0.0)
+                mean = sum(values) / len(values)
+                var = (sum((v - mean) ** 2 for v in values)
+                       / max(len(values) - 1, 1))
+                row[col] = mean
+                row[col + "_moe"] = _T95 * math.sqrt(var / len(values))
+            elif _number(value):
+                present = [float(x[col]) for x in entry["rows"].values()
+                           if _number(x.get(col))]
+                row[col] = sum(present) / len(present)
+        out.append(row)
+    # Sub-samples agree on ordering up to sampling noise: sort by mean
+    # relative position
+    order = sorted(merged, key=lambda k: sum(ranks[k]) / len(ranks[k]))
+    position = {k: i for i, k in enumerate(order)}
+    out.sort(key=lambda row: position[tuple(row.get(k) for k in keys)])
+    return out[:max((len(rows) for rows in results), default=0)]
+
+
+def run_preview(store, sql: str, params, max_rows: int,
+                spec: Optional[dict] = None,
+                preview_dir: Optional[Path] = None) -> list:
+    """Execute `sql` (already sargable) in preview mode -- see module doc.
+
+    spec: {"scale": [...], "keys": [...], "omit": [...]} (output column
+    names); without "scale" (or a sample) only the HyperLogLog rewrite is
+    applied and <column>_moe is None.
+    """
+    spec = spec or {}
+    scale = [c.lower() for c in spec.get("scale", [])]
+    samples = (sample_files(store.available_fys, preview_dir)
+               if scale else None)
+    if not samples:
+        rows = store._execute(approximate_distinct(sql), params, max_rows)
+        for row in rows:
+            for col in scale:
+                row.setdefault(col + "_moe", None)
+        return rows
+    results = [store._execute(sql, params, max_rows,
+                              sample={fy: (path, r)
+                                      for fy, path in samples.items()})
+               for r in range(REPLICATES)]
+    return merge_replicates(results,
+                            [c.lower() for c in spec.get("keys", [])],
+                            scale,
+                            [c.lower() for c in spec.get("omit", [])])
+
+
+# ---------------------------------------------------------------------------
+# BUILD
+# ---------------------------------------------------------------------------
+
+def _cleanup(preview_dir: Path, meta: dict) -> None:
+    """Remove sample files not referenced by the committed meta."""
+    keep = {entry["file"] for entry in meta["fys"].values()}
+    for path in preview_dir.glob("*.parquet"):
+        if path.name not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def build_preview_sample(store=None, force: bool = False,
+                         preview_dir: Optional[Path] = None) -> dict:
+    """Write the receipt sample for fiscal years whose source changed.
+
+    Returns:
+        {status, built: {FY: rows}, fresh: [FY, ...]}
+    """
+    if store is None:
+        from transaction_layer import TransactionStore
+        store = TransactionStore()
+    available = dict(store.available_fys)
+    if not available:
+        return {"status": "no_data", "built": {}, "fresh": []}
+
+    preview_dir = Path(preview_dir or PREVIEW_DIR)
+    preview_dir.mkdir(parents=True, exist_ok=True)
+    meta = load_meta(preview_dir)
+    fresh = [] if force else [
+        fy for fy, source in available.items()
+        if meta["fys"].get(fy, {}).get("source_sig") == signature(source)
+        and (preview_dir / meta["fys"][fy]["file"]).is_file()]
+    todo = {fy: path for fy, path in available.items() if fy not in fresh}
+    if not todo:
+        return {"status": "up_to_date", "built": {}, "fresh": sorted(fresh)}
+
+    import duckdb
+
+    built = {}
+    conn = duckdb.connect(":memory:")
+    try:
+        for fy, source in sorted(todo.items()):
+            source_sig = signature(source)
+            name = "{}-{}.parquet".format(fy, uuid.uuid4().hex[:8])
+            conn.execute("""
+                COPY (
+                    SELECT *, CAST({bucket} AS TINYINT) AS _replicate
+                    FROM read_parquet({source})
+                    WHERE {bucket} < {replicates}
+                    ORDER BY _replicate, SaleDate
+                ) TO {target} (FORMAT PARQUET, COMPRESSION ZSTD,
+                               ROW_GROUP_SIZE {rg})
+            """.format(bucket=_BUCKET_SQL, replicates=REPLICATES,
+                       source=sql_path(source),
+                       target=sql_path(preview_dir / name),
+                       rg=ROW_GROUP_SIZE))
+            rows = conn.execute(
+                "SELECT COUNT(*) FROM read_parquet({})".format(
+                    sql_path(preview_dir / name))).fetchone()[0]
+            meta["fys"][fy] = {
+                "file": name,
+                "source": str(source),
+                "source_sig": source_sig,
+                "rows": rows,
+                "built_at": datetime.now().isoformat(),
+            }
+            meta["version"] = LAYOUT_VERSION
+            write_meta(_meta_path(preview_dir), meta)
+            built[fy] = rows
+            logger.info("Preview sample %s: %d rows -> %s", fy, rows, name)
+    finally:
+        conn.close()
+
+    _cleanup(preview_dir, meta)
+    return {"status": "built", "built": built, "fresh": sorted(fresh)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every fiscal year")
+    args = parser.parse_args()
+    print(json.dumps(build_preview_sample(force=args.force), indent=2))
@@ -0,0 +1,143 @@
+"""
+Harris Farm Hub — Sargable Predicate Rewriter
+Rewrites SaleDate predicates that wrap the column in an expression into
+plain half-open timestamp ranges, so DuckDB can push them into the parquet
+scan and skip row groups by their min/max statistics.
+
+    CAST(t.SaleDate AS DATE) >= CAST(? AS DATE)
+        -> t.SaleDate >= CAST(CAST(? AS DATE) AS TIMESTAMP)
+    CAST(t.SaleDate AS DATE) <= CAST(? AS DATE)
+        -> t.SaleDate < CAST(CAST(? AS DATE) AS TIMESTAMP) + INTERVAL 1 DAY
+    CAST(SaleDate + INTERVAL '11' HOUR AS DATE) > DATE '2026-01-01'
+        -> SaleDate >= CAST(DATE '2026-01-01' AS TIMESTAMP)
+                       + INTERVAL 1 DAY - INTERVAL '11' HOUR
+    SaleDate + INTERVAL '11' HOUR < CAST(? AS TIMESTAMP)
+        -> SaleDate < CAST(? AS TIMESTAMP) - INTERVAL '11' HOUR
+
+The rewrite is purely textual and only fires when the result is exactly
+equivalent: the right-hand side must be a parameter or literal, the
+predicate must not be an operand of surrounding arithmetic, and
+placeholders are never duplicated (so `= ?` on a date cast is left
+alone). Hour-of-day extraction (EXTRACT(HOUR FROM ...)) is cyclic and
+cannot become a range, so it is not touched.
+
+TransactionStore.query() applies rewrite_sargable() to every statement.
+"""
+
+import re
+from functools import lru_cache
+
+# t.SaleDate / SaleDate, optionally shifted to local time
+_COL = r"(?P<col>(?:\w+\.)?SaleDate)"
+_SHIFT = r"(?:\s*\+\s*INTERVAL\s+'?(?P<hours>\d+)'?\s+HOURS?)"
+
+# Right-hand sides that are a single date / timestamp value
+_DATE_RHS = (
+    r"CAST\(\s*\?\s+AS\s+DATE\s*\)"
+    r"|CAST\(\s*'[^']*'\s+AS\s+DATE\s*\)"
+    r"|DATE\s+'[^']*'"
+    r"|'[^']*'"
+    r"|\?"
+)
+_TS_RHS = (
+    r"CAST\(\s*\?\s+AS\s+TIMESTAMP\s*\)"
+    r"|CAST\(\s*'[^']*'\s+AS\s+TIMESTAMP\s*\)"
+    r"|TIMESTAMP\s+'[^']*'"
+    r"|'[^']*'"
+    r"|\?"
+)
+
+_DATE_CMP = re.compile(
+    r"CAST\(\s*" + _COL + _SHIFT + r"?\s+AS\s+DATE\s*\)"
+    r"\s*(?P<op>>=|<=|<>|!=|=|<|>)\s*(?P<rhs>" + _DATE_RHS + r")",
+    re.IGNORECASE,
+)
+_DATE_BETWEEN = re.compile(
+    r"CAST\(\s*" + _COL + _SHIFT + r"?\s+AS\s+DATE\s*\)"
+    r"\s+BETWEEN\s+(?P<lo>" + _DATE_RHS + r")\s+AND\s+(?P<hi>"
+    + _DATE_RHS + r")",
+    re.IGNORECASE,
+)
+_SHIFTED_CMP = re.compile(
+    r"(?<![\w.])" + _COL + _SHIFT
+    + r"\s*(?P<op>>=|<=|<|>)\s*(?P<rhs>" + _TS_RHS + r")",
+    re.IGNORECASE,
+)
+
+# A predicate glued to one of these is an operand of a larger expression
+_BINDING_OPS = ("+", "-", "*", "/", "%", "|", "::", "^")
+
+
+def _is_operand(sql: str, start: int, end: int) -> bool:
+    before = sql[:start].rstrip()
+    after = sql[end:].lstrip()
+    if before.endswith(_BINDING_OPS) or after.startswith(_BINDING_OPS):
+        return True
+    # `NOT CAST(...) ...` is fine, but `x BETWEEN CAST(...) ...` is not ours
+    return bool(re.search(r"\bBETWEEN$", before, re.IGNORECASE))
+
+
+def _as_timestamp(rhs: str) -> str:
+    """Timestamp expression at 00:00 of a date right-hand side."""
+    if rhs == "?" or rhs.startswith("'"):
+        rhs = "CAST({} AS DATE)".format(rhs)
+    return "CAST({} AS TIMESTAMP)".format(rhs)
+
+
+def _unshift(expr: str, hours) -> str:
+    return expr if not hours else "{} - INTERVAL '{}' HOUR".format(expr, hours)
+
+
+def _date_cmp(m: re.Match) -> str:
+    sql = m.string
+    if _is_operand(sql, m.start(), m.end()):
+        return m.group(0)
+    col, hours, op, rhs = m.group("col"), m.group("hours"), m.group("op"), \
+        m.group("rhs")
+    day_start = _as_timestamp(rhs)
+    next_day = day_start + " + INTERVAL 1 DAY"
+    if op == ">=":
+        return "{} >= {}".format(col, _unshift(day_start, hours))
+    if op == ">":
+        return "{} >= {}".format(col, _unshift(next_day, hours))
+    if op == "<":
+        return "{} < {}".format(col, _unshift(day_start, hours))
+    if op == "<=":
+        return "{} < {}".format(col, _unshift(next_day, hours))
+    if op == "=" and "?" not in rhs:
+        return "({c} >= {lo} AND {c} < {hi})".format(
+            c=col, lo=_unshift(day_start, hours), hi=_unshift(next_day, hours))
+    return m.group(0)
+
+
+def _date_between(m: re.Match) -> str:
+    if _is_operand(m.string, m.start(), m.end()):
+        return m.group(0)
+    col, hours = m.group("col"), m.group("hours")
+    lo = _unshift(_as_timestamp(m.group("lo")), hours)
+    hi = _unshift(_as_timestamp(m.group("hi")) + " + INTERVAL 1 DAY", hours)
+    return "({c} >= {lo} AND {c} < {hi})".format(c=col, lo=lo, hi=hi)
+
+
+def _shifted_cmp(m: re.Match) -> str:
+    if _is_operand(m.string, m.start(), m.end()):
+        return m.group(0)
+    rhs = m.group("rhs")
+    if rhs == "?" or rhs.startswith("'"):
+        rhs = "CAST({} AS TIMESTAMP)".format(rhs)
+    return "{} {} {}".format(m.group("col"), m.group("op"),
+                             _unshift(rhs, m.group("hours")))
+
+
+@lru_cache(maxsize=1024)
+def rewrite_sargable(sql: str) -> str:
+    """Return sql with SaleDate predicates rewritten as timestamp ranges.
+
+    Parameter placeholders keep their count and order, so the caller's
+    params list is unchanged.
+    """
+    if "SaleDate" not in sql and "saledate" not in sql.lower():
+        return sql
+    sql = _DATE_BETWEEN.sub(_date_between, sql)
+    sql = _DATE_CMP.sub(_date_cmp, sql)
+    return _SHIFTED_CMP.sub(_shifted_cmp, sql)
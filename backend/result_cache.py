@@ -0,0 +1,231 @@
+"""
+Harris Farm Hub — Shared Result Cache
+Disk-backed cache for query results that every Streamlit worker and the
+FastAPI process read. It replaces per-process st.cache_data for the
+expensive transaction queries: results survive restarts and deploys, and
+replicas do not each hold their own copy of every DataFrame.
+
+    @result_cache.cached(namespace="transaction_queries.run_query",
+                         version=lambda: get_store().data_version())
+    def query_named(name, **kwargs):
+        ...
+
+Entries live in data/cache/results/<namespace>/<key>.<ext>:
+    .arrow  Arrow IPC file (DataFrames and lists of row dicts), read
+            through a memory map
+    .pkl    anything else
+key is a hash of the arguments and the data version, so a new data
+version simply misses and its entries age out. Files are written to a
+temporary name and renamed into place, so readers never see a partial
+entry. Access time records recency: when the directory grows past
+MAX_BYTES the least recently used entries are evicted.
+
+Arguments must be JSON-serialisable (dates, tuples and the like are keyed
+by their str()).
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger("hub_api")
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache" / "results"
+MAX_BYTES = int(os.getenv("HUB_RESULT_CACHE_MB", "1024")) * 1024 * 1024
+
+MISS = object()
+_KIND = b"hub_kind"
+
+
+# ---------------------------------------------------------------------------
+# KEYS
+# ---------------------------------------------------------------------------
+
+def make_key(args: tuple, kwargs: dict, version=None) -> str:
+    """Stable hash of call arguments and a data version."""
+    payload = json.dumps([list(args), kwargs, version], sort_keys=True,
+                         default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _entry(cache_dir: Path, namespace: str, key: str) -> Optional[Path]:
+    for ext in (".arrow", ".pkl"):
+        path = cache_dir / namespace / (key + ext)
+        if path.is_file():
+            return path
+    return None
+
+
+# ---------------------------------------------------------------------------
+# READ / WRITE
+# ---------------------------------------------------------------------------
+
+# pyarrow (and pandas) are imported on first use: the API process imports
+# this module at start-up.
+
+def _to_table(value):
+    """Arrow table for DataFrames and non-empty lists of row dicts."""
+    import pyarrow as pa
+
+    pd = sys.modules.get("pandas")  # not loaded: cannot be a DataFrame
+    try:
+        if pd is not None and isinstance(value, pd.DataFrame):
+            table = pa.Table.from_pandas(value)
+            kind = b"frame"
+        elif (isinstance(value, list) and value
+              and all(isinstance(r, dict) and r.keys() == value[0].keys()
+                      for r in value)):
+            table = pa.Table.from_pylist(value)
+            kind = b"records"
+        else:
+            return None
+    except (pa.ArrowException, ValueError, TypeError):
+        return None
+    meta = dict(table.schema.metadata or {})
+    meta[_KIND] = kind
+    return table.replace_schema_metadata(meta)
+
+
+def get(namespace: str, key: str, ttl: Optional[float] = None,
+        cache_dir: Optional[Path] = None):
+    """Cached value, or MISS (absent, expired or unreadable)."""
+    path = _entry(Path(cache_dir or CACHE_DIR), namespace, key)
+    if path is None:
+        return MISS
+    import pyarrow as pa
+
+    try:
+        stat = path.stat()
+        if ttl is not None and time.time() - stat.st_mtime > ttl:
+            return MISS
+        if path.suffix == ".arrow":
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+                if (table.schema.metadata or {}).get(_KIND) == b"records":
+                    value = table.to_pylist()
+                else:
+                    value = table.to_pandas()
+        else:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        # Access time is the LRU clock (set explicitly: noatime mounts)
+        os.utime(path, (time.time(), stat.st_mtime))
+    except (OSError, pa.ArrowException, pickle.UnpicklingError, EOFError):
+        return MISS
+    return value
+
+
+def put(namespace: str, key: str, value,
+        cache_dir: Optional[Path] = None) -> Optional[Path]:
+    """Store a value; returns its path, or None if it could not be written."""
+    import pyarrow as pa
+
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    folder = cache_dir / namespace
+    table = _to_table(value)
+    path = folder / (key + (".arrow" if table is not None else ".pkl"))
+    tmp = folder / ".{}.{}.tmp".format(key, uuid.uuid4().hex[:8])
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        if table is not None:
+            with pa.OSFile(str(tmp), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+        logger.warning("Result cache write failed (%s): %s", namespace, e)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return None
+    return path
+
+
+def evict(max_bytes: Optional[int] = None,
+          cache_dir: Optional[Path] = None) -> int:
+    """Delete least recently used entries until the cache fits in
+    max_bytes (to 90%, so every write does not evict). Returns the number
+    of files removed."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for path in cache_dir.glob("*/*"):
+        if path.name.startswith("."):
+            continue  # another process's write in flight
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return 0
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes * 0.9:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear(namespace: Optional[str] = None,
+          cache_dir: Optional[Path] = None) -> None:
+    """Remove every entry (of one namespace)."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    for path in cache_dir.glob("{}/*".format(namespace or "*")):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# DECORATOR
+# ---------------------------------------------------------------------------
+
+def cached(namespace: Optional[str] = None,
+           version: Optional[Callable[[], object]] = None,
+           ttl: Optional[float] = None):
+    """Cache a function's results in the shared result cache.
+
+    namespace: entry folder (defaults to module.function); functions that
+        compute the same thing may share one.
+    version: called on every lookup; part of the key (e.g. a data
+        fingerprint), so new data never returns old results.
+    ttl: optional maximum age in seconds.
+    """
+    def decorate(fn):
+        ns = namespace or "{}.{}".format(fn.__module__, fn.__qualname__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs, version() if version else None)
+            value = get(ns, key, ttl)
+            if value is not MISS:
+                return value
+            value = fn(*args, **kwargs)
+            if put(ns, key, value) is not None:
+                evict()
+            return value
+
+        wrapper.clear = lambda: clear(ns)
+        return wrapper
+
+    return decorate
@@ -345,11 +345,11 @@ def submit_placement(db_path: str, user_id: str, responses: list,
         # Create initial XP record
         conn.execute(
             "INSERT OR IGNORE INTO sa_user_xp "
-            "(user_id, total_xp, current_level, weekly_xp, monthly_xp, "
+            "(user_id, total_xp, current_level, "
             "streak_days, streak_multiplier, last_active_date, updated_at) "
-            "VALUES (?,?,?,?,?,?,?,?,?)",
+            "VALUES (?,?,?,?,?,?,?)",
             (
-                user_id, 0, placed_level, 0, 0,
+                user_id, 0, placed_level,
                 0, 1.0,
                 datetime.utcnow().strftime("%Y-%m-%d"),
                 datetime.utcnow().isoformat(),
@@ -372,16 +372,22 @@ def submit_placement(db_path: str, user_id: str, responses: list,
 
 
 def reset_placement(db_path: str, user_id: str) -> bool:
-    """Admin: delete a user's placement so they can retake it."""
+    """Admin: delete a user's placement and XP so they can retake it."""
+    from sa_v4_xp_engine import invalidate_rank_index
+
     conn = sqlite3.connect(db_path)
     try:
         conn.execute("DELETE FROM sa_placement_v4 WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM sa_verification_status WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM sa_user_xp WHERE user_id = ?", (user_id,))
+        # The leaderboards rank from the ledger, not sa_user_xp
+        conn.execute("DELETE FROM sa_xp_log WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM sa_xp_buckets WHERE user_id = ?", (user_id,))
         conn.commit()
-        return True
     finally:
         conn.close()
+    invalidate_rank_index(db_path)
+    return True
 
 
 def get_summary(db_path: str) -> dict:
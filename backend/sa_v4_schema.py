@@ -252,6 +252,16 @@ CREATE TABLE IF NOT EXISTS sa_xp_log (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Time-bucketed XP aggregates over the append-only sa_xp_log ledger.
+-- window_key: 'all', 'week:YYYY-MM-DD' (Monday, UTC) or 'month:YYYY-MM'.
+-- Weekly/monthly resets happen by moving to a new window_key.
+CREATE TABLE IF NOT EXISTS sa_xp_buckets (
+    window_key TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    xp INTEGER DEFAULT 0,
+    PRIMARY KEY (window_key, user_id)
+);
+
 CREATE TABLE IF NOT EXISTS sa_badges_v4 (
     badge_id INTEGER PRIMARY KEY AUTOINCREMENT,
     badge_code TEXT NOT NULL UNIQUE,
@@ -391,6 +401,7 @@ CREATE INDEX IF NOT EXISTS idx_sa_exercise_results_user ON sa_exercise_results(u
 CREATE INDEX IF NOT EXISTS idx_sa_mastery_user ON sa_mastery_evidence(user_id, target_level);
 CREATE INDEX IF NOT EXISTS idx_sa_verification_user ON sa_verification_status(user_id);
 CREATE INDEX IF NOT EXISTS idx_sa_xp_log_user ON sa_xp_log(user_id);
+CREATE INDEX IF NOT EXISTS idx_sa_xp_buckets_rank ON sa_xp_buckets(window_key, xp DESC);
 CREATE INDEX IF NOT EXISTS idx_sa_battles_status ON sa_peer_battles_v4(status);
 CREATE INDEX IF NOT EXISTS idx_sa_daily_comp_user ON sa_daily_completions_v4(user_id, challenge_date);
 CREATE INDEX IF NOT EXISTS idx_sa_placement_user ON sa_placement_v4(user_id);
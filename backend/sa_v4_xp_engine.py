@@ -5,13 +5,25 @@ Manages a separate XP/gamification system for Skills Academy v4,
 independent from the existing academy_engine.py (Paddock/sidebar).
 
 Tables (created in sa_v4_schema.py):
-    sa_user_xp, sa_xp_log, sa_badges_v4, sa_user_badges_v4, sa_levels
+    sa_user_xp, sa_xp_log, sa_xp_buckets, sa_badges_v4, sa_user_badges_v4,
+    sa_levels
+
+sa_xp_log is the append-only XP ledger. Every award also bumps the
+user's sa_xp_buckets rows for the 'all', current-week and current-month
+window keys, so weekly/monthly "resets" are just a new window key.
+Leaderboards and "my rank" are served from an in-process rank index that
+is built from the buckets once and then kept current by replaying only
+ledger rows newer than the last one it applied. Anything that deletes
+ledger rows must call invalidate_rank_index().
 
 Python 3.9 compatible.
 """
 
+import bisect
 import sqlite3
 import math
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -71,14 +83,35 @@ def _get_conn(db_path: str) -> sqlite3.Connection:
     return conn
 
 
+def _utcnow() -> datetime:
+    """Current UTC time (single seam for tests)."""
+    return datetime.utcnow()
+
+
 def _today_str() -> str:
     """Current UTC date as YYYY-MM-DD."""
-    return datetime.utcnow().strftime("%Y-%m-%d")
+    return _utcnow().strftime("%Y-%m-%d")
 
 
 def _now_iso() -> str:
     """Current UTC timestamp as ISO-8601."""
-    return datetime.utcnow().isoformat()
+    return _utcnow().isoformat()
+
+
+def _window_keys(ts: datetime) -> list:
+    """Leaderboard window keys an XP event at ``ts`` counts towards."""
+    monday = ts.date() - timedelta(days=ts.weekday())
+    return [
+        "all",
+        "week:{}".format(monday.isoformat()),
+        "month:{}".format(ts.strftime("%Y-%m")),
+    ]
+
+
+def _period_key(period: str, ts: Optional[datetime] = None) -> str:
+    """Window key for a leaderboard period ('all', 'weekly', 'monthly')."""
+    keys = _window_keys(ts or _utcnow())
+    return {"weekly": keys[1], "monthly": keys[2]}.get(period, keys[0])
 
 
 def _streak_multiplier(streak_days: int) -> float:
@@ -247,9 +280,9 @@ def _ensure_user(conn: sqlite3.Connection, user_id: str) -> None:
         today = _today_str()
         conn.execute(
             "INSERT INTO sa_user_xp "
-            "(user_id, total_xp, current_level, weekly_xp, monthly_xp, "
+            "(user_id, total_xp, current_level, "
             " streak_days, streak_multiplier, last_active_date, updated_at) "
-            "VALUES (?, 0, 1, 0, 0, 1, 1.0, ?, ?)",
+            "VALUES (?, 0, 1, 1, 1.0, ?, ?)",
             (user_id, today, now),
         )
 
@@ -271,6 +304,17 @@ def get_xp(db_path: str, user_id: str) -> dict:
             "SELECT * FROM sa_user_xp WHERE user_id = ?", (user_id,)
         ).fetchone()
 
+        week_key = _period_key("weekly")
+        month_key = _period_key("monthly")
+        buckets = {
+            r["window_key"]: r["xp"]
+            for r in conn.execute(
+                "SELECT window_key, xp FROM sa_xp_buckets "
+                "WHERE user_id = ? AND window_key IN (?, ?)",
+                (user_id, week_key, month_key),
+            ).fetchall()
+        }
+
         total_xp = row["total_xp"] or 0
         level_info = get_level_for_xp(total_xp)
 
@@ -280,8 +324,8 @@ def get_xp(db_path: str, user_id: str) -> dict:
             "current_level": level_info["level"],
             "level_name": level_info["name"],
             "level_color": level_info["color"],
-            "weekly_xp": row["weekly_xp"] or 0,
-            "monthly_xp": row["monthly_xp"] or 0,
+            "weekly_xp": buckets.get(week_key, 0),
+            "monthly_xp": buckets.get(month_key, 0),
             "streak_days": row["streak_days"] or 0,
             "streak_multiplier": row["streak_multiplier"] or 1.0,
             "xp_to_next_level": level_info["xp_to_next"],
@@ -305,8 +349,8 @@ def award_xp(
     Steps:
         1. Update streak
         2. Calculate multiplied amount
-        3. Insert sa_xp_log
-        4. Update sa_user_xp totals
+        3. Insert sa_xp_log (ledger)
+        4. Update sa_xp_buckets windows and sa_user_xp.total_xp
         5. Check level change
         6. Check badge triggers
 
@@ -340,24 +384,31 @@ def award_xp(
 
     conn = _get_conn(db_path)
     try:
+        _ensure_ledger(conn, db_path)
         _ensure_user(conn, user_id)
+        now = _utcnow()
 
-        # Step 3: Insert XP log
+        # Step 3: Append to the XP ledger
         conn.execute(
             "INSERT INTO sa_xp_log (user_id, xp_amount, source_type, source_id, "
             "description, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_id, awarded, source_type, source_id, description, _now_iso()),
+            (user_id, awarded, source_type, source_id, description,
+             now.isoformat()),
         )
 
-        # Step 4: Update totals
+        # Step 4: Bump the time-bucketed aggregates and the running total
+        conn.executemany(
+            "INSERT INTO sa_xp_buckets (window_key, user_id, xp) "
+            "VALUES (?, ?, ?) "
+            "ON CONFLICT(window_key, user_id) DO UPDATE SET xp = xp + excluded.xp",
+            [(key, user_id, awarded) for key in _window_keys(now)],
+        )
         conn.execute(
             "UPDATE sa_user_xp SET "
             "total_xp = total_xp + ?, "
-            "weekly_xp = weekly_xp + ?, "
-            "monthly_xp = monthly_xp + ?, "
             "updated_at = ? "
             "WHERE user_id = ?",
-            (awarded, awarded, awarded, _now_iso(), user_id),
+            (awarded, now.isoformat(), user_id),
         )
         conn.commit()
 
@@ -710,6 +761,239 @@ def upgrade_badge_status(db_path: str, user_id: str, badge_code: str) -> bool:
         conn.close()
 
 
+# ===================================================================
+#  XP LEDGER: BUCKET BACKFILL + RANK INDEX
+# ===================================================================
+
+# Full rebuild interval for the in-process rank index. Incremental
+# replay keeps XP current between rebuilds; the rebuild picks up
+# department changes and users who have no XP yet, so those can lag by
+# up to this long.
+_INDEX_TTL_SECONDS = 60
+
+_ledger_ready = set()  # db_paths whose buckets have been backfilled
+_indexes = {}          # db_path -> _XpLedgerIndex
+_indexes_lock = threading.Lock()
+
+
+def rebuild_xp_buckets(db_path: str) -> int:
+    """Rebuild sa_xp_buckets from the sa_xp_log ledger.
+
+    Run once automatically for databases that predate the buckets.
+    Returns number of bucket rows written.
+    """
+    conn = _get_conn(db_path)
+    try:
+        return _rebuild_buckets(conn)
+    finally:
+        conn.close()
+
+
+def _rebuild_buckets(conn: sqlite3.Connection) -> int:
+    """Replace all bucket rows with aggregates of the ledger (atomic)."""
+    day = "substr(created_at, 1, 10)"
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM sa_xp_buckets")
+        conn.execute(
+            "INSERT INTO sa_xp_buckets (window_key, user_id, xp) "
+            "SELECT window_key, user_id, SUM(xp_amount) FROM ("
+            "  SELECT 'all' AS window_key, user_id, xp_amount FROM sa_xp_log"
+            "  UNION ALL "
+            "  SELECT 'week:' || date({day}, '-' || "
+            "         ((CAST(strftime('%w', {day}) AS INTEGER) + 6) % 7) "
+            "         || ' days'), user_id, xp_amount FROM sa_xp_log"
+            "  UNION ALL "
+            "  SELECT 'month:' || substr(created_at, 1, 7), user_id, xp_amount "
+            "  FROM sa_xp_log"
+            ") GROUP BY window_key, user_id".format(day=day)
+        )
+        count = conn.execute("SELECT COUNT(*) FROM sa_xp_buckets").fetchone()[0]
+        conn.execute("COMMIT")
+        return count
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _ensure_ledger(conn: sqlite3.Connection, db_path: str) -> None:
+    """Backfill buckets from the ledger once per process if they are empty."""
+    if db_path in _ledger_ready:
+        return
+    has_buckets = conn.execute(
+        "SELECT 1 FROM sa_xp_buckets LIMIT 1").fetchone()
+    has_log = conn.execute("SELECT 1 FROM sa_xp_log LIMIT 1").fetchone()
+    if has_log and not has_buckets:
+        _rebuild_buckets(conn)
+    _ledger_ready.add(db_path)
+
+
+class _RankIndex:
+    """Scores kept in a sorted (-xp, key) list.
+
+    Rank lookups are a bisect (O(log n)). An update bisects for the old
+    and new positions but the list delete/insert is O(n) -- a memmove,
+    cheap at Hub user counts. Ties are broken by key so ranks are stable
+    across calls.
+    """
+
+    def __init__(self):
+        self._xp = {}
+        self._order = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def get(self, key: str) -> int:
+        return self._xp.get(key, 0)
+
+    def add(self, key: str, delta: int) -> None:
+        old = self._xp.get(key)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (-old, key))]
+        new = (old or 0) + delta
+        self._xp[key] = new
+        bisect.insort(self._order, (-new, key))
+
+    def rank(self, key: str) -> Optional[int]:
+        """1-based position of ``key``, or None if it has no XP."""
+        xp = self._xp.get(key)
+        if not xp or xp <= 0:
+            return None
+        return bisect.bisect_left(self._order, (-xp, key)) + 1
+
+    def top(self, limit: int) -> list:
+        """[(key, xp)] for the top ``limit`` entries with positive XP."""
+        out = []
+        for neg_xp, key in self._order[:limit]:
+            if neg_xp >= 0:
+                break
+            out.append((key, -neg_xp))
+        return out
+
+
+class _XpLedgerIndex:
+    """Rank indexes for the current all/week/month windows of one DB,
+    plus a department index over the 'all' window."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.windows = {}
+        self.departments = None
+        self.user_dept = {}
+        self.dept_members = {}
+        self.last_log_id = 0
+        self.built_at = 0.0
+
+    def refresh(self, conn: sqlite3.Connection) -> None:
+        """Catch up with the ledger; rebuild on window rollover or TTL."""
+        keys = _window_keys(_utcnow())
+        if (set(keys) != set(self.windows)
+                or time.time() - self.built_at > _INDEX_TTL_SECONDS):
+            self._build(conn, keys)
+            return
+
+        rows = conn.execute(
+            "SELECT log_id, user_id, xp_amount, created_at FROM sa_xp_log "
+            "WHERE log_id > ? ORDER BY log_id",
+            (self.last_log_id,),
+        ).fetchall()
+        for r in rows:
+            try:
+                event_keys = _window_keys(datetime.fromisoformat(r["created_at"]))
+            except (TypeError, ValueError):
+                event_keys = ["all"]
+            for key in event_keys:
+                if key in self.windows:
+                    self._apply(key, r["user_id"], r["xp_amount"] or 0)
+            self.last_log_id = r["log_id"]
+
+    def _build(self, conn: sqlite3.Connection, keys: list) -> None:
+        # Buckets and the ledger high-water mark from one read snapshot
+        conn.execute("BEGIN")
+        try:
+            high_water = conn.execute(
+                "SELECT COALESCE(MAX(log_id), 0) FROM sa_xp_log").fetchone()[0]
+            rows = conn.execute(
+                "SELECT window_key, user_id, xp FROM sa_xp_buckets "
+                "WHERE window_key IN ({})".format(", ".join("?" * len(keys))),
+                keys,
+            ).fetchall()
+            self.user_dept = _load_departments(conn)
+        finally:
+            conn.execute("COMMIT")
+
+        self.windows = {key: _RankIndex() for key in keys}
+        self.departments = _RankIndex() if self.user_dept else None
+        # Members are every user with an XP record, as before the ledger
+        self.dept_members = {}
+        for (user_id,) in conn.execute("SELECT user_id FROM sa_user_xp"):
+            dept = self.user_dept.get(user_id)
+            if dept:
+                self.dept_members.setdefault(dept, set()).add(user_id)
+        for r in rows:
+            self._apply(r["window_key"], r["user_id"], r["xp"] or 0)
+        self.last_log_id = high_water
+        self.built_at = time.time()
+
+    def _apply(self, key: str, user_id: str, xp: int) -> None:
+        self.windows[key].add(user_id, xp)
+        if key == "all" and self.departments is not None:
+            dept = self.user_dept.get(user_id)
+            if dept:
+                self.departments.add(dept, xp)
+                self.dept_members.setdefault(dept, set()).add(user_id)
+
+
+def _load_departments(conn: sqlite3.Connection) -> dict:
+    """user_id -> department, from sa_user_profiles or auth_users roles.
+
+    Returns {} when neither source is available (department leaderboard
+    then falls back to the individual leaderboard).
+    """
+    sources = [
+        "SELECT user_id, department FROM sa_user_profiles "
+        "WHERE department IS NOT NULL AND department != ''",
+        "SELECT email, role FROM auth_users "
+        "WHERE role IS NOT NULL AND role != ''",
+    ]
+    for sql in sources:
+        try:
+            rows = conn.execute(sql).fetchall()
+        except sqlite3.OperationalError:
+            continue
+        if rows:
+            return {r[0]: r[1] for r in rows}
+    return {}
+
+
+def invalidate_rank_index(db_path: str) -> None:
+    """Drop the in-process rank index so the next read rebuilds it.
+
+    Replay only sees new ledger rows, so call this after deleting any.
+    """
+    with _indexes_lock:
+        _indexes.pop(db_path, None)
+
+
+def _get_index(db_path: str) -> tuple:
+    """Return (index, conn) with the index caught up to the ledger.
+
+    Caller must close ``conn`` and hold ``_indexes_lock`` while reading.
+    """
+    conn = _get_conn(db_path)
+    try:
+        _ensure_ledger(conn, db_path)
+        index = _indexes.get(db_path)
+        if index is None:
+            index = _indexes[db_path] = _XpLedgerIndex(db_path)
+        index.refresh(conn)
+    except Exception:
+        conn.close()
+        raise
+    return index, conn
+
+
 # ===================================================================
 #  LEADERBOARD OPERATIONS
 # ===================================================================
@@ -724,133 +1008,111 @@ def get_leaderboard(db_path: str, period: str = "all", limit: int = 50) -> list:
     Returns:
         [{rank, user_id, xp, level_name, level_color, streak_days}]
     """
-    column_map = {
-        "all": "total_xp",
-        "weekly": "weekly_xp",
-        "monthly": "monthly_xp",
-    }
-    xp_col = column_map.get(period, "total_xp")
-
-    conn = _get_conn(db_path)
+    with _indexes_lock:
+        index, conn = _get_index(db_path)
+        top = index.windows[_period_key(period)].top(limit)
     try:
-        query = (
-            "SELECT user_id, total_xp, weekly_xp, monthly_xp, "
-            "current_level, streak_days "
-            "FROM sa_user_xp "
-            "WHERE {col} > 0 "
-            "ORDER BY {col} DESC "
-            "LIMIT ?"
-        ).format(col=xp_col)
-
-        rows = conn.execute(query, (limit,)).fetchall()
+        if not top:
+            return []
+
+        # Only the top-k rows need their profile columns (read unlocked)
+        users = {
+            r["user_id"]: r
+            for r in conn.execute(
+                "SELECT user_id, total_xp, streak_days FROM sa_user_xp "
+                "WHERE user_id IN ({})".format(", ".join("?" * len(top))),
+                [uid for uid, _ in top],
+            ).fetchall()
+        }
 
         results = []
-        for rank, r in enumerate(rows, start=1):
-            xp_value = r[xp_col]
-            level_info = get_level_for_xp(r["total_xp"] or 0)
+        for rank, (uid, xp_value) in enumerate(top, start=1):
+            row = users.get(uid)
+            total_xp = (row["total_xp"] if row else None) or 0
+            level_info = get_level_for_xp(total_xp)
             results.append({
                 "rank": rank,
-                "user_id": r["user_id"],
+                "user_id": uid,
                 "xp": xp_value,
                 "level_name": level_info["name"],
                 "level_color": level_info["color"],
-                "streak_days": r["streak_days"] or 0,
+                "streak_days": (row["streak_days"] if row else None) or 0,
             })
-
         return results
     finally:
         conn.close()
 
 
-def get_department_leaderboard(db_path: str) -> list:
-    """Aggregate XP by department.
-
-    Attempts to join sa_user_xp with a users/departments table.
-    Falls back to individual leaderboard if no department data is available.
+def get_user_rank(db_path: str, user_id: str, period: str = "all") -> dict:
+    """A user's leaderboard position for a period (O(log n) lookup).
 
     Returns:
-        [{rank, department, total_xp, member_count, avg_xp}]
+        {user_id, period, rank, xp, total_ranked} -- rank is None when
+        the user has no XP in the window.
     """
-    conn = _get_conn(db_path)
-    try:
-        # Try to find department info — check if sa_user_profiles or similar exists
-        try:
-            dept_rows = conn.execute(
-                "SELECT p.department, "
-                "SUM(x.total_xp) as dept_xp, "
-                "COUNT(DISTINCT x.user_id) as member_count, "
-                "ROUND(AVG(x.total_xp), 1) as avg_xp "
-                "FROM sa_user_xp x "
-                "JOIN sa_user_profiles p ON x.user_id = p.user_id "
-                "WHERE p.department IS NOT NULL AND p.department != '' "
-                "GROUP BY p.department "
-                "ORDER BY dept_xp DESC"
-            ).fetchall()
-
-            if dept_rows:
-                results = []
-                for rank, r in enumerate(dept_rows, start=1):
-                    results.append({
-                        "rank": rank,
-                        "department": r["department"],
-                        "total_xp": r["dept_xp"] or 0,
-                        "member_count": r["member_count"] or 0,
-                        "avg_xp": r["avg_xp"] or 0.0,
-                    })
-                return results
-        except sqlite3.OperationalError:
-            # sa_user_profiles table doesn't exist — fall back
-            pass
+    with _indexes_lock:
+        index, conn = _get_index(db_path)
+        conn.close()
+        window = index.windows[_period_key(period)]
+        return {
+            "user_id": user_id,
+            "period": period,
+            "rank": window.rank(user_id),
+            "xp": window.get(user_id),
+            "total_ranked": len(window),
+        }
 
-        # Fallback: try auth_users table for department/role info
-        try:
-            dept_rows = conn.execute(
-                "SELECT u.role as department, "
-                "SUM(x.total_xp) as dept_xp, "
-                "COUNT(DISTINCT x.user_id) as member_count, "
-                "ROUND(AVG(x.total_xp), 1) as avg_xp "
-                "FROM sa_user_xp x "
-                "JOIN auth_users u ON x.user_id = u.email "
-                "WHERE u.role IS NOT NULL AND u.role != '' "
-                "GROUP BY u.role "
-                "ORDER BY dept_xp DESC"
-            ).fetchall()
 
-            if dept_rows:
-                results = []
-                for rank, r in enumerate(dept_rows, start=1):
-                    results.append({
-                        "rank": rank,
-                        "department": r["department"],
-                        "total_xp": r["dept_xp"] or 0,
-                        "member_count": r["member_count"] or 0,
-                        "avg_xp": r["avg_xp"] or 0.0,
-                    })
-                return results
-        except sqlite3.OperationalError:
-            pass
+def get_department_leaderboard(db_path: str) -> list:
+    """Aggregate XP by department.
 
-        # Final fallback: return individual leaderboard
-        return get_leaderboard(db_path, period="all", limit=50)
+    Departments come from sa_user_profiles (or auth_users roles); totals
+    are maintained incrementally in the rank index. member_count counts
+    every user with an XP record, including those on zero. Department
+    changes take effect on the next index rebuild (_INDEX_TTL_SECONDS).
+    Falls back to the individual leaderboard if no department data is
+    available.
 
-    finally:
+    Returns:
+        [{rank, department, total_xp, member_count, avg_xp}]
+    """
+    with _indexes_lock:
+        index, conn = _get_index(db_path)
         conn.close()
+        departments = index.departments
+        if departments is not None and (len(departments)
+                                        or index.dept_members):
+            ranked = departments.top(len(departments))
+            seen = {dept for dept, _ in ranked}
+            ranked += [(dept, 0) for dept in sorted(index.dept_members)
+                       if dept not in seen]
+            results = []
+            for rank, (dept, dept_xp) in enumerate(ranked, start=1):
+                members = len(index.dept_members.get(dept, ()))
+                results.append({
+                    "rank": rank,
+                    "department": dept,
+                    "total_xp": dept_xp,
+                    "member_count": members,
+                    "avg_xp": round(dept_xp / members, 1) if members else 0.0,
+                })
+            return results
+
+    # Fallback: individual leaderboard
+    return get_leaderboard(db_path, period="all", limit=50)
 
 
 # ===================================================================
-#  UTILITY: Weekly/Monthly XP Reset
+#  UTILITY: Weekly/Monthly window housekeeping
 # ===================================================================
 
-def reset_weekly_xp(db_path: str) -> int:
-    """Reset weekly_xp for all users. Call from a scheduled job.
-
-    Returns number of rows updated.
-    """
+def _prune_windows(db_path: str, prefix: str, current_key: str) -> int:
     conn = _get_conn(db_path)
     try:
         cursor = conn.execute(
-            "UPDATE sa_user_xp SET weekly_xp = 0, updated_at = ?",
-            (_now_iso(),),
+            "DELETE FROM sa_xp_buckets WHERE window_key LIKE ? "
+            "AND window_key < ?",
+            (prefix + "%", current_key),
         )
         conn.commit()
         return cursor.rowcount
@@ -858,18 +1120,20 @@ def reset_weekly_xp(db_path: str) -> int:
         conn.close()
 
 
+def reset_weekly_xp(db_path: str) -> int:
+    """Drop bucket rows for past weeks.
+
+    Weekly XP resets automatically when the week key rolls over on
+    Monday (UTC); this only reclaims space. The ledger keeps full history.
+    Returns number of bucket rows removed.
+    """
+    return _prune_windows(db_path, "week:", _period_key("weekly"))
+
+
 def reset_monthly_xp(db_path: str) -> int:
-    """Reset monthly_xp for all users. Call from a scheduled job.
+    """Drop bucket rows for past months.
 
-    Returns number of rows updated.
+    Monthly XP resets automatically when the month key rolls over; this
+    only reclaims space. Returns number of bucket rows removed.
     """
-    conn = _get_conn(db_path)
-    try:
-        cursor = conn.execute(
-            "UPDATE sa_user_xp SET monthly_xp = 0, updated_at = ?",
-            (_now_iso(),),
-        )
-        conn.commit()
-        return cursor.rowcount
-    finally:
-        conn.close()
+    return _prune_windows(db_path, "month:", _period_key("monthly"))
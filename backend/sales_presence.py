@@ -0,0 +1,384 @@
+"""
+Harris Farm Hub — Store x PLU Daily Sales Presence
+Materialised store x PLU x day sales table and rolling-baseline support for
+out-of-stock (zero-sales) analytics.
+
+Derived files (data/transactions/derived/):
+    store_plu_daily/part-*.parquet
+        One row per Store_ID x PLUItem_ID x sale_date with any sales line:
+        daily_rev, sold_qty / sold_rev (positive-quantity lines only) and
+        running totals cum_days / cum_rev per store x PLU. Sorted by
+        store, PLU, date and ZSTD-compressed.
+    store_plu_pairs-<through>.parquet
+        One row per store x PLU: first/last sale date and the running
+        totals as of its last sale.
+    presence_meta.json
+        {through, parts, pairs} -- the commit point. Readers only use
+        files listed here, so a crashed refresh never exposes half a build.
+
+The rolling 90-day baseline for any as-of date is the difference of two
+running totals (ASOF lookups at as_of and as_of - 90 days) rather than a
+re-aggregation of raw transactions.
+
+Queries use two DuckDB table macros that TransactionStore installs on every
+connection via install_macros():
+    plu_daily(start_date, end_date)
+        Store_ID, PLUItem_ID, sale_date, daily_rev, sold_qty, sold_rev
+    plu_baseline(as_of, lookback_days)
+        Store_ID, PLUItem_ID, selling_days, avg_daily_rev
+Both read the materialised table up to its coverage date and fall back to
+the raw transactions view for anything newer (or for everything, when no
+build exists).
+
+Refresh incrementally (appends only days after the last build):
+    python backend/sales_presence.py            # nightly
+    python backend/sales_presence.py --full     # rebuild from scratch
+"""
+
+import json
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from derived_build import read_meta, sql_list, sql_path, write_meta
+
+logger = logging.getLogger("hub_api")
+
+DERIVED_DIR = Path(__file__).parent.parent / "data" / "transactions" / "derived"
+
+# Compact the daily table into one file once this many parts accumulate
+MAX_PARTS = 32
+
+
+# ---------------------------------------------------------------------------
+# METADATA
+# ---------------------------------------------------------------------------
+
+def _meta_path(derived_dir: Path) -> Path:
+    return Path(derived_dir) / "presence_meta.json"
+
+
+def load_meta(derived_dir: Optional[Path] = None) -> Optional[dict]:
+    """Current build metadata, or None if there is no (valid) build."""
+    derived_dir = Path(derived_dir or DERIVED_DIR)
+    meta = read_meta(_meta_path(derived_dir))
+    if meta is None:
+        return None
+    files = [derived_dir / p for p in meta.get("parts", [])]
+    files.append(derived_dir / meta.get("pairs", ""))
+    if not meta.get("parts") or not all(p.is_file() for p in files):
+        return None
+    return meta
+
+
+# ---------------------------------------------------------------------------
+# QUERY MACROS
+# ---------------------------------------------------------------------------
+
+_RAW_DAILY_MACRO = """
+    CREATE OR REPLACE MACRO _plu_daily_raw(start_date, end_date) AS TABLE
+    SELECT Store_ID, PLUItem_ID,
+           CAST(SaleDate AS DATE) AS sale_date,
+           SUM(SalesIncGST) AS daily_rev,
+           SUM(Quantity) FILTER (WHERE Quantity > 0) AS sold_qty,
+           SUM(SalesIncGST) FILTER (WHERE Quantity > 0) AS sold_rev
+    FROM transactions
+    WHERE SaleDate >= CAST(CAST(start_date AS DATE) AS TIMESTAMP)
+      AND SaleDate < CAST(CAST(end_date AS DATE) AS TIMESTAMP)
+    GROUP BY Store_ID, PLUItem_ID, CAST(SaleDate AS DATE)
+"""
+
+_RAW_MACROS = """
+    CREATE OR REPLACE MACRO plu_daily(start_date, end_date) AS TABLE
+    SELECT * FROM _plu_daily_raw(start_date, end_date);
+
+    CREATE OR REPLACE MACRO plu_baseline(as_of, lookback_days) AS TABLE
+    SELECT Store_ID, PLUItem_ID,
+           COUNT(*) AS selling_days,
+           SUM(daily_rev) / NULLIF(COUNT(*), 0) AS avg_daily_rev
+    FROM _plu_daily_raw(
+        CAST(as_of AS DATE) - CAST(lookback_days AS INTEGER), as_of)
+    GROUP BY Store_ID, PLUItem_ID;
+"""
+
+# {cover_end} is the first day NOT in the materialised table.
+_MATERIALISED_MACROS = """
+    CREATE OR REPLACE VIEW store_plu_daily AS
+    SELECT * FROM read_parquet({parts});
+
+    CREATE OR REPLACE VIEW store_plu_pairs AS
+    SELECT * FROM read_parquet({pairs});
+
+    CREATE OR REPLACE MACRO plu_daily(start_date, end_date) AS TABLE
+    SELECT Store_ID, PLUItem_ID, sale_date, daily_rev, sold_qty, sold_rev
+    FROM store_plu_daily
+    WHERE sale_date >= CAST(start_date AS DATE)
+      AND sale_date < LEAST(CAST(end_date AS DATE), DATE '{cover_end}')
+    UNION ALL
+    SELECT * FROM _plu_daily_raw(
+        GREATEST(CAST(start_date AS DATE), DATE '{cover_end}'), end_date);
+
+    CREATE OR REPLACE MACRO plu_baseline(as_of, lookback_days) AS TABLE
+    WITH windows AS (
+        SELECT Store_ID, PLUItem_ID,
+               LEAST(CAST(as_of AS DATE), DATE '{cover_end}') AS hi_date,
+               CAST(as_of AS DATE) - CAST(lookback_days AS INTEGER) AS lo_date
+        FROM store_plu_pairs
+        WHERE last_sale >= CAST(as_of AS DATE) - CAST(lookback_days AS INTEGER)
+          AND first_sale < LEAST(CAST(as_of AS DATE), DATE '{cover_end}')
+    ),
+    parts AS (
+        SELECT w.Store_ID, w.PLUItem_ID,
+               hi.cum_days - COALESCE(lo.cum_days, 0) AS days,
+               hi.cum_rev - COALESCE(lo.cum_rev, 0) AS rev
+        FROM windows w
+        ASOF JOIN store_plu_daily hi
+            ON w.Store_ID = hi.Store_ID
+            AND w.PLUItem_ID = hi.PLUItem_ID
+            AND w.hi_date > hi.sale_date
+        ASOF LEFT JOIN store_plu_daily lo
+            ON w.Store_ID = lo.Store_ID
+            AND w.PLUItem_ID = lo.PLUItem_ID
+            AND w.lo_date > lo.sale_date
+        UNION ALL
+        SELECT Store_ID, PLUItem_ID, COUNT(*) AS days, SUM(daily_rev) AS rev
+        FROM _plu_daily_raw(
+            GREATEST(CAST(as_of AS DATE) - CAST(lookback_days AS INTEGER),
+                     DATE '{cover_end}'),
+            as_of)
+        GROUP BY Store_ID, PLUItem_ID
+    )
+    SELECT Store_ID, PLUItem_ID,
+           SUM(days) AS selling_days,
+           SUM(rev) / NULLIF(SUM(days), 0) AS avg_daily_rev
+    FROM parts
+    GROUP BY Store_ID, PLUItem_ID
+    HAVING SUM(days) > 0;
+"""
+
+
+def install_macros(conn, derived_dir: Optional[Path] = None) -> bool:
+    """Create plu_daily / plu_baseline on a connection that already has the
+    `transactions` view. Returns True if the materialised table is used."""
+    derived_dir = Path(derived_dir or DERIVED_DIR)
+    conn.execute(_RAW_DAILY_MACRO)
+    meta = load_meta(derived_dir)
+    if meta is None:
+        conn.execute(_RAW_MACROS)
+        return False
+    cover_end = date.fromisoformat(meta["through"]) + timedelta(days=1)
+    conn.execute(_MATERIALISED_MACROS.format(
+        parts=sql_list(derived_dir / p for p in meta["parts"]),
+        pairs=sql_path(derived_dir / meta["pairs"]),
+        cover_end=cover_end.isoformat(),
+    ))
+    return True
+
+
+# ---------------------------------------------------------------------------
+# BUILD / REFRESH
+# ---------------------------------------------------------------------------
+
+def _month_chunks(start: date, end: date):
+    """[start, end) split at calendar month boundaries."""
+    cur = start
+    while cur < end:
+        nxt = (cur.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield cur, min(nxt, end)
+        cur = nxt
+
+
+def _append_chunk(conn, start: date, end: date, out_path: Path) -> int:
+    """Materialise [start, end) into out_path and roll the pairs table
+    forward. Returns rows written."""
+    conn.execute("DROP TABLE IF EXISTS _new_daily")
+    conn.execute(
+        "CREATE TEMP TABLE _new_daily AS "
+        "SELECT * FROM _plu_daily_raw(CAST(? AS DATE), CAST(? AS DATE))",
+        [start.isoformat(), end.isoformat()],
+    )
+    rows = conn.execute("SELECT COUNT(*) FROM _new_daily").fetchone()[0]
+    if not rows:
+        return 0
+
+    conn.execute("""
+        COPY (
+            SELECT n.Store_ID, n.PLUItem_ID, n.sale_date,
+                   n.daily_rev, n.sold_qty, n.sold_rev,
+                   COALESCE(p.cum_days, 0) + ROW_NUMBER() OVER w AS cum_days,
+                   COALESCE(p.cum_rev, 0) + SUM(n.daily_rev) OVER w AS cum_rev
+            FROM _new_daily n
+            LEFT JOIN _pairs p
+                ON n.Store_ID = p.Store_ID AND n.PLUItem_ID = p.PLUItem_ID
+            WINDOW w AS (PARTITION BY n.Store_ID, n.PLUItem_ID
+                         ORDER BY n.sale_date
+                         ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            ORDER BY n.Store_ID, n.PLUItem_ID, n.sale_date
+        ) TO {} (FORMAT PARQUET, COMPRESSION ZSTD)
+    """.format(sql_path(out_path)))
+
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE _pairs AS
+        WITH chunk AS (
+            SELECT Store_ID, PLUItem_ID,
+                   MIN(sale_date) AS first_sale, MAX(sale_date) AS last_sale,
+                   COUNT(*) AS days, SUM(daily_rev) AS rev
+            FROM _new_daily
+            GROUP BY Store_ID, PLUItem_ID
+        )
+        SELECT COALESCE(p.Store_ID, c.Store_ID) AS Store_ID,
+               COALESCE(p.PLUItem_ID, c.PLUItem_ID) AS PLUItem_ID,
+               COALESCE(p.first_sale, c.first_sale) AS first_sale,
+               COALESCE(c.last_sale, p.last_sale) AS last_sale,
+               COALESCE(p.cum_days, 0) + COALESCE(c.days, 0) AS cum_days,
+               COALESCE(p.cum_rev, 0) + COALESCE(c.rev, 0) AS cum_rev
+        FROM _pairs p
+        FULL OUTER JOIN chunk c
+            ON p.Store_ID = c.Store_ID AND p.PLUItem_ID = c.PLUItem_ID
+    """)
+    return rows
+
+
+def _compact(conn, derived_dir: Path, parts: list) -> list:
+    """Merge all parts into a single sorted file. Returns the new parts list."""
+    name = "store_plu_daily/part-compact-{}.parquet".format(uuid.uuid4().hex[:8])
+    conn.execute("""
+        COPY (SELECT * FROM read_parquet({})
+              ORDER BY Store_ID, PLUItem_ID, sale_date)
+        TO {} (FORMAT PARQUET, COMPRESSION ZSTD)
+    """.format(sql_list(derived_dir / p for p in parts),
+               sql_path(derived_dir / name)))
+    return [name]
+
+
+def _cleanup(derived_dir: Path, meta: dict) -> None:
+    """Remove part / pairs files not referenced by the committed meta."""
+    keep = set(meta["parts"]) | {meta["pairs"]}
+    candidates = list(derived_dir.glob("store_plu_pairs-*.parquet"))
+    candidates += list((derived_dir / "store_plu_daily").glob("*.parquet"))
+    for path in candidates:
+        rel = path.relative_to(derived_dir).as_posix()
+        if rel not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def refresh_sales_presence(store=None, through: Optional[str] = None,
+                           full: bool = False,
+                           derived_dir: Optional[Path] = None) -> dict:
+    """Append new days to the materialised presence table.
+
+    Args:
+        store: TransactionStore (created if omitted).
+        through: last day (YYYY-MM-DD) to materialise. Defaults to the day
+            before the latest sale, since the newest day may be partial.
+        full: rebuild from the first sale instead of appending.
+
+    Returns:
+        {status, through, days_added, rows_added, parts}
+    """
+    if store is None:
+        from transaction_layer import TransactionStore
+        store = TransactionStore()
+    if not store.available_fys:
+        return {"status": "no_data", "through": None,
+                "days_added": 0, "rows_added": 0, "parts": 0}
+
+    derived_dir = Path(derived_dir or DERIVED_DIR)
+    (derived_dir / "store_plu_daily").mkdir(parents=True, exist_ok=True)
+    meta = None if full else load_meta(derived_dir)
+
+    conn = store._get_connection()
+    try:
+        conn.execute(_RAW_DAILY_MACRO)
+        first_raw, last_raw = conn.execute(
+            "SELECT CAST(MIN(SaleDate) AS DATE), CAST(MAX(SaleDate) AS DATE) "
+            "FROM transactions"
+        ).fetchone()
+        if last_raw is None:
+            return {"status": "no_data", "through": None,
+                    "days_added": 0, "rows_added": 0, "parts": 0}
+
+        last_day = (date.fromisoformat(through) if through
+                    else last_raw - timedelta(days=1))
+        if meta:
+            start = date.fromisoformat(meta["through"]) + timedelta(days=1)
+            parts = list(meta["parts"])
+            conn.execute(
+                "CREATE TEMP TABLE _pairs AS SELECT * FROM read_parquet({})"
+                .format(sql_path(derived_dir / meta["pairs"])))
+        else:
+            start = first_raw
+            parts = []
+            conn.execute("""
+                CREATE TEMP TABLE _pairs (
+                    Store_ID VARCHAR, PLUItem_ID VARCHAR,
+                    first_sale DATE, last_sale DATE,
+                    cum_days BIGINT, cum_rev DOUBLE)
+            """)
+
+        if start > last_day:
+            # Nothing built yet (first or full build) has no coverage
+            return {"status": "up_to_date",
+                    "through": meta["through"] if meta else None,
+                    "days_added": 0, "rows_added": 0, "parts": len(parts)}
+
+        rows_added = 0
+        for chunk_start, chunk_end in _month_chunks(
+                start, last_day + timedelta(days=1)):
+            name = "store_plu_daily/part-{}_{}-{}.parquet".format(
+                chunk_start.strftime("%Y%m%d"),
+                (chunk_end - timedelta(days=1)).strftime("%Y%m%d"),
+                uuid.uuid4().hex[:8],
+            )
+            written = _append_chunk(conn, chunk_start, chunk_end,
+                                    derived_dir / name)
+            if written:
+                parts.append(name)
+                rows_added += written
+
+        if not parts:
+            return {"status": "no_data", "through": None,
+                    "days_added": 0, "rows_added": 0, "parts": 0}
+        if len(parts) > MAX_PARTS:
+            parts = _compact(conn, derived_dir, parts)
+
+        pairs_name = "store_plu_pairs-{}-{}.parquet".format(
+            last_day.strftime("%Y%m%d"), uuid.uuid4().hex[:8])
+        conn.execute("COPY _pairs TO {} (FORMAT PARQUET, COMPRESSION ZSTD)"
+                     .format(sql_path(derived_dir / pairs_name)))
+    finally:
+        conn.close()
+
+    new_meta = {
+        "through": last_day.isoformat(),
+        "parts": parts,
+        "pairs": pairs_name,
+        "built_at": datetime.now().isoformat(),
+    }
+    write_meta(_meta_path(derived_dir), new_meta)
+    _cleanup(derived_dir, new_meta)
+
+    days_added = (last_day - start).days + 1
+    logger.info("Sales presence refreshed through %s (+%d days, %d rows)",
+                last_day, days_added, rows_added)
+    return {"status": "refreshed", "through": new_meta["through"],
+            "days_added": days_added, "rows_added": rows_added,
+            "parts": len(parts)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild from the first sale")
+    parser.add_argument("--through", help="Last day to materialise (YYYY-MM-DD)")
+    args = parser.parse_args()
+    print(json.dumps(refresh_sales_presence(through=args.through,
+                                            full=args.full), indent=2))
@@ -0,0 +1,194 @@
+"""
+Harris Farm Hub — Startup Profiler
+Where API and dashboard start-up time goes.
+
+Phases: start-up steps run inside phase(name) (the FastAPI lifespan, and
+the warm-up thread it hands slow, non-critical work to). Each records
+its offset from process start, duration, thread and any error. They are
+logged and served, with milestones such as "app imported", at
+GET /api/admin/startup.
+
+Imports: import cost is measured in a fresh interpreter with CPython's
+-X importtime, so the report shows exactly what a cold worker pays:
+
+    python backend/startup_profile.py app                  # the API
+    python backend/startup_profile.py shared.auth_gate shared.styles
+    python backend/startup_profile.py store_ops_dashboard --top 40
+
+Modules resolve against backend/ and dashboards/ (and the project root).
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("hub_api")
+
+_T0 = time.time()
+_LOCK = threading.Lock()
+_PHASES: List[dict] = []
+_MILESTONES: List[dict] = []
+_WARM_UP = {"state": "not_started"}
+
+_PROJECT = Path(__file__).resolve().parent.parent
+SEARCH_PATHS = [_PROJECT / "backend", _PROJECT / "dashboards", _PROJECT]
+
+
+# ---------------------------------------------------------------------------
+# PHASES
+# ---------------------------------------------------------------------------
+
+def _since_start_ms(t: Optional[float] = None) -> float:
+    return round(((t or time.time()) - _T0) * 1000, 1)
+
+
+def mark(name: str) -> None:
+    """Record a milestone (e.g. "app imported")."""
+    with _LOCK:
+        _MILESTONES.append({"name": name, "at_ms": _since_start_ms()})
+
+
+@contextmanager
+def phase(name: str):
+    """Time a start-up step. Exceptions are recorded and re-raised."""
+    start = time.time()
+    entry = {"name": name, "start_ms": _since_start_ms(start),
+             "thread": threading.current_thread().name, "error": None}
+    try:
+        yield entry
+    except Exception as e:
+        entry["error"] = str(e)
+        raise
+    finally:
+        entry["ms"] = round((time.time() - start) * 1000, 1)
+        with _LOCK:
+            _PHASES.append(entry)
+        logger.info("Startup %s: %.0f ms%s", name, entry["ms"],
+                    " (failed)" if entry["error"] else "")
+
+
+def warm_up(steps: Iterable[Tuple[str, Callable[[], None]]],
+            name: str = "warm-up") -> threading.Thread:
+    """Run slow start-up steps in a daemon thread, in order, each as a
+    phase, so the server answers requests (and health checks) at once.
+    A failing step is logged and the rest still run."""
+    steps = list(steps)
+
+    def run():
+        _WARM_UP.update(state="running", started_ms=_since_start_ms())
+        for step_name, fn in steps:
+            try:
+                with phase(step_name):
+                    fn()
+            except Exception as e:
+                logger.warning("Warm-up step %s failed: %s", step_name, e)
+        _WARM_UP.update(state="done", finished_ms=_since_start_ms())
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up_state() -> dict:
+    return dict(_WARM_UP)
+
+
+def report() -> dict:
+    """Phases and milestones of this process so far."""
+    with _LOCK:
+        phases = sorted(_PHASES, key=lambda p: p["start_ms"])
+        milestones = list(_MILESTONES)
+    return {
+        "pid": os.getpid(),
+        "uptime_ms": _since_start_ms(),
+        "milestones": milestones,
+        "phases": phases,
+        "warm_up": warm_up_state(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# IMPORTS
+# ---------------------------------------------------------------------------
+
+def profile_imports(modules: List[str],
+                    paths: Optional[List[Path]] = None) -> List[dict]:
+    """Import modules in a fresh interpreter under -X importtime.
+
+    Returns one entry per imported module, in import order: {module,
+    self_ms, cumulative_ms, depth}. depth 0 is imported by the target
+    (or is the target itself).
+    """
+    paths = [str(p) for p in (paths or SEARCH_PATHS)]
+    code = "import sys; sys.path[:0] = {!r}\n".format(paths)
+    code += "".join("import {}\n".format(m) for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=str(_PROJECT))
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        name = name.rstrip()
+        entries.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1]
+                           if proc.stderr.strip() else "import failed")
+    return entries
+
+
+def summarise(entries: List[dict], top: int = 25) -> dict:
+    """Slowest direct imports, slowest modules overall, and self time
+    rolled up per top-level package."""
+    total = sum(e["self_ms"] for e in entries)
+    packages = {}
+    for e in entries:
+        pkg = e["module"].split(".")[0]
+        packages[pkg] = packages.get(pkg, 0) + e["self_ms"]
+    shallow = min((e["depth"] for e in entries), default=0)
+    return {
+        "total_ms": round(total, 1),
+        "direct": sorted((e for e in entries if e["depth"] <= shallow + 1),
+                         key=lambda e: -e["cumulative_ms"])[:top],
+        "packages": sorted(({"package": k, "self_ms": round(v, 1)}
+                            for k, v in packages.items()),
+                           key=lambda p: -p["self_ms"])[:top],
+    }
+
+
+def format_report(summary: dict) -> str:
+    lines = ["Total import time: {:.0f} ms".format(summary["total_ms"]), "",
+             "{:>10}  {:>10}  module".format("cumul ms", "self ms")]
+    for e in summary["direct"]:
+        lines.append("{:>10.1f}  {:>10.1f}  {}{}".format(
+            e["cumulative_ms"], e["self_ms"], "  " * e["depth"], e["module"]))
+    lines += ["", "{:>10}  package".format("self ms")]
+    for p in summary["packages"]:
+        lines.append("{:>10.1f}  {}".format(p["self_ms"], p["package"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("modules", nargs="+", help="Modules to import")
+    parser.add_argument("--top", type=int, default=25,
+                        help="Rows per section (default 25)")
+    args = parser.parse_args()
+    print(format_report(summarise(profile_imports(args.modules), args.top)))
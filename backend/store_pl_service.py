@@ -34,6 +34,8 @@ from typing import Optional
 
 import pandas as pd
 
+import telemetry
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -333,7 +335,7 @@ def ingest_to_sqlite(df: Optional[pd.DataFrame] = None, db_path: Optional[str] =
 # ---------------------------------------------------------------------------
 
 def _get_conn():
-    return sqlite3.connect(str(_DB_PATH))
+    return telemetry.connect(str(_DB_PATH))
 
 
 def _clean_for_json(df: pd.DataFrame) -> pd.DataFrame:
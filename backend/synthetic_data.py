@@ -0,0 +1,641 @@
+"""
+Harris Farm Hub — Synthetic Data Generator
+Seeded fixtures with the production schemas, cardinalities and skew, at
+any scale from a laptop-sized sample (--scale 0.001) to full size
+(--scale 1):
+
+    transactions/FY24.parquet, FY25.parquet, FY26.parquet
+        POS lines (134M / 149M / 99M rows at full size, Jul 2023 - Feb
+        2026), sorted by SaleDate. Lines come in Reference2 baskets whose
+        size is negative-binomial (mean BASKET_MEAN_LINES, long tail);
+        PLU popularity is Zipf (PLU_ZIPF_EXPONENT) over the active PLUs
+        in product_hierarchy.parquet; store volumes are lognormal; trade
+        follows the weekday, intraday (AEDT) and December peaks; 12% of
+        baskets carry a loyalty CustomerCode (the rest "NULL"), from a
+        customer pool with Zipf visit frequency and a home store.
+    harris_farm_plu.db
+        weekly_plu_results (27.3M rows at full size), dim_item, dim_store:
+        43 stores x every fiscal week, each store-week ranging a
+        popularity-weighted sample of the same PLU catalogue.
+    hub_data.db
+        Every table the API creates at startup (init_hub_database, the
+        seed_* functions, auth, MDHE, the job queue), built by those same
+        initialisers, plus seeded history in the high-volume tables
+        (page_views and its rollup, queries / llm_responses,
+        chat_messages).
+
+The same seed always writes the same data. Point the hub at a fixture
+with TransactionStore(parquet_files=...), plu_layer.PLU_DB and
+config.HUB_DB, or replay traffic against it with load_test.py.
+
+Usage:
+    python backend/synthetic_data.py out/                   # 0.1% scale
+    python backend/synthetic_data.py out/ --scale 0.05
+    python backend/synthetic_data.py out/ --scale 1         # full size
+    python backend/synthetic_data.py out/ --only plu hub
+"""
+
+import logging
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from transaction_layer import STORE_NAMES
+
+logger = logging.getLogger("hub_api")
+
+HIERARCHY_PARQUET = Path(__file__).parent.parent / "data" / "product_hierarchy.parquet"
+
+DEFAULT_SCALE = 0.001
+DEFAULT_SEED = 7
+
+# ---------------------------------------------------------------------------
+# PRODUCTION SHAPES (full size, scale = 1)
+# ---------------------------------------------------------------------------
+
+# Fiscal year -> (first day, trading days in the export, rows)
+FISCAL_YEARS = {
+    "FY24": (date(2023, 7, 3), 364, 134_000_000),
+    "FY25": (date(2024, 7, 1), 364, 149_000_000),
+    "FY26": (date(2025, 6, 30), 244, 99_000_000),
+}
+ROW_GROUP_SIZE = 122_880            # DuckDB's own row-group size
+
+BASKET_MEAN_LINES = 9.0
+BASKET_DISPERSION = 1.2             # negative binomial shape: lower = longer tail
+MAX_BASKET_LINES = 150
+PLU_ZIPF_EXPONENT = 0.9
+STORE_SIZE_SIGMA = 0.5              # lognormal spread of store volumes
+LOYALTY_SHARE = 0.12
+LOYALTY_CUSTOMERS = 400_000
+CUSTOMER_ZIPF_EXPONENT = 0.8
+HOME_STORE_SHARE = 0.85
+RETURN_SHARE = 0.004
+AEDT_OFFSET_HOURS = 11
+
+# Local trading hours 07:00-20:59 and their relative trade
+TRADING_HOURS = np.arange(7, 21)
+HOUR_WEIGHTS = np.array([2, 5, 8, 10, 10, 9, 8, 8, 9, 10, 9, 6, 3, 1], float)
+WEEKDAY_WEIGHTS = np.array([0.90, 0.88, 0.92, 1.00, 1.12, 1.25, 1.00])
+
+PLU_DB_ROWS = 27_300_000
+PLU_STORE_COUNT = 43
+PLU_FISCAL_YEARS = {2024: 52, 2025: 52, 2026: 35}
+ONLINE_SHARE = 0.06
+
+# hub_data.db tables seeded with history, and their full-size row counts
+HUB_VOLUMES = {
+    "page_views": 1_500_000,
+    "queries": 60_000,
+    "chat_messages": 150_000,
+}
+HUB_USERS = 600
+HUB_DAYS = 180
+HUB_ROLES = ["user", "user", "user", "store_manager", "buyer", "executive",
+             "admin"]
+HUB_PAGES = [
+    "home", "sales", "customers", "profitability", "store-ops", "buying-hub",
+    "product-intel", "plu-intel", "revenue-bridge", "market-share",
+    "store-network", "demographics", "whitespace", "trending", "transport",
+    "skills-academy", "the-paddock", "hub-assistant", "the-rubric",
+    "prompt-builder", "agent-hub", "approvals", "analytics-engine",
+    "strategy-overview", "greater-goodness", "mdhe-dashboard",
+]
+LLM_PROVIDERS = ["claude", "chatgpt", "grok"]
+QUESTION_TEMPLATES = [
+    "What were total sales at {store} last week?",
+    "Top 10 products by revenue in {dept}",
+    "How many {item} did we sell this month?",
+    "Compare {store} to last year",
+    "Which stores have the highest wastage in {dept}?",
+    "Average basket size at {store}",
+    "Show the trend for {item} across all stores",
+]
+
+# Fallback catalogue shape when product_hierarchy.parquet is absent
+_FALLBACK_DEPARTMENTS = [
+    ("10", "10 - FRUIT & VEGETABLES"), ("20", "20 - GROCERY"),
+    ("30", "30 - PERISHABLES"), ("40", "40 - MEAT"), ("50", "50 - DELI"),
+    ("60", "60 - BAKERY"), ("70", "70 - FLOWERS"),
+]
+_FALLBACK_PLUS = 26_000
+_WEIGHED_DEPARTMENTS = {"10", "40", "50"}
+_FRESH_DEPARTMENTS = {"10", "30", "40", "50", "60", "70"}
+
+_TRANSACTION_SCHEMA = pa.schema([
+    ("Store_ID", pa.string()),
+    ("PLUItem_ID", pa.string()),
+    ("SaleDate", pa.timestamp("us")),
+    ("Reference2", pa.string()),
+    ("CustomerCode", pa.string()),
+    ("Quantity", pa.float64()),
+    ("SalesIncGST", pa.float64()),
+    ("GST", pa.float64()),
+    ("EstimatedCOGS", pa.float64()),
+])
+
+
+def _zipf_weights(n: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _sampler(weights: np.ndarray):
+    """Inverse-CDF sampler: draw(rng, size) -> indices into weights."""
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return lambda rng, size: np.minimum(
+        np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+
+# ---------------------------------------------------------------------------
+# PRODUCT CATALOGUE
+# ---------------------------------------------------------------------------
+
+def load_catalogue(seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """Active PLUs with their hierarchy and generated commercial traits.
+
+    One row per PLU, ordered by popularity rank: plu, dept_code,
+    description, department, major_group, minor_group, popularity (Zipf,
+    sums to 1), price (inc GST, per kg if weighed), margin, taxable,
+    weighed, fresh.
+    """
+    rng = np.random.default_rng(seed)
+    if HIERARCHY_PARQUET.exists():
+        df = pd.read_parquet(HIERARCHY_PARQUET, columns=[
+            "ProductNumber", "ProductName", "DepartmentCode", "DepartmentDesc",
+            "MajorGroupDesc", "MinorGroupDesc", "ProductLifecycleStateId"])
+        df = df[df["ProductLifecycleStateId"] == "Active"]
+        cat = pd.DataFrame({
+            "plu": df["ProductNumber"].astype(str).values,
+            "dept_code": df["DepartmentCode"].astype(str).values,
+            "description": df["ProductName"].fillna("").values,
+            "department": df["DepartmentDesc"].values,
+            "major_group": df["MajorGroupDesc"].values,
+            "minor_group": df["MinorGroupDesc"].values,
+        })
+    else:
+        dept = rng.integers(0, len(_FALLBACK_DEPARTMENTS), _FALLBACK_PLUS)
+        codes = np.array([d[0] for d in _FALLBACK_DEPARTMENTS])[dept]
+        cat = pd.DataFrame({
+            "plu": [str(1000 + i) for i in range(_FALLBACK_PLUS)],
+            "dept_code": codes,
+            "description": ["ITEM {}".format(1000 + i)
+                            for i in range(_FALLBACK_PLUS)],
+            "department": np.array([d[1] for d in _FALLBACK_DEPARTMENTS])[dept],
+            "major_group": ["{} - GROUP".format(c) for c in codes],
+            "minor_group": ["{} - SUBGROUP".format(c) for c in codes],
+        })
+
+    # Popularity rank is a seeded shuffle; Zipf weights by rank
+    cat = cat.iloc[rng.permutation(len(cat))].reset_index(drop=True)
+    n = len(cat)
+    cat["popularity"] = _zipf_weights(n, PLU_ZIPF_EXPONENT)
+    cat["weighed"] = (cat["dept_code"].isin(_WEIGHED_DEPARTMENTS)
+                      & (rng.random(n) < 0.5))
+    cat["fresh"] = cat["dept_code"].isin(_FRESH_DEPARTMENTS)
+    cat["taxable"] = rng.random(n) < np.where(cat["fresh"], 0.05, 0.6)
+    cat["price"] = np.round(rng.lognormal(1.6, 0.7, n).clip(0.5, 150), 2)
+    cat["margin"] = rng.uniform(0.22, 0.45, n)
+    return cat
+
+
+# ---------------------------------------------------------------------------
+# TRANSACTIONS (parquet)
+# ---------------------------------------------------------------------------
+
+def _store_weights(stores: list, rng) -> np.ndarray:
+    weights = rng.lognormal(0.0, STORE_SIZE_SIGMA, len(stores))
+    return weights / weights.sum()
+
+
+def _day_weights(start: date, days: int) -> np.ndarray:
+    dates = [start + timedelta(days=d) for d in range(days)]
+    weights = WEEKDAY_WEIGHTS[[d.weekday() for d in dates]].copy()
+    for i, d in enumerate(dates):
+        if d.month == 12 and 15 <= d.day <= 24:
+            weights[i] *= 1.4
+        if d.month == 12 and d.day == 25:
+            weights[i] = 0.0
+    return weights / weights.sum()
+
+
+def _basket_sizes(rng, lines: int) -> np.ndarray:
+    """Negative-binomial basket sizes (>= 1) summing to exactly `lines`."""
+    p = BASKET_DISPERSION / (BASKET_DISPERSION + BASKET_MEAN_LINES - 1)
+    sizes = np.empty(0, dtype=np.int64)
+    while sizes.sum() < lines:
+        more = 1 + rng.negative_binomial(
+            BASKET_DISPERSION, p, int(lines / BASKET_MEAN_LINES) + 16)
+        sizes = np.concatenate([sizes, np.minimum(more, MAX_BASKET_LINES)])
+    cut = np.searchsorted(np.cumsum(sizes), lines)
+    sizes = sizes[:cut + 1]
+    sizes[-1] -= sizes.sum() - lines
+    return sizes[sizes > 0]
+
+
+def _day_table(rng, day: date, lines: int, ref_start: int, stores, store_draw,
+               customers, customer_draw, customer_home, cat, plu_draw):
+    """One trading day's POS lines, sorted by SaleDate."""
+    sizes = _basket_sizes(rng, lines)
+    baskets = len(sizes)
+
+    # Basket attributes: customer (and their home store), store, time
+    loyal = rng.random(baskets) < LOYALTY_SHARE
+    cust = customer_draw(rng, baskets)
+    store = store_draw(rng, baskets)
+    at_home = loyal & (rng.random(baskets) < HOME_STORE_SHARE)
+    store[at_home] = customer_home[cust[at_home]]
+    customer = np.where(loyal, customers[cust], "NULL")
+
+    hour = TRADING_HOURS[np.searchsorted(
+        np.cumsum(HOUR_WEIGHTS) / HOUR_WEIGHTS.sum(),
+        rng.random(baskets), side="right").clip(0, len(TRADING_HOURS) - 1)]
+    seconds = ((hour - AEDT_OFFSET_HOURS) * 3600
+               + rng.integers(0, 3600, baskets))
+    sale_ts = (np.datetime64(day.isoformat(), "s")
+               + seconds.astype("timedelta64[s]"))
+
+    # Expand baskets to lines
+    idx = np.repeat(np.arange(baskets), sizes)
+    plu = plu_draw(rng, lines)
+    weighed = cat["weighed"].values[plu]
+    quantity = np.where(
+        weighed, np.round(rng.lognormal(-0.6, 0.6, lines), 3),
+        rng.geometric(0.75, lines).astype(float))
+    quantity[rng.random(lines) < RETURN_SHARE] *= -1
+    sales = np.round(quantity * cat["price"].values[plu], 2)
+    gst = np.where(cat["taxable"].values[plu], np.round(sales / 11, 2), 0.0)
+    cogs = np.round(-(sales - gst) * (1 - cat["margin"].values[plu])
+                    * rng.uniform(0.95, 1.05, lines), 2)
+
+    order = np.argsort(sale_ts[idx], kind="stable")
+    idx, plu = idx[order], plu[order]
+    return pa.table({
+        "Store_ID": np.asarray(stores, dtype=object)[store[idx]],
+        "PLUItem_ID": cat["plu"].values[plu],
+        "SaleDate": pa.array(sale_ts[idx].astype("datetime64[us]")),
+        "Reference2": (ref_start + idx).astype(str).astype(object),
+        "CustomerCode": customer[idx].astype(object),
+        "Quantity": quantity[order],
+        "SalesIncGST": sales[order],
+        "GST": gst[order],
+        "EstimatedCOGS": cogs[order],
+    }, schema=_TRANSACTION_SCHEMA), baskets
+
+
+def write_transactions(out_dir: Path, scale: float = DEFAULT_SCALE,
+                       seed: int = DEFAULT_SEED,
+                       fiscal_years: Optional[list] = None,
+                       row_group_size: int = ROW_GROUP_SIZE,
+                       catalogue: Optional[pd.DataFrame] = None) -> dict:
+    """Write one parquet per fiscal year; returns {fy: path}."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cat = catalogue if catalogue is not None else load_catalogue(seed)
+    rng = np.random.default_rng(seed)
+
+    stores = list(STORE_NAMES)
+    store_draw = _sampler(_store_weights(stores, rng))
+    pool = max(1_000, int(LOYALTY_CUSTOMERS * scale))
+    customers = np.array([str(1_000_000 + i) for i in range(pool)],
+                         dtype=object)
+    customer_draw = _sampler(_zipf_weights(pool, CUSTOMER_ZIPF_EXPONENT))
+    customer_home = store_draw(rng, pool)
+    plu_draw = _sampler(cat["popularity"].values)
+
+    paths, reference = {}, 1_000_000_000
+    for fy in fiscal_years or FISCAL_YEARS:
+        start, days, rows = FISCAL_YEARS[fy]
+        day_lines = rng.multinomial(max(1, int(rows * scale)),
+                                    _day_weights(start, days))
+        path = out_dir / "{}.parquet".format(fy)
+        started = time.monotonic()
+        buffered, pending = [], 0
+        with pq.ParquetWriter(path, _TRANSACTION_SCHEMA,
+                              compression="zstd") as writer:
+            for d, lines in enumerate(day_lines):
+                if lines == 0:
+                    continue
+                table, baskets = _day_table(
+                    rng, start + timedelta(days=d), int(lines), reference,
+                    stores, store_draw, customers, customer_draw,
+                    customer_home, cat, plu_draw)
+                reference += baskets
+                buffered.append(table)
+                pending += table.num_rows
+                if pending >= row_group_size:
+                    whole = pa.concat_tables(buffered)
+                    full = pending // row_group_size * row_group_size
+                    writer.write_table(whole.slice(0, full),
+                                       row_group_size=row_group_size)
+                    buffered, pending = [whole.slice(full)], pending - full
+            if pending:
+                writer.write_table(pa.concat_tables(buffered),
+                                   row_group_size=row_group_size)
+        logger.info("Synthetic %s: %d rows in %.1fs", fy, day_lines.sum(),
+                    time.monotonic() - started)
+        paths[fy] = path
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# PLU WEEKLY RESULTS (harris_farm_plu.db)
+# ---------------------------------------------------------------------------
+
+def plu_stores() -> dict:
+    """The PLU_STORE_COUNT stores of the weekly results: the trading
+    stores, padded with placeholder ids."""
+    stores = dict(STORE_NAMES)
+    extra = 88
+    while len(stores) < PLU_STORE_COUNT:
+        stores[str(extra)] = "Store {}".format(extra)
+        extra += 1
+    return stores
+
+
+def write_plu_db(path: Path, scale: float = DEFAULT_SCALE,
+                 seed: int = DEFAULT_SEED,
+                 catalogue: Optional[pd.DataFrame] = None) -> Path:
+    """Write harris_farm_plu.db (weekly_plu_results, dim_item, dim_store)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    cat = catalogue if catalogue is not None else load_catalogue(seed)
+    rng = np.random.default_rng(seed + 1)
+
+    stores = plu_stores()
+    store_ids = list(stores)
+    store_weights = _store_weights(store_ids, rng)
+    weeks = sum(PLU_FISCAL_YEARS.values())
+    per_store_week = PLU_DB_ROWS * scale / (1 + ONLINE_SHARE) / (
+        len(store_ids) * weeks)
+    popularity = cat["popularity"].values
+    # Efraimidis-Spirakis: the top-k of u ** (1 / w) is a weighted
+    # sample of k PLUs without replacement
+    log_weight = np.log(popularity)
+    relative = popularity / popularity.mean()
+    price_ex = cat["price"].values / np.where(cat["taxable"].values, 1.1, 1.0)
+
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute("""CREATE TABLE dim_store (
+            store_id TEXT PRIMARY KEY, store_name TEXT)""")
+        conn.executemany("INSERT INTO dim_store VALUES (?,?)", stores.items())
+        conn.execute("""CREATE TABLE dim_item (
+            plu_code TEXT PRIMARY KEY, description TEXT, item_desc TEXT,
+            department TEXT, major_group TEXT, minor_group TEXT)""")
+        conn.executemany("INSERT INTO dim_item VALUES (?,?,?,?,?,?)", zip(
+            cat["plu"], cat["description"], cat["description"],
+            cat["department"], cat["major_group"], cat["minor_group"]))
+        conn.execute("""CREATE TABLE weekly_plu_results (
+            plu_code TEXT, store_id TEXT, fiscal_year INTEGER,
+            fiscal_week INTEGER, channel TEXT, sales_ex_gst REAL,
+            gross_margin REAL, wastage REAL, stocktake_cost REAL)""")
+
+        for fiscal_year, fy_weeks in PLU_FISCAL_YEARS.items():
+            for week in range(1, fy_weeks + 1):
+                batch = []
+                for s, store_id in enumerate(store_ids):
+                    size = store_weights[s] * len(store_ids)
+                    k = min(len(cat), int(rng.poisson(per_store_week * size)))
+                    if k == 0:
+                        continue
+                    keys = np.log(rng.random(len(cat))) / np.exp(
+                        log_weight - log_weight.max())
+                    plu = np.argpartition(-keys, k - 1)[:k]
+                    units = np.maximum(1.0, np.round(rng.lognormal(
+                        np.log(4.0 * size * relative[plu] ** 0.5), 0.6)))
+                    sales = np.round(units * price_ex[plu], 2)
+                    gm = np.round(sales * cat["margin"].values[plu]
+                                  * rng.uniform(0.85, 1.1, k), 2)
+                    fresh = cat["fresh"].values[plu]
+                    wastage = np.round(np.where(
+                        fresh | (rng.random(k) < 0.15),
+                        -sales * rng.beta(1.2, 20, k), 0.0), 2)
+                    stocktake = np.round(np.where(
+                        rng.random(k) < 0.25,
+                        -sales * rng.uniform(0, 0.03, k), 0.0), 2)
+                    codes = cat["plu"].values[plu]
+                    batch.extend(zip(codes, [store_id] * k, [fiscal_year] * k,
+                                     [week] * k, ["Retail"] * k,
+                                     sales.tolist(), gm.tolist(),
+                                     wastage.tolist(), stocktake.tolist()))
+                    online = rng.random(k) < ONLINE_SHARE
+                    batch.extend(zip(
+                        codes[online], [store_id] * int(online.sum()),
+                        [fiscal_year] * int(online.sum()),
+                        [week] * int(online.sum()),
+                        ["Online"] * int(online.sum()),
+                        np.round(sales[online] * 0.08, 2).tolist(),
+                        np.round(gm[online] * 0.08, 2).tolist(),
+                        [0.0] * int(online.sum()), [0.0] * int(online.sum())))
+                conn.executemany(
+                    "INSERT INTO weekly_plu_results VALUES (?,?,?,?,?,?,?,?,?)",
+                    batch)
+            conn.commit()
+
+        conn.execute("CREATE INDEX idx_wpr_plu ON weekly_plu_results"
+                     "(plu_code, channel)")
+        conn.execute("CREATE INDEX idx_wpr_fy ON weekly_plu_results"
+                     "(fiscal_year, channel)")
+        conn.execute("CREATE INDEX idx_wpr_store ON weekly_plu_results"
+                     "(store_id)")
+        conn.execute("CREATE INDEX idx_item_dept ON dim_item(department)")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+# ---------------------------------------------------------------------------
+# HUB DATABASE (hub_data.db)
+# ---------------------------------------------------------------------------
+
+def init_hub_schema(path: Path):
+    """Create every startup table in `path` with the API's own
+    initialisers (the same order as app.lifespan)."""
+    import app as hub_app
+    import auth
+    import mdhe_db
+    from job_queue import init_job_tables
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    saved = (hub_app.config.HUB_DB, auth.AUTH_DB, mdhe_db._DB,
+             mdhe_db._INIT_DONE)
+    hub_app.config.HUB_DB = str(path)
+    try:
+        hub_app.init_hub_database()
+        for seed_fn in (hub_app.seed_learning_data, hub_app.seed_arena_data,
+                        hub_app.seed_agent_control_data,
+                        hub_app.seed_prompt_templates,
+                        hub_app.seed_knowledge_base,
+                        hub_app.seed_sustainability_kpis):
+            try:
+                seed_fn()
+            except Exception as e:
+                logger.warning("Synthetic hub: %s skipped: %s",
+                               seed_fn.__name__, e)
+        auth.init_auth_db(str(path))
+        mdhe_db._DB, mdhe_db._INIT_DONE = path, False
+        mdhe_db.init_mdhe_db()
+        conn = sqlite3.connect(str(path))
+        try:
+            init_job_tables(conn)
+        finally:
+            conn.close()
+    finally:
+        (hub_app.config.HUB_DB, auth.AUTH_DB, mdhe_db._DB,
+         mdhe_db._INIT_DONE) = saved
+
+
+def _timestamps(rng, n: int, end: datetime, days: int) -> list:
+    """Working-hours timestamps over the last `days`, oldest first."""
+    day = rng.integers(0, days, n)
+    hour = TRADING_HOURS[np.searchsorted(
+        np.cumsum(HOUR_WEIGHTS) / HOUR_WEIGHTS.sum(),
+        rng.random(n), side="right").clip(0, len(TRADING_HOURS) - 1)]
+    offset = (day * 86400 + (hour - AEDT_OFFSET_HOURS) * 3600
+              + rng.integers(0, 3600, n))
+    start = datetime(end.year, end.month, end.day) - timedelta(days=days)
+    return [(start + timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S")
+            for s in np.sort(offset)]
+
+
+def seed_hub_history(path: Path, scale: float = DEFAULT_SCALE,
+                     seed: int = DEFAULT_SEED,
+                     catalogue: Optional[pd.DataFrame] = None,
+                     end: Optional[datetime] = None):
+    """Append HUB_VOLUMES rows of usage history (Zipf users and pages)."""
+    from analytics_engine import rebuild_rollups
+
+    rng = np.random.default_rng(seed + 2)
+    cat = catalogue if catalogue is not None else load_catalogue(seed)
+    end = end or datetime.utcnow()
+    user_draw = _sampler(_zipf_weights(HUB_USERS, 1.1))
+    page_draw = _sampler(_zipf_weights(len(HUB_PAGES), 1.0))
+    roles = np.array(HUB_ROLES, dtype=object)[
+        rng.integers(0, len(HUB_ROLES), HUB_USERS)]
+    counts = {t: max(10, int(n * scale)) for t, n in HUB_VOLUMES.items()}
+
+    conn = sqlite3.connect(str(path))
+    try:
+        n = counts["page_views"]
+        users = user_draw(rng, n)
+        conn.executemany(
+            "INSERT INTO page_views (user_id, user_email, page_slug, "
+            "user_role, created_at) VALUES (?,?,?,?,?)",
+            zip(("user{}".format(u) for u in users),
+                ("user{}@harrisfarm.com.au".format(u) for u in users),
+                (HUB_PAGES[p] for p in page_draw(rng, n)),
+                roles[users], _timestamps(rng, n, end, HUB_DAYS)))
+        rebuild_rollups(conn)
+
+        def question():
+            return QUESTION_TEMPLATES[rng.integers(len(QUESTION_TEMPLATES))]\
+                .format(store=STORE_NAMES[list(STORE_NAMES)[
+                            rng.integers(len(STORE_NAMES))]],
+                        dept=cat["department"].iat[rng.integers(20)],
+                        item=cat["description"].iat[rng.integers(200)].lower())
+
+        n = counts["queries"]
+        stamps = _timestamps(rng, n, end, HUB_DAYS)
+        for i in range(n):
+            query_id = conn.execute(
+                "INSERT INTO queries (question, query_type, user_id, "
+                "timestamp, context) VALUES (?,?,?,?,?)",
+                (question(), "nl_query",
+                 "user{}".format(user_draw(rng, 1)[0]), stamps[i],
+                 HUB_PAGES[page_draw(rng, 1)[0]])).lastrowid
+            for provider in LLM_PROVIDERS[:1 + int(rng.random() < 0.3)]:
+                conn.execute(
+                    "INSERT INTO llm_responses (query_id, provider, response, "
+                    "tokens, latency_ms, timestamp) VALUES (?,?,?,?,?,?)",
+                    (query_id, provider, "x" * int(rng.integers(200, 2000)),
+                     int(rng.integers(150, 1500)),
+                     round(float(rng.lognormal(7.6, 0.5)), 1), stamps[i]))
+
+        n = counts["chat_messages"]
+        stamps = _timestamps(rng, n, end, HUB_DAYS)
+        conn.executemany(
+            "INSERT INTO chat_messages (session_id, role, content, provider, "
+            "tokens, latency_ms, timestamp) VALUES (?,?,?,?,?,?,?)",
+            [("s{}".format(i // 6), "user" if i % 2 == 0 else "assistant",
+              question() if i % 2 == 0 else "x" * int(rng.integers(100, 1500)),
+              None if i % 2 == 0 else "claude",
+              0 if i % 2 == 0 else int(rng.integers(100, 1200)),
+              0 if i % 2 == 0 else round(float(rng.lognormal(7.4, 0.5)), 1),
+              stamps[i]) for i in range(n)])
+        conn.commit()
+    finally:
+        conn.close()
+    return counts
+
+
+def write_hub_db(path: Path, scale: float = DEFAULT_SCALE,
+                 seed: int = DEFAULT_SEED,
+                 catalogue: Optional[pd.DataFrame] = None) -> Path:
+    """Write a fresh hub_data.db: startup schema plus usage history."""
+    path = Path(path)
+    for stale in (path, Path(str(path) + "-wal"), Path(str(path) + "-shm")):
+        if stale.exists():
+            stale.unlink()
+    init_hub_schema(path)
+    seed_hub_history(path, scale, seed, catalogue)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# ALL FIXTURES
+# ---------------------------------------------------------------------------
+
+def generate(out_dir: Path, scale: float = DEFAULT_SCALE,
+             seed: int = DEFAULT_SEED, only: Optional[list] = None) -> dict:
+    """Write the fixtures into out_dir in the data/ layout (the API
+    keeps hub_data.db in backend/). `only` picks from "transactions",
+    "plu", "hub". Returns the paths written."""
+    out_dir = Path(out_dir)
+    only = set(only or ("transactions", "plu", "hub"))
+    cat = load_catalogue(seed)
+    written = {}
+    if "transactions" in only:
+        written["transactions"] = write_transactions(
+            out_dir / "transactions", scale, seed, catalogue=cat)
+    if "plu" in only:
+        written["plu"] = write_plu_db(out_dir / "harris_farm_plu.db", scale,
+                                      seed, catalogue=cat)
+    if "hub" in only:
+        written["hub"] = write_hub_db(out_dir / "hub_data.db", scale, seed,
+                                      catalogue=cat)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("out_dir", help="Directory to write the fixtures to")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE,
+                        help="Fraction of production size (1 = full size)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--only", nargs="+",
+                        choices=["transactions", "plu", "hub"])
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    for kind, written in generate(Path(args.out_dir), args.scale, args.seed,
+                                  args.only).items():
+        for path in (written.values() if isinstance(written, dict)
+                     else [written]):
+            print("{:<13} {}".format(kind, path))
+    print("done in {:.1f}s".format(time.monotonic() - started))
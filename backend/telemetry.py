@@ -0,0 +1,618 @@
+"""
+Harris Farm Hub — Telemetry
+Latency of API requests, DuckDB and SQLite queries and LLM calls, so a
+regression shows up in p95s before users notice it.
+
+Recording -- one series per (kind, name):
+    http    TelemetryMiddleware      route template, "GET /api/stores/{id}"
+    duckdb  TransactionStore._execute catalog template (run_query() labels
+                                      its queries with template()) or a
+                                      fingerprint of the SQL
+    sqlite  connect() connections    template() label or SQL fingerprint
+                                      (conn.execute() and cursor(), so
+                                      pd.read_sql() is timed too)
+    llm     timed_call() / timed()   "anthropic:<model>", "openai:<model>"
+Queries also record rows returned and an estimate of their payload bytes.
+
+Each observation updates an in-process histogram, served in Prometheus
+text format at GET /api/metrics, and is appended to a memory buffer. A
+background thread flushes the buffer every FLUSH_SECONDS into a ring
+buffer table in TELEMETRY_DB: row seq lands in slot seq % RING_SIZE, so
+the file never grows and the newest RING_SIZE observations (from every
+process sharing the file) survive restarts. summary() reads the ring for
+p50 / p95 / p99 per series.
+
+Slow queries: a query slower than SLOW_QUERY_MS is sampled (probability
+SLOW_SAMPLE_RATE) into the slow_queries ring with its plan. The plan
+(DuckDB EXPLAIN, SQLite EXPLAIN QUERY PLAN) is taken by the flusher
+thread, never on the request path.
+"""
+
+import atexit
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("hub_api")
+
+ENABLED = os.getenv("HUB_TELEMETRY", "1") != "0"
+TELEMETRY_DB = os.getenv(
+    "HUB_TELEMETRY_DB",
+    str(Path(__file__).parent.parent / "data" / "telemetry.db"))
+RING_SIZE = int(os.getenv("HUB_TELEMETRY_RING", "100000"))
+SLOW_RING_SIZE = 500
+SLOW_QUERY_MS = float(os.getenv("HUB_SLOW_QUERY_MS", "1000"))
+SLOW_SAMPLE_RATE = float(os.getenv("HUB_SLOW_QUERY_SAMPLE", "0.25"))
+FLUSH_SECONDS = 5.0
+FLUSH_ROWS = 2000
+MAX_BUFFERED = 50000   # if flushes keep failing
+MAX_SERIES = 500       # per kind; later names are counted as "other"
+
+# Histogram bucket upper bounds, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)
+
+# kind -> Prometheus metric prefix
+METRICS = {
+    "http": "hub_http_request",
+    "duckdb": "hub_duckdb_query",
+    "sqlite": "hub_sqlite_query",
+    "llm": "hub_llm_call",
+}
+
+_LOCK = threading.Lock()
+_SERIES: Dict[tuple, "_Series"] = {}
+_NAMES: Dict[str, set] = defaultdict(set)
+_BUFFER: List[tuple] = []
+_SLOW: List[dict] = []
+_TEMPLATES: Dict[str, str] = {}
+_WAKE = threading.Event()
+_FLUSHER: Optional[threading.Thread] = None
+_FLUSH_LOCK = threading.Lock()
+_START_LOCK = threading.Lock()
+
+_template = contextvars.ContextVar("telemetry_template", default=None)
+
+
+# ---------------------------------------------------------------------------
+# SERIES
+# ---------------------------------------------------------------------------
+
+class _Series:
+    """Histogram plus row / byte / error counters for one (kind, name)."""
+
+    __slots__ = ("buckets", "count", "seconds", "rows", "bytes", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+
+
+def _is_error(status: str) -> bool:
+    return status == "error" or status[:1] == "5"
+
+
+def observe(kind: str, name: str, seconds: float, rows: Optional[int] = None,
+            nbytes: Optional[int] = None, status: str = "ok") -> str:
+    """Record one timed operation; returns the series name used."""
+    if not ENABLED:
+        return name
+    with _LOCK:
+        names = _NAMES[kind]
+        if name not in names:
+            if len(names) >= MAX_SERIES:
+                name = "other"
+            names.add(name)
+        series = _SERIES.get((kind, name))
+        if series is None:
+            series = _SERIES[(kind, name)] = _Series()
+        series.buckets[bisect_left(BUCKETS, seconds)] += 1
+        series.count += 1
+        series.seconds += seconds
+        series.rows += rows or 0
+        series.bytes += nbytes or 0
+        series.errors += _is_error(status)
+        _BUFFER.append((time.time(), kind, name, seconds, rows, nbytes,
+                        status))
+        pending = len(_BUFFER)
+    _ensure_flusher()
+    if pending >= FLUSH_ROWS:
+        _WAKE.set()
+    return name
+
+
+@contextmanager
+def timed(kind: str, name: str):
+    """Time a block. The yielded dict may set rows / nbytes / status;
+    an exception records status "error" and propagates."""
+    entry = {"rows": None, "nbytes": None, "status": "ok"}
+    start = time.perf_counter()
+    try:
+        yield entry
+    except BaseException:
+        entry["status"] = "error"
+        raise
+    finally:
+        observe(kind, name, time.perf_counter() - start, entry["rows"],
+                entry["nbytes"], entry["status"])
+
+
+def timed_call(kind: str, prefix: str, func: Callable) -> Callable:
+    """Wrap an SDK call (e.g. client.messages.create) so each call is
+    timed as "<prefix>:<model>"."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(kind, "{}:{}".format(prefix, kwargs.get("model", "?"))):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def template(name: str):
+    """Label the queries run inside the block with a template name
+    (instead of their SQL fingerprint)."""
+    token = _template.set(name)
+    try:
+        yield
+    finally:
+        _template.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# QUERIES
+# ---------------------------------------------------------------------------
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalise_sql(sql: str) -> str:
+    """SQL with comments dropped, literals and IN lists replaced by ?
+    and whitespace collapsed: one text per query shape."""
+    sql = _LITERAL.sub("?", _COMMENT.sub(" ", sql))
+    return _SPACE.sub(" ", _IN_LIST.sub("(?)", sql)).strip()
+
+
+def fingerprint(sql: str) -> tuple:
+    """(name, normalised SQL) for a query without a template label."""
+    text = normalise_sql(sql)
+    return "sql:" + hashlib.sha1(text.lower().encode()).hexdigest()[:10], text
+
+
+def payload_bytes(rows: list, sample: int = 20) -> int:
+    """Estimated JSON size of a result, from its first rows."""
+    if not rows:
+        return 0
+    head = rows[:sample]
+    size = len(json.dumps(head, default=str))
+    return size * len(rows) // len(head)
+
+
+def record_query(kind: str, sql: str, seconds: float,
+                 rows: Optional[int] = None, nbytes: Optional[int] = None,
+                 status: str = "ok",
+                 explain: Optional[Callable[[], str]] = None) -> str:
+    """Record a DuckDB / SQLite query. Slow ones are sampled into the
+    slow-query log; explain() (returning the plan text) runs later on
+    the flusher thread."""
+    if not ENABLED:
+        return ""
+    name = _template.get()
+    text = None
+    if name is None:
+        name, text = fingerprint(sql)
+    name = observe(kind, name, seconds, rows, nbytes, status)
+    if seconds * 1000 >= SLOW_QUERY_MS and random.random() < SLOW_SAMPLE_RATE:
+        with _LOCK:
+            if len(_SLOW) < SLOW_RING_SIZE:
+                _SLOW.append({"ts": time.time(), "kind": kind, "name": name,
+                              "seconds": seconds, "rows": rows,
+                              "sql": sql, "explain": explain})
+        _WAKE.set()
+    if text is not None and name not in _TEMPLATES:
+        with _LOCK:
+            _TEMPLATES.setdefault(name, text)
+    return name
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """Cursor that records its statement once the result is consumed:
+    at execute() for statements without rows, else at the first
+    fetchone(), at fetchall() / fetchmany() or when iteration ends."""
+
+    _t_sql = None
+
+    def execute(self, sql, parameters=()):
+        self._t_sql, self._t_rows, self._t_bytes = sql, 0, 0
+        self._t_params = parameters
+        self._t_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception:
+            self._t_seconds += time.perf_counter() - start
+            self._t_record("error")
+            raise
+        self._t_seconds += time.perf_counter() - start
+        if self.description is None:
+            self._t_record()
+        return self
+
+    def _t_fetched(self, start, rows):
+        self._t_seconds += time.perf_counter() - start
+        if rows:
+            head = [tuple(r) for r in rows[:20]]
+            self._t_rows += len(rows)
+            self._t_bytes += payload_bytes(head) * len(rows) // len(head)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._t_fetched(start, [row] if row is not None else [])
+        self._t_record()
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._t_fetched(start, rows)
+        self._t_record()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._t_fetched(start, rows)
+        self._t_record()
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._t_seconds += time.perf_counter() - start
+            self._t_record()
+            raise
+        self._t_seconds += time.perf_counter() - start
+        self._t_rows += 1
+        return row
+
+    def _t_record(self, status="ok"):
+        sql = self._t_sql
+        if sql is None:
+            return
+        self._t_sql = None
+        record_query("sqlite", sql, self._t_seconds, self._t_rows,
+                     self._t_bytes, status,
+                     explain=functools.partial(
+                         _sqlite_plan, self.connection.t_path, sql,
+                         self._t_params))
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements are timed, whether run through
+    execute() or a cursor() (as pd.read_sql() does)."""
+
+    t_path = None
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+
+def connect(path, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect() with every statement recorded as a "sqlite"
+    query (see _TimedCursor)."""
+    conn = sqlite3.connect(path, factory=TimedConnection, **kwargs)
+    conn.t_path = str(path)
+    return conn
+
+
+def _sqlite_plan(path: str, sql: str, params) -> str:
+    conn = sqlite3.connect("file:{}?mode=ro".format(path), uri=True)
+    try:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        return "\n".join(str(r[-1]) for r in rows)
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# ASGI MIDDLEWARE
+# ---------------------------------------------------------------------------
+
+class TelemetryMiddleware:
+    """Times every HTTP request, labelled by method and route template
+    so path parameters do not split a series; requests matching no
+    route share "unmatched"."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            observe("http", "{} {}".format(scope["method"],
+                                           route or "unmatched"),
+                    time.perf_counter() - start, status=str(status["code"]))
+
+
+# ---------------------------------------------------------------------------
+# RING BUFFER
+# ---------------------------------------------------------------------------
+
+def init_telemetry_tables(conn: sqlite3.Connection):
+    """Create the ring buffer tables (idempotent)."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS telemetry_ring (
+        slot INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        ts REAL NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        seconds REAL NOT NULL,
+        rows INTEGER,
+        bytes INTEGER,
+        status TEXT
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tr_seq "
+                 "ON telemetry_ring(seq)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS slow_queries (
+        slot INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        ts REAL NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        seconds REAL NOT NULL,
+        rows INTEGER,
+        sql TEXT,
+        plan TEXT
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sq_seq "
+                 "ON slow_queries(seq)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS query_templates (
+        name TEXT PRIMARY KEY,
+        sql TEXT NOT NULL,
+        first_seen REAL NOT NULL
+    )""")
+    conn.commit()
+
+
+def _open(db_path: str) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    init_telemetry_tables(conn)
+    return conn
+
+
+def _append_ring(conn, table: str, size: int, rows: List[tuple]):
+    """Write rows into the next slots of a ring table (caller holds the
+    write transaction, so processes sharing the file interleave)."""
+    seq = conn.execute(f"SELECT COALESCE(MAX(seq), -1) + 1 FROM {table}"
+                       ).fetchone()[0]
+    marks = ",".join("?" * (len(rows[0]) + 2))
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {table} VALUES ({marks})",
+        [((seq + i) % size, seq + i) + row for i, row in enumerate(rows)])
+
+
+def _plan(entry: dict) -> Optional[str]:
+    if entry["explain"] is None:
+        return None
+    try:
+        return entry["explain"]()
+    except Exception as e:
+        return "plan unavailable: {}".format(e)
+
+
+def flush(db_path: Optional[str] = None) -> int:
+    """Write buffered observations (and slow queries, with their plans)
+    to the ring buffer. Returns the number of observations written; on
+    failure they return to the buffer for the next flush."""
+    db_path = db_path or TELEMETRY_DB
+    with _FLUSH_LOCK:
+        with _LOCK:
+            rows, slow = _BUFFER[:], _SLOW[:]
+            templates = dict(_TEMPLATES)
+            del _BUFFER[:], _SLOW[:]
+        if not rows and not slow:
+            return 0
+        slow_rows = [(e["ts"], e["kind"], e["name"], e["seconds"], e["rows"],
+                      e["sql"], _plan(e)) for e in slow]
+        try:
+            conn = _open(db_path)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                if rows:
+                    _append_ring(conn, "telemetry_ring", RING_SIZE, rows)
+                if slow_rows:
+                    _append_ring(conn, "slow_queries", SLOW_RING_SIZE,
+                                 slow_rows)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO query_templates VALUES (?,?,?)",
+                    [(n, s, time.time()) for n, s in templates.items()])
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("Telemetry flush failed (%d kept): %s",
+                           len(rows), e)
+            with _LOCK:
+                _BUFFER[:0] = rows
+                del _BUFFER[:-MAX_BUFFERED]
+            return 0
+        return len(rows)
+
+
+def _ensure_flusher() -> None:
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    with _START_LOCK:
+        if _FLUSHER is None or not _FLUSHER.is_alive():
+            _FLUSHER = threading.Thread(target=_flush_loop,
+                                        name="telemetry-flush", daemon=True)
+            _FLUSHER.start()
+
+
+def _flush_loop() -> None:
+    while True:
+        _WAKE.wait(FLUSH_SECONDS)
+        _WAKE.clear()
+        try:
+            flush()
+        except Exception as e:  # keep the flusher alive
+            logger.warning("Telemetry flusher error: %s", e)
+
+
+atexit.register(flush)
+
+
+# ---------------------------------------------------------------------------
+# REPORTS
+# ---------------------------------------------------------------------------
+
+def _percentile(ordered: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summary(db_path: Optional[str] = None, window_seconds: float = 3600,
+            kind: Optional[str] = None) -> List[dict]:
+    """p50 / p95 / p99 latency (ms), volume, rows, bytes and errors per
+    series over the ring's observations in the last window_seconds,
+    slowest p95 first. Query series carry their normalised SQL."""
+    db_path = db_path or TELEMETRY_DB
+    flush(db_path)
+    conn = _open(db_path)
+    try:
+        sql = ("SELECT kind, name, seconds, rows, bytes, status "
+               "FROM telemetry_ring WHERE ts >= ?")
+        params = [time.time() - window_seconds]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        grouped = defaultdict(list)
+        for row in conn.execute(sql, params):
+            grouped[row[:2]].append(row[2:])
+        texts = dict(conn.execute("SELECT name, sql FROM query_templates"))
+    finally:
+        conn.close()
+
+    out = []
+    for (k, name), obs in grouped.items():
+        ordered = sorted(o[0] for o in obs)
+        out.append({
+            "kind": k,
+            "name": name,
+            "count": len(obs),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 1),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1),
+            "rows": sum(o[1] or 0 for o in obs),
+            "bytes": sum(o[2] or 0 for o in obs),
+            "errors": sum(_is_error(o[3] or "") for o in obs),
+            "sql": texts.get(name),
+        })
+    out.sort(key=lambda s: s["p95_ms"], reverse=True)
+    return out
+
+
+def slow_queries(db_path: Optional[str] = None, limit: int = 50) -> List[dict]:
+    """The most recent sampled slow queries, newest first, with plans."""
+    db_path = db_path or TELEMETRY_DB
+    flush(db_path)
+    conn = _open(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute(
+            "SELECT seq, ts, kind, name, seconds, rows, sql, plan "
+            "FROM slow_queries ORDER BY seq DESC LIMIT ?", (limit,))]
+    finally:
+        conn.close()
+
+
+def _label(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+def prometheus_text() -> str:
+    """This process's series in the Prometheus text exposition format."""
+    with _LOCK:
+        series = {key: (list(s.buckets), s.count, s.seconds, s.rows,
+                        s.bytes, s.errors)
+                  for key, s in _SERIES.items()}
+    lines = []
+    for kind, prefix in METRICS.items():
+        items = sorted((name, v) for (k, name), v in series.items()
+                       if k == kind)
+        metric = prefix + "_duration_seconds"
+        lines += [f"# HELP {metric} {kind} latency in seconds",
+                  f"# TYPE {metric} histogram"]
+        for name, (buckets, count, seconds, *_rest) in items:
+            label = 'name="{}"'.format(_label(name))
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{label}}} {seconds:.6f}")
+            lines.append(f"{metric}_count{{{label}}} {count}")
+        counters = [("errors", 5, f"{kind} errors")]
+        if kind in ("duckdb", "sqlite"):
+            counters += [("rows", 3, "rows returned"),
+                         ("bytes", 4, "estimated result bytes")]
+        for suffix, index, help_text in counters:
+            counter = f"{prefix}_{suffix}_total"
+            lines += [f"# HELP {counter} {help_text}",
+                      f"# TYPE {counter} counter"]
+            for name, values in items:
+                lines.append('{}{{name="{}"}} {}'.format(
+                    counter, _label(name), values[index]))
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Drop in-process series and buffers (tests)."""
+    with _LOCK:
+        _SERIES.clear()
+        _NAMES.clear()
+        del _BUFFER[:], _SLOW[:]
+        _TEMPLATES.clear()
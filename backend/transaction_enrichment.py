@@ -0,0 +1,282 @@
+"""
+Harris Farm Hub — Enriched Transaction Layout
+Offline build of a denormalised copy of each fiscal-year transaction
+parquet with the fiscal calendar and product hierarchy attributes the
+query catalog groups and filters on already stored per line, so dashboard
+queries read one table instead of joining two and computing the local
+hour per row.
+
+Derived files (data/transactions/enriched/):
+    <FY>-<id>.parquet
+        Every transaction column plus
+            sale_date_utc       CAST(SaleDate AS DATE): the UTC calendar
+                                day, the key the fiscal columns are
+                                joined on (as in the raw-table queries)
+            local_date          calendar day, AEDT (SaleDate + 11h)
+            local_hour          hour of day, AEDT (SaleDate + 11h)
+            FinYear, FinQuarterOfYearNo/Name, FinMonthOfYearNo/Name/
+            ShortName, FinWeekOfYearNo/Name, FinWeekStartDate/EndDate,
+            DayOfWeekNo/Name, BusinessDay, Weekend, SeasonName
+            DepartmentCode/Desc, MajorGroupCode/Desc, MinorGroupCode/Desc,
+            HFMItem, BuyerId
+        Sorted by SaleDate, dictionary-encoded, ZSTD-compressed. Fiscal
+        columns are NULL for dates outside the calendar and hierarchy
+        columns are NULL for PLUs not in product_hierarchy (codes are never
+        NULL otherwise, so `DepartmentCode IS NOT NULL` is the inner join).
+    enriched_meta.json
+        Per FY: file name plus the size / mtime of the source parquet,
+        product_hierarchy.parquet and fiscal_calendar_daily.parquet it was
+        built from -- the commit point.
+
+TransactionStore installs the `transactions_enriched` view on every
+connection via install_enriched_view(). A fiscal year whose build is
+missing or stale (its source parquet or either dimension file changed)
+is served by the same SELECT over the raw file with live LEFT JOINs, so
+results never depend on whether the build has run.
+
+Rebuild fiscal years whose sources changed:
+    python backend/transaction_enrichment.py            # nightly
+    python backend/transaction_enrichment.py --force    # rebuild all
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from derived_build import read_meta, signature, sql_path, write_meta
+
+logger = logging.getLogger("hub_api")
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+ENRICHED_DIR = DATA_DIR / "transactions" / "enriched"
+HIERARCHY_PARQUET = DATA_DIR / "product_hierarchy.parquet"
+FISCAL_CALENDAR_PARQUET = DATA_DIR / "fiscal_calendar_daily.parquet"
+
+# Bump when the enriched column set changes -- older builds become stale
+LAYOUT_VERSION = 2
+
+ROW_GROUP_SIZE = 122_880
+
+# {source} is a read_parquet() call; needs the product_hierarchy and
+# fiscal_calendar views (TransactionStore._get_connection).
+_ENRICH_SELECT = """
+    SELECT t.*,
+           CAST(t.SaleDate AS DATE) AS sale_date_utc,
+           CAST(t.SaleDate + INTERVAL '11' HOUR AS DATE) AS local_date,
+           CAST(EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR)
+                AS TINYINT) AS local_hour,
+           CAST(fc.FinYear AS SMALLINT) AS FinYear,
+           CAST(fc.FinQuarterOfYearNo AS TINYINT) AS FinQuarterOfYearNo,
+           fc.FinQuarterOfYearName,
+           CAST(fc.FinMonthOfYearNo AS TINYINT) AS FinMonthOfYearNo,
+           fc.FinMonthOfYearName,
+           fc.FinMonthOfYearShortName,
+           CAST(fc.FinWeekOfYearNo AS TINYINT) AS FinWeekOfYearNo,
+           fc.FinWeekOfYearName,
+           CAST(fc.FinWeekStartDate AS DATE) AS FinWeekStartDate,
+           CAST(fc.FinWeekEndDate AS DATE) AS FinWeekEndDate,
+           CAST(fc.DayOfWeekNo AS TINYINT) AS DayOfWeekNo,
+           fc.DayOfWeekName,
+           fc.BusinessDay,
+           fc.Weekend,
+           fc.SeasonName,
+           p.DepartmentCode,
+           p.DepartmentDesc,
+           p.MajorGroupCode,
+           p.MajorGroupDesc,
+           p.MinorGroupCode,
+           p.MinorGroupDesc,
+           p.HFMItem,
+           p.BuyerId
+    FROM {source} t
+    LEFT JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
+    LEFT JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+"""
+
+
+# ---------------------------------------------------------------------------
+# METADATA
+# ---------------------------------------------------------------------------
+
+def _dimension_signatures() -> dict:
+    return {"hierarchy": signature(HIERARCHY_PARQUET),
+            "calendar": signature(FISCAL_CALENDAR_PARQUET)}
+
+
+def _meta_path(enriched_dir: Path) -> Path:
+    return Path(enriched_dir) / "enriched_meta.json"
+
+
+def load_meta(enriched_dir: Optional[Path] = None) -> dict:
+    """Build metadata ({fys: {FY: entry}}), empty if there is none."""
+    meta = read_meta(_meta_path(Path(enriched_dir or ENRICHED_DIR)),
+                     version=LAYOUT_VERSION)
+    if meta is None:
+        return {"fys": {}}
+    meta.setdefault("fys", {})
+    return meta
+
+
+def fresh_files(available_fys: dict,
+                enriched_dir: Optional[Path] = None) -> dict:
+    """{FY: enriched parquet} for fiscal years whose build matches the
+    current source and dimension files."""
+    enriched_dir = Path(enriched_dir or ENRICHED_DIR)
+    meta = load_meta(enriched_dir)
+    if not meta["fys"]:
+        return {}
+    dims = _dimension_signatures()
+    fresh = {}
+    for fy, source in available_fys.items():
+        entry = meta["fys"].get(fy)
+        if not entry:
+            continue
+        path = enriched_dir / entry["file"]
+        if (entry.get("source_sig") == signature(source)
+                and entry.get("hierarchy") == dims["hierarchy"]
+                and entry.get("calendar") == dims["calendar"]
+                and path.is_file()):
+            fresh[fy] = path
+    return fresh
+
+
+# ---------------------------------------------------------------------------
+# QUERY VIEW
+# ---------------------------------------------------------------------------
+
+def install_enriched_view(conn, available_fys: dict,
+                          enriched_dir: Optional[Path] = None,
+                          source_scan=None) -> list:
+    """Create `transactions_enriched` on a connection that has the
+    product_hierarchy / fiscal_calendar views.
+
+    Returns the fiscal years served from enriched files. Without the
+    dimension files, stale years cannot be enriched on the fly and the
+    view is only created if every year has a fresh build.
+
+    source_scan: optional fiscal_year -> relation SQL to enrich on the fly
+    instead of the source parquet (preview samples); builds are not used.
+    """
+    fresh = {} if source_scan else fresh_files(available_fys, enriched_dir)
+    can_join = (HIERARCHY_PARQUET.exists()
+                and FISCAL_CALENDAR_PARQUET.exists())
+    branches = []
+    for fy, source in sorted(available_fys.items()):
+        if fy in fresh:
+            select = "SELECT * FROM read_parquet({})".format(
+                sql_path(fresh[fy]))
+        elif can_join:
+            select = _ENRICH_SELECT.format(
+                source=(source_scan(fy) if source_scan else
+                        "read_parquet({})".format(sql_path(source))))
+        else:
+            return []
+        branches.append("SELECT *, '{}' AS fiscal_year FROM ({})".format(
+            fy, select))
+    if not branches:
+        return []
+    conn.execute("CREATE OR REPLACE VIEW transactions_enriched AS "
+                 + " UNION ALL BY NAME ".join(branches))
+    return sorted(fresh)
+
+
+# ---------------------------------------------------------------------------
+# BUILD
+# ---------------------------------------------------------------------------
+
+def _cleanup(enriched_dir: Path, meta: dict) -> None:
+    """Remove enriched files not referenced by the committed meta."""
+    keep = {entry["file"] for entry in meta["fys"].values()}
+    for path in enriched_dir.glob("*.parquet"):
+        if path.name not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def build_enriched(store=None, fys: Optional[list] = None,
+                   force: bool = False,
+                   enriched_dir: Optional[Path] = None) -> dict:
+    """Write enriched parquet for fiscal years whose sources changed.
+
+    Args:
+        store: TransactionStore (created if omitted).
+        fys: fiscal years to consider (default: all available).
+        force: rebuild even if the existing build is fresh.
+
+    Returns:
+        {status, built: {FY: rows}, fresh: [FY, ...]}
+    """
+    if store is None:
+        from transaction_layer import TransactionStore
+        store = TransactionStore()
+    available = {fy: path for fy, path in store.available_fys.items()
+                 if fys is None or fy in fys}
+    if not available:
+        return {"status": "no_data", "built": {}, "fresh": []}
+    if not (HIERARCHY_PARQUET.exists() and FISCAL_CALENDAR_PARQUET.exists()):
+        return {"status": "no_dimensions", "built": {}, "fresh": []}
+
+    enriched_dir = Path(enriched_dir or ENRICHED_DIR)
+    enriched_dir.mkdir(parents=True, exist_ok=True)
+    fresh = {} if force else fresh_files(available, enriched_dir)
+    todo = {fy: path for fy, path in available.items() if fy not in fresh}
+    if not todo:
+        return {"status": "up_to_date", "built": {}, "fresh": sorted(fresh)}
+
+    meta = load_meta(enriched_dir)
+    built = {}
+    conn = store._get_connection()
+    try:
+        for fy, source in sorted(todo.items()):
+            # Signatures are taken before reading, so a source that changes
+            # mid-build is simply rebuilt next time.
+            source_sig = signature(source)
+            dims = _dimension_signatures()
+            name = "{}-{}.parquet".format(fy, uuid.uuid4().hex[:8])
+            conn.execute("""
+                COPY ({} ORDER BY t.SaleDate)
+                TO {} (FORMAT PARQUET, COMPRESSION ZSTD,
+                       ROW_GROUP_SIZE {})
+            """.format(
+                _ENRICH_SELECT.format(
+                    source="read_parquet({})".format(sql_path(source))),
+                sql_path(enriched_dir / name), ROW_GROUP_SIZE))
+            rows = conn.execute(
+                "SELECT COUNT(*) FROM read_parquet({})".format(
+                    sql_path(enriched_dir / name))).fetchone()[0]
+            meta["fys"][fy] = {
+                "file": name,
+                "source": str(source),
+                "source_sig": source_sig,
+                "hierarchy": dims["hierarchy"],
+                "calendar": dims["calendar"],
+                "rows": rows,
+                "built_at": datetime.now().isoformat(),
+            }
+            meta["version"] = LAYOUT_VERSION
+            write_meta(_meta_path(enriched_dir), meta)
+            built[fy] = rows
+            logger.info("Enriched %s: %d rows -> %s", fy, rows, name)
+    finally:
+        conn.close()
+
+    _cleanup(enriched_dir, meta)
+    return {"status": "built", "built": built, "fresh": sorted(fresh)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every fiscal year")
+    parser.add_argument("fys", nargs="*", help="Fiscal years (e.g. FY26)")
+    args = parser.parse_args()
+    print(json.dumps(build_enriched(fys=args.fys or None, force=args.force),
+                     indent=2))
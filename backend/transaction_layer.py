@@ -5,10 +5,30 @@ Source: Microsoft Fabric retail fact_pos_sales → parquet export.
 """
 
 import duckdb
+import hashlib
+import json
 import logging
+import re
+import time
+from datetime import date
 from pathlib import Path
 from typing import Optional
 
+from customer_summary import DERIVED_DIR as CUSTOMER_DIR
+from customer_summary import install_customer_macros
+from query_preview import PREVIEW_DIR, replicate_scan, run_preview
+from query_preview import sample_files
+from query_rewriter import rewrite_sargable
+from sales_presence import DERIVED_DIR as PRESENCE_DIR
+from sales_presence import install_macros
+import telemetry
+from transaction_enrichment import (
+    ENRICHED_DIR,
+    FISCAL_CALENDAR_PARQUET,
+    HIERARCHY_PARQUET,
+    install_enriched_view,
+)
+
 logger = logging.getLogger("hub_api")
 
 # ---------------------------------------------------------------------------
@@ -88,6 +108,53 @@ _BLOCKED_KEYWORDS = {
     "DETACH", "EXPORT", "IMPORT", "LOAD", "INSTALL", "PRAGMA",
 }
 
+# ---------------------------------------------------------------------------
+# PERIOD COMPARISON
+# ---------------------------------------------------------------------------
+
+# Measures TransactionStore.compare_periods() can compute. Every one is a
+# sum of its per-store values, which like-for-like totals rely on.
+COMPARISON_MEASURES = {
+    "revenue": "SUM(SalesIncGST)",
+    "transactions": "COUNT(DISTINCT Reference2)",
+    "line_items": "COUNT(*)",
+    "quantity": "SUM(Quantity)",
+    "cogs": "SUM(EstimatedCOGS)",
+    "gp": "SUM(SalesIncGST) + COALESCE(SUM(EstimatedCOGS), 0)",
+    "active_stores": "COUNT(DISTINCT Store_ID)",
+    "fresh_revenue": "SUM(CASE WHEN GST = 0 THEN SalesIncGST ELSE 0 END)",
+    "returns_value": ("SUM(CASE WHEN SalesIncGST < 0 "
+                      "THEN ABS(SalesIncGST) ELSE 0 END)"),
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _shift_year(d: date, years: int) -> date:
+    try:
+        return d.replace(year=d.year + years)
+    except ValueError:  # 29 February
+        return d.replace(year=d.year + years, day=28)
+
+
+def comparison_windows(start: str, end: str, prior_period: bool = True,
+                       prior_year: bool = True) -> dict:
+    """Named [start, end) date windows for a period and its comparisons.
+
+    current: the period itself; prior_period: the same number of days
+    immediately before it; prior_year: the same dates a year earlier
+    (as SaleDate - INTERVAL '1' YEAR).
+    """
+    s, e = date.fromisoformat(str(start)[:10]), date.fromisoformat(str(end)[:10])
+    windows = {"current": (s.isoformat(), e.isoformat())}
+    if prior_period:
+        windows["prior_period"] = ((s - (e - s)).isoformat(), s.isoformat())
+    if prior_year:
+        windows["prior_year"] = (_shift_year(s, -1).isoformat(),
+                                 _shift_year(e, -1).isoformat())
+    return windows
+
+
 # ---------------------------------------------------------------------------
 # TRANSACTION STORE
 # ---------------------------------------------------------------------------
@@ -96,7 +163,29 @@ _BLOCKED_KEYWORDS = {
 class TransactionStore:
     """Query engine for Harris Farm POS transaction parquet files via DuckDB."""
 
-    def __init__(self):
+    def __init__(self, parquet_files: Optional[dict] = None,
+                 presence_dir: Optional[Path] = None,
+                 enriched_dir: Optional[Path] = None,
+                 customer_dir: Optional[Path] = None,
+                 preview_dir: Optional[Path] = None):
+        """
+        Args:
+            parquet_files: optional {fiscal_year: path} to use instead of
+                the local / external data directories (fixtures, benchmarks).
+            presence_dir: optional sales presence build directory
+                (defaults to sales_presence.DERIVED_DIR).
+            enriched_dir: optional enriched layout directory
+                (defaults to transaction_enrichment.ENRICHED_DIR).
+            customer_dir: optional customer summary build directory
+                (defaults to customer_summary.DERIVED_DIR).
+            preview_dir: optional preview sample build directory
+                (defaults to query_preview.PREVIEW_DIR).
+        """
+        self._parquet_files = parquet_files
+        self._presence_dir = presence_dir
+        self._enriched_dir = enriched_dir
+        self._customer_dir = customer_dir
+        self._preview_dir = preview_dir
         self._verify_files()
 
     def _verify_files(self):
@@ -104,6 +193,13 @@ class TransactionStore:
         data/transactions/ first, then external Desktop path."""
         self.available_fys = {}
 
+        if self._parquet_files is not None:
+            self.available_fys = {
+                fy: Path(path) for fy, path in self._parquet_files.items()
+                if Path(path).exists()
+            }
+            return
+
         # Try project-local files first (Replit / portable)
         for fy, path in LOCAL_PARQUET_FILES.items():
             if path.exists():
@@ -127,9 +223,24 @@ class TransactionStore:
             logger.error("No parquet files found in %s or %s",
                          LOCAL_PARQUET_DIR, EXTERNAL_PARQUET_DIR)
 
-    def _get_connection(self) -> duckdb.DuckDBPyConnection:
-        """Return a DuckDB connection with `transactions` view and
-        `product_hierarchy` table (if parquet available)."""
+    def _get_connection(self, sample: Optional[dict] = None
+                        ) -> duckdb.DuckDBPyConnection:
+        """Return a DuckDB connection with `transactions` view,
+        `product_hierarchy` / `fiscal_calendar` views (if parquet
+        available), the `transactions_enriched` view, the sales presence
+        macros and the customer summary macros.
+
+        sample: {fiscal_year: (sample parquet, replicate)} serves both
+        transaction views from one preview sub-sample (query_preview.py)
+        and skips the derived-table macros.
+        """
+        # Fiscal years can land after start-up while data_loader is still
+        # downloading the history -- pick them up without a restart.
+        if self._parquet_files is None:
+            for fy, path in LOCAL_PARQUET_FILES.items():
+                if fy not in self.available_fys and path.exists():
+                    self.available_fys[fy] = path
+
         conn = duckdb.connect(":memory:")
 
         unions = []
@@ -137,9 +248,10 @@ class TransactionStore:
             # Paths are embedded as string literals (not params) because
             # DuckDB does not support prepared params in CREATE VIEW.
             escaped = str(path).replace("'", "''")
+            source = (replicate_scan(*sample[fy]) if sample
+                      else f"read_parquet('{escaped}')")
             unions.append(
-                f"SELECT *, '{fy}' AS fiscal_year "
-                f"FROM read_parquet('{escaped}')"
+                f"SELECT *, '{fy}' AS fiscal_year FROM {source}"
             )
 
         if not unions:
@@ -148,46 +260,118 @@ class TransactionStore:
         sql = "CREATE VIEW transactions AS " + " UNION ALL ".join(unions)
         conn.execute(sql)
 
-        # Load product hierarchy table (72,911 products) for JOIN queries
-        hierarchy_path = (
-            Path(__file__).parent.parent / "data" / "product_hierarchy.parquet"
-        )
-        if hierarchy_path.exists():
-            escaped_h = str(hierarchy_path).replace("'", "''")
-            conn.execute(
-                f"CREATE TABLE product_hierarchy AS "
-                f"SELECT * FROM read_parquet('{escaped_h}')"
-            )
-
-        # Load fiscal calendar (4,018 daily rows) for fiscal-aware queries
-        fiscal_path = (
-            Path(__file__).parent.parent / "data" / "fiscal_calendar_daily.parquet"
-        )
-        if fiscal_path.exists():
-            escaped_fc = str(fiscal_path).replace("'", "''")
-            conn.execute(
-                f"CREATE TABLE fiscal_calendar AS "
-                f"SELECT * FROM read_parquet('{escaped_fc}')"
-            )
+        # Product hierarchy (72,911 products) and fiscal calendar (4,018
+        # daily rows) as views over their parquet: only queries that join
+        # them read them, instead of every connection materialising both.
+        for name, path in (("product_hierarchy", HIERARCHY_PARQUET),
+                           ("fiscal_calendar", FISCAL_CALENDAR_PARQUET)):
+            if path.exists():
+                escaped_d = str(path).replace("'", "''")
+                conn.execute(
+                    f"CREATE VIEW {name} AS "
+                    f"SELECT * FROM read_parquet('{escaped_d}')"
+                )
+
+        # transactions_enriched: calendar / hierarchy attributes per line,
+        # from the enriched build where fresh (transaction_enrichment.py)
+        if sample:
+            install_enriched_view(
+                conn, self.available_fys, self._enriched_dir,
+                source_scan=lambda fy: replicate_scan(*sample[fy]))
+            return conn
+        install_enriched_view(conn, self.available_fys, self._enriched_dir)
+
+        # plu_daily / plu_baseline macros over the materialised store x PLU
+        # daily table (raw transactions fallback) for out-of-stock queries
+        install_macros(conn, self._presence_dir)
+
+        # customer_baskets / customer_profile / customer_cohorts over the
+        # materialised customer tables (raw transactions fallback)
+        install_customer_macros(conn, self._customer_dir)
 
         return conn
 
+    def data_version(self) -> str:
+        """Fingerprint of the source parquet and the derived builds'
+        metadata: changes whenever new data or a rebuild is committed
+        (result_cache.py keys cached query results on it)."""
+        paths = sorted(self.available_fys.values())
+        if self._parquet_files is None:
+            paths += sorted(p for p in LOCAL_PARQUET_FILES.values()
+                            if p.exists() and p not in paths)
+        paths += [HIERARCHY_PARQUET, FISCAL_CALENDAR_PARQUET]
+        for folder in (self._presence_dir or PRESENCE_DIR,
+                       self._enriched_dir or ENRICHED_DIR,
+                       self._customer_dir or CUSTOMER_DIR,
+                       self._preview_dir or PREVIEW_DIR):
+            paths += sorted(Path(folder).glob("*.json"))
+        stamp = []
+        for path in paths:
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                continue
+            stamp.append([str(path), stat.st_size, stat.st_mtime_ns])
+        return hashlib.sha1(json.dumps(stamp).encode()).hexdigest()[:16]
+
+    def has_preview_sample(self) -> bool:
+        """True if every fiscal year has a fresh preview sample. Without
+        one a preview is a full scan too, so progressive pages skip it."""
+        return sample_files(self.available_fys, self._preview_dir) is not None
+
     # ------------------------------------------------------------------
     # PUBLIC QUERY METHODS
     # ------------------------------------------------------------------
 
     def query(self, sql: str, params: Optional[list] = None,
-              timeout_seconds: int = 30, max_rows: int = 10000) -> list[dict]:
+              timeout_seconds: int = 30, max_rows: int = 10000,
+              preview=False) -> list[dict]:
         """
         Execute a read-only SQL query against the transactions view.
+        SaleDate predicates are made sargable first (query_rewriter).
         Returns list of dicts (column-name → value).
+
+        preview: True for approximate distinct counts, or a spec dict
+        ({"scale": [...], "keys": [...], "omit": [...]}) to also run on
+        the preview sample with <column>_moe error bounds -- see
+        query_preview.py.
         """
-        conn = self._get_connection()
+        sql = rewrite_sargable(sql)
+        if preview:
+            spec = preview if isinstance(preview, dict) else None
+            return run_preview(self, sql, params, max_rows, spec,
+                               self._preview_dir)
+        return self._execute(sql, params, max_rows)
+
+    def _execute(self, sql: str, params: Optional[list], max_rows: int,
+                 sample: Optional[dict] = None) -> list[dict]:
+        # Timed from connection set-up to the last row (telemetry.py)
+        start = time.perf_counter()
+        rows, status = [], "error"
         try:
-            result = conn.execute(sql, params or [])
-            columns = [desc[0].lower() for desc in result.description]
-            rows = result.fetchmany(max_rows)
-            return [dict(zip(columns, row)) for row in rows]
+            conn = self._get_connection(sample)
+            try:
+                result = conn.execute(sql, params or [])
+                columns = [desc[0].lower() for desc in result.description]
+                rows = [dict(zip(columns, row))
+                        for row in result.fetchmany(max_rows)]
+                status = "ok"
+                return rows
+            finally:
+                conn.close()
+        finally:
+            telemetry.record_query(
+                "duckdb", sql, time.perf_counter() - start, len(rows),
+                telemetry.payload_bytes(rows), status,
+                explain=lambda: self.explain(sql, params, sample))
+
+    def explain(self, sql: str, params: Optional[list] = None,
+                sample: Optional[dict] = None) -> str:
+        """DuckDB's physical plan for a query (slow-query log)."""
+        conn = self._get_connection(sample)
+        try:
+            rows = conn.execute("EXPLAIN " + sql, params or []).fetchall()
+            return "\n".join(str(row[-1]) for row in rows)
         finally:
             conn.close()
 
@@ -401,6 +585,99 @@ class TransactionStore:
         finally:
             conn.close()
 
+    def compare_periods(self, windows: dict,
+                        measures: Optional[list] = None,
+                        store_id: Optional[str] = None,
+                        group_by: Optional[list] = None,
+                        like_for_like: bool = False) -> dict:
+        """Measures for several date windows from a single scan.
+
+        Args:
+            windows: {name: (start, end)}, end exclusive, e.g. from
+                comparison_windows(). Windows may overlap.
+            measures: names from COMPARISON_MEASURES (default all).
+            store_id: optional single store.
+            group_by: optional transaction columns to break down by.
+            like_for_like: only stores that trade in every window.
+
+        Rows are tagged with every window they fall in by a join against
+        the (tiny) window list, and only row groups inside some window
+        are read, so each row group is scanned once however many windows
+        are asked for -- instead of one scan per window.
+
+        Returns {name: DataFrame}, in window order, each with the measures
+        as columns and the same index: the union of group_by keys (zeros
+        where a window has no rows), or a single row. Like-for-like
+        totals add up per-store values, so transactions then counts
+        store x Reference2 receipts.
+        """
+        import pandas as pd
+
+        measures = list(measures or COMPARISON_MEASURES)
+        unknown = [m for m in measures if m not in COMPARISON_MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown measures: {unknown}")
+        group_by = list(group_by or [])
+        bad = [c for c in group_by if not _IDENTIFIER.match(c)]
+        if bad or not windows:
+            raise ValueError(f"Invalid group_by columns: {bad}" if bad
+                             else "At least one window is required")
+
+        keys = list(dict.fromkeys(
+            (["Store_ID"] if like_for_like else []) + group_by))
+        names = list(windows)
+        bounds = [(str(s), str(e)) for s, e in windows.values()]
+        values = ", ".join(
+            "(?, CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))" for _ in names)
+        ranges = " OR ".join(
+            "(t.SaleDate >= CAST(? AS TIMESTAMP) "
+            "AND t.SaleDate < CAST(? AS TIMESTAMP))" for _ in names)
+        select = ", ".join([f"t.{k} AS {k}" for k in keys] + [
+            f"{COMPARISON_MEASURES[m]} AS {m}" for m in measures])
+        store_clause = "AND t.Store_ID = ?" if store_id else ""
+        sql = f"""
+            SELECT w.window_name, {select}
+            FROM transactions t
+            JOIN (VALUES {values}) AS w(window_name, w_start, w_end)
+              ON t.SaleDate >= w.w_start AND t.SaleDate < w.w_end
+            WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
+              AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND ({ranges})
+              {store_clause}
+            GROUP BY ALL
+        """
+        params = [v for name, (s, e) in zip(names, bounds)
+                  for v in (name, s, e)]
+        params += [min(s for s, _ in bounds), max(e for _, e in bounds)]
+        params += [v for pair in bounds for v in pair]
+        if store_id:
+            params.append(store_id)
+
+        conn = self._get_connection()
+        try:
+            df = conn.execute(sql, params).df()
+        finally:
+            conn.close()
+
+        if like_for_like:
+            trading = df.groupby("Store_ID")["window_name"].nunique()
+            df = df[df["Store_ID"].isin(trading[trading == len(names)].index)]
+            if "active_stores" in measures:
+                df = df.assign(active_stores=1)
+            keys = group_by
+            df = df.groupby(["window_name"] + keys, as_index=False,
+                            dropna=False)[measures].sum(min_count=1)
+
+        frames = {name: df[df["window_name"] == name] for name in names}
+        if keys:
+            index = df.set_index(keys).index.unique().sort_values()
+            return {name: f.set_index(keys)[measures].reindex(
+                        index, fill_value=0)
+                    for name, f in frames.items()}
+        return {name: (f[measures].reset_index(drop=True) if len(f)
+                       else pd.DataFrame([{m: 0 for m in measures}]))
+                for name, f in frames.items()}
+
     @staticmethod
     def validate_freeform_sql(sql: str) -> Optional[str]:
         """
@@ -10,14 +10,34 @@ Usage:
     ts = TransactionStore()
     results = run_query(ts, "store_weekly_trend",
                         store_id="28", start="2025-07-01", end="2026-01-01")
+
+build_query() renders a template to (sql, params) without running it;
+query_benchmark.py profiles every template that way.
 """
 
+import re
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
+import duckdb
+
+import telemetry
+
+FISCAL_CALENDAR_PARQUET = (
+    Path(__file__).parent.parent / "data" / "fiscal_calendar_daily.parquet"
+)
+
 # ---------------------------------------------------------------------------
 # QUERY DEFINITIONS
 # ---------------------------------------------------------------------------
 
+# "preview": how a template's output scales from the preview sample
+# (query_preview.py): additive columns, the columns rows are keyed on, and
+# columns that have no sample estimate.
+_KPI_COLUMNS = ["line_items", "transactions", "revenue", "quantity", "cogs",
+                "gp"]
+
 QUERIES = {
     # ------------------------------------------------------------------
     # REVENUE & ITEM RANKING
@@ -105,6 +125,7 @@ QUERIES = {
             ORDER BY 1
         """,
         "params": ["store_id", "start", "end"],
+        "preview": {"keys": ["period"], "scale": _KPI_COLUMNS},
     },
 
     "store_monthly_trend": {
@@ -125,6 +146,7 @@ QUERIES = {
             ORDER BY 1
         """,
         "params": ["store_id", "start", "end"],
+        "preview": {"keys": ["period"], "scale": _KPI_COLUMNS},
     },
 
     "network_monthly_trend": {
@@ -149,6 +171,9 @@ QUERIES = {
     # ------------------------------------------------------------------
     # CUSTOMER ANALYSIS
     # ------------------------------------------------------------------
+    # Windowed customer queries aggregate customer_baskets() -- one row per
+    # customer x basket x store x day, materialised by customer_summary.py
+    # -- instead of raw lines.
     "customer_purchase_history": {
         "description": "Purchase history for a loyalty customer (12% of transactions have codes)",
         "sql": """
@@ -173,17 +198,12 @@ QUERIES = {
         "sql": """
             SELECT CustomerCode,
                    COUNT(DISTINCT Reference2) AS visits,
-                   SUM(SalesIncGST) AS total_spend,
-                   AVG(SalesIncGST) AS avg_item_value,
+                   SUM(spend) AS total_spend,
+                   SUM(spend) / SUM(lines) AS avg_item_value,
                    COUNT(DISTINCT Store_ID) AS stores_visited,
-                   MIN(SaleDate) AS first_purchase,
-                   MAX(SaleDate) AS last_purchase
-            FROM transactions
-            WHERE CustomerCode IS NOT NULL
-              AND CustomerCode != 'NULL'
-              AND LENGTH(CustomerCode) > 4
-              AND SaleDate >= CAST(? AS TIMESTAMP)
-              AND SaleDate < CAST(? AS TIMESTAMP)
+                   MIN(first_sale) AS first_purchase,
+                   MAX(last_sale) AS last_purchase
+            FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
             GROUP BY CustomerCode
             ORDER BY total_spend DESC
             LIMIT ?
@@ -196,18 +216,13 @@ QUERIES = {
         "sql": """
             WITH rfm AS (
                 SELECT CustomerCode,
-                       DATEDIFF('day', MAX(SaleDate), CURRENT_TIMESTAMP) AS recency_days,
+                       DATEDIFF('day', MAX(last_sale), CURRENT_TIMESTAMP) AS recency_days,
                        COUNT(DISTINCT Reference2) AS frequency,
-                       SUM(SalesIncGST) AS monetary,
+                       SUM(spend) AS monetary,
                        COUNT(DISTINCT Store_ID) AS stores_visited,
-                       MIN(SaleDate) AS first_purchase,
-                       MAX(SaleDate) AS last_purchase
-                FROM transactions
-                WHERE CustomerCode IS NOT NULL
-                  AND CustomerCode != 'NULL'
-                  AND LENGTH(CustomerCode) > 4
-                  AND SaleDate >= CAST(? AS TIMESTAMP)
-                  AND SaleDate < CAST(? AS TIMESTAMP)
+                       MIN(first_sale) AS first_purchase,
+                       MAX(last_sale) AS last_purchase
+                FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
                 GROUP BY CustomerCode
             )
             SELECT CustomerCode, recency_days, frequency, monetary,
@@ -226,51 +241,59 @@ QUERIES = {
     },
 
     "customer_cohort_retention": {
-        "description": "Monthly cohort retention — first purchase month vs activity in following months",
+        "description": "Monthly cohort retention — first purchase month in the period vs activity in following months",
         "sql": """
-            WITH first_month AS (
+            WITH activity AS MATERIALIZED (
                 SELECT CustomerCode,
-                       DATE_TRUNC('month', MIN(SaleDate)) AS cohort_month
-                FROM transactions
-                WHERE CustomerCode IS NOT NULL AND CustomerCode != 'NULL'
-                  AND LENGTH(CustomerCode) > 4
-                  AND SaleDate >= CAST(? AS TIMESTAMP)
-                  AND SaleDate < CAST(? AS TIMESTAMP)
-                GROUP BY CustomerCode
+                       DATE_TRUNC('month', first_sale) AS activity_month
+                FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
+                GROUP BY CustomerCode, DATE_TRUNC('month', first_sale)
             ),
-            activity AS (
-                SELECT DISTINCT t.CustomerCode,
-                       f.cohort_month,
-                       DATE_TRUNC('month', t.SaleDate) AS activity_month
-                FROM transactions t
-                JOIN first_month f ON t.CustomerCode = f.CustomerCode
-                WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
-                  AND t.SaleDate < CAST(? AS TIMESTAMP)
+            cohorts AS (
+                SELECT CustomerCode, activity_month,
+                       MIN(activity_month) OVER (PARTITION BY CustomerCode)
+                           AS cohort_month
+                FROM activity
             )
             SELECT cohort_month,
                    DATEDIFF('month', cohort_month, activity_month) AS months_since,
-                   COUNT(DISTINCT CustomerCode) AS active_customers
-            FROM activity
+                   COUNT(*) AS active_customers
+            FROM cohorts
             GROUP BY cohort_month, months_since
             ORDER BY cohort_month, months_since
         """,
-        "params": ["start", "end", "start", "end"],
+        "params": ["start", "end"],
+    },
+
+    "customer_cohort_matrix": {
+        "description": "Lifetime cohort retention — cohorts by first-ever purchase month, from the materialised cohort table",
+        "sql": """
+            SELECT cohort_month,
+                   DATEDIFF('month', cohort_month, activity_month) AS months_since,
+                   active_customers,
+                   spend
+            FROM customer_cohorts()
+            WHERE cohort_month >= DATE_TRUNC('month', CAST(? AS TIMESTAMP))
+              AND cohort_month < CAST(? AS TIMESTAMP)
+              AND activity_month < CAST(? AS TIMESTAMP)
+            ORDER BY cohort_month, months_since
+        """,
+        "params": ["start", "end", "end"],
     },
 
     "customer_segment_baskets": {
         "description": "Average basket size and value by RFM segment",
         "sql": """
-            WITH rfm AS (
+            WITH b AS MATERIALIZED (
+                SELECT *
+                FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
+            ),
+            rfm AS (
                 SELECT CustomerCode,
-                       DATEDIFF('day', MAX(SaleDate), CURRENT_TIMESTAMP) AS recency_days,
+                       DATEDIFF('day', MAX(last_sale), CURRENT_TIMESTAMP) AS recency_days,
                        COUNT(DISTINCT Reference2) AS frequency,
-                       SUM(SalesIncGST) AS monetary
-                FROM transactions
-                WHERE CustomerCode IS NOT NULL
-                  AND CustomerCode != 'NULL'
-                  AND LENGTH(CustomerCode) > 4
-                  AND SaleDate >= CAST(? AS TIMESTAMP)
-                  AND SaleDate < CAST(? AS TIMESTAMP)
+                       SUM(spend) AS monetary
+                FROM b
                 GROUP BY CustomerCode
             ),
             segments AS (
@@ -285,17 +308,12 @@ QUERIES = {
                 FROM rfm
             ),
             baskets AS (
-                SELECT t.CustomerCode,
-                       t.Reference2,
-                       COUNT(*) AS items,
-                       SUM(t.SalesIncGST) AS basket_value
-                FROM transactions t
-                WHERE t.CustomerCode IS NOT NULL
-                  AND t.CustomerCode != 'NULL'
-                  AND LENGTH(t.CustomerCode) > 4
-                  AND t.SaleDate >= CAST(? AS TIMESTAMP)
-                  AND t.SaleDate < CAST(? AS TIMESTAMP)
-                GROUP BY t.CustomerCode, t.Reference2
+                SELECT CustomerCode,
+                       Reference2,
+                       SUM(lines) AS items,
+                       SUM(spend) AS basket_value
+                FROM b
+                GROUP BY CustomerCode, Reference2
             )
             SELECT s.segment,
                    COUNT(DISTINCT b.CustomerCode) AS customers,
@@ -308,7 +326,7 @@ QUERIES = {
             GROUP BY s.segment
             ORDER BY avg_basket_value DESC
         """,
-        "params": ["start", "end", "start", "end"],
+        "params": ["start", "end"],
     },
 
     "customer_channel_summary": {
@@ -345,13 +363,8 @@ QUERIES = {
                 SELECT CustomerCode,
                        COUNT(DISTINCT Store_ID) AS store_count,
                        COUNT(DISTINCT Reference2) AS visits,
-                       SUM(SalesIncGST) AS spend
-                FROM transactions
-                WHERE CustomerCode IS NOT NULL
-                  AND CustomerCode != 'NULL'
-                  AND LENGTH(CustomerCode) > 4
-                  AND SaleDate >= CAST(? AS TIMESTAMP)
-                  AND SaleDate < CAST(? AS TIMESTAMP)
+                       SUM(spend) AS spend
+                FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
                 GROUP BY CustomerCode
             )
             SELECT CASE
@@ -376,12 +389,7 @@ QUERIES = {
             WITH visit_counts AS (
                 SELECT CustomerCode,
                        COUNT(DISTINCT Reference2) AS visits
-                FROM transactions
-                WHERE CustomerCode IS NOT NULL
-                  AND CustomerCode != 'NULL'
-                  AND LENGTH(CustomerCode) > 4
-                  AND SaleDate >= CAST(? AS TIMESTAMP)
-                  AND SaleDate < CAST(? AS TIMESTAMP)
+                FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
                 GROUP BY CustomerCode
             )
             SELECT CASE
@@ -408,18 +416,13 @@ QUERIES = {
         "sql": """
             WITH cust AS (
                 SELECT CustomerCode,
-                       SUM(SalesIncGST) AS total_spend,
+                       SUM(spend) AS total_spend,
                        COUNT(DISTINCT Reference2) AS visits,
                        COUNT(DISTINCT Store_ID) AS stores,
-                       MIN(SaleDate) AS first_purchase,
-                       MAX(SaleDate) AS last_purchase,
-                       DATEDIFF('month', MIN(SaleDate), MAX(SaleDate)) + 1 AS tenure_months
-                FROM transactions
-                WHERE CustomerCode IS NOT NULL
-                  AND CustomerCode != 'NULL'
-                  AND LENGTH(CustomerCode) > 4
-                  AND SaleDate >= CAST(? AS TIMESTAMP)
-                  AND SaleDate < CAST(? AS TIMESTAMP)
+                       MIN(first_sale) AS first_purchase,
+                       MAX(last_sale) AS last_purchase,
+                       DATEDIFF('month', MIN(first_sale), MAX(last_sale)) + 1 AS tenure_months
+                FROM customer_baskets(CAST(? AS TIMESTAMP), CAST(? AS TIMESTAMP))
                 GROUP BY CustomerCode
             )
             SELECT CASE
@@ -445,7 +448,7 @@ QUERIES = {
     "customer_top_departments": {
         "description": "Department revenue mix for loyalty customers vs all customers",
         "sql": """
-            SELECT ph.DepartmentDesc AS Department,
+            SELECT t.DepartmentDesc AS Department,
                    SUM(CASE WHEN t.CustomerCode IS NOT NULL
                             AND t.CustomerCode != 'NULL'
                             AND LENGTH(t.CustomerCode) > 4
@@ -455,12 +458,11 @@ QUERIES = {
                                        AND t.CustomerCode != 'NULL'
                                        AND LENGTH(t.CustomerCode) > 4
                                   THEN t.CustomerCode END) AS loyalty_customers
-            FROM transactions t
-            LEFT JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.DepartmentDesc IS NOT NULL
-            GROUP BY ph.DepartmentDesc
+              AND t.DepartmentDesc IS NOT NULL
+            GROUP BY t.DepartmentDesc
             ORDER BY total_revenue DESC
         """,
         "params": ["start", "end"],
@@ -472,20 +474,19 @@ QUERIES = {
     "customer_by_department": {
         "description": "Loyalty customer metrics by department",
         "sql": """
-            SELECT ph.DepartmentDesc AS Department,
+            SELECT t.DepartmentDesc AS Department,
                    COUNT(DISTINCT t.CustomerCode) AS customers,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    COUNT(*) AS line_items
-            FROM transactions t
-            JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
+            FROM transactions_enriched t
             WHERE t.CustomerCode IS NOT NULL
               AND t.CustomerCode != 'NULL'
               AND LENGTH(t.CustomerCode) > 4
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.DepartmentDesc IS NOT NULL
-            GROUP BY ph.DepartmentDesc
+              AND t.DepartmentDesc IS NOT NULL
+            GROUP BY t.DepartmentDesc
             ORDER BY revenue DESC
         """,
         "params": ["start", "end"],
@@ -494,21 +495,20 @@ QUERIES = {
     "customer_by_major_group": {
         "description": "Loyalty customer metrics by category within a department",
         "sql": """
-            SELECT ph.MajorGroupDesc AS Category,
+            SELECT t.MajorGroupDesc AS Category,
                    COUNT(DISTINCT t.CustomerCode) AS customers,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    COUNT(*) AS line_items
-            FROM transactions t
-            JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
+            FROM transactions_enriched t
             WHERE t.CustomerCode IS NOT NULL
               AND t.CustomerCode != 'NULL'
               AND LENGTH(t.CustomerCode) > 4
-              AND ph.DepartmentCode = ?
+              AND t.DepartmentCode = ?
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.MajorGroupDesc IS NOT NULL
-            GROUP BY ph.MajorGroupDesc
+              AND t.MajorGroupDesc IS NOT NULL
+            GROUP BY t.MajorGroupDesc
             ORDER BY revenue DESC
         """,
         "params": ["dept_code", "start", "end"],
@@ -517,22 +517,21 @@ QUERIES = {
     "customer_by_minor_group": {
         "description": "Loyalty customer metrics by subcategory within a category",
         "sql": """
-            SELECT ph.MinorGroupDesc AS Subcategory,
+            SELECT t.MinorGroupDesc AS Subcategory,
                    COUNT(DISTINCT t.CustomerCode) AS customers,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    COUNT(*) AS line_items
-            FROM transactions t
-            JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
+            FROM transactions_enriched t
             WHERE t.CustomerCode IS NOT NULL
               AND t.CustomerCode != 'NULL'
               AND LENGTH(t.CustomerCode) > 4
-              AND ph.DepartmentCode = ?
-              AND ph.MajorGroupCode = ?
+              AND t.DepartmentCode = ?
+              AND t.MajorGroupCode = ?
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.MinorGroupDesc IS NOT NULL
-            GROUP BY ph.MinorGroupDesc
+              AND t.MinorGroupDesc IS NOT NULL
+            GROUP BY t.MinorGroupDesc
             ORDER BY revenue DESC
         """,
         "params": ["dept_code", "major_code", "start", "end"],
@@ -541,7 +540,7 @@ QUERIES = {
     "channel_by_department": {
         "description": "All-customer revenue and loyalty rate by department",
         "sql": """
-            SELECT ph.DepartmentDesc AS Department,
+            SELECT t.DepartmentDesc AS Department,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    COUNT(DISTINCT t.Store_ID) AS stores,
@@ -553,12 +552,11 @@ QUERIES = {
                             AND t.CustomerCode != 'NULL'
                             AND LENGTH(t.CustomerCode) > 4
                        THEN t.SalesIncGST ELSE 0 END) AS loyalty_revenue
-            FROM transactions t
-            JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.DepartmentDesc IS NOT NULL
-            GROUP BY ph.DepartmentDesc
+              AND t.DepartmentDesc IS NOT NULL
+            GROUP BY t.DepartmentDesc
             ORDER BY revenue DESC
         """,
         "params": ["start", "end"],
@@ -567,7 +565,7 @@ QUERIES = {
     "channel_by_major_group": {
         "description": "All-customer revenue and loyalty rate by category within a dept",
         "sql": """
-            SELECT ph.MajorGroupDesc AS Category,
+            SELECT t.MajorGroupDesc AS Category,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    COUNT(DISTINCT CASE WHEN t.CustomerCode IS NOT NULL
@@ -578,13 +576,12 @@ QUERIES = {
                             AND t.CustomerCode != 'NULL'
                             AND LENGTH(t.CustomerCode) > 4
                        THEN t.SalesIncGST ELSE 0 END) AS loyalty_revenue
-            FROM transactions t
-            JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
-            WHERE ph.DepartmentCode = ?
+            FROM transactions_enriched t
+            WHERE t.DepartmentCode = ?
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.MajorGroupDesc IS NOT NULL
-            GROUP BY ph.MajorGroupDesc
+              AND t.MajorGroupDesc IS NOT NULL
+            GROUP BY t.MajorGroupDesc
             ORDER BY revenue DESC
         """,
         "params": ["dept_code", "start", "end"],
@@ -593,7 +590,7 @@ QUERIES = {
     "channel_by_minor_group": {
         "description": "All-customer revenue and loyalty rate by subcategory",
         "sql": """
-            SELECT ph.MinorGroupDesc AS Subcategory,
+            SELECT t.MinorGroupDesc AS Subcategory,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    COUNT(DISTINCT CASE WHEN t.CustomerCode IS NOT NULL
@@ -604,14 +601,13 @@ QUERIES = {
                             AND t.CustomerCode != 'NULL'
                             AND LENGTH(t.CustomerCode) > 4
                        THEN t.SalesIncGST ELSE 0 END) AS loyalty_revenue
-            FROM transactions t
-            JOIN product_hierarchy ph ON t.PLUItem_ID = ph.ProductNumber
-            WHERE ph.DepartmentCode = ?
-              AND ph.MajorGroupCode = ?
+            FROM transactions_enriched t
+            WHERE t.DepartmentCode = ?
+              AND t.MajorGroupCode = ?
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-              AND ph.MinorGroupDesc IS NOT NULL
-            GROUP BY ph.MinorGroupDesc
+              AND t.MinorGroupDesc IS NOT NULL
+            GROUP BY t.MinorGroupDesc
             ORDER BY revenue DESC
         """,
         "params": ["dept_code", "major_code", "start", "end"],
@@ -637,6 +633,9 @@ QUERIES = {
             ORDER BY revenue DESC
         """,
         "params": ["plu_id", "start", "end"],
+        "preview": {"keys": ["Store_ID"],
+                    "scale": ["line_items", "total_qty", "revenue",
+                              "cogs"]},
     },
 
     "plu_monthly_trend": {
@@ -721,11 +720,10 @@ QUERIES = {
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.Quantity) AS quantity,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -879,12 +877,11 @@ QUERIES = {
             WITH daily AS (
                 SELECT DATE_TRUNC('day', t.SaleDate) AS sale_date,
                        SUM(t.SalesIncGST) AS revenue
-                FROM transactions t
-                JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-                {fiscal_join}
+                FROM transactions_enriched t
                 WHERE t.Store_ID = ?
                   AND t.SaleDate >= CAST(? AS TIMESTAMP)
                   AND t.SaleDate < CAST(? AS TIMESTAMP)
+                  AND t.DepartmentCode IS NOT NULL
                   {dept_filter}
                   {major_filter}
                   {minor_filter}
@@ -1001,11 +998,10 @@ QUERIES = {
                    COUNT(*) AS line_items,
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.Quantity) AS quantity
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -1026,49 +1022,51 @@ QUERIES = {
     },
 
     # ------------------------------------------------------------------
-    # PRODUCT HIERARCHY QUERIES (require product_hierarchy table)
+    # PRODUCT HIERARCHY QUERIES (hierarchy columns of transactions_enriched;
+    # DepartmentCode IS NOT NULL keeps only PLUs in product_hierarchy)
     # ------------------------------------------------------------------
     "department_revenue": {
         "description": "Revenue/GP/transactions/unique SKUs by department",
         "sql": """
-            SELECT p.DepartmentCode, p.DepartmentDesc,
+            SELECT t.DepartmentCode, t.DepartmentDesc,
                    COUNT(*) AS line_items,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.EstimatedCOGS) AS cogs,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp,
                    COUNT(DISTINCT t.PLUItem_ID) AS unique_skus
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {day_type_filter}
               {hour_filter}
               {season_filter}
               {quarter_filter}
               {month_filter}
-            GROUP BY p.DepartmentCode, p.DepartmentDesc
+            GROUP BY t.DepartmentCode, t.DepartmentDesc
             ORDER BY revenue DESC
         """,
         "params": ["start", "end"],
         "optional": ["store_id"],
+        "preview": {"keys": ["DepartmentCode", "DepartmentDesc"],
+                    "scale": ["line_items", "transactions", "revenue",
+                              "cogs", "gp"],
+                    "omit": ["unique_skus"]},
     },
 
     "major_group_revenue": {
         "description": "Revenue by major group within a department",
         "sql": """
-            SELECT p.MajorGroupCode, p.MajorGroupDesc,
+            SELECT t.MajorGroupCode, t.MajorGroupDesc,
                    COUNT(*) AS line_items,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp,
                    COUNT(DISTINCT t.PLUItem_ID) AS unique_skus
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
-            WHERE p.DepartmentCode = ?
+            FROM transactions_enriched t
+            WHERE t.DepartmentCode = ?
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
               {store_filter}
@@ -1077,25 +1075,27 @@ QUERIES = {
               {season_filter}
               {quarter_filter}
               {month_filter}
-            GROUP BY p.MajorGroupCode, p.MajorGroupDesc
+            GROUP BY t.MajorGroupCode, t.MajorGroupDesc
             ORDER BY revenue DESC
         """,
         "params": ["dept_code", "start", "end"],
         "optional": ["store_id"],
+        "preview": {"keys": ["MajorGroupCode", "MajorGroupDesc"],
+                    "scale": ["line_items", "transactions", "revenue",
+                              "gp"],
+                    "omit": ["unique_skus"]},
     },
 
     "minor_group_revenue": {
         "description": "Revenue by minor group within a major group",
         "sql": """
-            SELECT p.MinorGroupCode, p.MinorGroupDesc,
+            SELECT t.MinorGroupCode, t.MinorGroupDesc,
                    COUNT(*) AS line_items,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.PLUItem_ID) AS unique_skus
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
-            WHERE p.DepartmentCode = ?
-              AND p.MajorGroupCode = ?
+            FROM transactions_enriched t
+            WHERE t.DepartmentCode = ?
+              AND t.MajorGroupCode = ?
               AND t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
               {store_filter}
@@ -1104,7 +1104,7 @@ QUERIES = {
               {season_filter}
               {quarter_filter}
               {month_filter}
-            GROUP BY p.MinorGroupCode, p.MinorGroupDesc
+            GROUP BY t.MinorGroupCode, t.MinorGroupDesc
             ORDER BY revenue DESC
         """,
         "params": ["dept_code", "major_code", "start", "end"],
@@ -1115,15 +1115,15 @@ QUERIES = {
         "description": "Monthly revenue trend by department",
         "sql": """
             SELECT DATE_TRUNC('month', t.SaleDate) AS period,
-                   p.DepartmentCode, p.DepartmentDesc,
+                   t.DepartmentCode, t.DepartmentDesc,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
-            GROUP BY 1, p.DepartmentCode, p.DepartmentDesc
+            GROUP BY 1, t.DepartmentCode, t.DepartmentDesc
             ORDER BY 1, revenue DESC
         """,
         "params": ["start", "end"],
@@ -1133,18 +1133,18 @@ QUERIES = {
     "buyer_performance": {
         "description": "Revenue/GP by BuyerId",
         "sql": """
-            SELECT p.BuyerId,
-                   COUNT(DISTINCT p.DepartmentCode) AS departments,
+            SELECT t.BuyerId,
+                   COUNT(DISTINCT t.DepartmentCode) AS departments,
                    COUNT(DISTINCT t.PLUItem_ID) AS unique_skus,
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp,
                    COUNT(DISTINCT t.Reference2) AS transactions
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
-            GROUP BY p.BuyerId
+            GROUP BY t.BuyerId
             ORDER BY revenue DESC
         """,
         "params": ["start", "end"],
@@ -1154,21 +1154,26 @@ QUERIES = {
     "top_items_by_department": {
         "description": "Top N items within a department by revenue",
         "sql": """
-            SELECT t.PLUItem_ID, p.ProductName,
-                   p.MajorGroupDesc, p.MinorGroupDesc,
-                   SUM(t.SalesIncGST) AS revenue,
-                   SUM(t.Quantity) AS total_qty,
-                   COUNT(*) AS transaction_count
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            WHERE p.DepartmentCode = ?
-              AND t.SaleDate >= CAST(? AS TIMESTAMP)
-              AND t.SaleDate < CAST(? AS TIMESTAMP)
-              {store_filter}
-            GROUP BY t.PLUItem_ID, p.ProductName,
-                     p.MajorGroupDesc, p.MinorGroupDesc
-            ORDER BY revenue DESC
-            LIMIT ?
+            WITH items AS (
+                SELECT t.PLUItem_ID, t.MajorGroupDesc, t.MinorGroupDesc,
+                       SUM(t.SalesIncGST) AS revenue,
+                       SUM(t.Quantity) AS total_qty,
+                       COUNT(*) AS transaction_count
+                FROM transactions_enriched t
+                WHERE t.DepartmentCode = ?
+                  AND t.SaleDate >= CAST(? AS TIMESTAMP)
+                  AND t.SaleDate < CAST(? AS TIMESTAMP)
+                  {store_filter}
+                GROUP BY t.PLUItem_ID, t.MajorGroupDesc, t.MinorGroupDesc
+                ORDER BY revenue DESC
+                LIMIT ?
+            )
+            SELECT i.PLUItem_ID, p.ProductName,
+                   i.MajorGroupDesc, i.MinorGroupDesc,
+                   i.revenue, i.total_qty, i.transaction_count
+            FROM items i
+            JOIN product_hierarchy p ON i.PLUItem_ID = p.ProductNumber
+            ORDER BY i.revenue DESC
         """,
         "params": ["dept_code", "start", "end", "limit"],
         "optional": ["store_id"],
@@ -1177,13 +1182,13 @@ QUERIES = {
     "department_store_heatmap": {
         "description": "Department revenue by store matrix",
         "sql": """
-            SELECT t.Store_ID, p.DepartmentCode, p.DepartmentDesc,
+            SELECT t.Store_ID, t.DepartmentCode, t.DepartmentDesc,
                    SUM(t.SalesIncGST) AS revenue
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
-            GROUP BY t.Store_ID, p.DepartmentCode, p.DepartmentDesc
+              AND t.DepartmentCode IS NOT NULL
+            GROUP BY t.Store_ID, t.DepartmentCode, t.DepartmentDesc
             ORDER BY t.Store_ID, revenue DESC
         """,
         "params": ["start", "end"],
@@ -1191,26 +1196,25 @@ QUERIES = {
 
     # ===================================================================
     # FISCAL CALENDAR QUERIES (10)
-    # JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
+    # Fiscal columns of transactions_enriched (UTC calendar day of SaleDate)
     # ===================================================================
 
     "fiscal_weekly_trend": {
         "description": "Revenue/GP/transactions by fiscal week for a FY",
         "sql": """
-            SELECT fc.FinYear, fc.FinWeekOfYearNo AS week_no,
-                   fc.FinWeekOfYearName AS week_name,
-                   MIN(CAST(fc.FinWeekStartDate AS DATE)) AS week_start,
-                   MAX(CAST(fc.FinWeekEndDate AS DATE)) AS week_end,
+            SELECT t.FinYear, t.FinWeekOfYearNo AS week_no,
+                   t.FinWeekOfYearName AS week_name,
+                   MIN(t.FinWeekStartDate) AS week_start,
+                   MAX(t.FinWeekEndDate) AS week_end,
                    COUNT(*) AS line_items,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear = ?
+            FROM transactions_enriched t
+            WHERE t.FinYear = ?
               {store_filter}
-            GROUP BY fc.FinYear, fc.FinWeekOfYearNo, fc.FinWeekOfYearName
-            ORDER BY fc.FinWeekOfYearNo
+            GROUP BY t.FinYear, t.FinWeekOfYearNo, t.FinWeekOfYearName
+            ORDER BY t.FinWeekOfYearNo
         """,
         "params": ["fin_year"],
         "optional": ["store_id"],
@@ -1219,21 +1223,20 @@ QUERIES = {
     "fiscal_monthly_trend": {
         "description": "Revenue by fiscal month (5-4-4 aligned)",
         "sql": """
-            SELECT fc.FinYear, fc.FinMonthOfYearNo AS month_no,
-                   fc.FinMonthOfYearName AS month_name,
-                   MIN(CAST(fc.TheDate AS DATE)) AS month_start,
-                   MAX(CAST(fc.TheDate AS DATE)) AS month_end,
-                   COUNT(DISTINCT fc.FinWeekOfYearNo) AS weeks_in_month,
+            SELECT t.FinYear, t.FinMonthOfYearNo AS month_no,
+                   t.FinMonthOfYearName AS month_name,
+                   MIN(t.sale_date_utc) AS month_start,
+                   MAX(t.sale_date_utc) AS month_end,
+                   COUNT(DISTINCT t.FinWeekOfYearNo) AS weeks_in_month,
                    COUNT(*) AS line_items,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear = ?
+            FROM transactions_enriched t
+            WHERE t.FinYear = ?
               {store_filter}
-            GROUP BY fc.FinYear, fc.FinMonthOfYearNo, fc.FinMonthOfYearName
-            ORDER BY fc.FinMonthOfYearNo
+            GROUP BY t.FinYear, t.FinMonthOfYearNo, t.FinMonthOfYearName
+            ORDER BY t.FinMonthOfYearNo
         """,
         "params": ["fin_year"],
         "optional": ["store_id"],
@@ -1242,21 +1245,20 @@ QUERIES = {
     "fiscal_quarter_summary": {
         "description": "Quarter-level KPIs for a fiscal year",
         "sql": """
-            SELECT fc.FinYear, fc.FinQuarterOfYearNo AS quarter_no,
-                   fc.FinQuarterOfYearName AS quarter_name,
-                   MIN(CAST(fc.TheDate AS DATE)) AS quarter_start,
-                   MAX(CAST(fc.TheDate AS DATE)) AS quarter_end,
-                   COUNT(DISTINCT fc.FinWeekOfYearNo) AS weeks,
+            SELECT t.FinYear, t.FinQuarterOfYearNo AS quarter_no,
+                   t.FinQuarterOfYearName AS quarter_name,
+                   MIN(t.sale_date_utc) AS quarter_start,
+                   MAX(t.sale_date_utc) AS quarter_end,
+                   COUNT(DISTINCT t.FinWeekOfYearNo) AS weeks,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp,
                    COUNT(DISTINCT t.Store_ID) AS active_stores
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear = ?
+            FROM transactions_enriched t
+            WHERE t.FinYear = ?
               {store_filter}
-            GROUP BY fc.FinYear, fc.FinQuarterOfYearNo, fc.FinQuarterOfYearName
-            ORDER BY fc.FinQuarterOfYearNo
+            GROUP BY t.FinYear, t.FinQuarterOfYearNo, t.FinQuarterOfYearName
+            ORDER BY t.FinQuarterOfYearNo
         """,
         "params": ["fin_year"],
         "optional": ["store_id"],
@@ -1265,18 +1267,17 @@ QUERIES = {
     "fiscal_yoy_weekly": {
         "description": "Week-over-week year-on-year comparison (excludes week 53)",
         "sql": """
-            SELECT fc.FinWeekOfYearNo AS week_no,
-                   fc.FinYear,
+            SELECT t.FinWeekOfYearNo AS week_no,
+                   t.FinYear,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear IN (?, ?)
-              AND fc.FinWeekOfYearNo <= 52
+            FROM transactions_enriched t
+            WHERE t.FinYear IN (?, ?)
+              AND t.FinWeekOfYearNo <= 52
               {store_filter}
-            GROUP BY fc.FinWeekOfYearNo, fc.FinYear
-            ORDER BY fc.FinWeekOfYearNo, fc.FinYear
+            GROUP BY t.FinWeekOfYearNo, t.FinYear
+            ORDER BY t.FinWeekOfYearNo, t.FinYear
         """,
         "params": ["fin_year", "fin_year_2"],
         "optional": ["store_id"],
@@ -1285,18 +1286,17 @@ QUERIES = {
     "fiscal_yoy_monthly": {
         "description": "Month-over-month year-on-year comparison",
         "sql": """
-            SELECT fc.FinMonthOfYearNo AS month_no,
-                   fc.FinMonthOfYearName AS month_name,
-                   fc.FinYear,
+            SELECT t.FinMonthOfYearNo AS month_no,
+                   t.FinMonthOfYearName AS month_name,
+                   t.FinYear,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear IN (?, ?)
+            FROM transactions_enriched t
+            WHERE t.FinYear IN (?, ?)
               {store_filter}
-            GROUP BY fc.FinMonthOfYearNo, fc.FinMonthOfYearName, fc.FinYear
-            ORDER BY fc.FinMonthOfYearNo, fc.FinYear
+            GROUP BY t.FinMonthOfYearNo, t.FinMonthOfYearName, t.FinYear
+            ORDER BY t.FinMonthOfYearNo, t.FinYear
         """,
         "params": ["fin_year", "fin_year_2"],
         "optional": ["store_id"],
@@ -1305,16 +1305,16 @@ QUERIES = {
     "fiscal_day_of_week": {
         "description": "Day-of-week pattern with business day and weekend flags",
         "sql": """
-            SELECT fc.DayOfWeekNo, fc.DayOfWeekName,
-                   fc.BusinessDay, fc.Weekend,
+            SELECT t.DayOfWeekNo, t.DayOfWeekName,
+                   t.BusinessDay, t.Weekend,
                    COUNT(*) AS line_items,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.FinYear IS NOT NULL
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -1326,8 +1326,8 @@ QUERIES = {
               {season_filter}
               {quarter_filter}
               {month_filter}
-            GROUP BY fc.DayOfWeekNo, fc.DayOfWeekName, fc.BusinessDay, fc.Weekend
-            ORDER BY fc.DayOfWeekNo
+            GROUP BY t.DayOfWeekNo, t.DayOfWeekName, t.BusinessDay, t.Weekend
+            ORDER BY t.DayOfWeekNo
         """,
         "params": ["start", "end"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code",
@@ -1337,15 +1337,14 @@ QUERIES = {
     "fiscal_season_comparison": {
         "description": "Season-over-season revenue comparison",
         "sql": """
-            SELECT fc.SeasonName, fc.FinYear,
+            SELECT t.SeasonName, t.FinYear,
                    SUM(t.SalesIncGST) AS revenue,
                    COUNT(DISTINCT t.Reference2) AS transactions
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear IN (?, ?)
+            FROM transactions_enriched t
+            WHERE t.FinYear IN (?, ?)
               {store_filter}
-            GROUP BY fc.SeasonName, fc.FinYear
-            ORDER BY fc.SeasonName, fc.FinYear
+            GROUP BY t.SeasonName, t.FinYear
+            ORDER BY t.SeasonName, t.FinYear
         """,
         "params": ["fin_year", "fin_year_2"],
         "optional": ["store_id"],
@@ -1354,16 +1353,16 @@ QUERIES = {
     "fiscal_hourly_by_day_type": {
         "description": "Hourly revenue patterns split by business day vs weekend (AEST)",
         "sql": """
-            SELECT fc.BusinessDay AS day_type,
-                   EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR) AS hour_of_day,
+            SELECT t.BusinessDay AS day_type,
+                   t.local_hour AS hour_of_day,
                    COUNT(*) AS line_items,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.FinYear IS NOT NULL
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -1375,8 +1374,8 @@ QUERIES = {
               {season_filter}
               {quarter_filter}
               {month_filter}
-            GROUP BY fc.BusinessDay, EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR)
-            ORDER BY fc.BusinessDay DESC, hour_of_day
+            GROUP BY t.BusinessDay, t.local_hour
+            ORDER BY t.BusinessDay DESC, hour_of_day
         """,
         "params": ["start", "end"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code",
@@ -1386,15 +1385,15 @@ QUERIES = {
     "fiscal_hourly_heatmap": {
         "description": "Day-of-week x hour-of-day revenue heatmap (AEST)",
         "sql": """
-            SELECT fc.DayOfWeekNo, fc.DayOfWeekName,
-                   EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR) AS hour_of_day,
+            SELECT t.DayOfWeekNo, t.DayOfWeekName,
+                   t.local_hour AS hour_of_day,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.FinYear IS NOT NULL
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -1406,9 +1405,8 @@ QUERIES = {
               {season_filter}
               {quarter_filter}
               {month_filter}
-            GROUP BY fc.DayOfWeekNo, fc.DayOfWeekName,
-                     EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR)
-            ORDER BY fc.DayOfWeekNo, hour_of_day
+            GROUP BY t.DayOfWeekNo, t.DayOfWeekName, t.local_hour
+            ORDER BY t.DayOfWeekNo, hour_of_day
         """,
         "params": ["start", "end"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code",
@@ -1418,18 +1416,16 @@ QUERIES = {
     "fiscal_hourly_by_month": {
         "description": "Hourly patterns by fiscal month for a FY (AEST)",
         "sql": """
-            SELECT fc.FinMonthOfYearNo AS month_no,
-                   fc.FinMonthOfYearShortName AS month_name,
-                   EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR) AS hour_of_day,
+            SELECT t.FinMonthOfYearNo AS month_no,
+                   t.FinMonthOfYearShortName AS month_name,
+                   t.local_hour AS hour_of_day,
                    COUNT(DISTINCT t.Reference2) AS transactions,
                    SUM(t.SalesIncGST) AS revenue
-            FROM transactions t
-            JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate
-            WHERE fc.FinYear = ?
+            FROM transactions_enriched t
+            WHERE t.FinYear = ?
               AND t.Store_ID = ?
-            GROUP BY fc.FinMonthOfYearNo, fc.FinMonthOfYearShortName,
-                     EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR)
-            ORDER BY fc.FinMonthOfYearNo, hour_of_day
+            GROUP BY t.FinMonthOfYearNo, t.FinMonthOfYearShortName, t.local_hour
+            ORDER BY t.FinMonthOfYearNo, hour_of_day
         """,
         "params": ["fin_year", "store_id"],
     },
@@ -1446,11 +1442,10 @@ QUERIES = {
                    SUM(t.Quantity) AS quantity,
                    SUM(t.EstimatedCOGS) AS cogs,
                    SUM(t.SalesIncGST) + COALESCE(SUM(t.EstimatedCOGS), 0) AS gp
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -1466,6 +1461,7 @@ QUERIES = {
         "params": ["start", "end"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code",
                      "hfm_item_code", "product_number"],
+        "preview": {"keys": [], "scale": _KPI_COLUMNS},
     },
 
     # ------------------------------------------------------------------
@@ -1480,11 +1476,10 @@ QUERIES = {
                    SUM(t.SalesIncGST) AS revenue,
                    SUM(t.Quantity) AS quantity,
                    SUM(t.EstimatedCOGS) AS cogs
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
+            FROM transactions_enriched t
             WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
               AND t.SaleDate < CAST(? AS TIMESTAMP)
+              AND t.DepartmentCode IS NOT NULL
               {store_filter}
               {dept_filter}
               {major_filter}
@@ -1510,35 +1505,43 @@ QUERIES = {
     "top_items_filtered": {
         "description": "Top items by revenue with optional hierarchy and day-type filters",
         "sql": """
-            SELECT t.PLUItem_ID AS pluitem_id,
+            WITH items AS (
+                SELECT t.PLUItem_ID,
+                       t.DepartmentDesc,
+                       t.MajorGroupDesc,
+                       t.MinorGroupDesc,
+                       SUM(t.SalesIncGST) AS total_revenue,
+                       SUM(t.Quantity) AS total_qty,
+                       COUNT(*) AS transaction_count,
+                       AVG(t.SalesIncGST / NULLIF(t.Quantity, 0)) AS avg_price
+                FROM transactions_enriched t
+                WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
+                  AND t.SaleDate < CAST(? AS TIMESTAMP)
+                  AND t.DepartmentCode IS NOT NULL
+                  {store_filter}
+                  {dept_filter}
+                  {major_filter}
+                  {minor_filter}
+                  {hfm_filter}
+                  {product_filter}
+                  {day_type_filter}
+                  {hour_filter}
+                  {season_filter}
+                  {quarter_filter}
+                  {month_filter}
+                GROUP BY t.PLUItem_ID, t.DepartmentDesc,
+                         t.MajorGroupDesc, t.MinorGroupDesc
+                ORDER BY total_revenue DESC
+                LIMIT ?
+            )
+            SELECT i.PLUItem_ID AS pluitem_id,
                    p.ProductName AS product_name,
-                   p.DepartmentDesc,
-                   p.MajorGroupDesc,
-                   p.MinorGroupDesc,
-                   SUM(t.SalesIncGST) AS total_revenue,
-                   SUM(t.Quantity) AS total_qty,
-                   COUNT(*) AS transaction_count,
-                   AVG(t.SalesIncGST / NULLIF(t.Quantity, 0)) AS avg_price
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
-            WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
-              AND t.SaleDate < CAST(? AS TIMESTAMP)
-              {store_filter}
-              {dept_filter}
-              {major_filter}
-              {minor_filter}
-              {hfm_filter}
-              {product_filter}
-              {day_type_filter}
-              {hour_filter}
-              {season_filter}
-              {quarter_filter}
-              {month_filter}
-            GROUP BY t.PLUItem_ID, p.ProductName, p.DepartmentDesc,
-                     p.MajorGroupDesc, p.MinorGroupDesc
-            ORDER BY total_revenue DESC
-            LIMIT ?
+                   i.DepartmentDesc, i.MajorGroupDesc, i.MinorGroupDesc,
+                   i.total_revenue, i.total_qty, i.transaction_count,
+                   i.avg_price
+            FROM items i
+            JOIN product_hierarchy p ON i.PLUItem_ID = p.ProductNumber
+            ORDER BY i.total_revenue DESC
         """,
         "params": ["start", "end", "limit"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code",
@@ -1551,36 +1554,44 @@ QUERIES = {
     "slow_movers_filtered": {
         "description": "Slow-moving items with optional hierarchy and day-type filters",
         "sql": """
-            SELECT t.PLUItem_ID AS pluitem_id,
+            WITH items AS (
+                SELECT t.PLUItem_ID,
+                       t.DepartmentDesc,
+                       t.MajorGroupDesc,
+                       t.MinorGroupDesc,
+                       COUNT(*) AS transaction_count,
+                       SUM(t.Quantity) AS total_qty,
+                       SUM(t.SalesIncGST) AS total_revenue,
+                       COUNT(DISTINCT t.Store_ID) AS stores_stocked
+                FROM transactions_enriched t
+                WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
+                  AND t.SaleDate < CAST(? AS TIMESTAMP)
+                  AND t.DepartmentCode IS NOT NULL
+                  {store_filter}
+                  {dept_filter}
+                  {major_filter}
+                  {minor_filter}
+                  {hfm_filter}
+                  {product_filter}
+                  {day_type_filter}
+                  {hour_filter}
+                  {season_filter}
+                  {quarter_filter}
+                  {month_filter}
+                GROUP BY t.PLUItem_ID, t.DepartmentDesc,
+                         t.MajorGroupDesc, t.MinorGroupDesc
+                HAVING COUNT(*) < ?
+                ORDER BY transaction_count ASC
+                LIMIT ?
+            )
+            SELECT i.PLUItem_ID AS pluitem_id,
                    p.ProductName AS product_name,
-                   p.DepartmentDesc,
-                   p.MajorGroupDesc,
-                   p.MinorGroupDesc,
-                   COUNT(*) AS transaction_count,
-                   SUM(t.Quantity) AS total_qty,
-                   SUM(t.SalesIncGST) AS total_revenue,
-                   COUNT(DISTINCT t.Store_ID) AS stores_stocked
-            FROM transactions t
-            JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-            {fiscal_join}
-            WHERE t.SaleDate >= CAST(? AS TIMESTAMP)
-              AND t.SaleDate < CAST(? AS TIMESTAMP)
-              {store_filter}
-              {dept_filter}
-              {major_filter}
-              {minor_filter}
-              {hfm_filter}
-              {product_filter}
-              {day_type_filter}
-              {hour_filter}
-              {season_filter}
-              {quarter_filter}
-              {month_filter}
-            GROUP BY t.PLUItem_ID, p.ProductName, p.DepartmentDesc,
-                     p.MajorGroupDesc, p.MinorGroupDesc
-            HAVING COUNT(*) < ?
-            ORDER BY transaction_count ASC
-            LIMIT ?
+                   i.DepartmentDesc, i.MajorGroupDesc, i.MinorGroupDesc,
+                   i.transaction_count, i.total_qty, i.total_revenue,
+                   i.stores_stocked
+            FROM items i
+            JOIN product_hierarchy p ON i.PLUItem_ID = p.ProductNumber
+            ORDER BY i.transaction_count ASC
         """,
         "params": ["start", "end", "threshold", "limit"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code",
@@ -1618,6 +1629,9 @@ QUERIES = {
     # daily revenue.  Products that sold on 30+ of those 90 days are "active".
     # For the analysis period, any day where an active product has zero sales
     # is flagged as a potential stock-out.  Missed revenue = baseline avg.
+    # Daily sales and baselines come from the plu_daily / plu_baseline macros
+    # (materialised store x PLU x day table, see sales_presence.py).  Dates
+    # are passed as direct parameters so empty raw-tail ranges fold away.
 
     "oos_by_department": {
         "description": "Estimated missed revenue by department x day (for heatmap rollup)",
@@ -1626,30 +1640,17 @@ QUERIES = {
                 SELECT CAST(? AS DATE) AS start_date,
                        CAST(? AS DATE) AS end_date
             ),
+            analysis_sales AS (
+                SELECT Store_ID, PLUItem_ID, sale_date, daily_rev
+                FROM plu_daily(CAST(? AS DATE), CAST(? AS DATE))
+            ),
             baseline AS (
                 SELECT t.Store_ID, t.PLUItem_ID,
-                       COUNT(DISTINCT CAST(t.SaleDate AS DATE)) AS selling_days,
-                       SUM(t.SalesIncGST)
-                           / NULLIF(COUNT(DISTINCT CAST(t.SaleDate AS DATE)), 0)
-                           AS avg_daily_rev
-                FROM transactions t
+                       t.selling_days, t.avg_daily_rev
+                FROM plu_baseline(CAST(? AS DATE), 90) t
                 JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                                        - INTERVAL '90' DAY
-                  AND t.SaleDate < (SELECT start_date FROM analysis_params)
+                WHERE t.selling_days >= 30
                   {store_filter}
-                GROUP BY t.Store_ID, t.PLUItem_ID
-                HAVING selling_days >= 30
-            ),
-            analysis_sales AS (
-                SELECT t.Store_ID, t.PLUItem_ID,
-                       CAST(t.SaleDate AS DATE) AS sale_date,
-                       SUM(t.SalesIncGST) AS daily_rev
-                FROM transactions t
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                  AND t.SaleDate < (SELECT end_date FROM analysis_params)
-                GROUP BY t.Store_ID, t.PLUItem_ID,
-                         CAST(t.SaleDate AS DATE)
             ),
             date_grid AS (
                 SELECT CAST(gs AS DATE) AS cal_date
@@ -1693,7 +1694,7 @@ QUERIES = {
                      fc.FinWeekOfYearNo, fc.FinMonthOfYearNo, fc.FinMonthOfYearShortName
             ORDER BY p.DepartmentDesc, g.cal_date
         """,
-        "params": ["start", "end"],
+        "params": ["start", "end", "start", "end", "start"],
         "optional": ["store_id"],
     },
 
@@ -1704,31 +1705,18 @@ QUERIES = {
                 SELECT CAST(? AS DATE) AS start_date,
                        CAST(? AS DATE) AS end_date
             ),
+            analysis_sales AS (
+                SELECT Store_ID, PLUItem_ID, sale_date, daily_rev
+                FROM plu_daily(CAST(? AS DATE), CAST(? AS DATE))
+            ),
             baseline AS (
                 SELECT t.Store_ID, t.PLUItem_ID,
-                       COUNT(DISTINCT CAST(t.SaleDate AS DATE)) AS selling_days,
-                       SUM(t.SalesIncGST)
-                           / NULLIF(COUNT(DISTINCT CAST(t.SaleDate AS DATE)), 0)
-                           AS avg_daily_rev
-                FROM transactions t
+                       t.selling_days, t.avg_daily_rev
+                FROM plu_baseline(CAST(? AS DATE), 90) t
                 JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                                        - INTERVAL '90' DAY
-                  AND t.SaleDate < (SELECT start_date FROM analysis_params)
+                WHERE t.selling_days >= 30
                   {store_filter}
                   {dept_filter}
-                GROUP BY t.Store_ID, t.PLUItem_ID
-                HAVING selling_days >= 30
-            ),
-            analysis_sales AS (
-                SELECT t.Store_ID, t.PLUItem_ID,
-                       CAST(t.SaleDate AS DATE) AS sale_date,
-                       SUM(t.SalesIncGST) AS daily_rev
-                FROM transactions t
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                  AND t.SaleDate < (SELECT end_date FROM analysis_params)
-                GROUP BY t.Store_ID, t.PLUItem_ID,
-                         CAST(t.SaleDate AS DATE)
             ),
             date_grid AS (
                 SELECT CAST(gs AS DATE) AS cal_date
@@ -1772,7 +1760,7 @@ QUERIES = {
                      fc.FinWeekOfYearNo, fc.FinMonthOfYearNo, fc.FinMonthOfYearShortName
             ORDER BY p.MajorGroupDesc, g.cal_date
         """,
-        "params": ["start", "end"],
+        "params": ["start", "end", "start", "end", "start"],
         "optional": ["store_id", "dept_code"],
     },
 
@@ -1783,32 +1771,19 @@ QUERIES = {
                 SELECT CAST(? AS DATE) AS start_date,
                        CAST(? AS DATE) AS end_date
             ),
+            analysis_sales AS (
+                SELECT Store_ID, PLUItem_ID, sale_date, daily_rev
+                FROM plu_daily(CAST(? AS DATE), CAST(? AS DATE))
+            ),
             baseline AS (
                 SELECT t.Store_ID, t.PLUItem_ID,
-                       COUNT(DISTINCT CAST(t.SaleDate AS DATE)) AS selling_days,
-                       SUM(t.SalesIncGST)
-                           / NULLIF(COUNT(DISTINCT CAST(t.SaleDate AS DATE)), 0)
-                           AS avg_daily_rev
-                FROM transactions t
+                       t.selling_days, t.avg_daily_rev
+                FROM plu_baseline(CAST(? AS DATE), 90) t
                 JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                                        - INTERVAL '90' DAY
-                  AND t.SaleDate < (SELECT start_date FROM analysis_params)
+                WHERE t.selling_days >= 30
                   {store_filter}
                   {dept_filter}
                   {major_filter}
-                GROUP BY t.Store_ID, t.PLUItem_ID
-                HAVING selling_days >= 30
-            ),
-            analysis_sales AS (
-                SELECT t.Store_ID, t.PLUItem_ID,
-                       CAST(t.SaleDate AS DATE) AS sale_date,
-                       SUM(t.SalesIncGST) AS daily_rev
-                FROM transactions t
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                  AND t.SaleDate < (SELECT end_date FROM analysis_params)
-                GROUP BY t.Store_ID, t.PLUItem_ID,
-                         CAST(t.SaleDate AS DATE)
             ),
             date_grid AS (
                 SELECT CAST(gs AS DATE) AS cal_date
@@ -1852,7 +1827,7 @@ QUERIES = {
                      fc.FinWeekOfYearNo, fc.FinMonthOfYearNo, fc.FinMonthOfYearShortName
             ORDER BY p.MinorGroupDesc, g.cal_date
         """,
-        "params": ["start", "end"],
+        "params": ["start", "end", "start", "end", "start"],
         "optional": ["store_id", "dept_code", "major_code"],
     },
 
@@ -1863,33 +1838,20 @@ QUERIES = {
                 SELECT CAST(? AS DATE) AS start_date,
                        CAST(? AS DATE) AS end_date
             ),
+            analysis_sales AS (
+                SELECT Store_ID, PLUItem_ID, sale_date, daily_rev
+                FROM plu_daily(CAST(? AS DATE), CAST(? AS DATE))
+            ),
             baseline AS (
                 SELECT t.Store_ID, t.PLUItem_ID,
-                       COUNT(DISTINCT CAST(t.SaleDate AS DATE)) AS selling_days,
-                       SUM(t.SalesIncGST)
-                           / NULLIF(COUNT(DISTINCT CAST(t.SaleDate AS DATE)), 0)
-                           AS avg_daily_rev
-                FROM transactions t
+                       t.selling_days, t.avg_daily_rev
+                FROM plu_baseline(CAST(? AS DATE), 90) t
                 JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                                        - INTERVAL '90' DAY
-                  AND t.SaleDate < (SELECT start_date FROM analysis_params)
+                WHERE t.selling_days >= 30
                   {store_filter}
                   {dept_filter}
                   {major_filter}
                   {minor_filter}
-                GROUP BY t.Store_ID, t.PLUItem_ID
-                HAVING selling_days >= 30
-            ),
-            analysis_sales AS (
-                SELECT t.Store_ID, t.PLUItem_ID,
-                       CAST(t.SaleDate AS DATE) AS sale_date,
-                       SUM(t.SalesIncGST) AS daily_rev
-                FROM transactions t
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                  AND t.SaleDate < (SELECT end_date FROM analysis_params)
-                GROUP BY t.Store_ID, t.PLUItem_ID,
-                         CAST(t.SaleDate AS DATE)
             ),
             date_grid AS (
                 SELECT CAST(gs AS DATE) AS cal_date
@@ -1924,7 +1886,7 @@ QUERIES = {
                    (SELECT COUNT(*) FROM date_grid) AS analysis_days
             FROM gaps g
         """,
-        "params": ["start", "end"],
+        "params": ["start", "end", "start", "end", "start"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code"],
     },
 
@@ -1935,33 +1897,20 @@ QUERIES = {
                 SELECT CAST(? AS DATE) AS start_date,
                        CAST(? AS DATE) AS end_date
             ),
+            analysis_sales AS (
+                SELECT Store_ID, PLUItem_ID, sale_date, daily_rev
+                FROM plu_daily(CAST(? AS DATE), CAST(? AS DATE))
+            ),
             baseline AS (
                 SELECT t.Store_ID, t.PLUItem_ID,
-                       COUNT(DISTINCT CAST(t.SaleDate AS DATE)) AS selling_days,
-                       SUM(t.SalesIncGST)
-                           / NULLIF(COUNT(DISTINCT CAST(t.SaleDate AS DATE)), 0)
-                           AS avg_daily_rev
-                FROM transactions t
+                       t.selling_days, t.avg_daily_rev
+                FROM plu_baseline(CAST(? AS DATE), 90) t
                 JOIN product_hierarchy p ON t.PLUItem_ID = p.ProductNumber
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                                        - INTERVAL '90' DAY
-                  AND t.SaleDate < (SELECT start_date FROM analysis_params)
+                WHERE t.selling_days >= 30
                   {store_filter}
                   {dept_filter}
                   {major_filter}
                   {minor_filter}
-                GROUP BY t.Store_ID, t.PLUItem_ID
-                HAVING selling_days >= 30
-            ),
-            analysis_sales AS (
-                SELECT t.Store_ID, t.PLUItem_ID,
-                       CAST(t.SaleDate AS DATE) AS sale_date,
-                       SUM(t.SalesIncGST) AS daily_rev
-                FROM transactions t
-                WHERE t.SaleDate >= (SELECT start_date FROM analysis_params)
-                  AND t.SaleDate < (SELECT end_date FROM analysis_params)
-                GROUP BY t.Store_ID, t.PLUItem_ID,
-                         CAST(t.SaleDate AS DATE)
             ),
             date_grid AS (
                 SELECT CAST(gs AS DATE) AS cal_date
@@ -2004,7 +1953,7 @@ QUERIES = {
             ORDER BY missed_revenue DESC
             LIMIT ?
         """,
-        "params": ["start", "end", "limit"],
+        "params": ["start", "end", "start", "end", "start", "limit"],
         "optional": ["store_id", "dept_code", "major_code", "minor_code"],
     },
 }
@@ -2018,25 +1967,89 @@ def get_query_catalog() -> list[dict]:
     """Return list of available queries with descriptions."""
     return [
         {"name": name, "description": q["description"],
-         "params": q["params"],
+         "params": list(dict.fromkeys(q["params"])),
          "optional": q.get("optional", [])}
         for name, q in QUERIES.items()
     ]
 
 
-def run_query(store, query_name: str, **kwargs) -> list[dict]:
+@lru_cache(maxsize=1)
+def _fiscal_year_bounds() -> dict:
+    """{FinYear: (first day, day after last day)} as ISO date strings."""
+    if not FISCAL_CALENDAR_PARQUET.exists():
+        return {}
+    rows = duckdb.sql(
+        "SELECT FinYear, CAST(MIN(TheDate) AS DATE), "
+        "CAST(MAX(TheDate) AS DATE) + 1 "
+        "FROM read_parquet('{}') GROUP BY FinYear".format(
+            str(FISCAL_CALENDAR_PARQUET).replace("'", "''"))
+    ).fetchall()
+    return {int(fy): (lo.isoformat(), hi.isoformat()) for fy, lo, hi in rows}
+
+
+_FIN_YEAR_WHERE = re.compile(
+    r"WHERE\s+t\.FinYear\s*(?:=\s*\?|IN\s*\(\s*\?\s*,\s*\?\s*\))")
+
+
+def _add_fiscal_year_range(sql: str, param_keys: list, kwargs: dict) -> str:
+    """Bound t.SaleDate by the requested fiscal years.
+
+    A FinYear filter on the live calendar join (years without an enriched
+    build) cannot prune the transactions scan; a literal SaleDate range
+    alongside it lets DuckDB skip every row group outside the year(s).
+    """
+    match = _FIN_YEAR_WHERE.search(sql)
+    if not match:
+        return sql
+    bounds = _fiscal_year_bounds()
+    years = [kwargs.get(k) for k in ("fin_year", "fin_year_2")
+             if k in param_keys and kwargs.get(k) is not None]
+    try:
+        spans = [bounds[int(y)] for y in years]
+    except (KeyError, ValueError):
+        return sql
+    if not spans:
+        return sql
+    lo = min(span[0] for span in spans)
+    hi = max(span[1] for span in spans)
+    return (sql[:match.end()]
+            + "\n              AND t.SaleDate >= TIMESTAMP '{}'"
+              " AND t.SaleDate < TIMESTAMP '{}'".format(lo, hi)
+            + sql[match.end():])
+
+
+def run_query(store, query_name: str, preview: bool = False,
+              **kwargs) -> list[dict]:
     """
     Execute a named query from the catalog.
 
     Args:
         store: TransactionStore instance
         query_name: Key from QUERIES dict
+        preview: approximate answer (query_preview.py) -- sampled with
+                 <column>_moe error bounds if the template has a
+                 "preview" entry, else approximate distinct counts only
         **kwargs: Named parameters matching the query's params list
                   (start, end, store_id, limit, plu_id, customer_code,
                    dept_code, major_code, fin_year, fin_year_2)
     Returns:
         list of dicts
     """
+    sql, params = build_query(query_name, **kwargs)
+    # Timed under the template's name rather than its SQL fingerprint
+    with telemetry.template(query_name):
+        if preview:
+            return store.query(sql, params,
+                               preview=QUERIES[query_name].get("preview", True))
+        return store.query(sql, params)
+
+
+def build_query(query_name: str, sargable: bool = True,
+                **kwargs) -> tuple[str, list]:
+    """Render a catalog query to (sql, params) -- see run_query().
+
+    sargable=False skips the fiscal-year SaleDate range (benchmarking).
+    """
     if query_name not in QUERIES:
         raise ValueError(f"Unknown query: {query_name}. "
                          f"Available: {list(QUERIES.keys())}")
@@ -2052,13 +2065,15 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
         else:
             sql = sql.replace("{store_filter}", "")
 
-    # Handle optional hierarchy filters (incl. HFM item and product)
+    # Handle optional hierarchy filters (incl. HFM item and product).
+    # Unqualified: transactions_enriched in the sales templates, the
+    # product_hierarchy join in the out-of-stock baselines.
     hierarchy_filters = [
-        ("{dept_filter}", "p.DepartmentCode", "dept_code"),
-        ("{major_filter}", "p.MajorGroupCode", "major_code"),
-        ("{minor_filter}", "p.MinorGroupCode", "minor_code"),
-        ("{hfm_filter}", "p.HFMItem", "hfm_item_code"),
-        ("{product_filter}", "p.ProductNumber", "product_number"),
+        ("{dept_filter}", "DepartmentCode", "dept_code"),
+        ("{major_filter}", "MajorGroupCode", "major_code"),
+        ("{minor_filter}", "MinorGroupCode", "minor_code"),
+        ("{hfm_filter}", "HFMItem", "hfm_item_code"),
+        ("{product_filter}", "PLUItem_ID", "product_number"),
     ]
     for filt, col, key in hierarchy_filters:
         if filt in sql:
@@ -2067,22 +2082,6 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
             else:
                 sql = sql.replace(filt, "")
 
-    # Handle conditional fiscal_calendar JOIN (for time dimension filters on non-fiscal queries)
-    if "{fiscal_join}" in sql:
-        needs_fc = (
-            (kwargs.get("day_type") and kwargs["day_type"] != "all")
-            or kwargs.get("day_of_week_names")
-            or kwargs.get("hour_start") is not None
-            or kwargs.get("season_names")
-            or kwargs.get("quarter_nos")
-            or kwargs.get("month_nos")
-        )
-        if needs_fc:
-            sql = sql.replace("{fiscal_join}",
-                "JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate")
-        else:
-            sql = sql.replace("{fiscal_join}", "")
-
     # Handle day-of-week / day-type filter (string substitution, not parameterized)
     # Values come from controlled checkbox selections — safe for string interpolation.
     if "{day_type_filter}" in sql:
@@ -2090,14 +2089,14 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
         if dow_names and len(dow_names) < 7:
             quoted = ", ".join(f"'{d}'" for d in dow_names)
             sql = sql.replace("{day_type_filter}",
-                              f"AND fc.DayOfWeekName IN ({quoted})")
+                              f"AND t.DayOfWeekName IN ({quoted})")
         else:
             # Legacy day_type fallback
             day_type = kwargs.get("day_type", "all")
             if day_type == "business":
-                sql = sql.replace("{day_type_filter}", "AND fc.BusinessDay = 'Y'")
+                sql = sql.replace("{day_type_filter}", "AND t.BusinessDay = 'Y'")
             elif day_type == "weekend":
-                sql = sql.replace("{day_type_filter}", "AND fc.Weekend = 'Y'")
+                sql = sql.replace("{day_type_filter}", "AND t.Weekend = 'Y'")
             else:
                 sql = sql.replace("{day_type_filter}", "")
 
@@ -2107,8 +2106,8 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
         h_end = kwargs.get("hour_end")
         if h_start is not None and h_end is not None:
             sql = sql.replace("{hour_filter}",
-                f"AND EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR) >= {int(h_start)} "
-                f"AND EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR) < {int(h_end)}")
+                f"AND t.local_hour >= {int(h_start)} "
+                f"AND t.local_hour < {int(h_end)}")
         else:
             sql = sql.replace("{hour_filter}", "")
 
@@ -2118,7 +2117,7 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
         if seasons and len(seasons) < 4:
             quoted = ", ".join(f"'{s}'" for s in seasons)
             sql = sql.replace("{season_filter}",
-                              f"AND fc.SeasonName IN ({quoted})")
+                              f"AND t.SeasonName IN ({quoted})")
         else:
             sql = sql.replace("{season_filter}", "")
 
@@ -2128,7 +2127,7 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
         if q_nos and len(q_nos) < 4:
             in_clause = ", ".join(str(int(q)) for q in q_nos)
             sql = sql.replace("{quarter_filter}",
-                              f"AND fc.FinQuarterOfYearNo IN ({in_clause})")
+                              f"AND t.FinQuarterOfYearNo IN ({in_clause})")
         else:
             sql = sql.replace("{quarter_filter}", "")
 
@@ -2138,7 +2137,7 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
         if m_nos and len(m_nos) < 12:
             in_clause = ", ".join(str(int(m)) for m in m_nos)
             sql = sql.replace("{month_filter}",
-                              f"AND fc.FinMonthOfYearNo IN ({in_clause})")
+                              f"AND t.FinMonthOfYearNo IN ({in_clause})")
         else:
             sql = sql.replace("{month_filter}", "")
 
@@ -2193,4 +2192,8 @@ def run_query(store, query_name: str, **kwargs) -> list[dict]:
     # Append tail params (LIMIT, HAVING threshold) after all WHERE-clause params
     params.extend(tail_params)
 
-    return store.query(sql, params)
+    # Fiscal-year templates: add a prunable SaleDate range (no new params)
+    if sargable:
+        sql = _add_fiscal_year_range(sql, q["params"], kwargs)
+
+    return sql, params
@@ -1,6 +1,10 @@
 """
 Harris Farm Hub — WATCHDOG Background Scheduler
-Runs periodic health checks, code audits, score backfills, and metrics snapshots.
+Runs periodic health checks, code audits, score backfills, HiPo rescoring
+and metrics snapshots. The derived data builds (derived_build.py) run here
+only with WATCHDOG_DERIVED_BUILDS=1; by default the start scripts run
+them in a separate background loop so their full-history scans stay out
+of the API process.
 Logs everything to watchdog/audit.log.
 """
 
@@ -14,6 +18,7 @@ from datetime import datetime, timedelta
 PROJECT_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
 AUDIT_LOG = os.path.join(PROJECT_ROOT, "watchdog", "audit.log")
 DEFAULT_DB = os.path.join(os.path.dirname(__file__), "hub_data.db")
+DERIVED_BUILDS_IN_PROCESS = os.getenv("WATCHDOG_DERIVED_BUILDS", "0") == "1"
 
 
 class WatchdogScheduler:
@@ -73,6 +78,13 @@ class WatchdogScheduler:
             # 4. Metrics snapshot
             results["metrics"] = self._collect_metrics()
 
+            # 4b. Rescore HiPo users whose activity changed
+            results["hipo"] = self._refresh_hipo_scores()
+
+            # 5. Derived data builds, when opted in to run in-process
+            if DERIVED_BUILDS_IN_PROCESS:
+                results["builds"] = self._run_derived_builds()
+
             # Store run in DB
             self._store_run(results)
 
@@ -171,6 +183,35 @@ class WatchdogScheduler:
         except Exception as e:
             return {"error": str(e)}
 
+    def _refresh_hipo_scores(self):
+        """Incrementally rescore the materialised hipo_scores table."""
+        try:
+            from hipo_engine import refresh_hipo_scores
+            result = refresh_hipo_scores(self.db_path)
+            if result.get("scored"):
+                self._log("HIPO", "mode:{} scored:{}".format(
+                    result["mode"], result["scored"]))
+            return result
+        except Exception as e:
+            self._log("HIPO", "failed: {}".format(e))
+            return {"error": str(e)}
+
+    def _run_derived_builds(self):
+        """Run the derived data builds (sales presence, enriched layout,
+        customer summary, preview sample, BigQuery mirror)."""
+        try:
+            from derived_build import run_builds
+            results = run_builds()
+            for name, result in results.items():
+                if result.get("error") or result.get("status") not in (
+                        "up_to_date", "no_data", "unavailable"):
+                    self._log("BUILD", "{}: {}".format(
+                        name, result.get("error") or result.get("status")))
+            return results
+        except Exception as e:
+            self._log("BUILD", "failed: {}".format(e))
+            return {"error": str(e)}
+
     # ── Storage ───────────────────────────────────────────────────────────
 
     def _store_run(self, results):
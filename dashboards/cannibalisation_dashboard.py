@@ -9,7 +9,6 @@ Coordinates: postcode_coords.json (1,040 Australian postcodes)
 """
 
 import json
-import math
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -28,6 +27,11 @@ _PROJECT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(_PROJECT / "backend"))
 
 from store_pl_service import get_summary_df, get_stores_list  # noqa: E402
+from catchment_engine import (  # noqa: E402
+    CatchmentModel,
+    haversine_matrix,
+    load_postcode_demand,
+)
 
 from shared.styles import (  # noqa: E402
     render_header,
@@ -80,6 +84,13 @@ _STORE_POSTCODES = {
     86: ("Miranda", "2228", "NSW"), 87: ("Maroubra", "2035", "NSW"),
 }
 
+# Postcode ranges for candidate-site filtering
+_POSTCODE_STATE_RANGES = {
+    "NSW": [(2000, 2999)],
+    "QLD": [(4000, 4999)],
+    "ACT": [(2600, 2618), (2900, 2914)],
+}
+
 def _store_state(sid: int) -> str:
     """Get state for a store ID."""
     entry = _STORE_POSTCODES.get(sid)
@@ -137,21 +148,6 @@ def _load_store_names() -> Dict[int, str]:
     return mapping
 
 
-# ---------------------------------------------------------------------------
-# Haversine distance
-# ---------------------------------------------------------------------------
-
-def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate great-circle distance between two points in km."""
-    R = 6371.0  # Earth radius in km
-    rlat1, rlon1 = math.radians(lat1), math.radians(lon1)
-    rlat2, rlon2 = math.radians(lat2), math.radians(lon2)
-    dlat = rlat2 - rlat1
-    dlon = rlon2 - rlon1
-    a = math.sin(dlat / 2) ** 2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
 # ---------------------------------------------------------------------------
 # Distance matrix builder
 # ---------------------------------------------------------------------------
@@ -162,19 +158,30 @@ def _build_distance_matrix(
 ) -> pd.DataFrame:
     """Pairwise distance matrix for all stores with known coordinates."""
     ids = sorted(coords.keys())
-    n = len(ids)
-    matrix = np.zeros((n, n))
-    for i in range(n):
-        for j in range(i + 1, n):
-            d = haversine(
-                coords[ids[i]][0], coords[ids[i]][1],
-                coords[ids[j]][0], coords[ids[j]][1],
-            )
-            matrix[i][j] = d
-            matrix[j][i] = d
+    lats = [coords[sid][0] for sid in ids]
+    lons = [coords[sid][1] for sid in ids]
+    matrix = haversine_matrix(lats, lons, lats, lons)
+    np.fill_diagonal(matrix, 0.0)
     return pd.DataFrame(matrix, index=ids, columns=ids)
 
 
+# ---------------------------------------------------------------------------
+# Huff catchment model (cached per network + decay settings)
+# ---------------------------------------------------------------------------
+
+@st.cache_resource(ttl=300)
+def _build_catchment_model(
+    coords: Dict[int, Tuple[float, float]],
+    beta: float,
+    max_km: float,
+) -> Optional[CatchmentModel]:
+    """Huff model over market-share postcodes for the current store network."""
+    demand = load_postcode_demand()
+    if demand.empty or not coords:
+        return None
+    return CatchmentModel(demand, coords, beta=beta, max_km=max_km)
+
+
 # ---------------------------------------------------------------------------
 # Detect store opening dates
 # ---------------------------------------------------------------------------
@@ -205,38 +212,42 @@ def _compute_before_after(
     before_start = opening_date - pd.DateOffset(months=months_window)
     after_end = opening_date + pd.DateOffset(months=months_window)
 
-    results = []
-    for sid in nearby_stores:
-        store_data = df[df["store_id"] == sid].copy()
-        if store_data.empty:
-            continue
-
-        before = store_data[
-            (store_data["date"] >= before_start)
-            & (store_data["date"] < opening_date)
-        ]
-        after = store_data[
-            (store_data["date"] >= opening_date)
-            & (store_data["date"] < after_end)
-        ]
-
-        if before.empty or after.empty:
-            continue
-
-        before_avg = before["revenue"].mean()
-        after_avg = after["revenue"].mean()
-        pct_change = ((after_avg - before_avg) / abs(before_avg) * 100) if before_avg != 0 else 0.0
-
-        results.append({
-            "store_id": sid,
-            "before_avg_monthly": before_avg,
-            "after_avg_monthly": after_avg,
-            "pct_change": round(pct_change, 2),
-            "before_months": len(before),
-            "after_months": len(after),
-        })
-
-    return pd.DataFrame(results)
+    # One filter over the window, then a grouped mean/count per period
+    window = df[
+        df["store_id"].isin(nearby_stores)
+        & (df["date"] >= before_start)
+        & (df["date"] < after_end)
+    ]
+    if window.empty:
+        return pd.DataFrame()
+    period = np.where(window["date"] < opening_date, "before", "after")
+    stats = (
+        window.groupby(["store_id", period])["revenue"]
+        .agg(["mean", "count"])
+        .unstack()
+        .dropna()
+    )
+    if stats.empty:
+        return pd.DataFrame()
+
+    before_avg = stats[("mean", "before")]
+    after_avg = stats[("mean", "after")]
+    pct_change = np.where(
+        before_avg != 0,
+        (after_avg - before_avg) / before_avg.abs() * 100,
+        0.0,
+    )
+    out = pd.DataFrame({
+        "store_id": stats.index.astype(int),
+        "before_avg_monthly": before_avg.values,
+        "after_avg_monthly": after_avg.values,
+        "pct_change": np.round(pct_change, 2),
+        "before_months": stats[("count", "before")].astype(int).values,
+        "after_months": stats[("count", "after")].astype(int).values,
+    })
+    # Preserve the caller's store order
+    order = {sid: i for i, sid in enumerate(nearby_stores)}
+    return out.sort_values("store_id", key=lambda c: c.map(order)).reset_index(drop=True)
 
 
 def _network_growth_rate(df: pd.DataFrame, opening_date: datetime, months_window: int = 12) -> float:
@@ -566,18 +577,15 @@ with tab3:
 
         # Find nearby stores that existed before the new one opened
         nearby = []
-        if selected_sid in coords:
-            for sid, (lat, lon) in coords.items():
+        if selected_sid in dist_matrix.index:
+            dists = dist_matrix.loc[selected_sid]
+            for sid, d in dists[dists <= radius_km].items():
                 if sid == selected_sid:
                     continue
-                if sid not in openings:
-                    continue
                 # Must have been open before the new store
-                if openings[sid] >= opening_dt:
+                if sid not in openings or openings[sid] >= opening_dt:
                     continue
-                d = haversine(coords[selected_sid][0], coords[selected_sid][1], lat, lon)
-                if d <= radius_km:
-                    nearby.append(sid)
+                nearby.append(sid)
 
         if not nearby:
             st.info(f"No existing stores found within {radius_km:.0f}km of {_sname(selected_sid)}.")
@@ -797,14 +805,13 @@ with tab5:
     # Compute historical cannibalisation rate from Tab 3 data
     historical_rates = []
     for new_sid, open_dt in new_stores.items():
-        if new_sid not in coords:
+        if new_sid not in dist_matrix.index:
             continue
-        for existing_sid, (elat, elon) in coords.items():
+        for existing_sid, d in dist_matrix.loc[new_sid].items():
             if existing_sid == new_sid:
                 continue
             if existing_sid not in openings or openings[existing_sid] >= open_dt:
                 continue
-            d = haversine(coords[new_sid][0], coords[new_sid][1], elat, elon)
             if d <= 5.0:
                 ba = _compute_before_after(rev_df, new_sid, [existing_sid], open_dt, 12)
                 if not ba.empty:
@@ -859,8 +866,13 @@ with tab5:
 
         # Find nearby existing stores
         affected = []
-        for sid, (slat, slon) in coords.items():
-            d = haversine(new_lat, new_lon, slat, slon)
+        store_ids = list(coords)
+        site_dists = haversine_matrix(
+            [new_lat], [new_lon],
+            [coords[sid][0] for sid in store_ids],
+            [coords[sid][1] for sid in store_ids],
+        )[0]
+        for sid, d in zip(store_ids, site_dists):
             if d <= whatif_radius:
                 # Get latest 12-month average revenue
                 recent = rev_df[
@@ -1027,6 +1039,97 @@ with tab5:
             )
 
 
+    # -----------------------------------------------------------------------
+    # Batch site scoring (Huff gravity model)
+    # -----------------------------------------------------------------------
+    st.markdown("---")
+    st.subheader("Batch Site Scoring — Huff Catchment Model")
+    st.caption(
+        "Scores every candidate postcode at once. Each postcode's grocery "
+        "market is shared between HFM stores and competitors in proportion "
+        "to attractiveness / distance^β, calibrated to current HFM market "
+        "share. A new site's sales split into transfer from existing stores "
+        "and genuinely new revenue."
+    )
+
+    hc1, hc2, hc3 = st.columns(3)
+    with hc1:
+        huff_beta = st.slider("Distance decay (β)", 1.0, 3.0, 2.0, 0.1,
+                              key="huff_beta")
+    with hc2:
+        huff_max_km = st.slider("Max travel distance (km)", 5.0, 50.0, 20.0, 5.0,
+                                key="huff_max_km")
+    with hc3:
+        huff_state = st.selectbox(
+            "Candidate region", ["All States"] + list(_POSTCODE_STATE_RANGES),
+            key="huff_state",
+        )
+
+    model = _build_catchment_model(coords, huff_beta, huff_max_km)
+    if model is None:
+        st.info("Market share postcode data not available for catchment modelling.")
+    else:
+        demand = load_postcode_demand()
+        candidates = demand
+        if huff_state != "All States":
+            pc_num = pd.to_numeric(demand["postcode"], errors="coerce")
+            in_state = np.zeros(len(demand), dtype=bool)
+            for lo, hi in _POSTCODE_STATE_RANGES[huff_state]:
+                in_state |= ((pc_num >= lo) & (pc_num <= hi)).to_numpy()
+            candidates = demand[in_state]
+
+        if candidates.empty:
+            st.info("No candidate postcodes in this region.")
+        else:
+            summary, transfer = model.simulate_sites(
+                candidates["lat"], candidates["lon"],
+                site_names=candidates["postcode"],
+            )
+            store_label = {sid: _sname(sid) for sid in coords}
+            summary = summary.sort_values("net_new_sales", ascending=False)
+            top_sites = summary.head(25)
+            top_sites = top_sites.assign(
+                largest_donor=transfer.loc[top_sites.index].idxmax(axis=1)
+                .map(store_label),
+            )
+
+            bc1, bc2, bc3 = st.columns(3)
+            with bc1:
+                st.metric("Sites Scored", f"{len(summary):,}")
+            with bc2:
+                st.metric("Best Net New (period)",
+                          f"${summary['net_new_sales'].iloc[0]:,.0f}")
+            with bc3:
+                st.metric("Median Retention",
+                          f"{summary['retention_pct'].median():.0f}%")
+
+            site_table = top_sites.reset_index().rename(columns={"index": "postcode"})
+            site_table = site_table[[
+                "postcode", "predicted_sales", "transfer", "net_new_sales",
+                "retention_pct", "stores_affected", "largest_donor",
+            ]]
+            site_table.columns = [
+                "Postcode", "Predicted Sales", "Transfer", "Net New Sales",
+                "Retention %", "Stores Affected", "Largest Donor",
+            ]
+            st.dataframe(
+                site_table,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Predicted Sales": st.column_config.NumberColumn(format="$%,.0f"),
+                    "Transfer": st.column_config.NumberColumn(format="$%,.0f"),
+                    "Net New Sales": st.column_config.NumberColumn(format="$%,.0f"),
+                    "Retention %": st.column_config.NumberColumn(format="%.0f%%"),
+                },
+            )
+            st.caption(
+                "Sales are per market-share period (monthly) for the postcode "
+                "grocery market. Sites are scored independently against the "
+                "current network."
+            )
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Footer
 # ═══════════════════════════════════════════════════════════════════════════
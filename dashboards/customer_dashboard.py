@@ -952,7 +952,7 @@ with tab4:
     )
 
     try:
-        cohort_data = query_named("customer_cohort_retention",
+        cohort_data = query_named("customer_cohort_matrix",
                                   start=txn_start, end=txn_end)
     except Exception as e:
         st.error("Could not load cohort data: {}".format(e))
@@ -40,7 +40,7 @@ def render():
     )
 
     try:
-        cohort_data = _query("customer_cohort_retention",
+        cohort_data = _query("customer_cohort_matrix",
                              start=txn_start, end=txn_end)
     except Exception as e:
         st.error("Could not load cohort data: {}".format(e))
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 import sqlite3
 from pathlib import Path
 from shared.fiscal_selector import render_fiscal_selector
+from shared.sales_store import load_weekly_sales
 
 # ============================================================================
 # STYLING
@@ -108,55 +109,8 @@ def load_profitability_data(date_from, date_to, stores=None, promo='N'):
     Returns DataFrame with: store, department, major_group, week_ending,
     sales, initial_gp, gp, budget_sales, budget_gp, shrinkage.
     """
-    db = _get_db_path()
-
-    query = """
-        SELECT store, department, major_group, week_ending, measure, value
-        FROM sales
-        WHERE channel = 'Retail'
-          AND is_promotion = ?
-          AND week_ending >= ?
-          AND week_ending <= ?
-    """
-    params = [promo, date_from, date_to]
-
-    if stores:
-        placeholders = ','.join('?' * len(stores))
-        query += f" AND store IN ({placeholders})"
-        params.extend(stores)
-
-    with sqlite3.connect(db) as conn:
-        df = pd.read_sql_query(query, conn, params=params)
-
-    if df.empty:
-        return pd.DataFrame()
-
-    measure_map = {
-        'Sales - Val': 'sales',
-        'Final Gross Prod - Val': 'gp',
-        'Initial Gross Profit - Val': 'initial_gp',
-        'Bgt Sales - Val': 'budget_sales',
-        'Bgt Final GP - Val': 'budget_gp',
-        'Total Shrinkage \u2013 Val': 'shrinkage',
-    }
-
-    df['measure_col'] = df['measure'].map(measure_map)
-    df = df.dropna(subset=['measure_col'])
-
-    pivoted = df.pivot_table(
-        index=['store', 'department', 'major_group', 'week_ending'],
-        columns='measure_col',
-        values='value',
-        aggfunc='sum'
-    ).reset_index()
-    pivoted.columns.name = None
-
-    for col in measure_map.values():
-        if col not in pivoted.columns:
-            pivoted[col] = 0.0
-
-    pivoted['week_ending'] = pd.to_datetime(pivoted['week_ending'])
-    return pivoted
+    return load_weekly_sales(date_from, date_to, stores=stores, promo=promo,
+                             db_path=_get_db_path())
 
 
 # ============================================================================
@@ -13,7 +13,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import date
 
-from transaction_layer import TransactionStore, STORE_NAMES
+from transaction_layer import TransactionStore, STORE_NAMES, comparison_windows
 from transaction_queries import run_query
 from product_hierarchy import get_departments, get_major_groups, get_minor_groups
 
@@ -53,36 +53,14 @@ def query_named(name, **kwargs):
 
 
 @st.cache_data(ttl=300)
-def query_network_kpis(start, end, store_id=None):
+def query_period_kpis(start, end, store_id=None):
+    """Period KPIs and the same period a year earlier, from one scan."""
     ts = get_store()
-    store_clause = f"AND Store_ID = '{store_id}'" if store_id else ""
-    sql = f"""
-        SELECT COUNT(DISTINCT Store_ID) AS active_stores,
-               SUM(SalesIncGST) AS revenue,
-               COUNT(DISTINCT Reference2) AS transactions,
-               SUM(CASE WHEN GST = 0 THEN SalesIncGST ELSE 0 END) AS fresh_revenue,
-               SUM(CASE WHEN SalesIncGST < 0 THEN ABS(SalesIncGST) ELSE 0 END) AS returns_value
-        FROM transactions
-        WHERE SaleDate >= CAST(? AS TIMESTAMP)
-          AND SaleDate < CAST(? AS TIMESTAMP)
-          {store_clause}
-    """
-    return ts.query(sql, [start, end])
-
-
-@st.cache_data(ttl=300)
-def query_prior_year_revenue(start, end, store_id=None):
-    """Get revenue for same period 1 year earlier."""
-    ts = get_store()
-    store_clause = f"AND Store_ID = '{store_id}'" if store_id else ""
-    sql = f"""
-        SELECT SUM(SalesIncGST) AS revenue
-        FROM transactions
-        WHERE SaleDate >= CAST(? AS TIMESTAMP) - INTERVAL '1' YEAR
-          AND SaleDate < CAST(? AS TIMESTAMP) - INTERVAL '1' YEAR
-          {store_clause}
-    """
-    return ts.query(sql, [start, end])
+    return ts.compare_periods(
+        comparison_windows(start, end, prior_period=False),
+        measures=["active_stores", "revenue", "transactions",
+                  "fresh_revenue", "returns_value"],
+        store_id=store_id)
 
 
 # ============================================================================
@@ -148,23 +126,22 @@ st.markdown(f"**Filters:** {' | '.join(filter_parts)}")
 # ============================================================================
 
 try:
-    kpi_data = query_network_kpis(start_str, end_str, store_id)
-    prior_data = query_prior_year_revenue(start_str, end_str, store_id)
+    period_kpis = query_period_kpis(start_str, end_str, store_id)
 except Exception as e:
     st.error(f"Failed to load data: {e}")
     st.stop()
 
-if not kpi_data:
+kpi = period_kpis["current"].iloc[0]
+if not kpi["active_stores"]:
     st.warning("No data found for this selection.")
     st.stop()
 
-kpi = kpi_data[0]
 revenue = kpi["revenue"] or 0
 active_stores = kpi["active_stores"] or 0
 fresh_rev = kpi["fresh_revenue"] or 0
 returns_val = kpi["returns_value"] or 0
 
-prior_rev = prior_data[0]["revenue"] if prior_data and prior_data[0]["revenue"] else 0
+prior_rev = period_kpis["prior_year"].iloc[0]["revenue"] or 0
 yoy_growth = ((revenue - prior_rev) / prior_rev * 100) if prior_rev > 0 else 0
 fresh_pct = (fresh_rev / revenue * 100) if revenue > 0 else 0
 returns_pct = (returns_val / revenue * 100) if revenue > 0 else 0
@@ -15,7 +15,10 @@ from datetime import datetime, timedelta
 import sqlite3
 from pathlib import Path
 
-from shared.bigquery_connector import is_bigquery_available, bq_query
+from shared.bigquery_connector import (
+    bq_query, is_bigquery_available, render_mirror_sync,
+)
+from shared.sales_store import finish_frame, load_weekly_sales, pivot_sql
 
 # ============================================================================
 # STYLING
@@ -146,13 +149,16 @@ def load_sales_data(date_from, date_to, stores=None, departments=None,
 
     if is_bigquery_available():
         try:
+            # Pivoted in the query: one row per group-week comes back
             bq_sql = f"""
-                SELECT store, department, major_group, week_ending, measure, value
+                SELECT store, department, major_group, week_ending,
+                       {pivot_sql()}
                 FROM `oval-blend-488902-p2.trading.weekly_sales`
                 WHERE channel = 'Retail'
                   AND is_promotion = '{promo}'
                   AND week_ending >= '{date_from}'
                   AND week_ending <= '{date_to}'
+                GROUP BY store, department, major_group, week_ending
             """
             df = bq_query(bq_sql)
             # Apply in-memory filters for list params
@@ -162,73 +168,18 @@ def load_sales_data(date_from, date_to, stores=None, departments=None,
                 df = df[df["department"].isin(departments)]
             if major_groups:
                 df = df[df["major_group"].isin(major_groups)]
+            df = finish_frame(df)
         except Exception:
             df = pd.DataFrame()
 
     if df.empty:
-        # SQLite fallback
-        db = _get_db_path()
-        query = """
-            SELECT
-                store, department, major_group, week_ending, measure, value
-            FROM sales
-            WHERE channel = 'Retail'
-              AND is_promotion = ?
-              AND week_ending >= ?
-              AND week_ending <= ?
-        """
-        params = [promo, date_from, date_to]
-
-        if stores:
-            placeholders = ','.join('?' * len(stores))
-            query += f" AND store IN ({placeholders})"
-            params.extend(stores)
-
-        if departments:
-            placeholders = ','.join('?' * len(departments))
-            query += f" AND department IN ({placeholders})"
-            params.extend(departments)
-
-        if major_groups:
-            placeholders = ','.join('?' * len(major_groups))
-            query += f" AND major_group IN ({placeholders})"
-            params.extend(major_groups)
-
-        with sqlite3.connect(db) as conn:
-            df = pd.read_sql_query(query, conn, params=params)
-
-    if df.empty:
-        return pd.DataFrame()
-
-    # Pivot measures into columns
-    measure_map = {
-        'Sales - Val': 'sales',
-        'Final Gross Prod - Val': 'gp',
-        'Initial Gross Profit - Val': 'initial_gp',
-        'Bgt Sales - Val': 'budget_sales',
-        'Bgt Final GP - Val': 'budget_gp',
-        'Total Shrinkage \u2013 Val': 'shrinkage',  # em-dash
-    }
-
-    df['measure_col'] = df['measure'].map(measure_map)
-    df = df.dropna(subset=['measure_col'])
-
-    pivoted = df.pivot_table(
-        index=['store', 'department', 'major_group', 'week_ending'],
-        columns='measure_col',
-        values='value',
-        aggfunc='sum'
-    ).reset_index()
-
-    pivoted.columns.name = None
-
-    # Ensure all measure columns exist
-    for col in measure_map.values():
-        if col not in pivoted.columns:
-            pivoted[col] = 0.0
+        # SQLite fallback: the wide weekly table built at extract time
+        df = load_weekly_sales(date_from, date_to, stores=stores,
+                               departments=departments,
+                               major_groups=major_groups, promo=promo,
+                               db_path=_get_db_path())
 
-    pivoted['week_ending'] = pd.to_datetime(pivoted['week_ending'])
-    return pivoted
+    return df
 
 
 @st.cache_data(ttl=300)
@@ -368,6 +319,7 @@ if filters.get("caveats"):
     for c in filters["caveats"]:
         st.caption(f"Note: {c}")
 st.caption(f"Data range: {data_min} to {data_max}")
+render_mirror_sync()
 
 # ============================================================================
 # LOAD DATA
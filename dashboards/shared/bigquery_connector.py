@@ -1,10 +1,14 @@
 """
 Harris Farm Hub — BigQuery Connector
-Single source of truth for all data queries. Falls back to SQLite when
-BigQuery is unavailable (local dev without credentials).
+Single source of truth for all data queries. Queries run locally against
+the parquet mirror of the BigQuery tables (shared/bq_mirror.py) when it
+has them and they were synced recently (BQ_MIRROR_MAX_AGE_HOURS),
+otherwise on BigQuery. Falls back to SQLite when neither is
+available (local dev without credentials or a mirror).
 
 Usage:
     from shared.bigquery_connector import bq_query, is_bigquery_available
+    from shared.bigquery_connector import render_mirror_sync
     from shared.bigquery_connector import get_weekly_sales, get_market_share
 
     # Direct query
@@ -15,38 +19,33 @@ Usage:
 
     # Safe wrappers (BigQuery first, SQLite fallback)
     df = get_weekly_sales_safe(date_from="2025-07-01")
+
+    # "Synced <time>" caption when results come from the local mirror
+    render_mirror_sync()
 """
 
-import json
 import logging
-import os
-from pathlib import Path
+from collections import namedtuple
 from typing import Optional, List, Dict, Any
 
 import pandas as pd
 import streamlit as st
 
+# Streamlit-free, so the mirror sync can use them too (re-exported)
+from shared.bq_client import BQ_LOCATION, BQ_PROJECT, create_client  # noqa: F401
+
 _log = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
-BQ_PROJECT = "oval-blend-488902-p2"
-BQ_LOCATION = "australia-southeast1"
-
 # Dataset fully-qualified prefixes
 DS_TRADING = f"{BQ_PROJECT}.trading"
 DS_MASTER = f"{BQ_PROJECT}.master_data"
 DS_DEMOGRAPHICS = f"{BQ_PROJECT}.demographics"
 DS_REFERENCE = f"{BQ_PROJECT}.reference"
 
-# Service account key search paths (checked in order)
-_KEY_PATHS = [
-    os.getenv("GOOGLE_APPLICATION_CREDENTIALS", ""),
-    str(Path.home() / ".config" / "gcloud" / "service-account-key.json"),
-]
-
 # ---------------------------------------------------------------------------
 # Client initialisation (cached for app lifetime)
 # ---------------------------------------------------------------------------
@@ -55,53 +54,59 @@ _KEY_PATHS = [
 @st.cache_resource
 def _get_bq_client():
     """Create and cache a BigQuery client. Returns None if unavailable."""
+    return create_client()
+
+
+def is_bigquery_available() -> bool:
+    """Check if BigQuery data can be queried (local mirror or client)."""
+    from shared import bq_mirror
+
+    return bq_mirror.is_available() or _get_bq_client() is not None
+
+
+def mirror_sync_caption() -> Optional[str]:
+    """Caption naming when the local mirror was last synced, or None when
+    queries go to BigQuery (no mirror, or it is stale)."""
+    from shared import bq_mirror
+
+    synced = bq_mirror.last_synced()
+    if synced is None:
+        return None
+    return "BigQuery data from the local copy, synced {}".format(
+        synced.strftime("%d %b %Y %H:%M"))
+
+
+def render_mirror_sync():
+    """Show mirror_sync_caption() under a page's data, if any."""
+    caption = mirror_sync_caption()
+    if caption:
+        st.caption(caption)
+
+
+# Stand-in for bigquery.ScalarQueryParameter when the library is missing
+# (queries against the local mirror only need name and value)
+QueryParam = namedtuple("QueryParam", ["name", "type_", "value"])
+
+
+def _param(name, type_, value):
+    """Scalar query parameter for bq_query()."""
     try:
         from google.cloud import bigquery
-        from google.oauth2 import service_account
     except ImportError:
-        _log.info("google-cloud-bigquery not installed — BigQuery unavailable")
-        return None
+        return QueryParam(name, type_, value)
+    return bigquery.ScalarQueryParameter(name, type_, value)
 
-    # Option 1: JSON string in env var (Render deployment)
-    sa_json = os.getenv("GCP_SERVICE_ACCOUNT_JSON")
-    if sa_json:
-        try:
-            info = json.loads(sa_json)
-            credentials = service_account.Credentials.from_service_account_info(info)
-            client = bigquery.Client(
-                project=BQ_PROJECT, credentials=credentials, location=BQ_LOCATION
-            )
-            client.query("SELECT 1").result()
-            _log.info("BigQuery connected via GCP_SERVICE_ACCOUNT_JSON")
-            return client
-        except Exception as e:
-            _log.warning("BigQuery JSON env var auth failed: %s", e)
-
-    # Option 2: Key file on disk (local dev)
-    for key_path in _KEY_PATHS:
-        if key_path and Path(key_path).exists():
-            try:
-                credentials = service_account.Credentials.from_service_account_file(
-                    key_path
-                )
-                client = bigquery.Client(
-                    project=BQ_PROJECT,
-                    credentials=credentials,
-                    location=BQ_LOCATION,
-                )
-                client.query("SELECT 1").result()
-                _log.info("BigQuery connected via key file: %s", key_path)
-                return client
-            except Exception as e:
-                _log.warning("BigQuery key file auth failed (%s): %s", key_path, e)
-
-    _log.info("No BigQuery credentials found — BigQuery unavailable")
-    return None
 
-
-def is_bigquery_available() -> bool:
-    """Check if BigQuery client is available and authenticated."""
-    return _get_bq_client() is not None
+def _params_key(params):
+    """Hashable cache key for a list of query parameters."""
+    key = []
+    for p in params or []:
+        value = getattr(p, "value", None)
+        if value is None and hasattr(p, "values"):
+            value = tuple(p.values)
+        key.append((p.name, getattr(p, "type_", None)
+                    or getattr(p, "array_type", None), value))
+    return tuple(key)
 
 
 # ---------------------------------------------------------------------------
@@ -109,23 +114,40 @@ def is_bigquery_available() -> bool:
 # ---------------------------------------------------------------------------
 
 
-@st.cache_data(ttl=300)
 def bq_query(sql, _params=None):
     """
     Execute a BigQuery SQL query and return a pandas DataFrame.
-    Results are cached for 5 minutes per unique query.
+    Runs in DuckDB over the local mirror when every table it references
+    has been mirrored, otherwise on BigQuery. Results are cached for 5
+    minutes per unique query, parameter values and mirror sync.
 
     Args:
         sql: SQL query string. Use backtick-quoted table references.
-        _params: Optional list of bigquery.ScalarQueryParameter (prefixed
-                 with _ so Streamlit doesn't try to hash it).
+        _params: Optional list of bigquery.ScalarQueryParameter (or
+                 _param()) values.
 
     Returns:
         pd.DataFrame
 
     Raises:
-        ConnectionError: If BigQuery is not available.
+        ConnectionError: If neither the mirror nor BigQuery can run it.
     """
+    from shared import bq_mirror
+
+    return _cached_query(sql, _params_key(_params), bq_mirror.version(),
+                         _params)
+
+
+@st.cache_data(ttl=300)
+def _cached_query(sql, params_key, mirror_version, _params):
+    """bq_query() body; params_key and mirror_version are the cache key
+    (Streamlit does not hash the underscore-prefixed _params)."""
+    from shared import bq_mirror
+
+    df = bq_mirror.run_local(sql, _params)
+    if df is not None:
+        return df
+
     client = _get_bq_client()
     if client is None:
         raise ConnectionError("BigQuery not available")
@@ -188,20 +210,19 @@ def get_weekly_sales(
     Returns DataFrame with columns: store, department, major_group, week_ending, value.
     """
     conditions = ["channel = @channel", "measure = @measure", "is_promotion = @promo"]
-    from google.cloud import bigquery
 
     params = [
-        bigquery.ScalarQueryParameter("channel", "STRING", channel),
-        bigquery.ScalarQueryParameter("measure", "STRING", measure),
-        bigquery.ScalarQueryParameter("promo", "STRING", promo),
+        _param("channel", "STRING", channel),
+        _param("measure", "STRING", measure),
+        _param("promo", "STRING", promo),
     ]
 
     if date_from:
         conditions.append("week_ending >= @date_from")
-        params.append(bigquery.ScalarQueryParameter("date_from", "STRING", date_from))
+        params.append(_param("date_from", "STRING", date_from))
     if date_to:
         conditions.append("week_ending <= @date_to")
-        params.append(bigquery.ScalarQueryParameter("date_to", "STRING", date_to))
+        params.append(_param("date_to", "STRING", date_to))
 
     where = " AND ".join(conditions)
 
@@ -233,16 +254,15 @@ def get_customer_data(
     # type: (Optional[List[str]], Optional[str], Optional[str]) -> pd.DataFrame
     """Query customers from BigQuery."""
     conditions = ["1=1"]
-    from google.cloud import bigquery
 
     params = []
 
     if date_from:
         conditions.append("week_ending >= @date_from")
-        params.append(bigquery.ScalarQueryParameter("date_from", "STRING", date_from))
+        params.append(_param("date_from", "STRING", date_from))
     if date_to:
         conditions.append("week_ending <= @date_to")
-        params.append(bigquery.ScalarQueryParameter("date_to", "STRING", date_to))
+        params.append(_param("date_to", "STRING", date_to))
 
     where = " AND ".join(conditions)
 
@@ -266,23 +286,22 @@ def get_market_share(
     # type: (Optional[str], str, Optional[int], Optional[int]) -> pd.DataFrame
     """Query market_share from BigQuery."""
     conditions = ["channel = @channel"]
-    from google.cloud import bigquery
 
-    params = [bigquery.ScalarQueryParameter("channel", "STRING", channel)]
+    params = [_param("channel", "STRING", channel)]
 
     if region_code:
         conditions.append("region_code = @region_code")
         params.append(
-            bigquery.ScalarQueryParameter("region_code", "STRING", region_code)
+            _param("region_code", "STRING", region_code)
         )
     if period_from:
         conditions.append("period >= @period_from")
         params.append(
-            bigquery.ScalarQueryParameter("period_from", "INT64", period_from)
+            _param("period_from", "INT64", period_from)
         )
     if period_to:
         conditions.append("period <= @period_to")
-        params.append(bigquery.ScalarQueryParameter("period_to", "INT64", period_to))
+        params.append(_param("period_to", "INT64", period_to))
 
     where = " AND ".join(conditions)
 
@@ -333,13 +352,12 @@ def search_knowledge_base(query, category=None, limit=10):
         "(LOWER(content) LIKE CONCAT('%', LOWER(@query), '%') "
         "OR LOWER(filename) LIKE CONCAT('%', LOWER(@query), '%'))"
     ]
-    from google.cloud import bigquery
 
-    params = [bigquery.ScalarQueryParameter("query", "STRING", query)]
+    params = [_param("query", "STRING", query)]
 
     if category:
         conditions.append("category = @category")
-        params.append(bigquery.ScalarQueryParameter("category", "STRING", category))
+        params.append(_param("category", "STRING", category))
 
     where = " AND ".join(conditions)
 
@@ -526,8 +544,7 @@ def get_response_count(workstream_name, test=False):
         FROM {table}
         WHERE transformation_focus = @ws_name
     """
-    from google.cloud import bigquery
-    params = [bigquery.ScalarQueryParameter("ws_name", "STRING", workstream_name)]
+    params = [_param("ws_name", "STRING", workstream_name)]
     df = bq_query(sql, _params=params)
     return int(df["cnt"].iloc[0]) if len(df) > 0 else 0
 
@@ -559,8 +576,7 @@ def get_responses_by_email(email, test=False):
         WHERE LOWER(email) = LOWER(@email)
         ORDER BY submitted_at DESC
     """
-    from google.cloud import bigquery
-    params = [bigquery.ScalarQueryParameter("email", "STRING", email)]
+    params = [_param("email", "STRING", email)]
     df = bq_query(sql, _params=params)
     return df.to_dict("records")
 
@@ -579,7 +595,6 @@ def get_department_counts(workstream_name, test=False):
         GROUP BY dept
         ORDER BY cnt DESC
     """
-    from google.cloud import bigquery
-    params = [bigquery.ScalarQueryParameter("ws_name", "STRING", workstream_name)]
+    params = [_param("ws_name", "STRING", workstream_name)]
     df = bq_query(sql, _params=params)
     return dict(zip(df["dept"].tolist(), df["cnt"].tolist()))
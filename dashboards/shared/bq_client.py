@@ -0,0 +1,69 @@
+"""
+Harris Farm Hub — BigQuery Client
+Project settings and client creation without Streamlit, for processes
+that are not dashboards (the BigQuery mirror sync, backend jobs).
+shared/bigquery_connector.py re-exports these and caches the client per
+Streamlit app.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+_log = logging.getLogger(__name__)
+
+BQ_PROJECT = "oval-blend-488902-p2"
+BQ_LOCATION = "australia-southeast1"
+
+# Service account key search paths (checked in order)
+_KEY_PATHS = [
+    os.getenv("GOOGLE_APPLICATION_CREDENTIALS", ""),
+    str(Path.home() / ".config" / "gcloud" / "service-account-key.json"),
+]
+
+
+def create_client():
+    """Create a BigQuery client. Returns None if unavailable."""
+    try:
+        from google.cloud import bigquery
+        from google.oauth2 import service_account
+    except ImportError:
+        _log.info("google-cloud-bigquery not installed — BigQuery unavailable")
+        return None
+
+    # Option 1: JSON string in env var (Render deployment)
+    sa_json = os.getenv("GCP_SERVICE_ACCOUNT_JSON")
+    if sa_json:
+        try:
+            info = json.loads(sa_json)
+            credentials = service_account.Credentials.from_service_account_info(info)
+            client = bigquery.Client(
+                project=BQ_PROJECT, credentials=credentials, location=BQ_LOCATION
+            )
+            client.query("SELECT 1").result()
+            _log.info("BigQuery connected via GCP_SERVICE_ACCOUNT_JSON")
+            return client
+        except Exception as e:
+            _log.warning("BigQuery JSON env var auth failed: %s", e)
+
+    # Option 2: Key file on disk (local dev)
+    for key_path in _KEY_PATHS:
+        if key_path and Path(key_path).exists():
+            try:
+                credentials = service_account.Credentials.from_service_account_file(
+                    key_path
+                )
+                client = bigquery.Client(
+                    project=BQ_PROJECT,
+                    credentials=credentials,
+                    location=BQ_LOCATION,
+                )
+                client.query("SELECT 1").result()
+                _log.info("BigQuery connected via key file: %s", key_path)
+                return client
+            except Exception as e:
+                _log.warning("BigQuery key file auth failed (%s): %s", key_path, e)
+
+    _log.info("No BigQuery credentials found — BigQuery unavailable")
+    return None
@@ -0,0 +1,452 @@
+"""
+Harris Farm Hub — BigQuery Local Mirror
+Snapshots the BigQuery tables the dashboards read into local parquet so
+bq_query() runs them in DuckDB: a millisecond local scan instead of a
+billed, network-bound round trip. BigQuery is only asked for deltas.
+
+Layout (data/bq_mirror/):
+    <dataset>.<table>/<partition>-<id>.parquet
+        Watermarked tables are partitioned by the first 7 characters of
+        the watermark value (YYYY-MM for dates and timestamps, the period
+        itself for YYYYMM integers); rows with a NULL watermark go to
+        "null". Other tables are a single "all" partition.
+    mirror_meta.json
+        {version, synced_at, tables: {name: {parts, rows, watermark,
+        modified, synced_at, checked_at}}} -- the commit point.
+        checked_at is the last sync that confirmed the table against
+        BigQuery, whether or not it changed.
+
+Sync (daily via the derived-build loop in render_start.sh, i.e.
+`python backend/derived_build.py bq_mirror`, or `python -m shared.bq_mirror`
+from dashboards/) -- never in the API or a dashboard process:
+    1. One `<dataset>.__TABLES__` query per dataset; tables whose
+       last_modified_time has not changed are skipped.
+    2. Watermarked tables fetch WHERE <watermark> >= <last max>. Rows at
+       the old maximum are replaced, so a week that is still being
+       restated is picked up, and only the touched partitions are
+       rewritten.
+    3. If the local row count then disagrees with BigQuery's (deletes,
+       restated history) or there is no previous sync, the table is
+       snapshotted in full.
+
+run_local() translates BigQuery SQL to DuckDB: backtick table references
+become views over the mirror, @params become $params, double-quoted and
+backslash-escaped strings are re-quoted, and [OFFSET(n)], SAFE_CAST,
+FLOAT64 and DATETIME literals are rewritten. It returns None when a table
+is not mirrored, was last checked more than BQ_MIRROR_MAX_AGE_HOURS ago
+(the sync has stopped running), or DuckDB cannot run the query, and the
+caller goes to BigQuery instead. Local results carry the oldest check
+time of the tables they read in df.attrs["mirror_synced_at"].
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from shared.bq_client import BQ_PROJECT, create_client
+
+_BACKEND = str(Path(__file__).resolve().parent.parent.parent / "backend")
+if _BACKEND not in sys.path:
+    sys.path.append(_BACKEND)
+
+from derived_build import read_meta, sql_list, write_meta  # noqa: E402
+
+_log = logging.getLogger(__name__)
+
+MIRROR_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "bq_mirror"
+LAYOUT_VERSION = 1
+
+# Tables not confirmed against BigQuery for longer than this are queried
+# on BigQuery instead (0 disables the check)
+MAX_AGE_HOURS = float(os.getenv("BQ_MIRROR_MAX_AGE_HOURS", "36"))
+
+# "<dataset>.<table>" -> watermark column (None: full snapshot on change)
+MIRROR_TABLES = {
+    "trading.weekly_sales": "week_ending",
+    "trading.weekly_customers": "week_ending",
+    "trading.market_share": "period",
+    "master_data.stores": None,
+    "master_data.departments": None,
+    "reference.fiscal_calendar_weekly": None,
+    "reference.knowledge_base": None,
+    "Surveys.sc_review_responses": "submitted_at",
+    "Surveys.sc_review_responses_test": "submitted_at",
+    "Surveys.meeting_os_responses": "submitted_at",
+}
+
+
+# ---------------------------------------------------------------------------
+# Metadata
+# ---------------------------------------------------------------------------
+
+def _meta_path(mirror_dir: Path) -> Path:
+    return Path(mirror_dir) / "mirror_meta.json"
+
+
+def load_meta(mirror_dir: Optional[Path] = None) -> dict:
+    """Mirror metadata; tables whose files are missing are left out."""
+    mirror_dir = Path(mirror_dir or MIRROR_DIR)
+    meta = read_meta(_meta_path(mirror_dir), version=LAYOUT_VERSION)
+    if meta is None:
+        return {"version": LAYOUT_VERSION, "tables": {}}
+    meta["tables"] = {
+        name: state for name, state in meta.get("tables", {}).items()
+        if all((mirror_dir / p).is_file() for p in state["parts"].values())
+    }
+    return meta
+
+
+def version(mirror_dir: Optional[Path] = None) -> Optional[int]:
+    """Changes whenever a sync commits (part of bq_query's cache key)."""
+    try:
+        return _meta_path(mirror_dir or MIRROR_DIR).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def checked_at(state: dict) -> datetime:
+    """When the sync last confirmed a table against BigQuery."""
+    return datetime.fromisoformat(state.get("checked_at")
+                                  or state["synced_at"])
+
+
+def fresh_tables(mirror_dir: Optional[Path] = None,
+                 max_age_hours: Optional[float] = None) -> dict:
+    """Mirrored tables checked within max_age_hours (default
+    MAX_AGE_HOURS): {name: state}."""
+    tables = load_meta(mirror_dir)["tables"]
+    max_age = MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    if max_age <= 0:
+        return tables
+    oldest = datetime.now() - timedelta(hours=max_age)
+    return {name: state for name, state in tables.items()
+            if checked_at(state) >= oldest}
+
+
+def last_synced(mirror_dir: Optional[Path] = None) -> Optional[datetime]:
+    """Oldest check time of the fresh tables, None if none are fresh."""
+    tables = fresh_tables(mirror_dir)
+    return min(map(checked_at, tables.values())) if tables else None
+
+
+def is_available(mirror_dir: Optional[Path] = None) -> bool:
+    """True if at least one table is mirrored and fresh."""
+    return bool(fresh_tables(mirror_dir))
+
+
+# ---------------------------------------------------------------------------
+# BigQuery SQL -> DuckDB
+# ---------------------------------------------------------------------------
+
+_LEXER = re.compile(r"""
+    (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<table>`[^`]+`)
+  | (?P<param>@\w+)
+""", re.X | re.S)
+
+_CODE_REWRITES = [
+    (re.compile(r"\[\s*(?:SAFE_)?OFFSET\s*\(\s*(\d+)\s*\)\s*\]", re.I),
+     lambda m: "[{}]".format(int(m.group(1)) + 1)),
+    (re.compile(r"\[\s*(?:SAFE_)?ORDINAL\s*\(\s*(\d+)\s*\)\s*\]", re.I),
+     lambda m: "[{}]".format(m.group(1))),
+    (re.compile(r"\bSAFE_CAST\s*\(", re.I), lambda m: "TRY_CAST("),
+    (re.compile(r"\bFLOAT64\b", re.I), lambda m: "DOUBLE"),
+    # DATETIME '...' literal (the string is the next token)
+    (re.compile(r"\bDATETIME(\s*)$", re.I), lambda m: "TIMESTAMP" + m.group(1)),
+]
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+
+def table_name(ref: str) -> Optional[str]:
+    """'project.dataset.table' or 'dataset.table' -> 'dataset.table'."""
+    parts = ref.strip("`").split(".")
+    if len(parts) == 3 and parts[0] == BQ_PROJECT:
+        parts = parts[1:]
+    return ".".join(parts) if len(parts) == 2 else None
+
+
+def _requote(literal: str) -> str:
+    body = re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)),
+                  literal[1:-1], flags=re.S)
+    return "'{}'".format(body.replace("'", "''"))
+
+
+def to_duckdb(sql: str, resolve: Callable[[str], str]):
+    """Translate BigQuery SQL; returns (sql, referenced parameter names).
+
+    resolve("dataset.table") returns the DuckDB relation to read; it raises
+    KeyError for tables that cannot be read locally.
+    """
+    out, params, pos = [], [], 0
+
+    def code(text):
+        for pattern, repl in _CODE_REWRITES:
+            text = pattern.sub(repl, text)
+        out.append(text)
+
+    for m in _LEXER.finditer(sql):
+        code(sql[pos:m.start()])
+        pos = m.end()
+        if m.group("string"):
+            out.append(_requote(m.group("string")))
+        elif m.group("table"):
+            name = table_name(m.group("table"))
+            if name is None:
+                raise KeyError(m.group("table"))
+            out.append(resolve(name))
+        else:
+            params.append(m.group("param")[1:])
+            out.append("$" + params[-1])
+    code(sql[pos:])
+    return "".join(out), params
+
+
+def param_values(params) -> Dict[str, object]:
+    """{name: value} for ScalarQueryParameter / ArrayQueryParameter lists
+    (or anything with .name and .value / .values)."""
+    values = {}
+    for p in params or []:
+        values[p.name] = (p.values if hasattr(p, "values")
+                          and not hasattr(p, "value") else p.value)
+    return values
+
+
+def run_local(sql: str, params=None,
+              mirror_dir: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    """Run a BigQuery query against the mirror; None if it cannot (or a
+    table it reads is stale)."""
+    import duckdb
+
+    mirror_dir = Path(mirror_dir or MIRROR_DIR)
+    tables = fresh_tables(mirror_dir)
+    used = []
+
+    def resolve(name):
+        used.append(checked_at(tables[name]))
+        files = sql_list(mirror_dir / p
+                         for p in sorted(tables[name]["parts"].values()))
+        return "read_parquet({}, union_by_name = true)".format(files)
+
+    try:
+        local_sql, names = to_duckdb(sql, resolve)
+    except KeyError:
+        return None
+    values = param_values(params)
+    if not set(names) <= set(values):
+        return None
+    conn = duckdb.connect()
+    try:
+        conn.execute("SET TimeZone = 'UTC'")  # BigQuery semantics
+        df = conn.execute(local_sql, {n: values[n] for n in set(names)}).df()
+    except duckdb.Error as e:
+        _log.debug("Mirror cannot run query, using BigQuery: %s", e)
+        return None
+    finally:
+        conn.close()
+    df.attrs["mirror_synced_at"] = min(used) if used else None
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+def _fetch(client, sql: str) -> pd.DataFrame:
+    return client.query(sql).to_dataframe()
+
+
+def _literal(value) -> str:
+    """BigQuery literal for a watermark value."""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        if value.tzinfo is not None:
+            return "TIMESTAMP '{}'".format(value.isoformat(sep=" "))
+        return "DATETIME '{}'".format(value.isoformat(sep=" "))
+    if isinstance(value, date):
+        return "DATE '{}'".format(value.isoformat())
+    if isinstance(value, str):
+        return "'{}'".format(value.replace("\\", "\\\\").replace("'", "\\'"))
+    return repr(value.item() if hasattr(value, "item") else value)
+
+
+def _partition_keys(df: pd.DataFrame, watermark: Optional[str]) -> pd.Series:
+    if watermark is None:
+        return pd.Series("all", index=df.index)
+    keys = df[watermark].astype(str).str[:7]
+    return keys.where(df[watermark].notna(), "null")
+
+
+def _table_info(client, dataset: str) -> Dict[str, tuple]:
+    """{table_id: (last_modified_time, row_count)}, {} if not readable."""
+    try:
+        df = _fetch(client, "SELECT table_id, last_modified_time, row_count "
+                            "FROM `{}.{}.__TABLES__`".format(BQ_PROJECT, dataset))
+    except Exception as e:
+        _log.warning("Mirror: no table info for %s: %s", dataset, e)
+        return {}
+    return {r.table_id: (int(r.last_modified_time), int(r.row_count))
+            for r in df.itertuples()}
+
+
+def _write_parts(mirror_dir: Path, name: str, df: pd.DataFrame,
+                 watermark: Optional[str]) -> Dict[str, str]:
+    """Write one file per partition; returns {partition: relative path}."""
+    (mirror_dir / name).mkdir(parents=True, exist_ok=True)
+    parts = {}
+    keys = _partition_keys(df, watermark)
+    for key in sorted(keys.unique()) if len(df) else ["all"]:
+        rel = "{}/{}-{}.parquet".format(name, key, uuid.uuid4().hex[:8])
+        df[keys == key].to_parquet(mirror_dir / rel, index=False)
+        parts[key] = rel
+    return parts
+
+
+def _sync_table(client, name: str, watermark: Optional[str],
+                state: Optional[dict], info: Optional[tuple],
+                mirror_dir: Path, force: bool) -> Optional[dict]:
+    """New table state, or None if BigQuery has not changed."""
+    if state and info and not force and state.get("modified") == info[0]:
+        return None
+    source = "`{}.{}`".format(BQ_PROJECT, name)
+    now = datetime.now().isoformat()
+    new = {"modified": info[0] if info else None,
+           "synced_at": now, "checked_at": now}
+
+    if state and watermark and state.get("watermark") and not force:
+        delta = _fetch(client, "SELECT * FROM {} WHERE {} >= {}".format(
+            source, watermark, state["watermark"]))
+        parts = dict(state["parts"])
+        touched = (set(_partition_keys(delta, watermark))
+                   | {state["watermark_part"]})
+        kept, dropped = [], 0
+        for key in touched & set(parts):
+            old = pd.read_parquet(mirror_dir / parts.pop(key))
+            dropped += len(old)
+            if key == state["watermark_part"]:
+                # Local rows are all <= the old maximum and the delta
+                # re-fetched the ones equal to it
+                old = old[old[watermark] != old[watermark].max()]
+            kept.append(old)
+        merged = pd.concat([k for k in kept if len(k)] + [delta],
+                           ignore_index=True)
+        rows = state["rows"] - dropped + len(merged)
+        if info is None or rows == info[1]:
+            parts.update(_write_parts(mirror_dir, name, merged, watermark))
+            new.update(parts=parts, rows=rows, fetched=len(delta),
+                       **_watermark(merged, watermark, state))
+            return new
+        _log.info("Mirror %s: %d local rows vs %d in BigQuery, reloading",
+                  name, rows, info[1])
+
+    df = _fetch(client, "SELECT * FROM {}".format(source))
+    new.update(parts=_write_parts(mirror_dir, name, df, watermark),
+               rows=len(df), fetched=len(df),
+               **_watermark(df, watermark, None))
+    return new
+
+
+def _watermark(df: pd.DataFrame, watermark: Optional[str],
+               state: Optional[dict]) -> dict:
+    if watermark is None or df[watermark].notna().sum() == 0:
+        return {"watermark": state and state.get("watermark"),
+                "watermark_part": state and state.get("watermark_part")}
+    top = df[watermark].max()
+    return {"watermark": _literal(top),
+            "watermark_part": str(top)[:7]}
+
+
+def _cleanup(mirror_dir: Path, meta: dict) -> None:
+    """Remove partition files the committed metadata no longer uses."""
+    keep = {mirror_dir / p for state in meta["tables"].values()
+            for p in state["parts"].values()}
+    for name in meta["tables"]:
+        for path in (mirror_dir / name).glob("*.parquet"):
+            if path not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+def sync_mirror(client, tables: Optional[Dict[str, Optional[str]]] = None,
+                mirror_dir: Optional[Path] = None,
+                force: bool = False) -> dict:
+    """Bring the local mirror up to date with BigQuery.
+
+    client: google.cloud.bigquery.Client (or anything with
+    .query(sql).to_dataframe()). Returns {status, synced: {table: rows
+    fetched}, unchanged: [...], failed: {table: error}}.
+    """
+    mirror_dir = Path(mirror_dir or MIRROR_DIR)
+    tables = MIRROR_TABLES if tables is None else tables
+    mirror_dir.mkdir(parents=True, exist_ok=True)
+    meta = load_meta(mirror_dir)
+    synced, unchanged, failed = {}, [], {}
+
+    info = {}
+    for dataset in sorted({name.split(".")[0] for name in tables}):
+        for table_id, row in _table_info(client, dataset).items():
+            info["{}.{}".format(dataset, table_id)] = row
+
+    for name, watermark in tables.items():
+        try:
+            state = _sync_table(client, name, watermark,
+                                meta["tables"].get(name), info.get(name),
+                                mirror_dir, force)
+        except Exception as e:
+            _log.warning("Mirror sync failed for %s: %s", name, e)
+            failed[name] = str(e)
+            continue
+        if state is None:
+            unchanged.append(name)
+            meta["tables"][name]["checked_at"] = datetime.now().isoformat()
+            continue
+        synced[name] = state.pop("fetched")
+        meta["tables"][name] = state
+        meta["synced_at"] = state["synced_at"]
+        write_meta(_meta_path(mirror_dir), meta)
+        _log.info("Mirror %s: %d rows fetched, %d local", name,
+                  synced[name], state["rows"])
+
+    if unchanged:
+        write_meta(_meta_path(mirror_dir), meta)
+    _cleanup(mirror_dir, meta)
+    return {"status": "failed" if failed and not synced else "synced",
+            "synced": synced, "unchanged": unchanged, "failed": failed}
+
+
+def sync_from_bigquery(tables: Optional[Dict[str, Optional[str]]] = None,
+                       force: bool = False) -> dict:
+    """sync_mirror() with a new BigQuery client; status "unavailable"
+    without credentials."""
+    bq = create_client()
+    if bq is None:
+        return {"status": "unavailable", "synced": {}, "unchanged": [],
+                "failed": {}}
+    return sync_mirror(bq, tables=tables, force=force)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--force", action="store_true",
+                        help="Snapshot every table in full")
+    parser.add_argument("--table", action="append",
+                        help="Only this dataset.table (repeatable)")
+    args = parser.parse_args()
+    selected = ({t: MIRROR_TABLES.get(t) for t in args.table}
+                if args.table else None)
+    result = sync_from_bigquery(tables=selected, force=args.force)
+    if result["status"] == "unavailable":
+        raise SystemExit("BigQuery not available")
+    print(json.dumps(result, indent=2))
@@ -116,23 +116,43 @@ def get_sales_data(
             - week_ending: str
             - value: float
     """
+    from shared.sales_store import MEASURES, TABLE, has_weekly_table
+
     db_path = get_db_path()
 
-    # Build query with filters
-    query = """
-        SELECT
-            store,
-            department,
-            major_group,
-            week_ending,
-            value
-        FROM sales
-        WHERE channel = ?
-          AND measure = ?
-          AND is_promotion = ?
-    """
+    with sqlite3.connect(db_path) as conn:
+        wide = measure in MEASURES and has_weekly_table(conn)
 
-    params = [channel, measure, promo]
+    # Build query with filters: one column of the wide weekly table when
+    # the extract built it, else the measure's rows of the long table
+    if wide:
+        query = f"""
+            SELECT
+                store,
+                department,
+                major_group,
+                week_ending,
+                {MEASURES[measure]} AS value
+            FROM {TABLE}
+            WHERE channel = ?
+              AND is_promotion = ?
+              AND {MEASURES[measure]} IS NOT NULL
+        """
+        params = [channel, promo]
+    else:
+        query = """
+            SELECT
+                store,
+                department,
+                major_group,
+                week_ending,
+                value
+            FROM sales
+            WHERE channel = ?
+              AND measure = ?
+              AND is_promotion = ?
+        """
+        params = [channel, measure, promo]
 
     if stores:
         placeholders = ','.join('?' * len(stores))
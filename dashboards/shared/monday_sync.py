@@ -0,0 +1,449 @@
+"""
+Harris Farm Hub — Monday.com Snapshot Sync
+Background sync of the pillar boards into a local SQLite snapshot. The
+dashboards read only the snapshot (monday_connector.py), so a pillar page
+never waits on Monday.com and always sees every item of every board.
+
+sync_boards():
+    Fetches every board in BOARD_IDS at once (up to MAX_WORKERS threads),
+    each a page at a time through items_page / next_items_page cursors
+    (PAGE_SIZE items per request) until the cursor runs out. Rate limits
+    back off and retry: HTTP 429 waits Retry-After, an exhausted
+    complexity budget waits its retry_in_seconds, and 5xx / connection
+    errors wait RETRY_BASE_SECONDS * 2 ** attempt (each wait capped at
+    MAX_WAIT_SECONDS, MAX_ATTEMPTS tries per request). A board's items are
+    replaced in one transaction once all of its pages have arrived; a
+    board that fails keeps its previous items and records last_error.
+
+Snapshot (data/monday_snapshot.db, or HUB_MONDAY_DB):
+    monday_boards  board_id, pillar, name, item_count, synced_at (the
+                   watermark: when the board was last fetched in full),
+                   attempted_at, last_error
+    monday_items   board_id, position, item_id, name, status,
+                   status_category, owner, group_title, due_date,
+                   timeline, priority
+
+The API runs start_sync_thread() during warm-up (every
+SYNC_INTERVAL_SECONDS, env MONDAY_SYNC_SECONDS). From dashboards/,
+`python -m shared.monday_sync` syncs once.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+_log = logging.getLogger(__name__)
+
+MONDAY_API_URL = "https://api.monday.com/v2"
+SNAPSHOT_DB = os.getenv(
+    "HUB_MONDAY_DB",
+    str(Path(__file__).resolve().parent.parent.parent / "data"
+        / "monday_snapshot.db"))
+
+PAGE_SIZE = 500
+MAX_WORKERS = 5
+REQUEST_TIMEOUT = 30
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2.0
+MAX_WAIT_SECONDS = 60.0
+SYNC_INTERVAL_SECONDS = int(os.getenv("MONDAY_SYNC_SECONDS", "300"))
+
+# Monday.com board IDs for each pillar
+BOARD_IDS = {
+    "P1": 5001442659,
+    "P2": 5001460085,
+    "P3": 5001476308,
+    "P4": 5001480788,
+    "P5": 5001485134,
+}
+
+# Status label -> category mapping (covers all labels found in the 5 boards)
+_STATUS_MAP = {
+    "Done": "done",
+    "Complete": "done",
+    "Completed": "done",
+    "Immediate requirements complete": "done",
+    "Working on it": "in_progress",
+    "In Progress": "in_progress",
+    "Stuck": "stuck",
+    "Blocked": "stuck",
+    "Future steps": "not_started",
+    "Not Started": "not_started",
+    "": "not_started",
+}
+
+_ITEM_FIELDS = """
+    cursor
+    items {
+      id
+      name
+      group { title }
+      column_values { id text type }
+    }
+"""
+
+_FIRST_PAGE = """
+query ($boardId: [ID!], $limit: Int!) {
+  boards(ids: $boardId) {
+    name
+    items_page(limit: $limit) {%s}
+  }
+}
+""" % _ITEM_FIELDS
+
+_NEXT_PAGE = """
+query ($cursor: String!, $limit: Int!) {
+  next_items_page(cursor: $cursor, limit: $limit) {%s}
+}
+""" % _ITEM_FIELDS
+
+_RESET_IN = re.compile(r"reset in (\d+) seconds?")
+
+
+class MondayError(Exception):
+    """A Monday.com request that failed for good."""
+
+
+def is_configured():
+    """Check if Monday.com API key is available."""
+    key = os.getenv("MONDAY_API_KEY", "").strip()
+    return bool(key)
+
+
+def _get_headers():
+    """Build authorization headers for Monday.com API."""
+    key = os.getenv("MONDAY_API_KEY", "").strip()
+    return {
+        "Authorization": key,
+        "Content-Type": "application/json",
+    }
+
+
+def categorise_status(status_label):
+    """Map a Monday.com status label to a category."""
+    if not status_label:
+        return "not_started"
+    return _STATUS_MAP.get(status_label, "not_started")
+
+
+def parse_item(item: dict) -> dict:
+    """Flatten a Monday.com item to the fields the dashboards show."""
+    # Extract columns by their known IDs
+    columns = {
+        "project_status": "status",
+        "project_owner": "owner",
+        "project_task_completion_date": "due_date",
+        "project_timeline": "timeline",
+        "project_priority": "priority",
+    }
+    fields = dict.fromkeys(columns.values(), "")
+    for c in item.get("column_values") or []:
+        if c.get("id") in columns:
+            fields[columns[c["id"]]] = c.get("text") or ""
+
+    # Fallbacks: any status-type / people-type column
+    for field, col_type in (("status", "status"), ("owner", "people")):
+        if not fields[field]:
+            for c in item.get("column_values") or []:
+                if c.get("type") == col_type and c.get("text"):
+                    fields[field] = c["text"]
+                    break
+
+    return {
+        "item_id": str(item.get("id", "")),
+        "name": item["name"],
+        "status": fields["status"],
+        "status_category": categorise_status(fields["status"]),
+        "owner": fields["owner"],
+        "group": (item.get("group") or {}).get("title", ""),
+        "due_date": fields["due_date"],
+        "timeline": fields["timeline"],
+        "priority": fields["priority"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# GraphQL client
+# ---------------------------------------------------------------------------
+
+def _retry_after(resp, data: Optional[dict]) -> Optional[float]:
+    """Seconds to wait if this response is a rate limit, else None."""
+    if resp.status_code == 429:
+        try:
+            return float(resp.headers.get("Retry-After", RETRY_BASE_SECONDS))
+        except ValueError:
+            return RETRY_BASE_SECONDS
+    if not data:
+        return None
+    for error in data.get("errors") or []:
+        extensions = error.get("extensions") or {}
+        if "retry_in_seconds" in extensions:
+            return float(extensions["retry_in_seconds"])
+    # Older API versions: {"error_code": "ComplexityException", ...}
+    if data.get("error_code") == "ComplexityException":
+        match = _RESET_IN.search(data.get("error_message", ""))
+        return float(match.group(1)) if match else RETRY_BASE_SECONDS
+    return None
+
+
+def _post(session, query: str, variables: dict, api_url: str) -> dict:
+    """POST one GraphQL request, backing off on rate limits and
+    transient failures. Returns the response's "data"."""
+    import requests
+
+    for attempt in range(MAX_ATTEMPTS):
+        last = attempt == MAX_ATTEMPTS - 1
+        try:
+            resp = session.post(api_url, json={"query": query,
+                                               "variables": variables},
+                                headers=_get_headers(),
+                                timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            if last:
+                raise MondayError(str(e))
+            wait = RETRY_BASE_SECONDS * 2 ** attempt
+        else:
+            try:
+                data = resp.json()
+            except ValueError:
+                data = None
+            wait = _retry_after(resp, data)
+            if wait is None and resp.status_code >= 500:
+                wait = RETRY_BASE_SECONDS * 2 ** attempt
+            if wait is None:
+                if resp.status_code >= 400 or data is None:
+                    raise MondayError("HTTP {}".format(resp.status_code))
+                if data.get("errors") or data.get("error_message"):
+                    raise MondayError(str(data.get("errors")
+                                          or data.get("error_message")))
+                return data.get("data") or {}
+            if last:
+                raise MondayError("gave up after {} attempts (HTTP {})".format(
+                    MAX_ATTEMPTS, resp.status_code))
+        time.sleep(min(wait, MAX_WAIT_SECONDS))
+
+
+def fetch_board(board_id, api_url: Optional[str] = None,
+                page_size: int = PAGE_SIZE, session=None) -> tuple:
+    """Every item of a board, following the page cursor.
+    Returns (board name, [parsed items])."""
+    import requests
+
+    if session is None:
+        with requests.Session() as session:
+            return fetch_board(board_id, api_url, page_size, session)
+    api_url = api_url or MONDAY_API_URL
+    data = _post(session, _FIRST_PAGE,
+                 {"boardId": [str(board_id)], "limit": page_size}, api_url)
+    boards = data.get("boards") or []
+    if not boards:
+        raise MondayError("board {} not found".format(board_id))
+    page = boards[0].get("items_page") or {}
+    items = list(page.get("items") or [])
+    while page.get("cursor"):
+        page = _post(session, _NEXT_PAGE,
+                     {"cursor": page["cursor"], "limit": page_size},
+                     api_url).get("next_items_page") or {}
+        items.extend(page.get("items") or [])
+    return boards[0].get("name", ""), [parse_item(i) for i in items]
+
+
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+def init_snapshot(conn: sqlite3.Connection):
+    """Create the snapshot tables (idempotent)."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS monday_boards (
+        board_id TEXT PRIMARY KEY,
+        pillar TEXT,
+        name TEXT NOT NULL DEFAULT '',
+        item_count INTEGER NOT NULL DEFAULT 0,
+        synced_at TEXT,
+        attempted_at TEXT,
+        last_error TEXT
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS monday_items (
+        board_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        item_id TEXT,
+        name TEXT NOT NULL,
+        status TEXT,
+        status_category TEXT,
+        owner TEXT,
+        group_title TEXT,
+        due_date TEXT,
+        timeline TEXT,
+        priority TEXT,
+        PRIMARY KEY (board_id, position)
+    )""")
+    conn.commit()
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = Path(db_path or SNAPSHOT_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    init_snapshot(conn)
+    return conn
+
+
+def _store_board(conn, pillar: str, board_id, name: str, items: list,
+                 synced_at: str):
+    with conn:
+        conn.execute("DELETE FROM monday_items WHERE board_id = ?",
+                     (str(board_id),))
+        conn.executemany(
+            "INSERT INTO monday_items VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+            [(str(board_id), pos, i["item_id"], i["name"], i["status"],
+              i["status_category"], i["owner"], i["group"], i["due_date"],
+              i["timeline"], i["priority"]) for pos, i in enumerate(items)])
+        conn.execute(
+            "INSERT INTO monday_boards (board_id, pillar, name, item_count, "
+            "synced_at, attempted_at, last_error) VALUES (?,?,?,?,?,?,NULL) "
+            "ON CONFLICT(board_id) DO UPDATE SET pillar = excluded.pillar, "
+            "name = excluded.name, item_count = excluded.item_count, "
+            "synced_at = excluded.synced_at, "
+            "attempted_at = excluded.attempted_at, last_error = NULL",
+            (str(board_id), pillar, name, len(items), synced_at, synced_at))
+
+
+def _record_failure(conn, pillar: str, board_id, error: str,
+                    attempted_at: str):
+    with conn:
+        conn.execute(
+            "INSERT INTO monday_boards (board_id, pillar, attempted_at, "
+            "last_error) VALUES (?,?,?,?) ON CONFLICT(board_id) DO UPDATE "
+            "SET attempted_at = excluded.attempted_at, "
+            "last_error = excluded.last_error",
+            (str(board_id), pillar, attempted_at, error[:500]))
+
+
+def sync_boards(boards: Optional[Dict[str, int]] = None,
+                db_path: Optional[str] = None, api_url: Optional[str] = None,
+                page_size: int = PAGE_SIZE,
+                workers: int = MAX_WORKERS) -> dict:
+    """Fetch every board concurrently into the snapshot.
+
+    Returns {status, synced: {pillar: items}, failed: {pillar: error}}.
+    """
+    if not is_configured():
+        return {"status": "unconfigured", "synced": {}, "failed": {}}
+    boards = BOARD_IDS if boards is None else boards
+    synced, failed = {}, {}
+    conn = _connect(db_path)
+    try:
+        with ThreadPoolExecutor(
+                max_workers=max(1, min(workers, len(boards)))) as pool:
+            futures = {pool.submit(fetch_board, board_id, api_url,
+                                   page_size): (pillar, board_id)
+                       for pillar, board_id in boards.items()}
+            # Written as each board completes, from this thread only
+            for future in as_completed(futures):
+                pillar, board_id = futures[future]
+                now = datetime.utcnow().isoformat(timespec="seconds")
+                try:
+                    name, items = future.result()
+                except Exception as e:
+                    _log.warning("Monday.com sync failed for %s (%s): %s",
+                                 pillar, board_id, e)
+                    failed[pillar] = str(e)
+                    _record_failure(conn, pillar, board_id, str(e), now)
+                    continue
+                _store_board(conn, pillar, board_id, name, items, now)
+                synced[pillar] = len(items)
+    finally:
+        conn.close()
+    if synced or failed:
+        _log.info("Monday.com sync: %s", " ".join(
+            "{}:{}".format(p, n) for p, n in sorted(synced.items()))
+            + (" failed:" + ",".join(sorted(failed)) if failed else ""))
+    return {"status": "failed" if failed and not synced else "synced",
+            "synced": synced, "failed": failed}
+
+
+def load_items(board_id, db_path: Optional[str] = None) -> list:
+    """A board's items from the snapshot, in board order."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT name, status, status_category, owner, group_title, "
+            "due_date, timeline, priority FROM monday_items "
+            "WHERE board_id = ? ORDER BY position", (str(board_id),)).fetchall()
+    finally:
+        conn.close()
+    return [{"name": r["name"], "status": r["status"],
+             "status_category": r["status_category"], "owner": r["owner"],
+             "group": r["group_title"], "due_date": r["due_date"],
+             "timeline": r["timeline"], "priority": r["priority"]}
+            for r in rows]
+
+
+def load_boards(db_path: Optional[str] = None) -> dict:
+    """{board_id: {pillar, name, item_count, synced_at, attempted_at,
+    last_error}} for every board the snapshot has seen."""
+    conn = _connect(db_path)
+    try:
+        return {r["board_id"]: dict(r) for r in conn.execute(
+            "SELECT * FROM monday_boards")}
+    finally:
+        conn.close()
+
+
+def last_synced(db_path: Optional[str] = None) -> Optional[str]:
+    """UTC time the least recently synced board was fetched in full
+    (None until every board has been)."""
+    boards = load_boards(db_path)
+    stamps = [boards.get(str(b), {}).get("synced_at") for b in BOARD_IDS.values()]
+    return None if None in stamps else min(stamps)
+
+
+# ---------------------------------------------------------------------------
+# Background thread
+# ---------------------------------------------------------------------------
+
+_STOP = threading.Event()
+_thread = None
+
+
+def start_sync_thread(interval: Optional[float] = None,
+                      db_path: Optional[str] = None) -> threading.Thread:
+    """Sync now and then every `interval` seconds in a daemon thread."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+    interval = SYNC_INTERVAL_SECONDS if interval is None else interval
+    _STOP.clear()
+
+    def run():
+        while True:
+            try:
+                sync_boards(db_path=db_path)
+            except Exception as e:
+                _log.warning("Monday.com sync failed: %s", e)
+            if _STOP.wait(interval):
+                return
+
+    _thread = threading.Thread(target=run, name="monday-sync", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def stop_sync_thread():
+    _STOP.set()
+
+
+if __name__ == "__main__":
+    import json
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(sync_boards(), indent=2))
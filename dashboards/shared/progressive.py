@@ -0,0 +1,80 @@
+"""
+Harris Farm Hub — Progressive (Preview then Exact) Rendering
+Reusable component: draw a section from a fast approximate query at once,
+keep building the page, and redraw the section with the exact answer when
+its query finishes (backend/query_preview.py).
+
+    progressive = ProgressiveRenderer()
+    progressive.show(render_kpis, lambda: kpis(preview=True),
+                     lambda: kpis(preview=False))
+    ...                                   # rest of the page
+    progressive.finish()                  # exact results replace previews
+
+render(result, approximate) is called once or twice inside a placeholder.
+If the exact query returns within `wait` seconds (e.g. a st.cache_data
+hit) it is drawn directly and the preview is skipped. Pass preview=None
+when a preview would cost as much as the exact query (no preview sample,
+TransactionStore.has_preview_sample()): the exact result is drawn once.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import (
+    add_script_run_ctx, get_script_run_ctx,
+)
+
+
+class ProgressiveRenderer:
+    """Previews now, exact results at finish()."""
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = []
+
+    def _submit(self, fn):
+        # Attach the script context so st.cache_data works in the worker
+        ctx = get_script_run_ctx()
+
+        def run():
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return fn()
+
+        return self._pool.submit(run)
+
+    def show(self, render, preview, exact, wait=0.3):
+        """Render exact() if it is quick, else preview() until finish().
+        preview None (or a preview() that returns None): wait for exact().
+        Returns what render() returned for the result drawn now."""
+        future = self._submit(exact)
+        slot = st.empty()
+        try:
+            result = future.result(timeout=None if preview is None else wait)
+        except TimeoutError:
+            try:
+                approx = preview()
+            except Exception:
+                approx = None  # No preview -- wait for the exact answer
+            if approx is not None:
+                with slot.container():
+                    drawn = render(approx, True)
+                self._pending.append((slot, render, future))
+                return drawn
+            result = future.result()
+        with slot.container():
+            return render(result, False)
+
+    def finish(self):
+        """Wait for the exact queries and replace their previews."""
+        for slot, render, future in self._pending:
+            try:
+                result = future.result()
+            except Exception as e:
+                slot.error(f"Failed to load exact figures: {e}")
+                continue
+            with slot.container():
+                render(result, False)
+        self._pending = []
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,178 @@
+"""
+Harris Farm Hub — Weekly Sales Store
+Wide weekly-sales facts: one row per store x channel x department x major
+group x promotion flag x week, one typed column per measure.
+
+The extract writes `sales` in long measure/value form (six rows per
+store-week-group), and every sales page used to pull all of them and
+pivot in pandas on each filter change. sales_weekly is that pivot, done
+once at extract time (scripts/extract_all_data.py, or
+`python -m shared.sales_store` from dashboards/ for an existing database):
+
+    sales_weekly (WITHOUT ROWID)
+        PRIMARY KEY (week_ending, channel, is_promotion, store,
+                     department, major_group)
+        -- rows are stored in week order, so a date range is one
+           contiguous range read of the table itself
+        idx_sales_weekly_store (store, week_ending)
+
+load_weekly_sales() returns the same frame the dashboards built before:
+store, department, major_group, week_ending (datetime) and one column
+per MEASURES value. A measure with no row for a group-week is NULL, as
+the pandas pivot left it. Databases extracted before this table existed
+are read from `sales` and pivoted as before.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+DB_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "harris_farm.db"
+
+TABLE = "sales_weekly"
+
+# Source measure name -> column
+MEASURES = {
+    "Sales - Val": "sales",
+    "Final Gross Prod - Val": "gp",
+    "Initial Gross Profit - Val": "initial_gp",
+    "Bgt Sales - Val": "budget_sales",
+    "Bgt Final GP - Val": "budget_gp",
+    "Total Shrinkage – Val": "shrinkage",  # em-dash
+}
+
+KEYS = ["store", "department", "major_group", "week_ending"]
+
+
+# ---------------------------------------------------------------------------
+# BUILD
+# ---------------------------------------------------------------------------
+
+def pivot_sql(value: str = "value", measure: str = "measure") -> str:
+    """SELECT-list expressions that pivot measure/value rows into measure
+    columns inside a GROUP BY. Plain SQL: runs in SQLite, BigQuery and
+    DuckDB alike."""
+    return ",\n".join(
+        "SUM(CASE WHEN {} = '{}' THEN {} END) AS {}".format(
+            measure, name, value, col)
+        for name, col in MEASURES.items())
+
+
+def build_weekly_sales(conn: sqlite3.Connection) -> int:
+    """(Re)build sales_weekly from the long `sales` table in one
+    transaction (readers see the old table or the new one, never a
+    partial build); returns its row count. Commits pending work first."""
+    columns = ",\n".join("{} REAL".format(c) for c in MEASURES.values())
+    names = list(MEASURES)
+    conn.commit()
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute("DROP TABLE IF EXISTS {}_new".format(TABLE))
+        conn.execute("""
+            CREATE TABLE {}_new (
+                week_ending TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                is_promotion TEXT NOT NULL,
+                store TEXT NOT NULL,
+                department TEXT NOT NULL,
+                major_group TEXT NOT NULL,
+                {},
+                PRIMARY KEY (week_ending, channel, is_promotion, store,
+                             department, major_group)
+            ) WITHOUT ROWID""".format(TABLE, columns))
+        conn.execute("""
+            INSERT INTO {table}_new
+            SELECT week_ending, channel, is_promotion, store, department,
+                   major_group,
+                   {pivot}
+            FROM sales
+            WHERE measure IN ({marks})
+            GROUP BY week_ending, channel, is_promotion, store, department,
+                     major_group""".format(
+            table=TABLE, pivot=pivot_sql(),
+            marks=",".join("?" * len(names))), names)
+        conn.execute("DROP TABLE IF EXISTS {}".format(TABLE))
+        conn.execute("ALTER TABLE {0}_new RENAME TO {0}".format(TABLE))
+        conn.execute("CREATE INDEX idx_sales_weekly_store "
+                     "ON {}(store, week_ending)".format(TABLE))
+    return conn.execute("SELECT COUNT(*) FROM {}".format(TABLE)).fetchone()[0]
+
+
+def has_weekly_table(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (TABLE,)).fetchone() is not None
+
+
+# ---------------------------------------------------------------------------
+# READ
+# ---------------------------------------------------------------------------
+
+def pivot_measures(df: pd.DataFrame) -> pd.DataFrame:
+    """Long store/department/major_group/week_ending/measure/value rows
+    to the wide frame (for sources that are still long)."""
+    if df.empty:
+        return pd.DataFrame()
+    df = df.assign(measure_col=df["measure"].map(MEASURES)).dropna(
+        subset=["measure_col"])
+    pivoted = df.pivot_table(index=KEYS, columns="measure_col",
+                             values="value", aggfunc="sum").reset_index()
+    pivoted.columns.name = None
+    return finish_frame(pivoted)
+
+
+def finish_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Measure columns all present (absent measure -> 0.0) and in
+    MEASURES order; week_ending as datetime."""
+    if df.empty:
+        return pd.DataFrame()
+    df = df.reindex(columns=KEYS + list(MEASURES.values()), fill_value=0.0)
+    return df.assign(week_ending=pd.to_datetime(df["week_ending"]))
+
+
+def _in(column: str, values: Optional[List[str]], where: list, params: list):
+    if values:
+        where.append("{} IN ({})".format(column, ",".join("?" * len(values))))
+        params.extend(values)
+
+
+def load_weekly_sales(date_from: str, date_to: str,
+                      stores: Optional[List[str]] = None,
+                      departments: Optional[List[str]] = None,
+                      major_groups: Optional[List[str]] = None,
+                      promo: str = "N", channel: str = "Retail",
+                      db_path: Optional[Path] = None) -> pd.DataFrame:
+    """Wide weekly sales for a date range (inclusive) and filters."""
+    where = ["week_ending >= ?", "week_ending <= ?", "channel = ?",
+             "is_promotion = ?"]
+    params = [date_from, date_to, channel, promo]
+    _in("store", stores, where, params)
+    _in("department", departments, where, params)
+    _in("major_group", major_groups, where, params)
+
+    with sqlite3.connect(str(db_path or DB_PATH)) as conn:
+        if has_weekly_table(conn):
+            df = pd.read_sql_query(
+                "SELECT {} FROM {} WHERE {}".format(
+                    ", ".join(KEYS + list(MEASURES.values())), TABLE,
+                    " AND ".join(where)),
+                conn, params=params)
+            return finish_frame(df)
+        df = pd.read_sql_query(
+            "SELECT store, department, major_group, week_ending, measure, "
+            "value FROM sales WHERE " + " AND ".join(where),
+            conn, params=params)
+    return pivot_measures(df)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--db", default=str(DB_PATH),
+                        help="SQLite database (default data/harris_farm.db)")
+    args = parser.parse_args()
+    with sqlite3.connect(args.db) as conn:
+        print("{}: {:,} rows".format(TABLE, build_weekly_sales(conn)))
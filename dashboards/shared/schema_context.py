@@ -2,9 +2,18 @@
 Harris Farm Hub — Shared Schema Context for Natural Language Query Generation.
 Single source of truth for database tables, columns, and query routing.
 Used by the /api/query backend endpoint to generate correct SQL.
+
+Product and category mentions in a question are found by an entity
+recogniser: one Aho-Corasick automaton over word tokens holding every
+department, major group, minor group, HFM item and product name in the
+product hierarchy (backend/product_hierarchy.py) plus the hand-maintained
+terms below. A single pass over the question returns each mention with
+its hierarchy codes, so routing needs no per-term regex and generated
+DuckDB SQL can filter on exact codes instead of LIKE scans.
 """
 
 import re
+import threading
 from datetime import datetime, timedelta
 
 # ---------------------------------------------------------------------------
@@ -137,6 +146,31 @@ TABLE/VIEW: transactions  (383M rows — individual POS line items)
     CustomerCode    TEXT      — Customer ID or "NULL" (88% null)
     fiscal_year     TEXT      — "FY24", "FY25", or "FY26"
 
+VIEW: transactions_enriched  (same rows — transactions with dimensions pre-joined)
+  Every transactions column plus:
+    sale_date       DATE      — CAST(SaleDate AS DATE), the fiscal calendar key
+    local_hour      TINYINT   — Hour of day, AEDT (SaleDate + 11h)
+    FinYear, FinQuarterOfYearNo/Name, FinMonthOfYearNo/Name/ShortName,
+    FinWeekOfYearNo/Name, FinWeekStartDate, FinWeekEndDate, DayOfWeekNo/Name,
+    BusinessDay, Weekend, SeasonName  — from fiscal_calendar (NULL outside it)
+    DepartmentCode/Desc, MajorGroupCode/Desc, MinorGroupCode/Desc, HFMItem,
+    BuyerId  — from product_hierarchy (NULL for unknown PLUs)
+  Prefer it over joining fiscal_calendar / product_hierarchy; filter
+  DepartmentCode IS NOT NULL to keep only known products.
+
+TABLE MACRO: customer_baskets(lo, hi)  (loyalty customers only — CustomerCode length > 4)
+  One row per CustomerCode x Reference2 x Store_ID x sale_date with lo <= SaleDate < hi:
+    first_sale, last_sale TIMESTAMP; lines, pos_lines BIGINT; spend, pos_spend DOUBLE
+    (pos_* = lines with Quantity > 0 AND SalesIncGST > 0)
+  Use it instead of scanning transactions for per-customer RFM / frequency / spend.
+
+TABLE MACRO: customer_profile()  (one row per loyalty customer, lifetime)
+    CustomerCode, first_sale, last_sale, cohort_month (first purchase month),
+    baskets, lines, spend
+
+TABLE MACRO: customer_cohorts()  (cohort_month x activity_month, lifetime cohorts)
+    cohort_month, activity_month TIMESTAMP; active_customers BIGINT; spend DOUBLE
+
 TABLE: product_hierarchy  (72,911 rows — product master with full hierarchy)
   Columns:
     ProductNumber           TEXT  — PLU code (join key to transactions.PLUItem_ID)
@@ -475,6 +509,234 @@ _PRODUCT_QUERY_PATTERNS = [
 ]
 
 
+# ---------------------------------------------------------------------------
+# ENTITY RECOGNITION
+# ---------------------------------------------------------------------------
+
+# Business words that never name an entity on their own, even where a
+# hierarchy level is called that (HFM item "BASKET", minor "SEASONAL")
+_GENERIC_TERMS = {
+    "store", "stores", "week", "month", "year", "department",
+    "revenue", "sales", "profit", "budget", "customer", "customers",
+    "market", "share", "total", "average", "daily", "weekly",
+    "basket", "seasonal", "product", "products", "item", "items",
+    "category", "price", "value", "open", "general", "other",
+}
+
+# Levels that name products rather than categories
+_PRODUCT_LEVELS = {"minor_group", "hfm_item", "product"}
+
+# transactions_enriched columns that pin down each level exactly:
+# (code key, column). Major group and HFM item codes are unique across
+# the hierarchy; minor group codes only within their major group.
+_LEVEL_FILTERS = {
+    "department": [("dept_code", "DepartmentCode")],
+    "major_group": [("major_code", "MajorGroupCode")],
+    "minor_group": [("major_code", "MajorGroupCode"),
+                    ("minor_code", "MinorGroupCode")],
+    "hfm_item": [("hfm_item_code", "HFMItem")],
+    "product": [("product_number", "PLUItem_ID")],
+}
+
+# Above this many code positions a term is left to a name search
+_MAX_FILTER_CODES = 200
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """Fold plurals so "bananas", "strawberries" and "tomatoes" match
+    "banana", "strawberry" and "tomato"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+_GENERIC_STEMS = {_stem(w) for w in _GENERIC_TERMS}
+
+
+def _tokens(text: str) -> list:
+    """(stem, start, end) per word; "and" is dropped so "fruit and
+    vegetables" matches "FRUIT & VEGETABLES"."""
+    return [(_stem(m.group()), m.start(), m.end())
+            for m in _WORD.finditer(text.lower()) if m.group() != "and"]
+
+
+def _words(text: str) -> list:
+    return [w for w in _WORD.findall(text.lower()) if w != "and"]
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    Built once from (phrase, entity) pairs; find() reports every phrase
+    in a text in one pass over its words, however many phrases there
+    are. Phrases are compared by word stems, so several entities can
+    share a phrase ("ROSE" wine, "ROSES" flowers): the first added whose
+    name is spelt as in the text wins, else the first added, so callers
+    add the broadest level first.
+    """
+
+    def __init__(self, entries):
+        self._goto = {}          # (state, token) -> state
+        self._out = [None]       # state -> (phrase length, [entities])
+        children = [[]]
+        for phrase, entity in entries:
+            key = [tok for tok, _, _ in _tokens(phrase)]
+            if not key or (len(key) == 1 and key[0] in _GENERIC_STEMS):
+                continue
+            state = 0
+            for tok in key:
+                nxt = self._goto.get((state, tok))
+                if nxt is None:
+                    nxt = len(self._out)
+                    self._goto[(state, tok)] = nxt
+                    self._out.append(None)
+                    children.append([])
+                    children[state].append((tok, nxt))
+                state = nxt
+            if self._out[state] is None:
+                self._out[state] = (len(key), [])
+            self._out[state][1].append(entity)
+        self.size = len(self._out)
+
+        # Breadth-first failure links, plus output links to the nearest
+        # state on the failure chain that ends a phrase
+        self._fail = [0] * self.size
+        self._link = [0] * self.size
+        queue = [child for _, child in children[0]]
+        for state in queue:
+            for tok, child in children[state]:
+                fail = self._fail[state]
+                while fail and (fail, tok) not in self._goto:
+                    fail = self._fail[fail]
+                fail = self._goto.get((fail, tok), 0)
+                self._fail[child] = fail
+                self._link[child] = (fail if self._out[fail] is not None
+                                     else self._link[fail])
+                queue.append(child)
+
+    def find(self, text: str) -> list:
+        """Leftmost-longest, non-overlapping matches in text: copies of
+        the entities with "term" (the words as written), "start" and
+        "end" added."""
+        tokens = _tokens(text)
+        goto, fail, out, link = self._goto, self._fail, self._out, self._link
+        hits = []
+        state = 0
+        for i, (tok, _, _) in enumerate(tokens):
+            while state and (state, tok) not in goto:
+                state = fail[state]
+            state = goto.get((state, tok), 0)
+            hit = state if out[state] is not None else link[state]
+            while hit:
+                length, entities = out[hit]
+                hits.append((i - length + 1, -length, entities))
+                hit = link[hit]
+
+        found, end = [], -1
+        for first, neg_length, entities in sorted(hits, key=lambda h: h[:2]):
+            last = first - neg_length - 1
+            if first <= end:
+                continue
+            start, stop = tokens[first][1], tokens[last][2]
+            term = text[start:stop]
+            entity = entities[0]
+            if len(entities) > 1:
+                words = _words(term)
+                entity = next((e for e in entities
+                               if _words(e["name"]) == words), entity)
+            found.append(dict(entity, term=term, start=start, end=stop))
+            end = last
+        return found
+
+
+def _alias_entries():
+    for term in sorted(_PRODUCT_TERMS):
+        yield term, {"name": term, "level": "product", "codes": []}
+    for term, level in _CATEGORY_TERMS.items():
+        yield term, {"name": term, "level": level, "codes": []}
+
+
+def _hierarchy_index():
+    try:
+        import product_hierarchy
+    except ImportError:  # backend/ not on sys.path
+        return None
+    return product_hierarchy.get_hierarchy_index()
+
+
+_matcher = None
+_matcher_source = None
+_matcher_lock = threading.Lock()
+
+
+def get_entity_matcher() -> EntityMatcher:
+    """Shared matcher over the product hierarchy and the hand-maintained
+    terms, rebuilt when the hierarchy index is. Falls back to the hand
+    terms alone (without codes) when the hierarchy is unavailable."""
+    global _matcher, _matcher_source
+    index = _hierarchy_index()
+    if _matcher is not None and _matcher_source is index:
+        return _matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher_source is not index:
+            entities = index.entities if index is not None else []
+            entries = [
+                (name, {"name": name.lower(), "level": level, "codes": codes})
+                for name, level, codes in entities
+            ]
+            entries.extend(_alias_entries())
+            _matcher = EntityMatcher(entries)
+            _matcher_source = index
+        return _matcher
+
+
+def recognise_entities(question: str) -> list:
+    """Products and categories mentioned in a question.
+
+    Returns list of dicts with name (canonical, lowercase), level
+    ("department", "major_group", "minor_group", "hfm_item" or
+    "product"), codes (hierarchy code dicts; empty for hand-maintained
+    terms the hierarchy does not name), term, start and end.
+    """
+    return get_entity_matcher().find(question)
+
+
+def _quote(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def entity_filter_sql(entities: list, alias: str = "t") -> str:
+    """WHERE condition selecting the entities' rows of
+    transactions_enriched by exact hierarchy code, or None when any of
+    them has no (or too many) codes and needs a name search instead."""
+    clauses = []
+    for entity in entities:
+        codes = entity.get("codes") or []
+        if not codes or len(codes) > _MAX_FILTER_CODES:
+            return None
+        keys = _LEVEL_FILTERS[entity["level"]]
+        if len(keys) == 1:
+            key, column = keys[0]
+            values = sorted({c[key] for c in codes})
+            clauses.append("{}.{} IN ({})".format(
+                alias, column, ", ".join(_quote(v) for v in values)))
+        else:
+            for c in codes:
+                clauses.append("(" + " AND ".join(
+                    "{}.{} = {}".format(alias, column, _quote(c[key]))
+                    for key, column in keys) + ")")
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else \
+        "(" + " OR ".join(clauses) + ")"
+
+
 def detect_product_query(question: str) -> dict:
     """Detect if a question is about specific products or categories.
 
@@ -485,6 +747,8 @@ def detect_product_query(question: str) -> dict:
             search_terms: list[str] — product/category terms found
             search_level: str — "product", "category", or None
             needs_duckdb: bool — True if query must route to DuckDB
+            entities: list[dict] — recognise_entities() matches behind
+                search_terms (empty for pattern-extracted terms)
     """
     q = question.lower()
     result = {
@@ -493,34 +757,26 @@ def detect_product_query(question: str) -> dict:
         "search_terms": [],
         "search_level": None,
         "needs_duckdb": False,
+        "entities": [],
     }
 
-    # Check for specific product terms
-    found_products = []
-    for term in _PRODUCT_TERMS:
-        # Match whole word or with common suffixes (s, es)
-        if re.search(rf"\b{re.escape(term)}s?\b", q):
-            found_products.append(term)
-
-    if found_products:
+    entities = recognise_entities(question)
+    products = [e for e in entities if e["level"] in _PRODUCT_LEVELS]
+    if products:
         result["is_product_query"] = True
-        result["search_terms"] = found_products
+        result["search_terms"] = [e["name"] for e in products]
         result["search_level"] = "product"
         result["needs_duckdb"] = True
+        result["entities"] = products
         return result
 
-    # Check for category terms
-    found_categories = []
-    for term, level in _CATEGORY_TERMS.items():
-        if re.search(rf"\b{re.escape(term)}\b", q):
-            found_categories.append(term)
-
-    if found_categories:
+    if entities:
         result["is_category_query"] = True
-        result["search_terms"] = found_categories
+        result["search_terms"] = [e["name"] for e in entities]
         result["search_level"] = "category"
         # Category queries can work in DuckDB too for richer results
         result["needs_duckdb"] = True
+        result["entities"] = entities
         return result
 
     # Check patterns that imply product-level queries
@@ -531,10 +787,7 @@ def detect_product_query(question: str) -> dict:
             # Only flag if the extracted term looks like a product
             if extracted in _PRODUCT_TERMS or len(extracted) > 3:
                 # Check it's not a generic business term
-                generic = {"store", "stores", "week", "month", "year", "department",
-                           "revenue", "sales", "profit", "budget", "customer", "customers",
-                           "market", "share", "total", "average", "daily", "weekly"}
-                if extracted not in generic:
+                if extracted not in _GENERIC_TERMS:
                     result["is_product_query"] = True
                     result["search_terms"] = [extracted]
                     result["search_level"] = "product"
@@ -558,19 +811,31 @@ def get_schema_for_page(page_context: str, question: str = None) -> tuple:
             effective_db is "sqlite" or "duckdb" — the actual DB to execute against
     """
     db_type = PAGE_DATABASE.get(page_context, "sqlite")
-    product_info = None
+    product_info = detect_product_query(question) if question else None
+    routed = False
 
     # Auto-route product queries to DuckDB
-    if question and db_type == "sqlite":
-        product_info = detect_product_query(question)
-        if product_info["needs_duckdb"]:
-            db_type = "duckdb"  # Override to DuckDB for product-level queries
+    if product_info and db_type == "sqlite" and product_info["needs_duckdb"]:
+        db_type = "duckdb"  # Override to DuckDB for product-level queries
+        routed = True
 
     schema = DUCKDB_SCHEMA if db_type == "duckdb" else SQLITE_SCHEMA
     guidance = PAGE_GUIDANCE.get(page_context, PAGE_GUIDANCE["general"])
+    code_filter = None
+    if product_info and db_type == "duckdb":
+        code_filter = entity_filter_sql(product_info["entities"])
 
     # If we auto-routed, add extra guidance
-    if product_info and product_info["needs_duckdb"]:
+    if code_filter:
+        terms = ", ".join(product_info["search_terms"])
+        guidance += (
+            f"\n\nHIERARCHY MATCH: {terms} matched the product hierarchy"
+            f"{' (auto-routed from SQLite to DuckDB)' if routed else ''}. "
+            "Query transactions_enriched t and filter by these exact codes "
+            f"instead of LIKE on names: WHERE {code_filter}. "
+            "No join to product_hierarchy is needed for the filter."
+        )
+    elif routed:
         terms = ", ".join(product_info["search_terms"])
         if product_info["is_product_query"]:
             guidance += (
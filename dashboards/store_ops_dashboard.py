@@ -14,8 +14,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import date
 
+import result_cache
 from transaction_layer import TransactionStore, STORE_NAMES
-from transaction_queries import run_query
+from transaction_queries import QUERIES, run_query
 from product_hierarchy import get_departments, get_major_groups, get_minor_groups
 from fiscal_calendar import get_current_fiscal_period
 
@@ -25,6 +26,7 @@ from shared.hierarchy_filter import (
     hierarchy_filter_summary,
 )
 from shared.hourly_charts import render_hourly_analysis
+from shared.progressive import ProgressiveRenderer
 from shared.time_filter import (
     render_time_filter, time_filter_summary,
     render_quick_period, resolve_quick_period,
@@ -54,20 +56,29 @@ def get_store():
     return TransactionStore()
 
 
-@st.cache_data(ttl=300)
+def data_version():
+    return get_store().data_version()
+
+
+# Query results go to the shared on-disk cache (result_cache.py) rather
+# than st.cache_data: every worker, restart and the API reuse them.
+@result_cache.cached(namespace="transaction_queries.run_query",
+                     version=data_version)
 def query_named(name, **kwargs):
     ts = get_store()
     return run_query(ts, name, **kwargs)
 
 
-@st.cache_data(ttl=300)
+@result_cache.cached(version=data_version)
 def query_summary_kpis(store_id, start, end, dept_code=None,
                        major_code=None, minor_code=None,
                        hfm_item_code=None, product_number=None,
                        day_of_week_names=None, hour_start=None,
                        hour_end=None, season_names=None,
-                       quarter_nos=None, month_nos=None):
-    """KPI summary — uses hierarchy-filtered query when filters active."""
+                       quarter_nos=None, month_nos=None, preview=False):
+    """KPI summary — uses hierarchy-filtered query when filters active.
+
+    preview=True returns a fast sampled estimate (query_preview.py)."""
     ts = get_store()
     has_time_filter = (day_of_week_names or hour_start is not None
                        or season_names or quarter_nos or month_nos)
@@ -85,7 +96,8 @@ def query_summary_kpis(store_id, start, end, dept_code=None,
                          hour_end=hour_end,
                          season_names=season_names,
                          quarter_nos=quarter_nos,
-                         month_nos=month_nos)
+                         month_nos=month_nos,
+                         preview=preview)
     sql = """
         SELECT COUNT(*) AS line_items,
                COUNT(DISTINCT Reference2) AS transactions,
@@ -98,10 +110,27 @@ def query_summary_kpis(store_id, start, end, dept_code=None,
           AND SaleDate >= CAST(? AS TIMESTAMP)
           AND SaleDate < CAST(? AS TIMESTAMP)
     """
+    if preview:
+        # Same output columns as filtered_kpis, so the same scaling
+        return ts.query(sql, [store_id, start, end],
+                        preview=QUERIES["filtered_kpis"]["preview"])
     return ts.query(sql, [store_id, start, end])
 
 
-@st.cache_data(ttl=300)
+@result_cache.cached(version=data_version)
+def query_compared_kpis(store_id, start, end, comp_start, comp_end):
+    """Unfiltered KPI rows for a period and its comparison from one scan
+    (the same columns as query_summary_kpis)."""
+    frames = get_store().compare_periods(
+        {"current": (start, end), "comparison": (comp_start, comp_end)},
+        measures=["line_items", "transactions", "revenue", "quantity",
+                  "cogs", "gp"],
+        store_id=store_id)
+    return tuple(frames[name].to_dict("records")
+                 for name in ("current", "comparison"))
+
+
+@result_cache.cached(version=data_version)
 def query_lfl_stores(start, end, prior_start, prior_end):
     """Find stores with transactions in both periods."""
     ts = get_store()
@@ -257,90 +286,123 @@ st.markdown(f"**Filters:** {' | '.join(filter_parts)}")
 # KPI ROW
 # ============================================================================
 
+kpi_filters = dict(
+    dept_code=selected_dept_code,
+    major_code=selected_major_code,
+    minor_code=selected_minor_code,
+    hfm_item_code=selected_hfm_item_code,
+    product_number=selected_product_number,
+    day_of_week_names=time_filters.get("day_of_week_names"),
+    hour_start=time_filters.get("hour_start"),
+    hour_end=time_filters.get("hour_end"),
+    season_names=time_filters.get("season_names"),
+    quarter_nos=time_filters.get("quarter_nos"),
+    month_nos=time_filters.get("month_nos"),
+)
+
+
+def load_kpis(preview):
+    """(current, comparison) KPI rows; comparison is None if unavailable.
+    An empty preview is None, so the page waits for the exact answer."""
+    # Same test as query_summary_kpis: unfiltered KPIs come from one
+    # two-window scan; filtered ones and previews stay per period
+    filtered = (kpi_filters["dept_code"] or kpi_filters["day_of_week_names"]
+                or kpi_filters["hour_start"] is not None
+                or kpi_filters["season_names"] or kpi_filters["quarter_nos"]
+                or kpi_filters["month_nos"])
+    if comparison and not preview and not filtered:
+        try:
+            return query_compared_kpis(selected_store, start_str, end_str,
+                                       comparison["start"], comparison["end"])
+        except Exception:
+            pass  # Fall back to separate queries below
+    kpi_rows = query_summary_kpis(selected_store, start_str, end_str,
+                                  preview=preview, **kpi_filters)
+    if preview and not kpi_rows:
+        return None  # The sample may miss a small range entirely
+    comp_rows = None
+    if comparison:
+        try:
+            comp_rows = query_summary_kpis(
+                selected_store, comparison["start"], comparison["end"],
+                preview=preview, **kpi_filters)
+        except Exception:
+            pass  # Comparison data unavailable — show current only
+    return kpi_rows, comp_rows
+
+
+def render_kpi_row(result, approximate):
+    """Draw the KPI metrics; False if there was no data to draw."""
+    kpi_data, comp_data = result
+    if not kpi_data:
+        st.warning("No transaction data found for this store and date range.")
+        return False
+
+    kpi = kpi_data[0]
+    revenue = kpi["revenue"] or 0
+    transactions = kpi["transactions"] or 0
+    line_items = kpi["line_items"] or 0
+    gp = kpi["gp"] or 0
+
+    avg_basket = revenue / transactions if transactions > 0 else 0
+    items_per_txn = line_items / transactions if transactions > 0 else 0
+    gp_pct = (gp / revenue * 100) if revenue > 0 else 0
+
+    # Comparison KPIs
+    comp_revenue = comp_transactions = None
+    comp_avg_basket = comp_items_per_txn = comp_gp_pct = None
+
+    if comp_data and comp_data[0]["revenue"]:
+        ck = comp_data[0]
+        comp_revenue = ck["revenue"] or 0
+        comp_transactions = ck["transactions"] or 0
+        comp_line_items = ck["line_items"] or 0
+        comp_gp = ck["gp"] or 0
+        comp_avg_basket = (comp_revenue / comp_transactions
+                           if comp_transactions > 0 else 0)
+        comp_items_per_txn = (comp_line_items / comp_transactions
+                              if comp_transactions > 0 else 0)
+        comp_gp_pct = (comp_gp / comp_revenue * 100
+                       if comp_revenue > 0 else 0)
+
+    revenue_moe = kpi.get("revenue_moe") if approximate else None
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Revenue", f"${revenue:,.0f}",
+              delta=calc_delta(revenue, comp_revenue),
+              help=(f"Preview ±${revenue_moe:,.0f} (95%)"
+                    if revenue_moe else None))
+    k2.metric("Transactions", f"{transactions:,.0f}",
+              delta=calc_delta(transactions, comp_transactions))
+    k3.metric("Avg Basket", f"${avg_basket:,.2f}",
+              delta=calc_delta(avg_basket, comp_avg_basket))
+    k4.metric("Items/Txn", f"{items_per_txn:.1f}",
+              delta=calc_delta(items_per_txn, comp_items_per_txn))
+    k5.metric("Est GP%", f"{gp_pct:.1f}%",
+              delta=calc_delta(gp_pct, comp_gp_pct))
+
+    if approximate:
+        st.caption("Preview (approximate) — exact figures loading…")
+    if comparison and comp_revenue is not None:
+        st.caption(f"Compared to: {comparison.get('label', 'Prior Period')}")
+    return True
+
+
+progressive = ProgressiveRenderer()
+# Without a preview sample a preview is a second full scan: skip it
+kpi_preview = ((lambda: load_kpis(True))
+               if get_store().has_preview_sample() else None)
 with st.spinner("Loading KPIs..."):
     try:
-        kpi_data = query_summary_kpis(
-            selected_store, start_str, end_str,
-            dept_code=selected_dept_code,
-            major_code=selected_major_code,
-            minor_code=selected_minor_code,
-            hfm_item_code=selected_hfm_item_code,
-            product_number=selected_product_number,
-            day_of_week_names=time_filters.get("day_of_week_names"),
-            hour_start=time_filters.get("hour_start"),
-            hour_end=time_filters.get("hour_end"),
-            season_names=time_filters.get("season_names"),
-            quarter_nos=time_filters.get("quarter_nos"),
-            month_nos=time_filters.get("month_nos"),
-        )
+        has_kpis = progressive.show(render_kpi_row, kpi_preview,
+                                    lambda: load_kpis(False))
     except Exception as e:
         st.error(f"Failed to load data: {e}")
         st.stop()
 
-if not kpi_data:
-    st.warning("No transaction data found for this store and date range.")
+if not has_kpis:
+    progressive.finish()
     st.stop()
 
-kpi = kpi_data[0]
-revenue = kpi["revenue"] or 0
-transactions = kpi["transactions"] or 0
-line_items = kpi["line_items"] or 0
-gp = kpi["gp"] or 0
-
-avg_basket = revenue / transactions if transactions > 0 else 0
-items_per_txn = line_items / transactions if transactions > 0 else 0
-gp_pct = (gp / revenue * 100) if revenue > 0 else 0
-
-# Comparison KPIs
-comp_revenue = comp_transactions = comp_gp = None
-comp_avg_basket = comp_items_per_txn = comp_gp_pct = None
-
-if comparison:
-    try:
-        comp_data = query_summary_kpis(
-            selected_store, comparison["start"], comparison["end"],
-            dept_code=selected_dept_code,
-            major_code=selected_major_code,
-            minor_code=selected_minor_code,
-            hfm_item_code=selected_hfm_item_code,
-            product_number=selected_product_number,
-            day_of_week_names=time_filters.get("day_of_week_names"),
-            hour_start=time_filters.get("hour_start"),
-            hour_end=time_filters.get("hour_end"),
-            season_names=time_filters.get("season_names"),
-            quarter_nos=time_filters.get("quarter_nos"),
-            month_nos=time_filters.get("month_nos"),
-        )
-        if comp_data and comp_data[0]["revenue"]:
-            ck = comp_data[0]
-            comp_revenue = ck["revenue"] or 0
-            comp_transactions = ck["transactions"] or 0
-            comp_line_items = ck["line_items"] or 0
-            comp_gp = ck["gp"] or 0
-            comp_avg_basket = (comp_revenue / comp_transactions
-                               if comp_transactions > 0 else 0)
-            comp_items_per_txn = (comp_line_items / comp_transactions
-                                  if comp_transactions > 0 else 0)
-            comp_gp_pct = (comp_gp / comp_revenue * 100
-                           if comp_revenue > 0 else 0)
-    except Exception:
-        pass  # Comparison data unavailable — show current only
-
-k1, k2, k3, k4, k5 = st.columns(5)
-k1.metric("Revenue", f"${revenue:,.0f}",
-          delta=calc_delta(revenue, comp_revenue))
-k2.metric("Transactions", f"{transactions:,.0f}",
-          delta=calc_delta(transactions, comp_transactions))
-k3.metric("Avg Basket", f"${avg_basket:,.2f}",
-          delta=calc_delta(avg_basket, comp_avg_basket))
-k4.metric("Items/Txn", f"{items_per_txn:.1f}",
-          delta=calc_delta(items_per_txn, comp_items_per_txn))
-k5.metric("Est GP%", f"{gp_pct:.1f}%",
-          delta=calc_delta(gp_pct, comp_gp_pct))
-
-if comparison and comp_revenue is not None:
-    st.caption(f"Compared to: {comparison.get('label', 'Prior Period')}")
-
 
 # ============================================================================
 # TABBED ANALYSIS
@@ -954,4 +1016,6 @@ st.caption(
     "Times shown in AEDT (UTC+11 approximation)"
 )
 
+progressive.finish()
+
 render_footer("Store Operations", user=user)
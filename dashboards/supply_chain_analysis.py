@@ -17,6 +17,7 @@ import plotly.graph_objects as go
 from shared.styles import render_header, render_footer
 from shared.bigquery_connector import (
     is_bigquery_available, bq_query, get_response_counts_by_focus,
+    render_mirror_sync,
 )
 from config.workstreams import get_active_workstreams
 
@@ -276,6 +277,7 @@ if not is_bigquery_available():
     st.stop()
 
 all_responses = _load_all(test=_test_mode)
+render_mirror_sync()
 
 if not all_responses:
     st.info(
@@ -6,7 +6,7 @@ Summary of all strategic initiatives across 5 pillars.
 import streamlit as st
 
 from shared.styles import HFM_GREEN, HFM_DARK
-from shared.monday_connector import fetch_all_pillar_summaries
+from shared.monday_connector import fetch_all_pillar_summaries, last_synced
 from shared.pillar_data import get_all_pillars
 
 
@@ -29,6 +29,10 @@ def render():
     k3.metric("In Progress", in_prog)
     k4.metric("Stuck", stuck, delta=None)
     k5.metric("Completion", "{}%".format(pct))
+    synced_at = last_synced()
+    st.caption("Synced from Monday.com at {} UTC".format(
+        synced_at.replace("T", " ")) if synced_at
+        else "Waiting for the first Monday.com sync")
 
     # ── Overall progress bar ──
     st.markdown(
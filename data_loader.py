@@ -2,11 +2,26 @@
 Harris Farm Hub -- Data Loader
 Downloads data files from GitHub Releases on first deploy.
 Files are stored on Render's persistent disk at /data/.
+
+Downloads run concurrently using HTTP range requests. Each file is
+pre-allocated as ``<dest>.partial`` and every chunk (of every split part)
+is written straight to its final offset, so multi-part files need no
+second reassembly pass. Completed chunks are recorded in
+``<dest>.partial.json`` so an interrupted download resumes where it
+stopped. When a file is complete its SHA-256 is checked against the
+release manifest and only then renamed into place -- files become usable
+one at a time (highest priority first) while the rest keep downloading.
 """
 
+import argparse
+import hashlib
+import json
 import os
 import sys
+import time
+import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ---------------------------------------------------------------------------
 # GitHub Release configuration
@@ -15,21 +30,25 @@ REPO = "anguspharris-lab/harris-farm-hub"
 RELEASE_TAG = "data-v1"
 _BASE_URL = f"https://github.com/{REPO}/releases/download/{RELEASE_TAG}"
 
+# Checksum manifest: {local path: {"sha256": hex, "size": bytes}}.
+# A local copy (if present) wins over the release asset.
+MANIFEST_URL = f"{_BASE_URL}/manifest.json"
+LOCAL_MANIFEST = "data/manifest.json"
+
 # Files to download: local path -> {url(s), size_mb, description}
-# Files over 2GB are split into parts and reassembled after download.
+# Files over 2GB are split into parts; parts are written in place.
+# Dict order is download priority: the core DB and the current fiscal
+# year land first so the API can start before the history is complete.
 DATA_FILES = {
     "data/harris_farm.db": {
         "urls": [f"{_BASE_URL}/harris_farm.db"],
         "size_mb": 399,
         "description": "Weekly aggregated sales, customer & market share data",
     },
-    "data/transactions/FY24.parquet": {
-        "urls": [
-            f"{_BASE_URL}/FY24.parquet.part_aa",
-            f"{_BASE_URL}/FY24.parquet.part_ab",
-        ],
-        "size_mb": 2336,
-        "description": "POS transactions FY24 (Jul 2023 - Jun 2024, 134M rows)",
+    "data/transactions/FY26.parquet": {
+        "urls": [f"{_BASE_URL}/FY26.parquet"],
+        "size_mb": 1773,
+        "description": "POS transactions FY26 YTD (Jul 2025 - Feb 2026, 99M rows)",
     },
     "data/transactions/FY25.parquet": {
         "urls": [
@@ -39,10 +58,13 @@ DATA_FILES = {
         "size_mb": 2675,
         "description": "POS transactions FY25 (Jul 2024 - Jun 2025, 149M rows)",
     },
-    "data/transactions/FY26.parquet": {
-        "urls": [f"{_BASE_URL}/FY26.parquet"],
-        "size_mb": 1773,
-        "description": "POS transactions FY26 YTD (Jul 2025 - Feb 2026, 99M rows)",
+    "data/transactions/FY24.parquet": {
+        "urls": [
+            f"{_BASE_URL}/FY24.parquet.part_aa",
+            f"{_BASE_URL}/FY24.parquet.part_ab",
+        ],
+        "size_mb": 2336,
+        "description": "POS transactions FY24 (Jul 2023 - Jun 2024, 134M rows)",
     },
     "data/harris_farm_plu.db": {
         "urls": [
@@ -54,89 +76,366 @@ DATA_FILES = {
     },
 }
 
+USER_AGENT = "HarrisFarmHub-DataLoader/2.0"
+CHUNK_SIZE = 64 * 1024 * 1024   # bytes per range request
+BLOCK_SIZE = 1024 * 1024        # read/write buffer
+DEFAULT_WORKERS = 6
+MAX_RETRIES = 4
+RETRY_DELAY = 2.0               # seconds, doubled on each retry
+TIMEOUT = 60
+
+
+# ---------------------------------------------------------------------------
+# HTTP helpers
+# ---------------------------------------------------------------------------
+
+def _open(url, byte_range=None):
+    """Open a URL, optionally for an inclusive (start, end) byte range."""
+    req = urllib.request.Request(url)
+    req.add_header("User-Agent", USER_AGENT)
+    if byte_range is not None:
+        req.add_header("Range", "bytes={}-{}".format(*byte_range))
+    return urllib.request.urlopen(req, timeout=TIMEOUT)
+
+
+def probe_url(url):
+    """Return (size_bytes, supports_ranges) for a URL.
 
-def download_file(url, dest):
-    """Download a file from a URL with progress reporting."""
-    filename = os.path.basename(url)
-    print(f"  Downloading {filename}...", flush=True)
+    Uses a one-byte range GET rather than HEAD so that redirects to
+    signed storage URLs behave exactly as the real download will.
+    """
+    with _open(url, (0, 0)) as resp:
+        content_range = resp.headers.get("Content-Range", "")
+        if resp.status == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            if total.isdigit():
+                return int(total), True
+        length = resp.headers.get("Content-Length")
+        return (int(length) if length else None), False
+
+
+def load_manifest(url=MANIFEST_URL, local_path=LOCAL_MANIFEST):
+    """Load the checksum manifest (local file first, then the release).
+
+    Returns an empty dict when no manifest is available; files are then
+    downloaded without checksum verification.
+    """
     try:
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "HarrisFarmHub-DataLoader/1.0")
-        response = urllib.request.urlopen(req)
-
-        total = response.headers.get("Content-Length")
-        downloaded = 0
-        block_size = 1024 * 1024  # 1 MB chunks
-
-        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
-        with open(dest, "wb") as f:
-            while True:
-                chunk = response.read(block_size)
-                if not chunk:
-                    break
-                f.write(chunk)
-                downloaded += len(chunk)
-                mb = downloaded / (1024 * 1024)
-                if total:
-                    pct = (downloaded / int(total)) * 100
-                    print(
-                        f"\r  {filename}... {mb:.0f}MB ({pct:.0f}%)",
-                        end="", flush=True,
-                    )
-                else:
-                    print(
-                        f"\r  {filename}... {mb:.0f}MB",
-                        end="", flush=True,
+        if local_path and os.path.exists(local_path):
+            with open(local_path) as f:
+                return json.load(f)
+        if url:
+            with _open(url) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+    except (OSError, ValueError, urllib.error.URLError) as e:
+        print(f"  Manifest unavailable ({e}); skipping checksum checks")
+    return {}
+
+
+def sha256_file(path):
+    """Streaming SHA-256 of a file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Per-file download state
+# ---------------------------------------------------------------------------
+
+class FileDownload:
+    """One destination file assembled from one or more URL parts.
+
+    Chunks are (index, url, part_start, part_end, file_offset) tuples;
+    ``part_start``/``part_end`` are inclusive offsets within the URL's
+    body and ``file_offset`` is where the chunk lands in the output file.
+    """
+
+    def __init__(self, dest, urls, sha256=None, chunk_size=CHUNK_SIZE):
+        self.dest = dest
+        self.urls = list(urls)
+        self.sha256 = sha256
+        self.chunk_size = chunk_size
+        self.partial = dest + ".partial"
+        self.state_path = dest + ".partial.json"
+        self.sizes = []
+        self.ranged = {}
+        self.chunks = []
+        self.done = set()
+        self.failed = False
+
+    # -- planning ------------------------------------------------------
+
+    def plan(self):
+        """Probe each part and split it into range-request chunks."""
+        offset = 0
+        for url in self.urls:
+            size, ranged = probe_url(url)
+            if size is None:
+                raise RuntimeError(f"No Content-Length for {url}")
+            self.sizes.append(size)
+            self.ranged[url] = ranged
+            step = self.chunk_size if ranged else max(size, 1)
+            for start in range(0, size, step):
+                end = min(start + step, size) - 1
+                self.chunks.append(
+                    (len(self.chunks), url, start, end, offset + start)
+                )
+            offset += size
+        self._load_state()
+
+    @property
+    def total_bytes(self):
+        return sum(self.sizes)
+
+    @property
+    def pending(self):
+        return [c for c in self.chunks if c[0] not in self.done]
+
+    @property
+    def complete(self):
+        return len(self.done) == len(self.chunks)
+
+    def _load_state(self):
+        """Resume from a previous run if part sizes are unchanged."""
+        state = None
+        if os.path.exists(self.state_path) and os.path.exists(self.partial):
+            try:
+                with open(self.state_path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = None
+        if (state and state.get("sizes") == self.sizes
+                and state.get("chunk_size") == self.chunk_size):
+            self.done = set(state.get("done", []))
+            return
+
+        os.makedirs(os.path.dirname(self.dest) or ".", exist_ok=True)
+        with open(self.partial, "wb") as f:
+            f.truncate(self.total_bytes)
+        self.done = set()
+        self._save_state()
+
+    def _save_state(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "sizes": self.sizes,
+                "chunk_size": self.chunk_size,
+                "done": sorted(self.done),
+            }, f)
+        os.replace(tmp, self.state_path)
+
+    # -- transfer ------------------------------------------------------
+
+    def fetch_chunk(self, chunk, retries=MAX_RETRIES, retry_delay=RETRY_DELAY):
+        """Download one chunk into place. Runs on a worker thread."""
+        index, url, start, end, file_offset = chunk
+        byte_range = (start, end) if self.ranged[url] else None
+        last_error = None
+        for attempt in range(retries + 1):
+            try:
+                with _open(url, byte_range) as resp:
+                    if byte_range is not None and resp.status != 206:
+                        raise RuntimeError(
+                            f"Server ignored range request ({resp.status})"
+                        )
+                    written = 0
+                    with open(self.partial, "r+b") as out:
+                        out.seek(file_offset)
+                        while True:
+                            block = resp.read(BLOCK_SIZE)
+                            if not block:
+                                break
+                            out.write(block)
+                            written += len(block)
+                        out.flush()
+                        os.fsync(out.fileno())
+                expected = end - start + 1
+                if written != expected:
+                    raise RuntimeError(
+                        f"Short read: {written} of {expected} bytes"
                     )
+                return index, expected
+            except Exception as e:  # network errors, short reads, 5xx
+                last_error = e
+                if attempt < retries:
+                    time.sleep(retry_delay * (2 ** attempt))
+        raise RuntimeError(f"{os.path.basename(url)} chunk {index}: {last_error}")
 
-        size_mb = os.path.getsize(dest) / (1024 * 1024)
-        print(f"\n  Done: {filename} ({size_mb:.1f}MB)")
-        return True
+    def mark_done(self, index):
+        self.done.add(index)
+        self._save_state()
 
-    except Exception as e:
-        print(f"\n  Failed: {filename}: {e}")
-        if os.path.exists(dest):
-            os.remove(dest)
-        return False
+    def finalize(self):
+        """Verify the checksum and move the file into place."""
+        if self.sha256:
+            digest = sha256_file(self.partial)
+            if digest != self.sha256:
+                self.discard()
+                raise RuntimeError(
+                    f"SHA-256 mismatch for {self.dest}: "
+                    f"expected {self.sha256[:12]}..., got {digest[:12]}..."
+                )
+        os.replace(self.partial, self.dest)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
 
+    def discard(self):
+        for path in (self.partial, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
 
-def download_and_assemble(dest, urls):
-    """Download one or more parts and concatenate into the final file."""
-    if len(urls) == 1:
-        return download_file(urls[0], dest)
-
-    # Multi-part: download parts, concatenate, clean up
-    parts = []
-    for i, url in enumerate(urls):
-        part_path = f"{dest}.part{i}"
-        if not download_file(url, part_path):
-            # Clean up any downloaded parts
-            for p in parts:
-                if os.path.exists(p):
-                    os.remove(p)
-            return False
-        parts.append(part_path)
-
-    # Concatenate parts into final file
-    print(f"  Assembling {os.path.basename(dest)} from {len(parts)} parts...")
-    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
-    with open(dest, "wb") as out:
-        for part_path in parts:
-            with open(part_path, "rb") as inp:
-                while True:
-                    chunk = inp.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    out.write(chunk)
-            os.remove(part_path)
-
-    size_mb = os.path.getsize(dest) / (1024 * 1024)
-    print(f"  Assembled: {os.path.basename(dest)} ({size_mb:.1f}MB)")
-    return True
 
+# ---------------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------------
+
+def download_files(files, manifest=None, workers=DEFAULT_WORKERS,
+                   chunk_size=CHUNK_SIZE, on_ready=None,
+                   retries=MAX_RETRIES, retry_delay=RETRY_DELAY):
+    """Download several files concurrently.
 
-def ensure_data():
+    ``files`` maps destination path -> list of part URLs and is processed
+    in order of priority. ``on_ready(dest)`` is called as soon as each
+    file has been verified and moved into place.
+
+    Returns (succeeded, failed) lists of destination paths.
+    """
+    manifest = manifest or {}
+    jobs = []
+    failed = []
+    for dest, urls in files.items():
+        job = FileDownload(dest, urls,
+                           sha256=manifest.get(dest, {}).get("sha256"),
+                           chunk_size=chunk_size)
+        try:
+            job.plan()
+        except Exception as e:
+            print(f"  Failed: {os.path.basename(dest)}: {e}")
+            failed.append(dest)
+            continue
+        if job.done:
+            print(f"  Resuming {os.path.basename(dest)} "
+                  f"({len(job.done)}/{len(job.chunks)} chunks already done)")
+        jobs.append(job)
+
+    succeeded = []
+
+    def _finish(job):
+        try:
+            job.finalize()
+        except Exception as e:
+            print(f"  Failed: {os.path.basename(job.dest)}: {e}")
+            failed.append(job.dest)
+            return
+        size_mb = os.path.getsize(job.dest) / (1024 * 1024)
+        verified = "verified" if job.sha256 else "no checksum"
+        print(f"  Ready: {os.path.basename(job.dest)} "
+              f"({size_mb:.1f}MB, {verified})", flush=True)
+        succeeded.append(job.dest)
+        if on_ready:
+            on_ready(job.dest)
+
+    # Files that were fully downloaded last run but not finalized
+    for job in [j for j in jobs if j.complete]:
+        _finish(job)
+
+    remaining = [j for j in jobs if not j.complete]
+    total = sum(j.total_bytes for j in remaining)
+    downloaded = sum(
+        c[3] - c[2] + 1 for j in remaining for c in j.chunks if c[0] in j.done
+    )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for job in remaining:
+            for chunk in job.pending:
+                fut = pool.submit(job.fetch_chunk, chunk, retries, retry_delay)
+                futures[fut] = job
+
+        for fut in as_completed(futures):
+            job = futures[fut]
+            if job.failed or fut.cancelled():
+                continue
+            try:
+                index, nbytes = fut.result()
+            except Exception as e:
+                # Keep completed chunks on disk so the next run resumes
+                job.failed = True
+                print(f"\n  Failed: {os.path.basename(job.dest)}: {e}")
+                failed.append(job.dest)
+                for other, owner in futures.items():
+                    if owner is job:
+                        other.cancel()
+                continue
+
+            job.mark_done(index)
+            downloaded += nbytes
+            if total:
+                print(f"\r  Downloaded {downloaded / (1024 * 1024):.0f}MB "
+                      f"of {total / (1024 * 1024):.0f}MB "
+                      f"({downloaded / total * 100:.0f}%)",
+                      end="", flush=True)
+            if job.complete:
+                print()
+                _finish(job)
+
+    return succeeded, failed
+
+
+def download_and_assemble(dest, urls, sha256=None):
+    """Download one or more parts directly into ``dest``."""
+    manifest = {dest: {"sha256": sha256}} if sha256 else {}
+    _, failed = download_files({dest: urls}, manifest=manifest)
+    return not failed
+
+
+def verify_data(manifest=None):
+    """Re-hash present data files against the manifest.
+
+    Returns a list of paths whose checksum does not match.
+    """
+    manifest = manifest if manifest is not None else load_manifest()
+    bad = []
+    for filepath in DATA_FILES:
+        expected = manifest.get(filepath, {}).get("sha256")
+        if not expected or not os.path.exists(filepath):
+            continue
+        if sha256_file(filepath) != expected:
+            print(f"  Checksum mismatch: {filepath}")
+            bad.append(filepath)
+    return bad
+
+
+def write_manifest(path=LOCAL_MANIFEST):
+    """Write a manifest for the local data files (run before a release)."""
+    manifest = {}
+    for filepath in DATA_FILES:
+        if os.path.exists(filepath):
+            manifest[filepath] = {
+                "sha256": sha256_file(filepath),
+                "size": os.path.getsize(filepath),
+            }
+            print(f"  {filepath}: {manifest[filepath]['sha256'][:12]}...")
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest written to {path}")
+    return manifest
+
+
+def ensure_data(workers=DEFAULT_WORKERS, on_ready=None, verify=False):
     """Check all required data files exist; download any missing ones."""
+    manifest = load_manifest()
+    if verify:
+        for filepath in verify_data(manifest):
+            os.remove(filepath)
+
     missing = {}
     for filepath, info in DATA_FILES.items():
         if not os.path.exists(filepath):
@@ -148,15 +447,17 @@ def ensure_data():
 
     print(f"Need to download {len(missing)} data file(s)...")
     total_mb = sum(info["size_mb"] for info in missing.values())
-    print(f"  Total download: ~{total_mb:.0f} MB (first deploy only)\n")
+    print(f"  Total download: ~{total_mb:.0f} MB "
+          f"({workers} parallel connections, first deploy only)\n")
 
-    failed = []
-    for filepath, info in missing.items():
-        if not download_and_assemble(filepath, info["urls"]):
-            failed.append(filepath)
+    _, failed = download_files(
+        {path: info["urls"] for path, info in missing.items()},
+        manifest=manifest, workers=workers, on_ready=on_ready,
+    )
 
     if failed:
         print(f"\n{len(failed)} file(s) failed. Some dashboards may not work.")
+        print("Re-run to resume from the last completed chunk.")
         return False
 
     print(f"\nAll data files downloaded successfully")
@@ -164,4 +465,16 @@ def ensure_data():
 
 
 if __name__ == "__main__":
-    ensure_data()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="parallel range requests (default %(default)s)")
+    parser.add_argument("--verify", action="store_true",
+                        help="re-hash existing files and re-download mismatches")
+    parser.add_argument("--write-manifest", action="store_true",
+                        help=f"write {LOCAL_MANIFEST} from local files and exit")
+    args = parser.parse_args()
+
+    if args.write_manifest:
+        write_manifest()
+        sys.exit(0)
+    sys.exit(0 if ensure_data(workers=args.workers, verify=args.verify) else 1)
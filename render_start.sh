@@ -29,9 +29,16 @@ if [ -d /data ]; then
 
     echo "Data directory linked to persistent disk"
 
-    # Download large data files if missing (first deploy only)
+    # Download large data files if missing (first deploy only).
+    # Files download in parallel and each is moved into place as soon as
+    # its checksum verifies, so only wait for the core DB -- transaction
+    # years and the PLU DB keep arriving in the background.
     echo "Checking data files..."
-    python3 data_loader.py
+    python3 data_loader.py &
+    LOADER_PID=$!
+    while [ ! -f data/harris_farm.db ] && kill -0 $LOADER_PID 2>/dev/null; do
+        sleep 5
+    done
 fi
 
 # Also link backend/hub_data.db to persistent disk
@@ -91,6 +98,27 @@ fi
     done
 ) &
 
+# ---------------------------------------------------------------------------
+# Derived data builds (backend/derived_build.py): sales presence, enriched
+# layout, customer summary, preview sample and BigQuery mirror. Run here,
+# niced and in their own process, so the full-history scans stay out of the
+# API and Streamlit. Waits for the data loader on first deploy, then repeats
+# every DERIVED_BUILD_INTERVAL seconds (default daily).
+# ---------------------------------------------------------------------------
+(
+    if [ -n "$LOADER_PID" ]; then
+        while kill -0 $LOADER_PID 2>/dev/null; do
+            sleep 30
+        done
+    fi
+    while true; do
+        echo "[builds] Running derived data builds..."
+        nice -n 10 python3 backend/derived_build.py 2>&1 \
+            || echo "[builds] Derived builds exited with an error"
+        sleep ${DERIVED_BUILD_INTERVAL:-86400}
+    done
+) &
+
 # ---------------------------------------------------------------------------
 # Start Streamlit IMMEDIATELY — don't wait for backend
 # Streamlit pages handle missing backend gracefully (show loading states).
@@ -21,7 +21,6 @@ Data lineage:
 """
 
 import json
-import math
 import sys
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
@@ -29,6 +28,14 @@ from typing import Optional, Dict, List, Tuple
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from catchment_engine import (  # noqa: E402
+    CatchmentModel,
+    haversine_matrix,
+    load_postcode_demand,
+    nearest_points,
+)
+
 # ── Paths ────────────────────────────────────────────────────────────────────
 _BASE = Path(__file__).resolve().parent.parent / "data"
 _CENSUS = _BASE / "census" / "processed" / "census_postcode_demographics.parquet"
@@ -70,16 +77,6 @@ SCORE_WEIGHTS = {
 
 # ── Utilities ────────────────────────────────────────────────────────────────
 
-def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Great-circle distance between two lat/lon points in kilometres."""
-    R = 6371.0
-    rlat1, rlon1, rlat2, rlon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = rlat2 - rlat1
-    dlon = rlon2 - rlon1
-    a = math.sin(dlat / 2) ** 2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
 def load_coords() -> Dict[str, Dict[str, float]]:
     """Load postcode -> {lat, lon} mapping."""
     with open(_COORDS) as f:
@@ -105,9 +102,10 @@ def build_store_postcode_map(cbas: dict, coords: dict) -> Dict[str, str]:
     pc_df = pd.read_csv(_POSTCODES)
     # Filter out aggregate rows (state/country-level: ACT, NSW, QLD, AUS)
     pc_df = pc_df[pd.to_numeric(pc_df["postcode"], errors="coerce").notna()].copy()
-    region_to_postcode = {}
-    for _, row in pc_df.iterrows():
-        region_to_postcode[str(row["region_name"]).strip().lower()] = str(int(float(row["postcode"])))
+    region_to_postcode = dict(zip(
+        pc_df["region_name"].astype(str).str.strip().str.lower(),
+        pc_df["postcode"].astype(float).astype(int).astype(str),
+    ))
 
     # Also build from CBAS store names + catchments to find store postcodes
     catchments = cbas.get("catchments", {})
@@ -195,8 +193,11 @@ def build_store_profiles(census: pd.DataFrame, pc_analysis: pd.DataFrame,
     census["postcode"] = census["postcode"].astype(str)
     pc_analysis["postcode"] = pc_analysis["postcode"].astype(int).astype(str)
 
-    # Merge census onto postcodes in the analysis
-    census_lookup = census.set_index("postcode")
+    # Census postcodes with coordinates, for the 10km radius search
+    census_pcs = set(census["postcode"])
+    radius_pcs = [pc for pc in coords if pc in census_pcs]
+    radius_lat = np.array([coords[pc]["lat"] for pc in radius_pcs])
+    radius_lon = np.array([coords[pc]["lon"] for pc in radius_pcs])
 
     results = []
 
@@ -214,34 +215,26 @@ def build_store_profiles(census: pd.DataFrame, pc_analysis: pd.DataFrame,
 
         # Also, if we have the store postcode, find additional nearby postcodes
         # from census that are within 10km (via haversine) but not already included
-        if store_pc and store_pc in coords:
-            store_lat = coords[store_pc]["lat"]
-            store_lon = coords[store_pc]["lon"]
+        if store_pc and store_pc in coords and radius_pcs:
+            dists = haversine_matrix(
+                [coords[store_pc]["lat"]], [coords[store_pc]["lon"]],
+                radius_lat, radius_lon,
+            )[0]
 
             existing_pcs = set(store_pcs["postcode"].astype(str).tolist())
-
-            extra_pcs = []
-            for pc_str, c in coords.items():
-                if pc_str in existing_pcs:
-                    continue
-                if pc_str not in census_lookup.index:
-                    continue
-                dist = haversine_km(store_lat, store_lon, c["lat"], c["lon"])
-                if dist <= 10.0:
-                    extra_pcs.append(pc_str)
+            extra_rows = [
+                {
+                    "postcode": pc_str,
+                    "nearest_store": store,
+                    "distance_km": round(float(dist), 2),
+                    "market_share_pct": 0.0,  # no market share data for these
+                }
+                for pc_str, dist in zip(radius_pcs, dists)
+                if dist <= 10.0 and pc_str not in existing_pcs
+            ]
 
             # Add extras with basic info
-            if extra_pcs:
-                extra_rows = []
-                for pc_str in extra_pcs:
-                    dist = haversine_km(store_lat, store_lon,
-                                        coords[pc_str]["lat"], coords[pc_str]["lon"])
-                    extra_rows.append({
-                        "postcode": pc_str,
-                        "nearest_store": store,
-                        "distance_km": round(dist, 2),
-                        "market_share_pct": 0.0,  # no market share data for these
-                    })
+            if extra_rows:
                 extra_df = pd.DataFrame(extra_rows)
                 store_pcs = pd.concat([store_pcs, extra_df], ignore_index=True)
 
@@ -515,6 +508,22 @@ def validated_opportunities(
     for store, pc in store_pc_map.items():
         if pc in coords:
             store_coords[store] = coords[pc]
+    store_names = list(store_coords)
+    store_lat = [store_coords[s]["lat"] for s in store_names]
+    store_lon = [store_coords[s]["lon"] for s in store_names]
+
+    def _nearest(postcodes):
+        """Nearest store name and distance for each postcode (None if no coords)."""
+        known = [pc for pc in postcodes if pc in coords]
+        idx, dist = nearest_points(
+            [coords[pc]["lat"] for pc in known],
+            [coords[pc]["lon"] for pc in known],
+            store_lat, store_lon,
+        )
+        return {
+            pc: (store_names[i] if i >= 0 else None, float(d))
+            for pc, i, d in zip(known, idx, dist)
+        }
 
     # Merge demographic scores with postcode analysis
     pc_scores_copy = pc_scores.copy()
@@ -542,19 +551,13 @@ def validated_opportunities(
     expansion = no_presence[no_presence["demographic_score"] > 70].copy()
 
     # For expansion targets, find nearest store and distance
+    nearest_map = _nearest(list(expansion["postcode"]) + list(opportunities["postcode"]))
     expansion_records = []
     for _, row in expansion.iterrows():
         pc = row["postcode"]
-        if pc not in coords:
+        if pc not in nearest_map:
             continue
-        lat, lon = coords[pc]["lat"], coords[pc]["lon"]
-        nearest = None
-        min_dist = float("inf")
-        for s, sc in store_coords.items():
-            d = haversine_km(lat, lon, sc["lat"], sc["lon"])
-            if d < min_dist:
-                min_dist = d
-                nearest = s
+        nearest, min_dist = nearest_map[pc]
         expansion_records.append({
             "postcode": pc,
             "state": row.get("state", ""),
@@ -569,21 +572,13 @@ def validated_opportunities(
     opp_records = []
     for _, row in opportunities.iterrows():
         pc = row["postcode"]
-        if pc not in coords:
+        if pc not in nearest_map:
             # Use distance from postcode_analysis if available
             dist = row.get("distance_km", None)
             nearest = row.get("nearest_store", None)
         else:
-            lat, lon = coords[pc]["lat"], coords[pc]["lon"]
-            nearest = None
-            min_dist = float("inf")
-            for s, sc in store_coords.items():
-                d = haversine_km(lat, lon, sc["lat"], sc["lon"])
-                if d < min_dist:
-                    min_dist = d
-                    nearest = s
+            nearest, min_dist = nearest_map[pc]
             dist = round(min_dist, 2)
-            nearest = nearest
 
         opp_records.append({
             "postcode": pc,
@@ -606,6 +601,25 @@ def validated_opportunities(
         else:
             opp["cannibalisation_risk"] = False
 
+    # Huff gravity model: predicted sales and transfer from existing stores
+    # if a store opened at each opportunity postcode (one batched call)
+    huff_pcs = [o["postcode"] for o in all_opps if o["postcode"] in coords]
+    demand = load_postcode_demand(str(_POSTCODES), str(_COORDS))
+    if huff_pcs and store_coords and not demand.empty:
+        model = CatchmentModel(
+            demand, {s: (c["lat"], c["lon"]) for s, c in store_coords.items()})
+        huff, _ = model.simulate_sites(
+            [coords[pc]["lat"] for pc in huff_pcs],
+            [coords[pc]["lon"] for pc in huff_pcs],
+            site_names=huff_pcs,
+        )
+        for opp in all_opps:
+            if opp["postcode"] in huff.index:
+                h = huff.loc[opp["postcode"]]
+                opp["huff_predicted_sales"] = round(float(h["predicted_sales"]), 0)
+                opp["huff_sales_transfer"] = round(float(h["transfer"]), 0)
+                opp["huff_net_new_sales"] = round(float(h["net_new_sales"]), 0)
+
     # Score: demographic_score * (1 - current_hfm_share/20)
     for opp in all_opps:
         share = opp.get("hfm_share_pct", 0)
@@ -665,6 +679,8 @@ def validated_opportunities(
         "scoring_method": "demographic_score * (1 - hfm_share_pct / 20)",
         "opportunity_threshold": "demographic_score > 70 AND hfm_share < 5%",
         "cannibalisation_radius_km": 5.0,
+        "huff_model": "market_size * A/d^2 share vs calibrated competitor "
+                      "utility; sales per market-share period",
     }
     return output
 
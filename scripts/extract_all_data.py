@@ -8,7 +8,8 @@ Source files:
 
 Sheets extracted:
   - Ref → fiscal_calendar table
-  - Data_ByMajGrp → sales table (wide-to-long melt)
+  - Data_ByMajGrp → sales table (wide-to-long melt), then sales_weekly
+    (one column per measure; see dashboards/shared/sales_store.py)
   - Data_Customer → customers table (wide-to-long melt)
 
 Excel layout (Data_ByMajGrp) — 0-based column indices:
@@ -17,21 +18,88 @@ Excel layout (Data_ByMajGrp) — 0-based column indices:
   Row 17+: Data rows
 
 Uses iter_rows() for fast bulk reading instead of cell-by-cell access.
+
+Pipeline:
+  1. Parts: every sheet of every workbook is parsed in its own worker
+     process and streamed in bulk batches into a part database,
+     data/extract/<label>.<ref|sales|customers>.db. manifest.json records
+     each workbook's SHA-256; unchanged workbooks reuse their parts.
+  2. Staging: the parts are bulk-copied into harris_farm.db.staging with
+     the tables this script does not own (market_share, product_lines,
+     ...) carried over from the live database; indexes and sales_weekly
+     are built after the load.
+  3. Swap: os.replace() puts the staging file in place, so dashboards see
+     the old database or the new one, never a half-built table.
+
+    python scripts/extract_all_data.py [--force] [--workers N]
 """
 
+import hashlib
+import itertools
+import json
+import os
+import shutil
 import sqlite3
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
 
 import openpyxl
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "dashboards"))
+from shared.sales_store import build_weekly_sales  # noqa: E402
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "harris_farm.db"
+PARTS_DIR = DATA_DIR / "extract"
 
 NSW_FILE = Path("/Users/angusharris/Downloads/Weekly Fresh Report/_trading Team Meeting_Retail_NSW.xlsx")
 QLD_FILE = Path("/Users/angusharris/Downloads/Weekly Fresh Report/_trading Team Meeting_QLD.xlsx")
 
+# Extraction order: the first workbook wins fiscal calendar duplicates
+WORKBOOKS = {"NSW": NSW_FILE, "QLD": QLD_FILE}
+
+BATCH_ROWS = 50000
+
+# part -> (table, typed columns); column order is the record order
+SCHEMAS = {
+    "ref": ("fiscal_calendar", [
+        ("sequence", "INTEGER"), ("week_ending_date", "TEXT"),
+        ("month_end", "TEXT"), ("prior_month_end", "TEXT"),
+        ("retail_weeks_in_month", "INTEGER"), ("financial_year", "INTEGER"),
+        ("fin_week_of_month", "INTEGER"), ("fin_week_of_year", "INTEGER"),
+        ("prior_year_week_ending", "TEXT"), ("current_fy_start", "TEXT"),
+        ("prior_fy_start", "TEXT"),
+    ]),
+    "sales": ("sales", [
+        ("store", "TEXT"), ("channel", "TEXT"), ("department", "TEXT"),
+        ("major_group", "TEXT"), ("is_promotion", "TEXT"),
+        ("measure", "TEXT"), ("week_ending", "TEXT"), ("value", "REAL"),
+        ("fy_lol", "INTEGER"), ("rolling_13wk_lol", "INTEGER"),
+        ("fv_store", "INTEGER"),
+    ]),
+    "customers": ("customers", [
+        ("store", "TEXT"), ("channel", "TEXT"), ("measure", "TEXT"),
+        ("week_ending", "TEXT"), ("value", "REAL"),
+    ]),
+}
+
+# Rebuilt on every run; every other table in the database is carried over
+OWNED_TABLES = {"fiscal_calendar", "sales", "customers", "stores",
+                "departments", "sales_weekly"}
+
+INDEXES = [
+    "CREATE INDEX idx_sales_store ON sales(store)",
+    "CREATE INDEX idx_sales_week ON sales(week_ending)",
+    "CREATE INDEX idx_sales_measure ON sales(measure)",
+    "CREATE INDEX idx_sales_dept ON sales(department)",
+    "CREATE INDEX idx_customers_store ON customers(store)",
+    "CREATE INDEX idx_customers_week ON customers(week_ending)",
+    "CREATE INDEX idx_fc_fy_wk ON fiscal_calendar(financial_year, fin_week_of_year)",
+]
+
 
 def safe_date(v):
     """Convert to YYYY-MM-DD string, or None if not a valid date."""
@@ -88,8 +156,9 @@ def build_date_lookup(ref_df: pd.DataFrame) -> dict:
     return lookup
 
 
-def extract_sales(wb, date_lookup: dict, label: str) -> pd.DataFrame:
-    """Extract Data_ByMajGrp sheet using fast iter_rows bulk read."""
+def iter_sales(wb, date_lookup: dict, label: str):
+    """Yield Data_ByMajGrp records (SCHEMAS["sales"] order) using fast
+    iter_rows bulk read."""
     print(f"  [{label}] Reading Data_ByMajGrp headers...", flush=True)
     ws = wb["Data_ByMajGrp"]
 
@@ -103,7 +172,7 @@ def extract_sales(wb, date_lookup: dict, label: str) -> pd.DataFrame:
 
     if not fy_row or not wk_row:
         print(f"  [{label}] ERROR: Could not read header rows")
-        return pd.DataFrame()
+        return
 
     # Build week column mapping: list of (col_0based_index, week_ending_date)
     # Data columns start at index 11 (col L in Excel, col 12 in 1-based)
@@ -124,11 +193,11 @@ def extract_sales(wb, date_lookup: dict, label: str) -> pd.DataFrame:
 
     print(f"  [{label}] Found {len(week_map)} valid week columns", flush=True)
     if not week_map:
-        return pd.DataFrame()
+        return
 
     # Read ALL data rows at once using iter_rows (much faster than cell-by-cell)
     print(f"  [{label}] Reading data rows (bulk)...", flush=True)
-    all_rows = []
+    records = 0
     row_count = 0
     for row in ws.iter_rows(min_row=17, values_only=True):
         store = row[5]  # col F (0-based index 5) = Company Full Name
@@ -164,27 +233,23 @@ def extract_sales(wb, date_lookup: dict, label: str) -> pd.DataFrame:
             if val_float == 0:
                 continue
 
-            all_rows.append((
+            yield (
                 store_s, channel, dept, major_group, is_promo,
                 measure, we_date, val_float,
                 fy_lol_int, r13_int, fv_int,
-            ))
+            )
+            records += 1
 
         row_count += 1
         if row_count % 1000 == 0:
-            print(f"  [{label}] Processed {row_count} rows ({len(all_rows):,} records)...", flush=True)
-
-    cols = ["store", "channel", "department", "major_group", "is_promotion",
-            "measure", "week_ending", "value", "fy_lol", "rolling_13wk_lol", "fv_store"]
-    df = pd.DataFrame(all_rows, columns=cols)
-    print(f"  [{label}] Sales: {row_count} data rows → {len(df):,} records", flush=True)
-    if len(df) > 0:
-        print(f"  [{label}]   {df['store'].nunique()} stores, {df['measure'].nunique()} measures", flush=True)
-    return df
+            print(f"  [{label}] Processed {row_count} rows ({records:,} records)...", flush=True)
 
+    print(f"  [{label}] Sales: {row_count} data rows → {records:,} records", flush=True)
 
-def extract_customers(wb, date_lookup: dict, label: str) -> pd.DataFrame:
-    """Extract Data_Customer sheet using fast iter_rows bulk read."""
+
+def iter_customers(wb, date_lookup: dict, label: str):
+    """Yield Data_Customer records (SCHEMAS["customers"] order) using fast
+    iter_rows bulk read."""
     print(f"  [{label}] Reading Data_Customer headers...", flush=True)
     ws = wb["Data_Customer"]
 
@@ -198,7 +263,7 @@ def extract_customers(wb, date_lookup: dict, label: str) -> pd.DataFrame:
 
     if not fy_row or not wk_row:
         print(f"  [{label}] ERROR: Could not read customer header rows")
-        return pd.DataFrame()
+        return
 
     # Find where week data starts (first col with a valid FY int in row 14)
     week_map = []
@@ -223,11 +288,11 @@ def extract_customers(wb, date_lookup: dict, label: str) -> pd.DataFrame:
 
     print(f"  [{label}] Found {len(week_map)} valid customer week columns", flush=True)
     if not week_map:
-        return pd.DataFrame()
+        return
 
     # Read data rows (start at row 16)
     # Customer metadata: col 6=store (0-based), col 7=channel, col 8=measure
-    all_rows = []
+    records = 0
     row_count = 0
     for row in ws.iter_rows(min_row=16, values_only=True):
         store = row[6] if len(row) > 6 else None   # Company Full Name
@@ -252,14 +317,12 @@ def extract_customers(wb, date_lookup: dict, label: str) -> pd.DataFrame:
             if val_float == 0:
                 continue
 
-            all_rows.append((store_s, channel, measure, we_date, val_float))
+            yield (store_s, channel, measure, we_date, val_float)
+            records += 1
 
         row_count += 1
 
-    cols = ["store", "channel", "measure", "week_ending", "value"]
-    df = pd.DataFrame(all_rows, columns=cols)
-    print(f"  [{label}] Customers: {row_count} data rows → {len(df):,} records", flush=True)
-    return df
+    print(f"  [{label}] Customers: {row_count} data rows → {records:,} records", flush=True)
 
 
 def extract_stores(sales_df: pd.DataFrame) -> pd.DataFrame:
@@ -306,127 +369,280 @@ def extract_departments(sales_df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(rows).drop_duplicates().sort_values(["department_code", "major_group_code"])
 
 
-def main():
+# ---------------------------------------------------------------------------
+# PARTS (one worker process per workbook sheet)
+# ---------------------------------------------------------------------------
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def part_path(parts_dir: Path, label: str, part: str) -> Path:
+    return parts_dir / f"{label}.{part}.db"
+
+
+def _write_part(out_path: Path, part: str, rows) -> int:
+    """Stream rows into a part database in bulk batches; the file only
+    appears (os.replace) once complete."""
+    table, columns = SCHEMAS[part]
+    tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(tmp))
+    count = 0
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f"CREATE TABLE {table} ({_column_defs(columns)})")
+        insert = (f"INSERT INTO {table} VALUES "
+                  f"({','.join('?' * len(columns))})")
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, BATCH_ROWS))
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+            count += len(batch)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, out_path)
+    return count
+
+
+def extract_part(label: str, path: Path, part: str, out_path: Path) -> int:
+    """Worker: parse one sheet of one workbook into its part database.
+    Every part reads the (small) Ref sheet for the week-ending lookup."""
+    wb = openpyxl.load_workbook(str(path), read_only=True, data_only=True)
+    try:
+        ref = extract_ref(wb, label)
+        if part == "ref":
+            rows = _records(ref[[c for c, _ in SCHEMAS["ref"][1]]])
+        elif part == "sales":
+            rows = iter_sales(wb, build_date_lookup(ref), label)
+        else:
+            rows = iter_customers(wb, build_date_lookup(ref), label)
+        return _write_part(out_path, part, rows)
+    finally:
+        wb.close()
+
+
+def extract_parts(workbooks: dict, parts_dir: Path, force: bool = False,
+                  workers: Optional[int] = None) -> tuple:
+    """Bring every workbook's parts up to date, in parallel.
+
+    A workbook whose checksum matches the manifest (and whose parts all
+    exist) is skipped. Returns (manifest, labels that were re-extracted).
+    """
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = parts_dir / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    changed = {}
+    for label, path in workbooks.items():
+        checksum = file_checksum(path)
+        entry = manifest.get(label, {})
+        current = (entry.get("sha256") == checksum and all(
+            part_path(parts_dir, label, part).exists() for part in SCHEMAS))
+        if current and not force:
+            print(f"  [{label}] Unchanged ({checksum[:12]}), reusing parts",
+                  flush=True)
+        else:
+            changed[label] = checksum
+
+    tasks = [(label, workbooks[label], part,
+              part_path(parts_dir, label, part))
+             for label in changed for part in SCHEMAS]
+    counts = {}
+    if tasks:
+        workers = workers or min(len(tasks), os.cpu_count() or 1)
+        print(f"  Extracting {len(tasks)} sheets with {workers} workers...",
+              flush=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(extract_part, *task): task for task in tasks}
+            for future in as_completed(futures):
+                label, _, part, _ = futures[future]
+                counts[(label, part)] = future.result()
+
+    for label, checksum in changed.items():
+        manifest[label] = {
+            "path": str(workbooks[label]),
+            "sha256": checksum,
+            "rows": {part: counts[(label, part)] for part in SCHEMAS},
+        }
+    tmp = manifest_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, manifest_path)
+    return manifest, list(changed)
+
+
+# ---------------------------------------------------------------------------
+# ASSEMBLY (staging database, swapped in atomically)
+# ---------------------------------------------------------------------------
+
+def _records(df: pd.DataFrame):
+    """DataFrame rows as tuples of plain Python values (NaN -> None)."""
+    return df.astype(object).where(df.notna(), None).itertuples(
+        index=False, name=None)
+
+
+def _column_defs(columns) -> str:
+    return ", ".join(f"{name} {kind}" for name, kind in columns)
+
+
+def _carry_over(conn: sqlite3.Connection, live_path: Path) -> list:
+    """Copy every table this script does not own (market_share,
+    product_lines, ...) and its indexes from the live database."""
+    if not live_path.exists():
+        return []
+    conn.execute("ATTACH DATABASE ? AS live", (str(live_path),))
+    objects = conn.execute(
+        "SELECT type, name, tbl_name, sql FROM live.sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'table' DESC").fetchall()
+    kept = []
+    for kind, name, table, sql in objects:
+        if table in OWNED_TABLES or kind not in ("table", "index", "view"):
+            continue
+        conn.execute(sql)
+        if kind == "table":
+            conn.execute(f'INSERT INTO main."{name}" SELECT * FROM live."{name}"')
+            kept.append(name)
+    conn.commit()
+    conn.execute("DETACH DATABASE live")
+    return kept
+
+
+def build_database(labels: list, parts_dir: Path, db_path: Path) -> dict:
+    """Assemble the parts into a staging copy of the database and swap it
+    in with one os.replace. Readers see the old database or the new one,
+    never a half-built table. Returns row counts."""
+    staging = db_path.with_name(db_path.name + ".staging")
+    staging.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(staging))
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")  # scratch file until the swap
+        conn.execute("PRAGMA synchronous = OFF")
+        kept = _carry_over(conn, db_path)
+        for table, columns in SCHEMAS.values():
+            conn.execute(f"CREATE TABLE {table} ({_column_defs(columns)})")
+
+        # Bulk copy of the parts, in workbook order
+        ref_frames = []
+        for label in labels:
+            for part, (table, _) in SCHEMAS.items():
+                conn.execute("ATTACH DATABASE ? AS part",
+                             (str(part_path(parts_dir, label, part)),))
+                if part == "ref":
+                    ref_frames.append(pd.read_sql_query(
+                        f"SELECT * FROM part.{table}", conn))
+                else:
+                    conn.execute(f"INSERT INTO main.{table} "
+                                 f"SELECT * FROM part.{table}")
+                conn.commit()
+                conn.execute("DETACH DATABASE part")
+
+        # Fiscal calendar: first workbook wins for a (year, week)
+        ref_all = pd.concat(ref_frames).drop_duplicates(
+            subset=["financial_year", "fin_week_of_year"], keep="first"
+        ).sort_values("sequence")
+        conn.executemany(
+            f"INSERT INTO fiscal_calendar VALUES "
+            f"({','.join('?' * len(ref_all.columns))})", _records(ref_all))
+
+        stores_df = extract_stores(pd.read_sql_query(
+            "SELECT DISTINCT store FROM sales", conn))
+        depts_df = extract_departments(pd.read_sql_query(
+            "SELECT DISTINCT department, major_group FROM sales", conn))
+        stores_df.to_sql("stores", conn, index=False)
+        depts_df.to_sql("departments", conn, index=False)
+
+        # Indexes after the load: one sorted build each
+        print("  Creating indexes...", flush=True)
+        for statement in INDEXES:
+            conn.execute(statement)
+        conn.commit()
+
+        # Wide weekly facts the dashboards read (clustered by week)
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("fiscal_calendar", "sales", "customers",
+                                "stores", "departments")}
+        counts["sales_weekly"] = build_weekly_sales(conn)
+        counts["kept"] = kept
+        conn.execute("ANALYZE")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        staging.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    if db_path.exists():
+        backup = db_path.with_suffix(".db.bak")
+        shutil.copy2(db_path, backup)
+        print(f"  Backed up existing DB to {backup.name}", flush=True)
+    os.replace(staging, db_path)
+    return counts
+
+
+def main(workbooks: Optional[dict] = None, db_path: Path = DB_PATH,
+         parts_dir: Path = PARTS_DIR, force: bool = False,
+         workers: Optional[int] = None) -> Optional[dict]:
+    """Extract changed workbooks and swap in the rebuilt database.
+    Returns row counts, or None when nothing changed."""
+    workbooks = workbooks or WORKBOOKS
     print("=" * 60, flush=True)
     print("Harris Farm Hub — Full Data Extraction", flush=True)
     print("=" * 60, flush=True)
 
-    for f in [NSW_FILE, QLD_FILE]:
-        if not f.exists():
+    for f in workbooks.values():
+        if not Path(f).exists():
             print(f"ERROR: {f} not found")
             sys.exit(1)
 
-    DATA_DIR.mkdir(exist_ok=True)
-
-    # Backup existing DB
-    if DB_PATH.exists():
-        backup = DB_PATH.with_suffix(".db.bak")
-        import shutil
-        shutil.copy2(DB_PATH, backup)
-        print(f"Backed up existing DB to {backup.name}", flush=True)
-
-    # --- NSW ---
-    print("\n--- NSW ---", flush=True)
-    print("Loading workbook...", flush=True)
-    wb_nsw = openpyxl.load_workbook(str(NSW_FILE), read_only=True, data_only=True)
-
-    ref_nsw = extract_ref(wb_nsw, "NSW")
-    date_lookup_nsw = build_date_lookup(ref_nsw)
-    sales_nsw = extract_sales(wb_nsw, date_lookup_nsw, "NSW")
-    customers_nsw = extract_customers(wb_nsw, date_lookup_nsw, "NSW")
-    wb_nsw.close()
-
-    # --- QLD ---
-    print("\n--- QLD ---", flush=True)
-    print("Loading workbook...", flush=True)
-    wb_qld = openpyxl.load_workbook(str(QLD_FILE), read_only=True, data_only=True)
-
-    ref_qld = extract_ref(wb_qld, "QLD")
-    date_lookup_qld = build_date_lookup(ref_qld)
-    sales_qld = extract_sales(wb_qld, date_lookup_qld, "QLD")
-    customers_qld = extract_customers(wb_qld, date_lookup_qld, "QLD")
-    wb_qld.close()
-
-    # --- Merge ---
-    print("\n--- Merging ---", flush=True)
-    ref_all = pd.concat([ref_nsw, ref_qld]).drop_duplicates(
-        subset=["financial_year", "fin_week_of_year"], keep="first"
-    ).sort_values("sequence").reset_index(drop=True)
-    print(f"Fiscal calendar: {len(ref_all)} rows", flush=True)
-
-    sales_all = pd.concat([sales_nsw, sales_qld], ignore_index=True)
-    print(f"Sales: {len(sales_all):,} total records", flush=True)
-    print(f"  Stores: {sales_all['store'].nunique()}", flush=True)
-    print(f"  Measures: {sorted(sales_all['measure'].unique())}", flush=True)
-
-    customers_all = pd.concat([customers_nsw, customers_qld], ignore_index=True)
-    print(f"Customers: {len(customers_all):,} total records", flush=True)
-
-    stores_df = extract_stores(sales_all)
-    print(f"Stores: {len(stores_df)} stores", flush=True)
-
-    depts_df = extract_departments(sales_all)
-    print(f"Departments: {len(depts_df)} dept/major-group combos", flush=True)
-
-    # --- Write to SQLite ---
-    print("\n--- Writing to SQLite ---", flush=True)
-    conn = sqlite3.connect(str(DB_PATH))
-
-    conn.execute("DROP TABLE IF EXISTS fiscal_calendar")
-    conn.execute("DROP TABLE IF EXISTS sales")
-    conn.execute("DROP TABLE IF EXISTS customers")
-    conn.execute("DROP TABLE IF EXISTS stores")
-    conn.execute("DROP TABLE IF EXISTS departments")
-
-    ref_all.to_sql("fiscal_calendar", conn, index=False)
-    print(f"  fiscal_calendar: {len(ref_all)} rows written", flush=True)
-
-    sales_all.to_sql("sales", conn, index=False, chunksize=50000)
-    print(f"  sales: {len(sales_all):,} rows written", flush=True)
-
-    customers_all.to_sql("customers", conn, index=False)
-    print(f"  customers: {len(customers_all):,} rows written", flush=True)
-
-    stores_df.to_sql("stores", conn, index=False)
-    print(f"  stores: {len(stores_df)} rows written", flush=True)
-
-    depts_df.to_sql("departments", conn, index=False)
-    print(f"  departments: {len(depts_df)} rows written", flush=True)
-
-    # Keep existing tables
-    existing = [r[0] for r in conn.execute(
-        "SELECT name FROM sqlite_master WHERE type='table'"
-    ).fetchall()]
-    for t in ["market_share", "product_lines"]:
-        if t in existing:
-            count = conn.execute(f"SELECT COUNT(*) FROM [{t}]").fetchone()[0]
-            print(f"  {t}: {count} rows (kept as-is)", flush=True)
-
-    # Create indexes
-    print("\n  Creating indexes...", flush=True)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_store ON sales(store)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_week ON sales(week_ending)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_measure ON sales(measure)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_dept ON sales(department)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_store ON customers(store)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_week ON customers(week_ending)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_fc_fy_wk ON fiscal_calendar(financial_year, fin_week_of_year)")
-    print("  Done.", flush=True)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    conn.commit()
-    conn.close()
+    print("\n--- Extracting workbooks ---", flush=True)
+    manifest, changed = extract_parts(workbooks, parts_dir, force, workers)
+    if not changed and db_path.exists():
+        print("\nAll workbooks unchanged — database left as-is.", flush=True)
+        return None
+
+    print("\n--- Building staging database ---", flush=True)
+    counts = build_database(list(workbooks), parts_dir, db_path)
+    for t in counts["kept"]:
+        print(f"  {t}: kept as-is", flush=True)
 
     # --- Summary ---
     print("\n" + "=" * 60, flush=True)
     print("EXTRACTION COMPLETE", flush=True)
     print("=" * 60, flush=True)
-    db_size = DB_PATH.stat().st_size / (1024 * 1024)
-    print(f"Database: {DB_PATH} ({db_size:.1f} MB)", flush=True)
-    print(f"Sales: {len(sales_all):,} records ({sales_all['store'].nunique()} stores)", flush=True)
-    print(f"Customers: {len(customers_all):,} records", flush=True)
-    print(f"Calendar: {len(ref_all)} weeks", flush=True)
-    print(f"Stores: {len(stores_df)}, Dept combos: {len(depts_df)}", flush=True)
+    db_size = db_path.stat().st_size / (1024 * 1024)
+    print(f"Database: {db_path} ({db_size:.1f} MB)", flush=True)
+    print(f"Re-extracted: {', '.join(changed) or 'none'}", flush=True)
+    print(f"Sales: {counts['sales']:,} records "
+          f"({counts['stores']} stores), weekly: {counts['sales_weekly']:,}",
+          flush=True)
+    print(f"Customers: {counts['customers']:,} records", flush=True)
+    print(f"Calendar: {counts['fiscal_calendar']} weeks", flush=True)
+    print(f"Dept combos: {counts['departments']}", flush=True)
+    return counts
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--force", action="store_true",
+                        help="Re-extract workbooks even if unchanged")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per sheet, "
+                             "up to the CPU count)")
+    args = parser.parse_args()
+    main(force=args.force, workers=args.workers)
@@ -8,14 +8,32 @@ Tables used:
   G02  — Medians (income, rent, mortgage, household size)
   G33  — Household income distribution
   G43  — Labour force, qualifications
-  G60A — Occupation by category
+  G60B — Occupation by category (person totals)
   G62  — Method of travel to work (WFH)
   SEIFA — IRSAD decile per SA1
+
+Pipeline:
+  1. Parts: every state x table (plus SEIFA and the concordance) is one
+     task on a process pool. CSVs are read with only the columns the
+     table needs, SA1 codes as strings and measures as float64. Each
+     result is written to processed/parts/<part>.parquet; manifest.json
+     keys it by the SHA-256 of its source files and of its loader, so
+     only parts whose source (or loader) changed are rebuilt.
+  2. Join: the state frames, SEIFA and the postcode aggregation are
+     rebuilt from the cached parts (seconds), and skipped entirely when
+     no part changed.
+
+    python scripts/process_census.py [--force] [--workers N]
 """
 
+import hashlib
+import inspect
 import json
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
@@ -25,7 +43,6 @@ warnings.filterwarnings("ignore", category=UserWarning)
 BASE = Path(__file__).resolve().parent.parent / "data" / "census"
 RAW = BASE / "raw"
 OUT = BASE / "processed"
-OUT.mkdir(parents=True, exist_ok=True)
 
 STATES = {
     "NSW": BASE / "2021_NSW" / "2021 Census GCP Statistical Area 1 for NSW",
@@ -36,63 +53,84 @@ STATES = {
 # Column abbreviation varies slightly between states — state suffix changes
 STATE_SUFFIX = {"NSW": "NSW", "QLD": "QLD", "ACT": "ACT"}
 
+SA1 = "SA1_CODE_2021"
+
+G02_COLUMNS = {
+    "Median_age_persons": "median_age",
+    "Median_mortgage_repay_monthly": "median_mortgage_monthly",
+    "Median_tot_prsnl_inc_weekly": "median_personal_income_weekly",
+    "Median_rent_weekly": "median_rent_weekly",
+    "Median_tot_fam_inc_weekly": "median_family_income_weekly",
+    "Median_tot_hhd_inc_weekly": "median_hh_income_weekly",
+    "Average_household_size": "avg_household_size",
+}
+
+AGG_COLS = [
+    "median_age", "median_personal_income_weekly", "median_hh_income_weekly",
+    "median_rent_weekly", "median_mortgage_monthly", "median_family_income_weekly",
+    "avg_household_size", "pct_high_income_hh", "pct_degree",
+    "pct_professional", "pct_wfh", "labour_force_participation_pct",
+    "unemployment_pct", "seifa_irsad_score", "seifa_irsad_decile",
+]
+
+SUM_COLS = ["n_degree_total", "n_prof_managerial", "n_wfh", "hh_total"]
+
 
 def _csv(state_dir, table, state_code):
     """Resolve a Census CSV path. E.g. 2021Census_G01_NSW_SA1.csv"""
     return state_dir / f"2021Census_{table}_{state_code}_SA1.csv"
 
 
+def _read(state_dir, table, sc, columns):
+    """Read only `columns` of a DataPack CSV: SA1 code as a string, every
+    measure as float64 (no type inference, no full-width load)."""
+    wanted = set(columns)
+    return pd.read_csv(
+        _csv(state_dir, table, sc),
+        usecols=lambda c: c == SA1 or c in wanted,
+        dtype={SA1: str, **{c: "float64" for c in columns}},
+    )
+
+
 def load_g01(state_dir, sc):
     """G01 — Total persons, age bands."""
-    df = pd.read_csv(_csv(state_dir, "G01", sc), low_memory=False)
-    return df[["SA1_CODE_2021", "Tot_P_P"]].rename(
+    df = _read(state_dir, "G01", sc, ["Tot_P_P"])
+    return df[[SA1, "Tot_P_P"]].rename(
         columns={"Tot_P_P": "total_population"}
     )
 
 
 def load_g02(state_dir, sc):
     """G02 — Medians and averages."""
-    df = pd.read_csv(_csv(state_dir, "G02", sc), low_memory=False)
-    return df.rename(columns={
-        "Median_age_persons": "median_age",
-        "Median_mortgage_repay_monthly": "median_mortgage_monthly",
-        "Median_tot_prsnl_inc_weekly": "median_personal_income_weekly",
-        "Median_rent_weekly": "median_rent_weekly",
-        "Median_tot_fam_inc_weekly": "median_family_income_weekly",
-        "Median_tot_hhd_inc_weekly": "median_hh_income_weekly",
-        "Average_household_size": "avg_household_size",
-    })
+    df = _read(state_dir, "G02", sc, list(G02_COLUMNS))
+    return df.rename(columns=G02_COLUMNS)
 
 
 def load_g33(state_dir, sc):
     """G33 — Household income distribution. Derive pct_high_income_hh (>$2500/wk = $130K+/yr)."""
-    df = pd.read_csv(_csv(state_dir, "G33", sc), low_memory=False)
+    header = pd.read_csv(_csv(state_dir, "G33", sc), nrows=0).columns
     # High income bands: $2,500-$2,999, $3,000-$3,499, $3,500-$3,999, $4,000+
-    high_cols = [c for c in df.columns if any(
+    high_cols = [c for c in header if any(
         x in c for x in ["HI_2500_2999", "HI_3000_3499", "HI_3500_3999", "HI_4000_more"]
     ) and c.endswith("_Tot")]
-    total_col = [c for c in df.columns if c.startswith("Tot_") and c.endswith("_Tot")
-                 or c == "Total_Total"]
-    # Find the total households column
-    all_tot_cols = [c for c in df.columns if "Tot" in c and "HI_" not in c
-                    and "Neg" not in c and c != "SA1_CODE_2021"]
-    # The last total column should be the grand total
+    # The grand total households column
     # ABS naming: Partial_income_stated_Tot, All_incomes_not_stated_Tot, Tot_Tot
     tot_col_name = None
-    for c in df.columns:
+    for c in header:
         if c in ("Tot_Tot", "Total_Total"):
             tot_col_name = c
             break
     if tot_col_name is None:
         # Try finding it
-        for c in df.columns:
+        for c in header:
             if c.endswith("_Tot") and c.startswith("Tot"):
                 tot_col_name = c
                 break
     if tot_col_name is None:
-        tot_col_name = df.columns[-1]  # fallback
+        tot_col_name = header[-1]  # fallback
 
-    result = df[["SA1_CODE_2021"]].copy()
+    df = _read(state_dir, "G33", sc, high_cols + [tot_col_name])
+    result = df[[SA1]].copy()
     result["hh_high_income"] = df[high_cols].sum(axis=1) if high_cols else 0
     result["hh_total"] = df[tot_col_name]
     result["pct_high_income_hh"] = np.where(
@@ -100,13 +138,17 @@ def load_g33(state_dir, sc):
         result["hh_high_income"] / result["hh_total"] * 100,
         np.nan
     )
-    return result[["SA1_CODE_2021", "pct_high_income_hh", "hh_total"]]
+    return result[[SA1, "pct_high_income_hh", "hh_total"]]
 
 
 def load_g43(state_dir, sc):
     """G43 — Labour force status + qualifications."""
-    df = pd.read_csv(_csv(state_dir, "G43", sc), low_memory=False)
-    result = df[["SA1_CODE_2021"]].copy()
+    df = _read(state_dir, "G43", sc, [
+        "P_15_yrs_over_P", "Percnt_LabForc_prticipation_P",
+        "Percent_Unem_loyment_P", "non_sch_qual_PostGrad_Dgre_P",
+        "non_sch_qual_Gr_Dip_Gr_Crt_P", "non_sch_qual_Bchelr_Degree_P",
+    ])
+    result = df[[SA1]].copy()
 
     # Population 15+
     result["pop_15_plus"] = df["P_15_yrs_over_P"]
@@ -125,7 +167,7 @@ def load_g43(state_dir, sc):
         result["n_degree_total"] / result["pop_15_plus"] * 100,
         np.nan
     )
-    return result[["SA1_CODE_2021", "pop_15_plus", "labour_force_participation_pct",
+    return result[[SA1, "pop_15_plus", "labour_force_participation_pct",
                     "unemployment_pct", "pct_degree", "n_degree_total"]]
 
 
@@ -133,8 +175,9 @@ def load_g60b(state_dir, sc):
     """G60B — Occupation by category (Person totals). Derive pct_professional (Managers + Professionals).
     G60A has M/F breakdown; G60B has P (person) totals with columns:
       P_Tot_Managers, P_Tot_Professionals, P_Tot_Tot etc."""
-    df = pd.read_csv(_csv(state_dir, "G60B", sc), low_memory=False)
-    result = df[["SA1_CODE_2021"]].copy()
+    df = _read(state_dir, "G60B", sc, ["P_Tot_Managers", "P_Tot_Professionals",
+                                        "P_Tot_Tot"])
+    result = df[[SA1]].copy()
     result["n_managers"] = df["P_Tot_Managers"]
     result["n_professionals"] = df["P_Tot_Professionals"]
     result["n_total_employed_occ"] = df["P_Tot_Tot"]
@@ -144,13 +187,13 @@ def load_g60b(state_dir, sc):
         result["n_prof_managerial"] / result["n_total_employed_occ"] * 100,
         np.nan
     )
-    return result[["SA1_CODE_2021", "n_prof_managerial", "n_total_employed_occ", "pct_professional"]]
+    return result[[SA1, "n_prof_managerial", "n_total_employed_occ", "pct_professional"]]
 
 
 def load_g62(state_dir, sc):
     """G62 — Method of travel to work. Derive pct_wfh."""
-    df = pd.read_csv(_csv(state_dir, "G62", sc), low_memory=False)
-    result = df[["SA1_CODE_2021"]].copy()
+    df = _read(state_dir, "G62", sc, ["Worked_home_P", "Tot_P"])
+    result = df[[SA1]].copy()
     result["n_wfh"] = df["Worked_home_P"]
     result["n_travel_total"] = df["Tot_P"]
     result["pct_wfh"] = np.where(
@@ -158,15 +201,14 @@ def load_g62(state_dir, sc):
         result["n_wfh"] / result["n_travel_total"] * 100,
         np.nan
     )
-    return result[["SA1_CODE_2021", "pct_wfh", "n_wfh"]]
+    return result[[SA1, "pct_wfh", "n_wfh"]]
 
 
-def load_seifa():
+def load_seifa(path):
     """Load SEIFA 2021 IRSAD deciles per SA1."""
-    path = RAW / "seifa_2021_sa1.xlsx"
     if not path.exists():
         print("  SEIFA file not found, skipping")
-        return pd.DataFrame(columns=["SA1_CODE_2021", "seifa_irsad_score", "seifa_irsad_decile"])
+        return pd.DataFrame(columns=[SA1, "seifa_irsad_score", "seifa_irsad_decile"])
     # Try different sheet names
     try:
         df = pd.read_excel(path, sheet_name="Table 1", header=5, engine="openpyxl")
@@ -206,7 +248,7 @@ def load_seifa():
                 break
 
     result = pd.DataFrame()
-    result["SA1_CODE_2021"] = df[sa1_col]
+    result[SA1] = df[sa1_col]
     if score_col:
         result["seifa_irsad_score"] = pd.to_numeric(df[score_col], errors="coerce")
     else:
@@ -216,18 +258,15 @@ def load_seifa():
     else:
         result["seifa_irsad_decile"] = np.nan
 
-    result = result.dropna(subset=["SA1_CODE_2021"])
-    result["SA1_CODE_2021"] = result["SA1_CODE_2021"].astype(str).str.strip()
+    result = result.dropna(subset=[SA1])
+    result[SA1] = result[SA1].astype(str).str.strip()
     return result
 
 
-def build_sa1_postcode_concordance():
+def build_sa1_postcode_concordance(mb_path, poa_path):
     """Build SA1→Postcode mapping using Mesh Block allocation files.
     Each MB belongs to exactly one SA1 and one POA (postcode area).
     """
-    mb_path = RAW / "MB_2021_AUST.xlsx"
-    poa_path = RAW / "POA_2021_AUST.xlsx"
-
     if not mb_path.exists() or not poa_path.exists():
         print("  Allocation files not found, skipping concordance")
         return pd.DataFrame()
@@ -311,145 +350,220 @@ def build_sa1_postcode_concordance():
     return sa1_poa
 
 
-def process_state(state_code):
-    """Process all Census tables for one state, return merged SA1 DataFrame."""
-    state_dir = STATES[state_code]
-    sc = STATE_SUFFIX[state_code]
-    print(f"\n{'='*60}")
-    print(f"Processing {state_code}...")
-    print(f"{'='*60}")
-
-    if not state_dir.exists():
-        print(f"  Directory not found: {state_dir}")
-        return pd.DataFrame()
-
-    # Load each table
-    print("  G01 — Population...")
-    g01 = load_g01(state_dir, sc)
-    print(f"    {len(g01):,} SA1s")
-
-    print("  G02 — Medians...")
-    g02 = load_g02(state_dir, sc)
-
-    print("  G33 — Household income...")
-    g33 = load_g33(state_dir, sc)
-
-    print("  G43 — Labour force & qualifications...")
-    g43 = load_g43(state_dir, sc)
+# State tables, in merge order (G01 is the SA1 spine)
+TABLES = {
+    "G01": load_g01,
+    "G02": load_g02,
+    "G33": load_g33,
+    "G43": load_g43,
+    "G60B": load_g60b,
+    "G62": load_g62,
+}
 
-    print("  G60B — Occupation (Person totals)...")
-    g60 = load_g60b(state_dir, sc)
 
-    print("  G62 — Travel to work / WFH...")
-    g62 = load_g62(state_dir, sc)
+# ---------------------------------------------------------------------------
+# PARTS (one worker per state x table, cached by source checksum)
+# ---------------------------------------------------------------------------
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def part_specs(states: dict, raw: Path) -> dict:
+    """part name -> (loader, args, source files)."""
+    specs = {}
+    for state, state_dir in states.items():
+        if not state_dir.exists():
+            print(f"  Directory not found: {state_dir}")
+            continue
+        sc = STATE_SUFFIX.get(state, state)
+        for table, loader in TABLES.items():
+            specs[f"{state}.{table}"] = (loader, (state_dir, sc),
+                                         [_csv(state_dir, table, sc)])
+    seifa = raw / "seifa_2021_sa1.xlsx"
+    specs["SEIFA"] = (load_seifa, (seifa,), [seifa])
+    mb, poa = raw / "MB_2021_AUST.xlsx", raw / "POA_2021_AUST.xlsx"
+    specs["concordance"] = (build_sa1_postcode_concordance, (mb, poa), [mb, poa])
+    return specs
+
+
+def part_key(loader, sources) -> str:
+    """SHA-256 of the loader's code and of every source file, so a fixed
+    CSV or a fixed loader invalidates just that part."""
+    digest = hashlib.sha256(inspect.getsource(loader).encode())
+    for path in sources:
+        digest.update(file_checksum(path).encode() if path.exists()
+                      else b"missing")
+    return digest.hexdigest()
+
+
+def part_path(parts_dir: Path, name: str) -> Path:
+    return parts_dir / f"{name}.parquet"
+
+
+def build_part(name: str, loader, args, out_path: Path) -> int:
+    """Worker: run one loader and write its frame; the parquet only
+    appears (os.replace) once complete."""
+    print(f"  [{name}] Loading...", flush=True)
+    df = loader(*args)
+    tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, out_path)
+    print(f"  [{name}] {len(df):,} rows", flush=True)
+    return len(df)
+
+
+def build_parts(specs: dict, parts_dir: Path, force: bool = False,
+                workers: Optional[int] = None) -> list:
+    """Bring every part up to date, in parallel. A part whose key matches
+    the manifest (and whose parquet exists) is reused. Returns the names
+    of the parts that were rebuilt."""
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = parts_dir / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    changed = {}
+    for name, (loader, _, sources) in specs.items():
+        key = part_key(loader, sources)
+        entry = manifest.get(name, {})
+        if (force or entry.get("key") != key
+                or not part_path(parts_dir, name).exists()):
+            changed[name] = key
+
+    if not changed:
+        return []
+    workers = workers or min(len(changed), os.cpu_count() or 1)
+    print(f"  Rebuilding {len(changed)} of {len(specs)} parts with "
+          f"{workers} workers...", flush=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(build_part, name, specs[name][0], specs[name][1],
+                        part_path(parts_dir, name)): name
+            for name in changed}
+        for future in as_completed(futures):
+            name = futures[future]
+            manifest[name] = {"key": changed[name], "rows": future.result(),
+                              "sources": [str(p) for p in specs[name][2]]}
+
+    tmp = manifest_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, manifest_path)
+    return sorted(changed)
+
+
+# ---------------------------------------------------------------------------
+# JOIN (from cached parts)
+# ---------------------------------------------------------------------------
+
+def merge_state(parts_dir: Path, state: str) -> pd.DataFrame:
+    """All tables for one state, merged on SA1 code."""
+    merged = pd.read_parquet(part_path(parts_dir, f"{state}.G01"))
+    for table in list(TABLES)[1:]:
+        df = pd.read_parquet(part_path(parts_dir, f"{state}.{table}"))
+        merged = merged.merge(df, on=SA1, how="left")
+    merged["state"] = state
+    print(f"  {state}: {len(merged):,} SA1s × {len(merged.columns)} columns")
+    return merged
 
-    # Merge all on SA1_CODE_2021
-    merged = g01.copy()
-    for df in [g02, g33, g43, g60, g62]:
-        merged = merged.merge(df, on="SA1_CODE_2021", how="left")
 
-    merged["state"] = state_code
-    print(f"  Merged: {len(merged):,} SA1s × {len(merged.columns)} columns")
-    return merged
+def aggregate_postcodes(sa1_poa: pd.DataFrame) -> pd.DataFrame:
+    """Population-weighted postcode profile. For medians, the
+    population-weighted mean is the approximation; counts are summed."""
+    pop_col = "total_population"
+    weight = sa1_poa[pop_col].fillna(0)
+    postcode = sa1_poa["postcode"]
+    by = sa1_poa.groupby("postcode")
 
+    out = pd.DataFrame({
+        "total_population": by[pop_col].sum(),
+        "num_sa1s": by["sa1_code"].nunique(),
+    })
+    # Most common state; ties go to the first alphabetically
+    states = (sa1_poa.groupby(["postcode", "state"]).size()
+              .rename("n").reset_index()
+              .sort_values(["postcode", "n", "state"],
+                           ascending=[True, False, True])
+              .drop_duplicates("postcode").set_index("postcode")["state"])
+    out["state"] = states
+
+    for col in AGG_COLS:
+        if col not in sa1_poa.columns:
+            out[col] = np.nan
+            continue
+        mask = sa1_poa[col].notna() & (weight > 0)
+        total = (sa1_poa[col] * weight).where(mask).groupby(postcode).sum()
+        weights = weight.where(mask).groupby(postcode).sum()
+        out[col] = (total / weights.replace(0, np.nan))
+
+    for col in SUM_COLS:
+        out[col] = by[col].sum() if col in sa1_poa.columns else 0
+    return out.reset_index()
+
+
+def main(states: Optional[dict] = None, raw: Path = RAW, out: Path = OUT,
+         force: bool = False, workers: Optional[int] = None):
+    """Rebuild changed parts and the outputs. Returns the rebuilt part
+    names, or None when nothing changed and the outputs exist."""
+    states = STATES if states is None else states
+    parts_dir = out / "parts"
+    sa1_path = out / "census_sa1_demographics.parquet"
+    out.mkdir(parents=True, exist_ok=True)
 
-def main():
     print("=" * 60)
     print("ABS Census 2021 — SA1 Demographic Processing")
     print("=" * 60)
 
-    # Process each state
-    frames = []
-    for sc in STATES:
-        df = process_state(sc)
-        if not df.empty:
-            frames.append(df)
+    specs = part_specs(states, raw)
+    rebuilt = build_parts(specs, parts_dir, force=force, workers=workers)
+    if not rebuilt and sa1_path.exists():
+        print("\nNo source changed — outputs are current.")
+        return None
 
+    # Join states from the cached parts
+    frames = [merge_state(parts_dir, sc) for sc in states
+              if f"{sc}.G01" in specs]
+    frames = [df for df in frames if not df.empty]
     if not frames:
         print("\nERROR: No state data processed!")
-        return
+        return rebuilt
 
     all_sa1 = pd.concat(frames, ignore_index=True)
     print(f"\n{'='*60}")
     print(f"Combined: {len(all_sa1):,} SA1s across {all_sa1['state'].nunique()} states")
 
     # Add SEIFA
-    print("\nLoading SEIFA IRSAD...")
-    seifa = load_seifa()
+    seifa = pd.read_parquet(part_path(parts_dir, "SEIFA"))
     if not seifa.empty:
-        seifa["SA1_CODE_2021"] = seifa["SA1_CODE_2021"].astype(str)
-        all_sa1["SA1_CODE_2021"] = all_sa1["SA1_CODE_2021"].astype(str)
-        all_sa1 = all_sa1.merge(seifa, on="SA1_CODE_2021", how="left")
+        all_sa1 = all_sa1.merge(seifa, on=SA1, how="left")
         matched = all_sa1["seifa_irsad_decile"].notna().sum()
         print(f"  SEIFA matched: {matched:,} / {len(all_sa1):,} SA1s")
 
     # Save SA1-level parquet
-    sa1_path = OUT / "census_sa1_demographics.parquet"
     all_sa1.to_parquet(sa1_path, index=False)
     print(f"\nSaved SA1-level: {sa1_path} ({len(all_sa1):,} rows)")
 
-    # Build SA1→Postcode concordance
-    print("\nBuilding SA1→Postcode concordance...")
-    concordance = build_sa1_postcode_concordance()
+    concordance = pd.read_parquet(part_path(parts_dir, "concordance"))
     if not concordance.empty:
-        conc_path = OUT / "sa1_postcode_concordance.parquet"
+        conc_path = out / "sa1_postcode_concordance.parquet"
         concordance.to_parquet(conc_path, index=False)
         print(f"Saved concordance: {conc_path}")
 
-        # Aggregate to postcode level (population-weighted where appropriate)
-        print("\nAggregating to postcode level...")
-        all_sa1["SA1_CODE_2021"] = all_sa1["SA1_CODE_2021"].astype(str)
-        concordance["sa1_code"] = concordance["sa1_code"].astype(str)
-
         # Join SA1 demographics to concordance
+        print("\nAggregating to postcode level...")
         sa1_poa = concordance.merge(
-            all_sa1, left_on="sa1_code", right_on="SA1_CODE_2021", how="inner"
+            all_sa1, left_on="sa1_code", right_on=SA1, how="inner"
         )
         print(f"  Joined: {len(sa1_poa):,} SA1-postcode pairs with demographics")
 
-        # Population-weighted aggregation to postcode
-        # For medians, use population-weighted mean as approximation
-        pop_col = "total_population"
-        sa1_poa["weight"] = sa1_poa[pop_col].fillna(0)
-
-        def weighted_mean(group, col):
-            w = group["weight"]
-            v = group[col]
-            mask = v.notna() & (w > 0)
-            if mask.sum() == 0:
-                return np.nan
-            return np.average(v[mask], weights=w[mask])
-
-        agg_cols = [
-            "median_age", "median_personal_income_weekly", "median_hh_income_weekly",
-            "median_rent_weekly", "median_mortgage_monthly", "median_family_income_weekly",
-            "avg_household_size", "pct_high_income_hh", "pct_degree",
-            "pct_professional", "pct_wfh", "labour_force_participation_pct",
-            "unemployment_pct", "seifa_irsad_score", "seifa_irsad_decile",
-        ]
-
-        postcode_rows = []
-        for postcode, grp in sa1_poa.groupby("postcode"):
-            row = {"postcode": postcode}
-            row["total_population"] = grp[pop_col].sum()
-            row["num_sa1s"] = grp["sa1_code"].nunique()
-            row["state"] = grp["state"].mode().iloc[0] if len(grp) > 0 else ""
-
-            for col in agg_cols:
-                if col in grp.columns:
-                    row[col] = weighted_mean(grp, col)
-                else:
-                    row[col] = np.nan
-
-            # Sum counts for degree + professional
-            row["n_degree_total"] = grp["n_degree_total"].sum() if "n_degree_total" in grp.columns else 0
-            row["n_prof_managerial"] = grp["n_prof_managerial"].sum() if "n_prof_managerial" in grp.columns else 0
-            row["n_wfh"] = grp["n_wfh"].sum() if "n_wfh" in grp.columns else 0
-            row["hh_total"] = grp["hh_total"].sum() if "hh_total" in grp.columns else 0
-            postcode_rows.append(row)
-
-        postcode_df = pd.DataFrame(postcode_rows)
-        poa_path = OUT / "census_postcode_demographics.parquet"
+        postcode_df = aggregate_postcodes(sa1_poa)
+        poa_path = out / "census_postcode_demographics.parquet"
         postcode_df.to_parquet(poa_path, index=False)
         print(f"Saved postcode-level: {poa_path} ({len(postcode_df):,} postcodes)")
 
@@ -459,22 +573,30 @@ def main():
         print(f"{'='*60}")
         for col in ["median_hh_income_weekly", "pct_professional", "pct_degree",
                      "pct_wfh", "seifa_irsad_decile", "pct_high_income_hh"]:
-            if col in postcode_df.columns:
-                vals = postcode_df[col].dropna()
-                if len(vals) > 0:
-                    print(f"  {col}: mean={vals.mean():.1f}, median={vals.median():.1f}, "
-                          f"min={vals.min():.1f}, max={vals.max():.1f}")
-
-    # Also save a CSV for easy inspection
-    csv_path = OUT / "census_postcode_demographics.csv"
-    if 'postcode_df' in dir():
+            vals = postcode_df[col].dropna()
+            if len(vals) > 0:
+                print(f"  {col}: mean={vals.mean():.1f}, median={vals.median():.1f}, "
+                      f"min={vals.min():.1f}, max={vals.max():.1f}")
+
+        # Also save a CSV for easy inspection
+        csv_path = out / "census_postcode_demographics.csv"
         postcode_df.round(2).to_csv(csv_path, index=False)
         print(f"\nAlso saved CSV: {csv_path}")
 
     print(f"\n{'='*60}")
     print("DONE — Phase 1 Census processing complete")
     print(f"{'='*60}")
+    return rebuilt
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every part even if its sources are unchanged")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per changed part, "
+                             "up to the CPU count)")
+    args = parser.parse_args()
+    main(force=args.force, workers=args.workers)
@@ -59,6 +59,16 @@ else
     echo "  API failed — check logs/api.log"
 fi
 
+# ---- Derived data builds (niced, own process, repeats daily) ----
+echo ""
+echo "Starting derived data builds (logs/builds.log)..."
+(
+    while true; do
+        nice -n 10 python3 backend/derived_build.py || true
+        sleep ${DERIVED_BUILD_INTERVAL:-86400}
+    done
+) >> logs/builds.log 2>&1 &
+
 # ---- Start Single Multi-Page Streamlit App ----
 echo ""
 echo "Starting Hub (port 8500)..."
@@ -0,0 +1,79 @@
+"""Shared test set-up: telemetry kept out of data/, and synthetic sales
+parquet with a TransactionStore over it for the transaction-layer tests."""
+
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The app's telemetry flusher (started by TestClient) would otherwise write
+# to the real data/telemetry.db; set before anything imports telemetry
+os.environ.setdefault("HUB_TELEMETRY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="hub-telemetry-"), "telemetry.db"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from transaction_layer import TransactionStore
+
+# Derived build directories the store reads, under tmp_path. Tests that run
+# a build pass it the same directory, e.g. derived_dir=tmp_path / "presence"
+DERIVED_DIRS = {"presence_dir": "presence", "enriched_dir": "enriched",
+                "customer_dir": "customers", "preview_dir": "preview"}
+
+
+def _receipts(start, days, stores, seed, n=6000, max_lines=3,
+              plus=("4001", "4002", "4003")):
+    """``n`` receipts of 1..max_lines lines spread over ``days`` from
+    ``start``, assigned to ``stores`` round-robin."""
+    rng = np.random.default_rng(seed)
+    lines = rng.integers(1, max_lines + 1, n)
+    receipt = np.repeat(np.arange(n), lines)
+    minute = np.repeat(np.sort(rng.integers(0, days * 24 * 60, n)), lines)
+    return pd.DataFrame({
+        "Store_ID": np.array(stores)[receipt % len(stores)],
+        "Reference2": ["R{}-{}".format(seed, r) for r in receipt],
+        "PLUItem_ID": rng.choice(list(plus), len(receipt)),
+        "SaleDate": [start + timedelta(minutes=int(m)) for m in minute],
+        "Quantity": rng.integers(1, 4, len(receipt)).astype(float),
+        "SalesIncGST": np.round(rng.uniform(-5, 30, len(receipt)), 2),
+        "EstimatedCOGS": np.round(-rng.uniform(0.5, 20, len(receipt)), 2),
+        "GST": rng.choice([0.0, 1.0], len(receipt)),
+    })
+
+
+@pytest.fixture
+def synthetic_receipts():
+    """Generator of multi-line receipts (see ``_receipts``)."""
+    return _receipts
+
+
+@pytest.fixture
+def sales_store(tmp_path):
+    """Factory: write {fiscal_year: DataFrame} as parquet under tmp_path and
+    return a TransactionStore over it, with every derived build directory
+    under tmp_path too (see DERIVED_DIRS)."""
+    def make(frames, row_group_size=None):
+        files = {}
+        for fy, df in frames.items():
+            files[fy] = tmp_path / "{}.parquet".format(fy)
+            df.to_parquet(files[fy], index=False,
+                          row_group_size=row_group_size)
+        return TransactionStore(
+            parquet_files=files,
+            **{k: tmp_path / v for k, v in DERIVED_DIRS.items()})
+    return make
+
+
+@pytest.fixture
+def assert_same():
+    """Compare two {key: DataFrame} results key by key."""
+    def check(expected, actual):
+        assert expected.keys() == actual.keys()
+        for key, df in expected.items():
+            pd.testing.assert_frame_equal(df, actual[key], check_dtype=False,
+                                          rtol=1e-9, obj=str(key))
+    return check
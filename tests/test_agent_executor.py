@@ -4,6 +4,8 @@ import os
 import sys
 import sqlite3
 import json
+import threading
+import time
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
@@ -401,3 +403,122 @@ class TestImprovementTrigger:
         ).fetchone()[0]
         conn.close()
         assert count >= 1
+
+
+# ---------------------------------------------------------------------------
+# Concurrent Queue Execution Tests
+# ---------------------------------------------------------------------------
+
+class TestConcurrentExecution:
+    """Approved proposals run through the job queue on a worker pool."""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self, tmp_path, monkeypatch):
+        import agent_executor
+        import job_queue
+        self.db_path = str(tmp_path / "hub.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE agent_proposals (id INTEGER PRIMARY KEY "
+            "AUTOINCREMENT, agent_name TEXT NOT NULL, task_type TEXT NOT NULL "
+            "DEFAULT 'ANALYSIS', description TEXT NOT NULL, proposed_changes "
+            "TEXT, risk_level TEXT DEFAULT 'MEDIUM', estimated_impact TEXT, "
+            "status TEXT DEFAULT 'PENDING', created_at TEXT DEFAULT "
+            "(datetime('now')), reviewed_at TEXT, reviewer TEXT, "
+            "reviewer_notes TEXT, execution_result TEXT)")
+        conn.commit()
+        conn.close()
+        monkeypatch.setattr(agent_executor.config, "HUB_DB", self.db_path)
+        monkeypatch.setattr(job_queue, "RETRY_BASE_SECONDS", 0)
+        self.executor = agent_executor
+        self.active, self.peak = {}, {}
+        self.lock = threading.Lock()
+
+    def _approve(self, agent, n):
+        conn = sqlite3.connect(self.db_path)
+        for i in range(n):
+            conn.execute(
+                "INSERT INTO agent_proposals (agent_name, description, status) "
+                "VALUES (?, ?, 'APPROVED')", (agent, "Job {}".format(i)))
+        conn.commit()
+        conn.close()
+
+    def _statuses(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM agent_proposals GROUP BY status"
+        ).fetchall()
+        conn.close()
+        return dict(rows)
+
+    def _slow_execute(self, seconds, fail_first=0):
+        attempts = {}
+
+        def execute(proposal):
+            kind = self.executor.route_proposal(proposal)[0]
+            with self.lock:
+                attempts[proposal["id"]] = attempts.get(proposal["id"], 0) + 1
+                if attempts[proposal["id"]] <= fail_first:
+                    raise sqlite3.OperationalError("database is locked")
+                self.active[kind] = self.active.get(kind, 0) + 1
+                self.peak[kind] = max(self.peak.get(kind, 0), self.active[kind])
+            time.sleep(seconds)
+            with self.lock:
+                self.active[kind] -= 1
+            self.executor.mark_completed(proposal["id"], "ok")
+        return execute
+
+    def test_ten_proposals_run_concurrently(self, monkeypatch):
+        monkeypatch.setattr(self.executor, "execute_proposal",
+                            self._slow_execute(0.4))
+        monkeypatch.setattr(self.executor, "EXECUTOR_WORKERS", 10)
+        self._approve("DemandAnalyzer", 10)
+        start = time.monotonic()
+        assert self.executor.run_once() == 10
+        assert time.monotonic() - start < 2.0  # serial: 10 x (0.4 + 0.5)
+        assert self._statuses() == {"COMPLETED": 10}
+        assert self.executor.run_once() == 0  # nothing left, no re-runs
+
+    def test_heavy_kinds_respect_concurrency_limit(self, monkeypatch):
+        monkeypatch.setattr(self.executor, "execute_proposal",
+                            self._slow_execute(0.1))
+        self._approve("BasketAnalyzer", 3)
+        self._approve("DemandAnalyzer", 3)
+        assert self.executor.run_once() == 6
+        assert self.peak["basket_analysis"] == 1
+        assert self.peak["demand_pattern"] > 1
+
+    def test_retries_then_fails(self, monkeypatch):
+        monkeypatch.setattr(self.executor, "execute_proposal",
+                            self._slow_execute(0, fail_first=1))
+        self._approve("DemandAnalyzer", 2)
+        assert self.executor.run_once() == 2
+        assert self._statuses() == {"COMPLETED": 2}
+
+        monkeypatch.setattr(self.executor, "execute_proposal",
+                            self._slow_execute(0, fail_first=99))
+        self._approve("PriceAnalyzer", 1)
+        assert self.executor.run_once() == 0
+        assert self._statuses() == {"COMPLETED": 2, "FAILED": 1}
+
+    def test_approval_wakes_a_waiting_executor(self, monkeypatch):
+        monkeypatch.setattr(self.executor, "execute_proposal",
+                            self._slow_execute(0))
+        stop = threading.Event()
+        executor = self.executor.ProposalExecutor(db_path=self.db_path)
+        thread = threading.Thread(target=executor.run, kwargs={"stop": stop})
+        thread.start()
+        try:
+            time.sleep(0.2)  # idle and waiting
+            self._approve("DemandAnalyzer", 1)
+            self.executor.enqueue_proposal(1)
+            deadline = time.monotonic() + 3
+            while (self._statuses().get("COMPLETED") != 1
+                   and time.monotonic() < deadline):
+                time.sleep(0.02)
+            assert self._statuses() == {"COMPLETED": 1}
+        finally:
+            stop.set()
+            self.executor.notify()
+            thread.join(5)
+        assert not thread.is_alive()
@@ -0,0 +1,152 @@
+"""Tests for buffered page-view logging and the daily rollups."""
+
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import analytics_engine
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "hub.db")
+    conn = sqlite3.connect(path)
+    analytics_engine.init_analytics_tables(conn)
+    conn.close()
+    yield path
+    analytics_engine.flush(path)
+
+
+def _count(db, table):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM " + table).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _seed_history(db):
+    """Raw views over the past week, as an older Hub would have logged."""
+    # An hour back, so every seeded view is older than one logged now
+    now = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    rows = []
+    for d in range(7):
+        at = now - timedelta(days=d)
+        for u in range(d + 1):
+            for slug in ("home", "sales", "home")[:1 + u % 3]:
+                rows.append(("u{}".format(u), "u{}@hfm.com.au".format(u), slug,
+                             "admin" if u == 0 else "user",
+                             (at + timedelta(minutes=u)).strftime(
+                                 "%Y-%m-%d %H:%M:%S")))
+    conn = sqlite3.connect(db)
+    conn.executemany("INSERT INTO page_views (user_id, user_email, page_slug, "
+                     "user_role, created_at) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def _from_raw(db, first_day):
+    """The reports computed straight from page_views."""
+    conn = sqlite3.connect(db)
+    q = lambda sql: conn.execute(sql, (first_day,)).fetchall()
+    out = {
+        "totals": q("SELECT COUNT(DISTINCT user_id), COUNT(*) FROM page_views "
+                    "WHERE date(created_at) >= ?")[0],
+        "pages": q("SELECT page_slug, COUNT(*), COUNT(DISTINCT user_id) "
+                   "FROM page_views WHERE date(created_at) >= ? "
+                   "GROUP BY page_slug ORDER BY 2 DESC"),
+        "days": q("SELECT date(created_at), COUNT(*), COUNT(DISTINCT user_id) "
+                  "FROM page_views WHERE date(created_at) >= ? "
+                  "GROUP BY 1 ORDER BY 1"),
+        "roles": q("SELECT user_role, COUNT(*), COUNT(DISTINCT user_id) "
+                   "FROM page_views WHERE date(created_at) >= ? "
+                   "GROUP BY user_role ORDER BY 2 DESC"),
+        "users": q("SELECT user_id, COUNT(*), COUNT(DISTINCT page_slug), "
+                   "MAX(created_at) FROM page_views "
+                   "WHERE date(created_at) >= ? GROUP BY user_id ORDER BY 1"),
+    }
+    conn.close()
+    return out
+
+
+class TestBuffer:
+    def test_views_are_buffered_then_written_in_one_flush(self, db):
+        for i in range(5):
+            analytics_engine.log_page_view(db, "u1", "u1@hfm.com.au",
+                                           "page{}".format(i % 2))
+        # The flusher may already have run; either way nothing is lost
+        assert analytics_engine.pending_views(db) + _count(db, "page_views") == 5
+        analytics_engine.flush(db)
+        assert analytics_engine.pending_views(db) == 0
+        assert _count(db, "page_views") == 5
+        assert _count(db, "page_view_daily") == 2
+
+    def test_full_buffer_wakes_the_flusher(self, db, monkeypatch):
+        monkeypatch.setattr(analytics_engine, "FLUSH_ROWS", 10)
+        for _ in range(10):
+            analytics_engine.log_page_view(db, "u1", "", "home")
+        deadline = time.time() + 5
+        while _count(db, "page_views") < 10 and time.time() < deadline:
+            time.sleep(0.05)
+        assert _count(db, "page_views") == 10
+
+    def test_failed_flush_keeps_views(self, tmp_path):
+        missing = str(tmp_path / "no" / "such" / "hub.db")
+        analytics_engine.log_page_view(missing, "u1", "", "home")
+        analytics_engine.flush(missing)
+        assert analytics_engine.pending_views(missing) == 1
+        with analytics_engine._LOCK:
+            analytics_engine._BUFFER.pop(missing, None)
+
+
+class TestRollups:
+    def test_reports_match_raw_views(self, db):
+        _seed_history(db)
+        conn = sqlite3.connect(db)
+        analytics_engine.init_analytics_tables(conn)  # backfills the rollup
+        conn.close()
+        analytics_engine.log_page_view(db, "u9", "u9@hfm.com.au", "home", "user")
+        analytics_engine.log_page_view(db, "u0", "new@hfm.com.au", "sales",
+                                       "admin")
+
+        days = 4
+        first_day = (datetime.utcnow() - timedelta(days=days)).strftime(
+            "%Y-%m-%d")
+        summary = analytics_engine.get_analytics_summary(db, days=days)
+        raw = _from_raw(db, first_day)
+
+        assert (summary["unique_users"], summary["total_views"]) == raw["totals"]
+        assert ([(p["slug"], p["views"], p["users"]) for p in summary["top_pages"]]
+                == raw["pages"])
+        assert ([(d["day"], d["views"], d["users"]) for d in summary["views_by_day"]]
+                == raw["days"])
+        roles = analytics_engine.get_analytics_by_role(db, days=days)
+        assert [(r["role"], r["views"], r["users"]) for r in roles] == raw["roles"]
+        users = sorted(analytics_engine.get_user_activity(db, days=days),
+                       key=lambda u: u["user_id"])
+        assert ([(u["user_id"], u["page_views"], u["unique_pages"],
+                  u["last_active"]) for u in users] == raw["users"])
+        # Email is the one on the user's latest view
+        assert users[0]["email"] == "new@hfm.com.au"
+
+    def test_incremental_rollup_equals_rebuild(self, db):
+        for i in range(30):
+            analytics_engine.log_page_view(db, "u{}".format(i % 4), "",
+                                           "page{}".format(i % 3),
+                                           "user" if i % 5 else "admin")
+            if i % 7 == 0:
+                analytics_engine.flush(db)
+        analytics_engine.flush(db)
+        conn = sqlite3.connect(db)
+        select = "SELECT * FROM page_view_daily ORDER BY 1, 2, 3, 4"
+        incremental = conn.execute(select).fetchall()
+        analytics_engine.rebuild_rollups(conn)
+        assert conn.execute(select).fetchall() == incremental
+        conn.close()
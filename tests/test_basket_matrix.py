@@ -0,0 +1,175 @@
+"""Tests for the sparse receipt x PLU basket matrix (basket / halo analysis)."""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import basket_matrix
+import data_analysis
+
+pytestmark = pytest.mark.skipif(not basket_matrix.available(),
+                                reason="scipy not installed")
+
+WINDOW = ("2025-11-10", "2026-01-05")
+PLUS = ["{}".format(4000 + i) for i in range(40)]
+
+
+def _sales():
+    """Baskets drawn from a few affinity groups so pairs have real lift,
+    with duplicate PLU lines, returns and an occasional bulk order."""
+    rng = np.random.default_rng(5)
+    groups = [PLUS[i:i + 8] for i in range(0, len(PLUS), 8)]
+    rows = []
+    day = date(2025, 10, 25)
+    ref = 0
+    while day < date(2026, 1, 20):
+        for store in ("28", "10", "31"):
+            for _ in range(rng.integers(20, 40)):
+                ref += 1
+                ts = datetime(day.year, day.month, day.day,
+                              int(rng.integers(0, 12)), 0)
+                group = groups[rng.integers(0, len(groups))]
+                picks = list(rng.choice(group, rng.integers(1, 5),
+                                        replace=False))
+                picks += list(rng.choice(PLUS, rng.integers(0, 3)))
+                bulk = rng.random() < 0.01
+                for line, plu in enumerate(picks + picks[:1]):
+                    qty = -1.0 if rng.random() < 0.05 else 1.0
+                    price = 3000.0 if bulk else rng.uniform(2, 25)
+                    rows.append((store, "R{}".format(ref), plu,
+                                 ts + timedelta(seconds=line), qty,
+                                 round(qty * price, 2)))
+        day += timedelta(days=1)
+    return pd.DataFrame(rows, columns=["Store_ID", "Reference2", "PLUItem_ID",
+                                       "SaleDate", "Quantity", "SalesIncGST"])
+
+
+@pytest.fixture
+def ts(sales_store, tmp_path, monkeypatch):
+    store = sales_store({"FY26": _sales()})
+    # The analysis runners build their own store and use the default cache
+    monkeypatch.setattr(basket_matrix, "CACHE_DIR", tmp_path / "matrix")
+    monkeypatch.setattr(data_analysis, "TransactionStore", lambda: store)
+    monkeypatch.setattr(data_analysis, "_get_date_range", lambda days: WINDOW)
+    monkeypatch.setattr(data_analysis, "get_product_by_plu", None)
+    return store
+
+
+def _findings(monkeypatch, matrix, runner, **kwargs):
+    monkeypatch.setattr(data_analysis, "_use_basket_matrix", lambda: matrix)
+    return pd.DataFrame(runner(**kwargs)["findings"])
+
+
+class TestMatchesSql:
+    def test_basket_pairs(self, ts, monkeypatch):
+        kwargs = dict(store_id="28", min_support=3, limit=40)
+        sql = _findings(monkeypatch, False,
+                        data_analysis.run_basket_analysis, **kwargs)
+        matrix = _findings(monkeypatch, True,
+                           data_analysis.run_basket_analysis, **kwargs)
+        assert len(sql) == 40
+        # SQL breaks lift / pair_count ties arbitrarily
+        keys = ["lift", "pair_count", "item_a", "item_b"]
+        sql = sql.sort_values(keys).reset_index(drop=True)
+        matrix = matrix.sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(sql, matrix[sql.columns],
+                                      check_dtype=False)
+
+    def test_halo(self, ts, monkeypatch):
+        kwargs = dict(store_id="10", min_baskets=15, limit=30)
+        sql = _findings(monkeypatch, False,
+                        data_analysis.run_halo_effect, **kwargs)
+        matrix = _findings(monkeypatch, True,
+                           data_analysis.run_halo_effect, **kwargs)
+        assert len(sql) == 30
+        keys = ["value_uplift", "pluitem_id"]
+        sql = sql.sort_values(keys).reset_index(drop=True)
+        matrix = matrix.sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(sql, matrix[sql.columns],
+                                      check_dtype=False, rtol=1e-9)
+
+
+class TestNetwork:
+    def test_network_counts_receipts_per_store(self, ts):
+        pairs = basket_matrix.pair_stats(ts, *WINDOW, min_support=3,
+                                         limit=10)
+        total = ts.query("""
+            SELECT COUNT(DISTINCT Store_ID || '|' || Reference2) AS n
+            FROM transactions
+            WHERE SaleDate >= CAST(? AS TIMESTAMP)
+              AND SaleDate < CAST(? AS TIMESTAMP)
+              AND Quantity > 0 AND SalesIncGST > 0
+        """, list(WINDOW))[0]["n"]
+        assert pairs[0]["total_baskets"] == total
+        per_store = [basket_matrix.pair_stats(ts, *WINDOW, store_id=s,
+                                              min_support=1, limit=1)
+                     for s in ("28", "10", "31")]
+        assert sum(p[0]["total_baskets"] for p in per_store) == total
+
+    def test_network_flag(self, ts, monkeypatch):
+        result = data_analysis.run_halo_effect(network=True, min_baskets=15)
+        assert result["title"].startswith("Halo Effect / Basket Growth — All")
+        assert ("Single store analysis (not network-wide)"
+                not in result["methodology"]["limitations"])
+        monkeypatch.setattr(data_analysis, "_use_basket_matrix",
+                            lambda: False)
+        result = data_analysis.run_basket_analysis(network=True)
+        assert result["confidence_level"] == 0.0
+        assert "scipy" in result["executive_summary"]
+
+
+class TestCache:
+    def test_month_slices_are_reused(self, ts):
+        first = basket_matrix.slice_paths(ts, *WINDOW, store_id="28")
+        names = sorted(p.name.rsplit("_", 1)[0] for p in first)
+        assert names == ["28_2025-11-10_2025-12-01",
+                         "28_2025-12-01_2026-01-01",
+                         "28_2026-01-01_2026-01-05"]
+        # A later window shares the whole December slice
+        later = basket_matrix.slice_paths(ts, "2025-12-01", "2026-01-12",
+                                          store_id="28")
+        assert later[0] == first[1]
+
+    def test_data_load_invalidates(self, ts, tmp_path):
+        old = basket_matrix.slice_paths(ts, *WINDOW, store_id="28")
+        os.utime(tmp_path / "FY26.parquet", ns=(0, 0))
+        new = basket_matrix.slice_paths(ts, *WINDOW, store_id="28")
+        assert not any(p.exists() for p in old)
+        assert all(p.exists() for p in new)
+
+    def test_load_only_invalidates_its_fiscal_year(self, sales_store,
+                                                   tmp_path):
+        sales = _sales()
+        store = sales_store({
+            "FY25": sales.assign(SaleDate=sales["SaleDate"]
+                                 - pd.Timedelta(days=364)),
+            "FY26": sales,
+        })
+
+        def november_slices():
+            return [basket_matrix.slice_paths(
+                        store, lo, hi, store_id="28",
+                        cache_dir=tmp_path / "matrix")[0]
+                    for lo, hi in (("2024-11-01", "2024-12-01"),
+                                   ("2025-11-01", "2025-12-01"))]
+
+        old = november_slices()
+        os.utime(tmp_path / "FY26.parquet", ns=(0, 0))
+        new = november_slices()
+        assert new[0] == old[0]  # the FY25 month is reused
+        assert new[1] != old[1] and not old[1].exists()
+
+    def test_eviction_drops_least_recently_used(self, ts, monkeypatch):
+        paths = basket_matrix.slice_paths(ts, *WINDOW, store_id="28")
+        os.utime(paths[0], (1, 1))
+        os.utime(paths[1], (2, 2))
+        budget = paths[1].stat().st_size + paths[2].stat().st_size
+        monkeypatch.setattr(basket_matrix, "MAX_CACHE_BYTES", budget)
+        basket_matrix._evict(basket_matrix.CACHE_DIR, [])
+        assert [p.exists() for p in paths] == [False, True, True]
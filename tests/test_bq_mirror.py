@@ -0,0 +1,265 @@
+"""Tests for the local BigQuery parquet mirror and bq_query's local path."""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import duckdb
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "dashboards"))
+
+from shared import bigquery_connector, bq_mirror
+from shared.bigquery_connector import BQ_PROJECT, QueryParam
+
+
+class FakeResult:
+    def __init__(self, df):
+        self._df = df
+
+    def to_dataframe(self):
+        return self._df
+
+
+class FakeBigQuery:
+    """Tables held as DataFrames; queries run through the mirror's own
+    BigQuery -> DuckDB translation, and every SQL string is recorded."""
+
+    def __init__(self, tables):
+        self.tables = dict(tables)
+        self.modified = {name: 1 for name in tables}
+        self.queries = []
+
+    def update(self, name, df):
+        self.tables[name] = df
+        self.modified[name] += 1
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        conn = duckdb.connect()
+        conn.execute("SET TimeZone = 'UTC'")
+        frames = dict(self.tables)
+        for dataset in {n.split(".")[0] for n in self.tables}:
+            frames[dataset + ".__TABLES__"] = pd.DataFrame([
+                {"table_id": n.split(".")[1],
+                 "last_modified_time": self.modified[n],
+                 "row_count": len(df)}
+                for n, df in self.tables.items()
+                if n.startswith(dataset + ".")])
+        for i, (name, df) in enumerate(frames.items()):
+            conn.register("t{}".format(i), df)
+        aliases = {name: "t{}".format(i) for i, name in enumerate(frames)}
+        local, _ = bq_mirror.to_duckdb(sql, lambda name: aliases[name])
+        try:
+            return FakeResult(conn.execute(local).df())
+        finally:
+            conn.close()
+
+    def data_queries(self):
+        return [q for q in self.queries if "__TABLES__" not in q]
+
+
+def _weekly_sales(weeks, stores=("10 - HFM Pennant Hills", "28 - HFM Mosman")):
+    rows = []
+    for w, week in enumerate(weeks):
+        for s, store in enumerate(stores):
+            for measure in ("Sales - Val", "Final Gross Prod - Val"):
+                rows.append({"store": store, "department": "Fruit",
+                             "major_group": "Citrus", "week_ending": week,
+                             "channel": "Retail", "measure": measure,
+                             "is_promotion": "N",
+                             "value": float(1000 * (w + 1) + 10 * s)})
+    return pd.DataFrame(rows)
+
+
+WEEKS = ["2025-{:02d}-{:02d}".format(m, d) for m in (7, 8, 9)
+         for d in (6, 13, 20, 27)]
+TABLES = {"trading.weekly_sales": "week_ending", "master_data.stores": None}
+
+
+@pytest.fixture
+def bq():
+    return FakeBigQuery({
+        "trading.weekly_sales": _weekly_sales(WEEKS[:8]),
+        "master_data.stores": pd.DataFrame({
+            "store_number": [10, 28], "store_name": ["Pennant Hills", "Mosman"],
+            "state": ["NSW", "NSW"]}),
+    })
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    monkeypatch.setattr(bq_mirror, "MIRROR_DIR", tmp_path / "mirror")
+    monkeypatch.setattr(bigquery_connector, "_get_bq_client", lambda: None)
+    bigquery_connector._cached_query.clear()
+    return tmp_path / "mirror"
+
+
+def _local(name, mirror_dir):
+    df = bq_mirror.run_local("SELECT * FROM `{}.{}`".format(BQ_PROJECT, name),
+                             mirror_dir=mirror_dir)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _age(mirror_dir, name, hours):
+    """Pretend the sync last checked ``name`` ``hours`` ago."""
+    path = mirror_dir / "mirror_meta.json"
+    meta = json.loads(path.read_text())
+    meta["tables"][name]["checked_at"] = (
+        datetime.now() - timedelta(hours=hours)).isoformat()
+    path.write_text(json.dumps(meta))
+
+
+def _remote(bq, name):
+    df = bq.tables[name]
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+class TestTranslation:
+    def test_bigquery_sql_to_duckdb(self):
+        sql, params = bq_mirror.to_duckdb(
+            "SELECT SPLIT(store, ' - ')[OFFSET(0)] AS num, "
+            "SAFE_CAST(value AS FLOAT64) AS v, \"it\\'s @home\" AS s "
+            "FROM `{}.trading.weekly_sales` "
+            "WHERE store = @store AND week_ending >= @date_from".format(
+                BQ_PROJECT),
+            lambda name: "tbl")
+        assert params == ["store", "date_from"]
+        assert "SPLIT(store, ' - ')[1]" in sql
+        assert "TRY_CAST(value AS DOUBLE)" in sql
+        assert "'it''s @home'" in sql
+        assert "FROM tbl WHERE store = $store AND week_ending >= $date_from" in sql
+
+    def test_unknown_project_is_not_local(self, mirror, bq):
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert bq_mirror.run_local(
+            "SELECT * FROM `other-project.trading.weekly_sales`",
+            mirror_dir=mirror) is None
+        assert bq_mirror.run_local(
+            "SELECT * FROM `trading.market_share`", mirror_dir=mirror) is None
+
+
+class TestSync:
+    def test_unchanged_tables_are_skipped(self, mirror, bq):
+        first = bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert first["synced"] == {"trading.weekly_sales": 32,
+                                   "master_data.stores": 2}
+        bq.queries.clear()
+        again = bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert again["synced"] == {}
+        assert sorted(again["unchanged"]) == sorted(TABLES)
+        assert bq.data_queries() == []
+        # One partition per month of week_ending
+        parts = bq_mirror.load_meta(mirror)["tables"]["trading.weekly_sales"]
+        assert sorted(parts["parts"]) == ["2025-07", "2025-08"]
+
+    def test_delta_appends_and_restates_last_week(self, mirror, bq):
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        df = _weekly_sales(WEEKS)
+        # The last synced week is restated
+        df.loc[df["week_ending"] == WEEKS[7], "value"] += 0.5
+        bq.update("trading.weekly_sales", df)
+        bq.queries.clear()
+
+        result = bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        # Only the last synced week and the new ones are fetched
+        assert result["synced"] == {"trading.weekly_sales": 20}
+        assert bq.data_queries() == [
+            "SELECT * FROM `{}.trading.weekly_sales` "
+            "WHERE week_ending >= '{}'".format(BQ_PROJECT, WEEKS[7])]
+        pd.testing.assert_frame_equal(
+            _local("trading.weekly_sales", mirror),
+            _remote(bq, "trading.weekly_sales"))
+        # Untouched partitions keep their files
+        files = {p.name for p in (mirror / "trading.weekly_sales").iterdir()}
+        assert len(files) == 3
+
+    def test_deleted_history_forces_full_reload(self, mirror, bq):
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        df = _weekly_sales(WEEKS[:9])
+        bq.update("trading.weekly_sales", df[df["week_ending"] != WEEKS[0]])
+        bq.queries.clear()
+
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert len(bq.data_queries()) == 2  # delta, then the snapshot
+        pd.testing.assert_frame_equal(
+            _local("trading.weekly_sales", mirror),
+            _remote(bq, "trading.weekly_sales"))
+        rows = bq_mirror.load_meta(mirror)["tables"]["trading.weekly_sales"]
+        assert rows["rows"] == 32
+
+    def test_stale_tables_are_not_served(self, mirror, bq, monkeypatch):
+        monkeypatch.setattr(bq_mirror, "MAX_AGE_HOURS", 36)
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        sql = "SELECT * FROM `{}.trading.weekly_sales`".format(BQ_PROJECT)
+        df = bq_mirror.run_local(sql, mirror_dir=mirror)
+        synced = df.attrs["mirror_synced_at"]
+        assert datetime.now() - synced < timedelta(minutes=1)
+
+        _age(mirror, "trading.weekly_sales", 48)
+        assert bq_mirror.run_local(sql, mirror_dir=mirror) is None
+        assert list(bq_mirror.fresh_tables(mirror)) == ["master_data.stores"]
+        # An unchanged table is fresh again once a sync has checked it
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert bq_mirror.run_local(sql, mirror_dir=mirror) is not None
+        monkeypatch.setattr(bq_mirror, "MAX_AGE_HOURS", 0)
+        _age(mirror, "trading.weekly_sales", 48)
+        assert bq_mirror.run_local(sql, mirror_dir=mirror) is not None
+
+    def test_sync_process_does_not_import_streamlit(self):
+        dashboards = os.path.join(os.path.dirname(__file__), "..", "dashboards")
+        code = ("import sys; sys.path.insert(0, {!r}); import shared.bq_mirror; "
+                "print('streamlit' in sys.modules)".format(dashboards))
+        out = subprocess.run([sys.executable, "-c", code], check=True,
+                             capture_output=True, text=True).stdout
+        assert out.strip() == "False"
+
+
+class TestBqQuery:
+    def test_params_are_part_of_the_cache_key(self, mirror, bq):
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        sql = ("SELECT SUM(value) AS total "
+               "FROM `{}.trading.weekly_sales` WHERE store = @store".format(
+                   BQ_PROJECT))
+        totals = [
+            bigquery_connector.bq_query(
+                sql, _params=[QueryParam("store", "STRING", store)]
+            )["total"].iloc[0]
+            for store in ("10 - HFM Pennant Hills", "28 - HFM Mosman")
+        ]
+        df = bq.tables["trading.weekly_sales"]
+        assert totals == [df[df["store"] == s]["value"].sum()
+                          for s in ("10 - HFM Pennant Hills", "28 - HFM Mosman")]
+
+    def test_convenience_query_runs_offline(self, mirror, bq):
+        assert not bigquery_connector.is_bigquery_available()
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert bigquery_connector.is_bigquery_available()
+        df = bigquery_connector.get_weekly_sales(
+            date_from=WEEKS[2], date_to=WEEKS[5])
+        assert sorted(df["week_ending"].unique()) == WEEKS[2:6]
+        assert len(df) == 8
+
+    def test_unmirrored_table_without_client_raises(self, mirror, bq):
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        with pytest.raises(ConnectionError):
+            bigquery_connector.bq_query(
+                "SELECT * FROM `{}.trading.market_share`".format(BQ_PROJECT))
+
+    def test_stale_mirror_goes_to_bigquery(self, mirror, bq, monkeypatch):
+        bq_mirror.sync_mirror(bq, tables=TABLES, mirror_dir=mirror)
+        assert bigquery_connector.mirror_sync_caption().startswith(
+            "BigQuery data from the local copy, synced ")
+        for name in TABLES:
+            _age(mirror, name, bq_mirror.MAX_AGE_HOURS + 1)
+        assert bigquery_connector.mirror_sync_caption() is None
+        assert not bigquery_connector.is_bigquery_available()
+
+        monkeypatch.setattr(bigquery_connector, "_get_bq_client", lambda: bq)
+        bq.queries.clear()
+        bigquery_connector.bq_query(
+            "SELECT * FROM `{}.master_data.stores`".format(BQ_PROJECT))
+        assert bq.data_queries()
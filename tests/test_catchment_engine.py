@@ -0,0 +1,100 @@
+"""Tests for the vectorised catchment engine (distances + Huff model)."""
+
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from catchment_engine import CatchmentModel, haversine_matrix, nearest_points
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    rlat1, rlon1, rlat2, rlon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    a = (math.sin((rlat2 - rlat1) / 2) ** 2
+         + math.cos(rlat1) * math.cos(rlat2) * math.sin((rlon2 - rlon1) / 2) ** 2)
+    return 6371.0 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+STORES = {
+    "Mosman": (-33.8291, 151.2440),
+    "Broadway": (-33.8835, 151.1946),
+}
+
+
+@pytest.fixture
+def demand():
+    return pd.DataFrame({
+        "postcode": ["2088", "2007", "2000", "2120"],
+        "lat": [-33.829, -33.884, -33.868, -33.738],
+        "lon": [151.244, 151.195, 151.207, 151.072],
+        "market_size": [300000.0, 100000.0, 400000.0, 250000.0],
+        "share_pct": [20.0, 5.0, 4.0, np.nan],
+    })
+
+
+class TestDistances:
+    def test_matrix_matches_scalar_haversine(self):
+        lats, lons = [-33.87, -27.48, -36.07], [151.21, 153.01, 146.91]
+        m = haversine_matrix(lats, lons, lats[:2], lons[:2])
+        assert m.shape == (3, 2)
+        for i in range(3):
+            for j in range(2):
+                assert m[i, j] == pytest.approx(
+                    _haversine(lats[i], lons[i], lats[j], lons[j]))
+
+    def test_nearest_points(self):
+        idx, dist = nearest_points([-33.88], [151.20],
+                                   [-27.48, -33.8835], [153.0, 151.1946])
+        assert idx.tolist() == [1]
+        assert dist[0] < 1.0
+
+    def test_nearest_with_no_targets(self):
+        idx, dist = nearest_points([-33.88], [151.20], [], [])
+        assert idx.tolist() == [-1] and np.isinf(dist[0])
+
+
+class TestCatchmentModel:
+    def test_calibration_reproduces_observed_share(self, demand):
+        model = CatchmentModel(demand, STORES)
+        hfm_prob = model.network_utility / (model.network_utility + model.outside)
+        np.testing.assert_allclose(hfm_prob[:3], [0.20, 0.05, 0.04])
+        # Predicted network sales equal observed HFM spend where calibrated
+        assert model.store_sales().sum() == pytest.approx(
+            60000 + 5000 + 16000 + model.spend[3] * hfm_prob[3])
+
+    def test_batch_matches_one_at_a_time(self, demand):
+        model = CatchmentModel(demand, STORES)
+        lats, lons = [-33.87, -33.75, -30.0], [151.21, 151.10, 150.0]
+        batch, batch_transfer = model.simulate_sites(lats, lons, ["a", "b", "c"])
+        for name, lat, lon in zip("abc", lats, lons):
+            single, single_transfer = model.simulate_sites([lat], [lon], [name])
+            pd.testing.assert_series_equal(batch.loc[name], single.loc[name])
+            pd.testing.assert_series_equal(
+                batch_transfer.loc[name], single_transfer.loc[name])
+
+    def test_transfer_is_loss_of_existing_store_sales(self, demand):
+        model = CatchmentModel(demand, STORES)
+        before = model.store_sales()
+        summary, transfer = model.simulate_sites([-33.87], [151.21], ["cbd"])
+
+        # Recompute with the site as a real store
+        with_site = CatchmentModel(demand, dict(STORES, cbd=(-33.87, 151.21)))
+        with_site.outside = model.outside
+        after = (model.spend / (with_site.network_utility + model.outside)) \
+            @ with_site.utility
+        np.testing.assert_allclose(before.values - after[:2],
+                                   transfer.loc["cbd"].values)
+        assert summary.loc["cbd", "predicted_sales"] == pytest.approx(after[2])
+        assert summary.loc["cbd", "net_new_sales"] == pytest.approx(
+            after.sum() - before.sum())
+
+    def test_remote_site_captures_nothing(self, demand):
+        model = CatchmentModel(demand, STORES)
+        summary, _ = model.simulate_sites([-12.46], [130.84], ["darwin"])
+        assert summary.loc["darwin", "predicted_sales"] == 0
+        assert summary.loc["darwin", "retention_pct"] == 0
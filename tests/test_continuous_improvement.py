@@ -245,6 +245,87 @@ class TestHealthMetricsCollector:
         assert metrics["endpoint_count"] > 50  # 71+ endpoints
 
 
+# ---------------------------------------------------------------------------
+# Incremental Audit Engine Tests
+# ---------------------------------------------------------------------------
+
+class TestAuditEngine:
+    """Test the single-pass, cached source audit."""
+
+    @pytest.fixture
+    def tree(self, tmp_path):
+        backend, dashboards = tmp_path / "backend", tmp_path / "dashboards"
+        backend.mkdir()
+        dashboards.mkdir()
+        (backend / "api.py").write_text(textwrap.dedent("""\
+            import os
+            def handler(conn, ids):
+                for i in ids:
+                    conn.execute("SELECT * FROM t WHERE id = ?", (i,))
+                try:
+                    os.system("ls")
+                except:
+                    pass
+        """))
+        (backend / "__init__.py").write_text("# package\n")
+        (dashboards / "page.py").write_text(
+            "def render():\n    return eval('1')\n")
+        (dashboards / "broken.py").write_text("def (:\n" + "x = 1\n" * 600)
+        return {"directories": [str(backend), str(dashboards)],
+                "docstring_dirs": [str(backend)],
+                "db_path": str(tmp_path / "hub.db")}
+
+    def test_matches_separate_auditors(self, tree):
+        from continuous_improvement import (
+            AuditEngine, CodeSafetyAuditor, DocumentationAuditor,
+            PerformanceAuditor)
+        result = AuditEngine(workers=1, **tree).run()
+        dirs = tree["directories"]
+        assert result["safety"] == CodeSafetyAuditor(directories=dirs).audit()
+        assert result["performance"] == PerformanceAuditor(
+            directories=dirs).audit()
+        assert result["documentation"] == DocumentationAuditor(
+            backend_dir=dirs[0])._check_missing_docstrings()
+        assert result["total_lines"] == 8 + 1 + 2 + 601
+        assert result["scanned"] == 4
+
+    def test_unchanged_files_are_not_rescanned(self, tree):
+        from continuous_improvement import AuditEngine
+        first = AuditEngine(workers=1, **tree).run()
+        second = AuditEngine(workers=1, **tree).run()
+        assert second["scanned"] == 0
+        assert second["safety"] == first["safety"]
+
+        page = os.path.join(tree["directories"][1], "page.py")
+        os.utime(page, (0, 0))  # touched, content unchanged
+        assert AuditEngine(workers=1, **tree).run()["scanned"] == 0
+
+        with open(page, "w") as f:
+            f.write("def render():\n    return exec('1')\n")
+        os.remove(os.path.join(tree["directories"][1], "broken.py"))
+        third = AuditEngine(workers=1, **tree).run()
+        assert third["scanned"] == 1
+        titles = [f["title"] for f in third["safety"]]
+        assert "exec() call detected" in titles
+        assert "eval() call detected" not in titles
+        assert not any("Large file" in t for t in titles)
+        conn = sqlite3.connect(tree["db_path"])
+        paths = [r[0] for r in conn.execute(
+            "SELECT path FROM audit_file_cache")]
+        conn.close()
+        assert not any(p.endswith("broken.py") for p in paths)
+
+    def test_process_pool_scan(self, tree, monkeypatch):
+        from continuous_improvement import AuditEngine
+        inline = AuditEngine(workers=1, **tree).run()
+        monkeypatch.setattr(AuditEngine, "POOL_MIN_FILES", 1)
+        tree["db_path"] += ".pool"
+        pooled = AuditEngine(workers=2, **tree).run()
+        assert pooled["scanned"] == 4
+        for key in ("safety", "documentation", "performance", "total_lines"):
+            assert pooled[key] == inline[key]
+
+
 # ---------------------------------------------------------------------------
 # Findings Manager Tests
 # ---------------------------------------------------------------------------
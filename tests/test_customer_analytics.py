@@ -288,6 +288,7 @@ class TestQueryCatalog:
     @pytest.mark.parametrize("name", [
         "customer_rfm_segments",
         "customer_cohort_retention",
+        "customer_cohort_matrix",
         "customer_segment_baskets",
         "customer_channel_summary",
         "customer_channel_crossover",
@@ -307,6 +308,7 @@ class TestQueryCatalog:
     @pytest.mark.parametrize("name", [
         "customer_rfm_segments",
         "customer_cohort_retention",
+        "customer_cohort_matrix",
         "customer_segment_baskets",
         "customer_channel_summary",
         "customer_channel_crossover",
@@ -0,0 +1,193 @@
+"""Tests for the materialised loyalty-customer basket, profile and cohort tables."""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import customer_summary
+from transaction_queries import run_query
+
+CUSTOMERS = ["C10001", "C10002", "C10003", "C10004", "C10005", "C10006"]
+FIRST_DAY = date(2025, 9, 1)
+LAST_DAY = date(2026, 1, 20)
+
+CUSTOMER_QUERIES = ["top_customers_by_spend", "customer_rfm_segments",
+                    "customer_cohort_retention", "customer_cohort_matrix",
+                    "customer_segment_baskets", "customer_channel_crossover",
+                    "customer_frequency_distribution", "customer_ltv_tiers"]
+WINDOWS = [
+    {"start": "2025-10-01", "end": "2026-01-16"},
+    # Partial days at both ends come from raw transactions
+    {"start": "2025-10-01 10:30:00", "end": "2026-01-15 22:00:00"},
+]
+
+
+def _sales():
+    """Multi-line baskets for a few loyalty customers (staggered first
+    visits, a basket that crosses midnight UTC) plus anonymous lines."""
+    rng = np.random.default_rng(11)
+    rows = []
+    day = FIRST_DAY
+    ref = 0
+    while day <= LAST_DAY:
+        for i, code in enumerate(CUSTOMERS + ["", "NULL", "C12"]):
+            if day < FIRST_DAY + timedelta(days=20 * i) or rng.random() < 0.6:
+                continue
+            ref += 1
+            ts = datetime(day.year, day.month, day.day, 23, 58)
+            store = "28" if rng.random() < 0.7 else "10"
+            for line in range(rng.integers(1, 5)):
+                qty = -1.0 if rng.random() < 0.05 else 2.0
+                rows.append((store, "R{}".format(ref), code, "1001",
+                             ts + timedelta(minutes=line), qty,
+                             round(qty * rng.uniform(2, 20), 2)))
+        day += timedelta(days=1)
+    return pd.DataFrame(rows, columns=["Store_ID", "Reference2",
+                                       "CustomerCode", "PLUItem_ID",
+                                       "SaleDate", "Quantity", "SalesIncGST"])
+
+
+@pytest.fixture
+def ts(sales_store):
+    return sales_store({"FY26": _sales()})
+
+
+def _results(store):
+    out = {}
+    for i, window in enumerate(WINDOWS):
+        for name in CUSTOMER_QUERIES:
+            df = pd.DataFrame(run_query(store, name, limit=50, **window))
+            out[(name, i)] = df.sort_values(list(df.columns)).reset_index(
+                drop=True)
+    return out
+
+
+def _lifetime(store):
+    return (pd.DataFrame(store.query(
+                "SELECT * FROM customer_profile() ORDER BY CustomerCode")),
+            pd.DataFrame(store.query(
+                "SELECT * FROM customer_cohorts() "
+                "ORDER BY cohort_month, activity_month")))
+
+
+def _stored(derived_dir):
+    meta = customer_summary.load_meta(derived_dir)
+    baskets = pd.concat(pd.read_parquet(derived_dir / p)
+                        for p in meta["parts"])
+    baskets = baskets.sort_values(["CustomerCode", "Reference2", "Store_ID",
+                                   "sale_date"]).reset_index(drop=True)
+    return (baskets,
+            pd.read_parquet(derived_dir / meta["profile"]),
+            pd.read_parquet(derived_dir / meta["cohorts"]))
+
+
+class TestMacros:
+    def test_raw_fallback_without_build(self, ts, tmp_path):
+        conn = ts._get_connection()
+        assert customer_summary.install_customer_macros(
+            conn, tmp_path / "customers") is False
+        conn.close()
+        profile, _ = _lifetime(ts)
+        # Blank, 'NULL' and short codes are not loyalty customers
+        assert sorted(profile["customercode"]) == CUSTOMERS
+
+    def test_materialised_matches_raw(self, ts, tmp_path, assert_same):
+        raw = _results(ts)
+        raw_profile, raw_cohorts = _lifetime(ts)
+
+        # Coverage ends inside the windows and mid-month, so the raw tail
+        # and the recounted open month are both used
+        result = customer_summary.refresh_customer_summary(
+            ts, through="2025-12-20", derived_dir=tmp_path / "customers")
+        assert result["status"] == "refreshed"
+        assert result["customers"] == len(CUSTOMERS)
+        conn = ts._get_connection()
+        assert customer_summary.install_customer_macros(
+            conn, tmp_path / "customers") is True
+        conn.close()
+
+        assert_same(raw, _results(ts))
+        profile, cohorts = _lifetime(ts)
+        pd.testing.assert_frame_equal(raw_profile, profile,
+                                      check_dtype=False, rtol=1e-9)
+        pd.testing.assert_frame_equal(raw_cohorts, cohorts,
+                                      check_dtype=False, rtol=1e-9)
+
+    def test_lifetime_cohorts_ignore_window_start(self, ts, tmp_path):
+        customer_summary.refresh_customer_summary(
+            ts, derived_dir=tmp_path / "customers")
+        rows = run_query(ts, "customer_cohort_matrix",
+                         start="2025-11-01", end="2026-01-01")
+        cohorts = {r["cohort_month"].date() for r in rows}
+        # C10001-C10004 first bought before November: not a new cohort
+        assert cohorts == {date(2025, 11, 1), date(2025, 12, 1)}
+        windowed = run_query(ts, "customer_cohort_retention",
+                             start="2025-11-01", end="2026-01-01")
+        first = [r for r in windowed if r["months_since"] == 0
+                 and r["cohort_month"].date() == date(2025, 11, 1)]
+        assert first[0]["active_customers"] >= 3
+
+
+class TestRefresh:
+    def test_incremental_equals_full_rebuild(self, ts, tmp_path):
+        derived = tmp_path / "customers"
+        customer_summary.refresh_customer_summary(ts, through="2025-10-15",
+                                                  derived_dir=derived)
+        customer_summary.refresh_customer_summary(ts, through="2025-12-03",
+                                                  derived_dir=derived)
+        result = customer_summary.refresh_customer_summary(
+            ts, through="2026-01-19", derived_dir=derived)
+        assert result["days_added"] == 47
+        incremental = _stored(derived)
+
+        full_dir = tmp_path / "full"
+        customer_summary.refresh_customer_summary(
+            ts, through="2026-01-19", derived_dir=full_dir)
+        for expected, actual in zip(_stored(full_dir), incremental):
+            pd.testing.assert_frame_equal(expected, actual, rtol=1e-9)
+
+    def test_up_to_date_and_default_through(self, ts, tmp_path):
+        derived = tmp_path / "customers"
+        result = customer_summary.refresh_customer_summary(
+            ts, derived_dir=derived)
+        # The last basket runs past midnight, so the newest sale is the day
+        # after LAST_DAY and LAST_DAY is the last complete day
+        assert result["through"] == LAST_DAY.isoformat()
+        again = customer_summary.refresh_customer_summary(
+            ts, derived_dir=derived)
+        assert again["status"] == "up_to_date"
+        assert again["rows_added"] == 0
+        assert again["customers"] == len(CUSTOMERS)
+
+    def test_first_build_with_no_complete_day(self, sales_store, tmp_path):
+        # A single day of sales: that day may be partial, so nothing to add
+        sales = _sales()
+        day = sales["SaleDate"].dt.normalize()
+        one_day = sales[day == day.min()]
+        store = sales_store({"FY26": one_day})
+        derived = tmp_path / "customers"
+        for full in (False, True):
+            result = customer_summary.refresh_customer_summary(
+                store, full=full, derived_dir=derived)
+            assert result["status"] == "up_to_date"
+            assert result["through"] is None
+            assert result["customers"] == 0
+        assert customer_summary.load_meta(derived) is None
+
+    def test_compaction_and_cleanup(self, ts, tmp_path, monkeypatch):
+        monkeypatch.setattr(customer_summary, "MAX_PARTS", 2)
+        derived = tmp_path / "customers"
+        customer_summary.refresh_customer_summary(ts, through="2025-10-31",
+                                                  derived_dir=derived)
+        result = customer_summary.refresh_customer_summary(
+            ts, through="2025-12-31", derived_dir=derived)
+        assert result["parts"] == 1
+        assert len(list((derived / "customer_baskets").glob("*.parquet"))) == 1
+        assert len(list(derived.glob("customer_profile-*.parquet"))) == 1
+        assert len(list(derived.glob("customer_cohorts-*.parquet"))) == 1
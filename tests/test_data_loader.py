@@ -0,0 +1,193 @@
+"""Tests for data_loader: parallel range downloads, resume, checksums."""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import data_loader
+from data_loader import FileDownload, download_files
+
+
+# ---------------------------------------------------------------------------
+# Local HTTP server with Range support
+# ---------------------------------------------------------------------------
+
+PART_A = bytes(range(256)) * 40          # 10,240 bytes
+PART_B = b"harris-farm-" * 500           # 6,000 bytes
+SINGLE = b"fy26-parquet-bytes" * 300     # 5,400 bytes
+
+ASSETS = {
+    "/big.part_aa": PART_A,
+    "/big.part_ab": PART_B,
+    "/single.bin": SINGLE,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+    ranges_enabled = True
+    fail_paths = set()
+    fail_ranges_only = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = ASSETS.get(self.path)
+        type(self).requests_seen.append((self.path, self.headers.get("Range")))
+        failing = self.path in self.fail_paths and not (
+            self.fail_ranges_only and self.headers.get("Range") == "bytes=0-0"
+        )
+        if body is None or failing:
+            self.send_error(404 if body is None else 500)
+            return
+        rng = self.headers.get("Range")
+        if rng and self.ranges_enabled:
+            start, end = rng.split("=")[1].split("-")
+            start, end = int(start), min(int(end), len(body) - 1)
+            chunk = body[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range",
+                             f"bytes {start}-{end}/{len(body)}")
+        else:
+            chunk = body
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(chunk)))
+        self.end_headers()
+        self.wfile.write(chunk)
+
+
+@pytest.fixture
+def server():
+    _Handler.requests_seen = []
+    _Handler.ranges_enabled = True
+    _Handler.fail_paths = set()
+    _Handler.fail_ranges_only = False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+class TestProbe:
+    def test_probe_reports_size_and_range_support(self, server):
+        assert data_loader.probe_url(server + "/single.bin") == (len(SINGLE), True)
+
+    def test_probe_without_range_support(self, server):
+        _Handler.ranges_enabled = False
+        assert data_loader.probe_url(server + "/single.bin") == (len(SINGLE), False)
+
+
+class TestDownloadFiles:
+    def test_multipart_written_in_place_and_verified(self, server, tmp_path):
+        dest = str(tmp_path / "big.db")
+        manifest = {dest: {"sha256": _sha(PART_A + PART_B)}}
+        ok, failed = download_files(
+            {dest: [server + "/big.part_aa", server + "/big.part_ab"]},
+            manifest=manifest, workers=4, chunk_size=1024,
+        )
+        assert ok == [dest] and failed == []
+        assert open(dest, "rb").read() == PART_A + PART_B
+        # No leftover part files or state
+        assert sorted(os.listdir(tmp_path)) == ["big.db"]
+        # Chunked: many range requests, not one per part
+        ranged = [r for r in _Handler.requests_seen if r[1] != "bytes=0-0"]
+        assert len(ranged) == 10 + 6
+
+    def test_files_ready_callback_in_priority_order(self, server, tmp_path):
+        first = str(tmp_path / "FY26.parquet")
+        second = str(tmp_path / "FY24.parquet")
+        ready = []
+        download_files(
+            {first: [server + "/single.bin"],
+             second: [server + "/big.part_aa", server + "/big.part_ab"]},
+            workers=1, chunk_size=2048, on_ready=ready.append,
+        )
+        assert ready == [first, second]
+
+    def test_checksum_mismatch_discards_file(self, server, tmp_path):
+        dest = str(tmp_path / "single.bin")
+        ok, failed = download_files(
+            {dest: [server + "/single.bin"]},
+            manifest={dest: {"sha256": "0" * 64}}, chunk_size=1024,
+        )
+        assert ok == [] and failed == [dest]
+        assert os.listdir(tmp_path) == []
+
+    def test_resume_only_fetches_missing_chunks(self, server, tmp_path):
+        dest = str(tmp_path / "single.bin")
+        urls = [server + "/single.bin"]
+
+        # Simulate an interrupted run that completed chunks 0-2
+        job = FileDownload(dest, urls, chunk_size=1024)
+        job.plan()
+        with open(job.partial, "r+b") as f:
+            f.write(SINGLE[:3 * 1024])
+        for i in range(3):
+            job.mark_done(i)
+        _Handler.requests_seen = []
+
+        ok, _ = download_files({dest: urls}, chunk_size=1024,
+                               manifest={dest: {"sha256": _sha(SINGLE)}})
+        assert ok == [dest]
+        assert open(dest, "rb").read() == SINGLE
+        fetched = {r[1] for r in _Handler.requests_seen} - {"bytes=0-0"}
+        assert fetched == {"bytes=3072-4095", "bytes=4096-5119",
+                           "bytes=5120-5399"}
+
+    def test_failed_chunk_keeps_state_for_resume(self, server, tmp_path):
+        dest = str(tmp_path / "big.db")
+        urls = [server + "/big.part_aa", server + "/big.part_ab"]
+        # Probes pass; every range request for the second part fails
+        _Handler.fail_paths = {"/big.part_ab"}
+        _Handler.fail_ranges_only = True
+
+        ok, failed = download_files({dest: urls}, chunk_size=1024,
+                                    workers=1, retries=0, retry_delay=0)
+        assert failed == [dest]
+        assert not os.path.exists(dest)
+        state = json.load(open(dest + ".partial.json"))
+        assert set(state["done"]) == set(range(10))
+
+    def test_server_without_ranges_streams_whole_part(self, server, tmp_path):
+        _Handler.ranges_enabled = False
+        dest = str(tmp_path / "big.db")
+        ok, _ = download_files(
+            {dest: [server + "/big.part_aa", server + "/big.part_ab"]},
+            chunk_size=1024,
+        )
+        assert ok == [dest]
+        assert open(dest, "rb").read() == PART_A + PART_B
+
+
+class TestManifest:
+    def test_local_manifest_preferred(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        path.write_text(json.dumps({"data/x.db": {"sha256": "abc"}}))
+        assert data_loader.load_manifest(url=None, local_path=str(path)) == {
+            "data/x.db": {"sha256": "abc"}
+        }
+
+    def test_missing_manifest_is_empty(self, server, tmp_path):
+        manifest = data_loader.load_manifest(
+            url=server + "/manifest.json",
+            local_path=str(tmp_path / "none.json"),
+        )
+        assert manifest == {}
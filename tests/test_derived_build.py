@@ -0,0 +1,61 @@
+"""Tests for the shared derived-build meta helpers."""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import derived_build
+
+
+class TestMeta:
+    def test_round_trip_and_version(self, tmp_path):
+        path = tmp_path / "build_meta.json"
+        assert derived_build.read_meta(path) is None
+        derived_build.write_meta(path, {"version": 2, "parts": ["a"]})
+        assert derived_build.read_meta(path) == {"version": 2, "parts": ["a"]}
+        assert derived_build.read_meta(path, version=2)["parts"] == ["a"]
+        assert derived_build.read_meta(path, version=1) is None
+        path.write_text("{not json")
+        assert derived_build.read_meta(path) is None
+
+    def test_concurrent_writers_never_share_a_temp_file(self, tmp_path):
+        path = tmp_path / "build_meta.json"
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(50):
+                    derived_build.write_meta(path, {"writer": n, "i": i})
+            except Exception as e:  # pragma: no cover - the failure mode
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert derived_build.read_meta(path)["i"] == 49
+        assert [p.name for p in tmp_path.iterdir()] == ["build_meta.json"]
+
+    def test_signature_and_sql_literals(self, tmp_path):
+        path = tmp_path / "it's.parquet"
+        assert derived_build.signature(path) is None
+        path.write_bytes(b"1234")
+        assert derived_build.signature(path)[0] == 4
+        assert derived_build.sql_path(path).endswith("it''s.parquet'")
+        assert derived_build.sql_list([path, path]).count("it''s") == 2
+
+
+class TestRunner:
+    def test_failures_are_reported_and_the_rest_still_run(self, monkeypatch):
+        monkeypatch.setattr(derived_build, "BUILDS", {
+            "bad": ("json", "dumps"),      # TypeError: missing argument
+            "cwd": ("os", "getcwd"),
+        })
+        results = derived_build.run_builds()
+        assert "error" in results["bad"]
+        assert results["cwd"] == os.getcwd()
+        assert list(derived_build.run_builds(["cwd"])) == ["cwd"]
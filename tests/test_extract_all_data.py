@@ -0,0 +1,142 @@
+"""Tests for the parallel, atomic workbook extraction pipeline."""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import openpyxl
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import extract_all_data
+
+FIRST_WEEK = date(2024, 7, 7)
+MEASURES = ["Sales - Val", "Final Gross Prod - Val"]
+
+
+def _workbook(path, stores, weeks=4, bump=0.0):
+    """A workbook in the trading report layout: Ref, Data_ByMajGrp and
+    Data_Customer, FY2025 weeks 1..weeks."""
+    wb = openpyxl.Workbook()
+    ref = wb.active
+    ref.title = "Ref"
+    for w in range(weeks):  # rows 1-3 are headers
+        we = FIRST_WEEK + timedelta(weeks=w)
+        ref.cell(row=4 + w, column=2, value=w + 1)             # B sequence
+        ref.cell(row=4 + w, column=3, value=we)                # C week ending
+        ref.cell(row=4 + w, column=5, value=date(2024, 7, 28))  # E month end
+        ref.cell(row=4 + w, column=7, value=4)                 # G weeks in month
+        ref.cell(row=4 + w, column=8, value=2025)              # H FY
+        ref.cell(row=4 + w, column=9, value=w + 1)             # I week of month
+        ref.cell(row=4 + w, column=10, value=w + 1)            # J week of year
+
+    sales = wb.create_sheet("Data_ByMajGrp")
+    customers = wb.create_sheet("Data_Customer")
+    for w in range(weeks):
+        sales.cell(row=15, column=12 + w, value=2025)
+        sales.cell(row=16, column=12 + w, value=w + 1)
+        customers.cell(row=14, column=10 + w, value=2025)
+        customers.cell(row=15, column=10 + w, value=w + 1)
+    row = 17
+    for s, store in enumerate(stores):
+        for group in ("10 - Citrus", "20 - Apples"):
+            for m, measure in enumerate(MEASURES):
+                values = [1, 1, 1, None, store, "Retail",
+                          "10 - Fruit & Vegetables", group, "N", measure]
+                for c, v in enumerate(values, start=2):
+                    sales.cell(row=row, column=c, value=v)
+                for w in range(weeks):
+                    sales.cell(row=row, column=12 + w,
+                               value=100.0 * (s + 1) + 10 * w + m + bump)
+                row += 1
+        customers.cell(row=16 + s, column=7, value=store)
+        customers.cell(row=16 + s, column=8, value="Retail")
+        customers.cell(row=16 + s, column=9, value="Customer Count")
+        for w in range(weeks):
+            customers.cell(row=16 + s, column=10 + w, value=50.0 + w)
+    wb.save(path)
+
+
+@pytest.fixture
+def env(tmp_path):
+    nsw, qld = tmp_path / "nsw.xlsx", tmp_path / "qld.xlsx"
+    _workbook(nsw, ["10 - HFM Pennant Hills", "28 - HFM Mosman"])
+    _workbook(qld, ["70 - HFM West End"])
+    db = tmp_path / "harris_farm.db"
+    with sqlite3.connect(db) as conn:  # a table the extract does not own
+        conn.execute("CREATE TABLE market_share (period INTEGER, share REAL)")
+        conn.execute("CREATE INDEX idx_ms_period ON market_share(period)")
+        conn.execute("INSERT INTO market_share VALUES (202407, 0.12)")
+    return {"workbooks": {"NSW": nsw, "QLD": qld}, "db_path": db,
+            "parts_dir": tmp_path / "extract", "workers": 2}
+
+
+def _query(db, sql):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+class TestPipeline:
+    def test_full_extract(self, env):
+        counts = extract_all_data.main(**env)
+        db = env["db_path"]
+        # 3 stores x 2 groups x 2 measures x 4 weeks
+        assert counts["sales"] == 48
+        assert counts["sales_weekly"] == 24
+        assert counts["customers"] == 12
+        assert counts["fiscal_calendar"] == 4  # QLD duplicates dropped
+        assert counts["kept"] == ["market_share"]
+        assert _query(db, "SELECT * FROM market_share") == [(202407, 0.12)]
+        assert _query(db, "SELECT name FROM sqlite_master WHERE name = "
+                          "'idx_ms_period'") == [("idx_ms_period",)]
+        assert _query(db, "SELECT DISTINCT week_ending FROM sales "
+                          "ORDER BY 1")[0] == ("2024-07-07",)
+        assert _query(db, "SELECT state FROM stores WHERE "
+                          "store_number = '70'") == [("QLD",)]
+        assert not db.with_name(db.name + ".staging").exists()
+
+    def test_unchanged_workbooks_are_skipped(self, env):
+        extract_all_data.main(**env)
+        parts = env["parts_dir"]
+        nsw_part = parts / "NSW.sales.db"
+        stamp = nsw_part.stat().st_mtime_ns
+        assert extract_all_data.main(**env) is None
+
+        _workbook(env["workbooks"]["QLD"], ["70 - HFM West End"], bump=0.5)
+        counts = extract_all_data.main(**env)
+        assert counts["sales"] == 48
+        assert nsw_part.stat().st_mtime_ns == stamp  # NSW not re-parsed
+        manifest = json.loads((parts / "manifest.json").read_text())
+        assert manifest["QLD"]["rows"]["sales"] == 16
+        assert _query(env["db_path"], "SELECT MIN(value) FROM sales WHERE "
+                                      "store = '70 - HFM West End'") == [(100.5,)]
+
+    def test_readers_never_see_a_partial_database(self, env, monkeypatch):
+        extract_all_data.main(**env)
+        db = env["db_path"]
+        reader = sqlite3.connect(db)
+        reader.execute("BEGIN")
+        before = reader.execute("SELECT SUM(value) FROM sales").fetchone()
+
+        # A failed build leaves the live database untouched
+        def broken(conn):
+            raise RuntimeError("disk full")
+        monkeypatch.setattr(extract_all_data, "build_weekly_sales", broken)
+        with pytest.raises(RuntimeError):
+            extract_all_data.main(force=True, **env)
+        assert _query(db, "SELECT COUNT(*) FROM sales") == [(48,)]
+        assert not db.with_name(db.name + ".staging").exists()
+
+        # A swap under an open reader: it keeps its snapshot
+        monkeypatch.undo()
+        _workbook(env["workbooks"]["NSW"], ["10 - HFM Pennant Hills"])
+        extract_all_data.main(**env)
+        assert reader.execute("SELECT SUM(value) FROM sales").fetchone() == before
+        reader.close()
+        assert _query(db, "SELECT COUNT(*) FROM sales") == [(32,)]
@@ -0,0 +1,171 @@
+"""Tests for HiPo batch scoring and the materialised hipo_scores table."""
+
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import hipo_engine
+from hipo_engine import (
+    calculate_all_signals,
+    get_hipo_leaderboard,
+    get_hipo_matrix,
+    refresh_hipo_scores,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Hub DB with the activity columns the signal calculators read."""
+    path = str(tmp_path / "hub.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE academy_xp_log (id INTEGER PRIMARY KEY, user_id TEXT,
+            xp_amount INTEGER, created_at TEXT);
+        CREATE TABLE skills_assessments (id INTEGER PRIMARY KEY,
+            user_id TEXT, module_code TEXT, score REAL, passed INTEGER,
+            submitted_at TEXT, rubric_scores_json TEXT);
+        CREATE TABLE paddock_attempts (id INTEGER PRIMARY KEY, user_id TEXT,
+            topic TEXT);
+        CREATE TABLE sa_exercise_state (id INTEGER PRIMARY KEY, user_id TEXT,
+            tier TEXT, status TEXT);
+        CREATE TABLE sa_peer_battles (id INTEGER PRIMARY KEY,
+            challenger_id TEXT, opponent_id TEXT, winner_id TEXT);
+        CREATE TABLE analytics_pageviews (id INTEGER PRIMARY KEY,
+            user_id TEXT, page_name TEXT);
+        CREATE TABLE auth_users (user_id TEXT PRIMARY KEY,
+            display_name TEXT);
+    """)
+    conn.executemany(
+        "INSERT INTO academy_xp_log (user_id, xp_amount, created_at) "
+        "VALUES (?, ?, ?)",
+        [("ana", 400, "2026-01-01"), ("ana", 600, "2026-01-11"),
+         ("ben", 50, "2026-02-01")],
+    )
+    conn.executemany(
+        "INSERT INTO skills_assessments (user_id, module_code, score, passed, "
+        "submitted_at, rubric_scores_json) VALUES (?, ?, ?, ?, ?, ?)",
+        [("ana", "L1", 18, 1, "2026-01-01", '{"a": 4, "b": 5}'),
+         ("ana", "L1", 23, 1, "2026-01-02", '{"a": 5, "b": 5}'),
+         ("ana", "D2", 21, 1, "2026-01-03", None),
+         ("ana", "L6-1", 20, 0, "2026-01-04", None),
+         ("ben", "practice", 10, 0, "2026-02-01", '{"a": 1, "b": 5}')],
+    )
+    conn.executemany(
+        "INSERT INTO paddock_attempts (user_id, topic) VALUES (?, ?)",
+        [("ana", "fruit"), ("ana", "veg"), ("ben", "fruit")],
+    )
+    conn.executemany(
+        "INSERT INTO sa_exercise_state (user_id, tier, status) VALUES (?, ?, ?)",
+        [("ana", "stretch", "complete"), ("ana", "elite", "complete")],
+    )
+    conn.executemany(
+        "INSERT INTO sa_peer_battles (challenger_id, opponent_id, winner_id) "
+        "VALUES (?, ?, ?)",
+        [("ana", "ben", "ana"), ("ben", "ana", "ana"), ("ben", None, None)],
+    )
+    conn.executemany(
+        "INSERT INTO analytics_pageviews (user_id, page_name) VALUES (?, ?)",
+        [("ana", "Prompt Engine")] * 6 + [("ben", "Hub Assistant")],
+    )
+    conn.execute("INSERT INTO auth_users VALUES ('ana', 'Ana Example')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _per_user(db_path, user_id):
+    return {st: fn(db_path, user_id)[0]
+            for st, fn in hipo_engine._CALCULATORS.items()}
+
+
+class TestBatchScoring:
+    def test_batch_matches_per_user_calculators(self, db):
+        expected = {uid: _per_user(db, uid) for uid in ("ana", "ben")}
+        refresh_hipo_scores(db, full=True)
+
+        conn = sqlite3.connect(db)
+        rows = conn.execute(
+            "SELECT user_id, signal_type, score FROM sa_hipo_signals"
+        ).fetchall()
+        conn.close()
+        actual = {}
+        for uid, st, score in rows:
+            actual.setdefault(uid, {})[st] = score
+        assert actual == expected
+
+    def test_calculate_all_signals_returns_nine(self, db):
+        signals = calculate_all_signals(db, "ana")
+        assert [s["signal_type"] for s in signals] == list(
+            hipo_engine.SIGNAL_DEFINITIONS)
+        assert {s["signal_type"]: s["score"] for s in signals} == \
+            _per_user(db, "ana")
+
+    def test_leaderboard_reads_materialised_table(self, db):
+        refresh_hipo_scores(db)
+        board = get_hipo_leaderboard(db)
+        assert [u["user_id"] for u in board][:1] == ["ana"]
+        assert board[0]["display_name"] == "Ana Example"
+        assert len(board[0]["top_signals"]) == 3
+        assert board[1]["display_name"] == "ben"
+
+    def test_matrix_summary(self, db):
+        refresh_hipo_scores(db)
+        matrix = get_hipo_matrix(db)
+        assert matrix["summary"]["total"] == 2
+        users = [u for q in matrix["quadrants"].values() for u in q]
+        ana = next(u for u in users if u["user_id"] == "ana")
+        assert ana["total_xp"] == 1000
+
+    def test_reads_do_not_write(self, db):
+        assert get_hipo_leaderboard(db) == []
+        assert get_hipo_matrix(db)["summary"]["total"] == 0
+        conn = sqlite3.connect(db)
+        created = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE '%hipo%'"
+        ).fetchone()[0]
+        conn.close()
+        assert created == 0
+
+
+class TestIncrementalRefresh:
+    def test_noop_when_nothing_changed(self, db):
+        assert refresh_hipo_scores(db)["mode"] == "full"
+        assert refresh_hipo_scores(db) == {"mode": "incremental", "scored": 0}
+
+    def test_only_changed_users_rescored(self, db):
+        refresh_hipo_scores(db)
+        conn = sqlite3.connect(db)
+        conn.execute(
+            "INSERT INTO analytics_pageviews (user_id, page_name) "
+            "VALUES ('ben', 'Analytics Engine')"
+        )
+        conn.commit()
+        conn.close()
+
+        assert refresh_hipo_scores(db) == {"mode": "incremental", "scored": 1}
+        conn = sqlite3.connect(db)
+        evidence = json.loads(conn.execute(
+            "SELECT evidence_json FROM sa_hipo_signals "
+            "WHERE user_id = 'ben' AND signal_type = 'proactive_usage'"
+        ).fetchone()[0])
+        conn.close()
+        assert evidence["distinct_tools_used"] == 2
+
+    def test_triggers_skip_tables_without_user_column(self, tmp_path):
+        path = str(tmp_path / "hub.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE paddock_attempts (id INTEGER, topic TEXT)")
+        conn.commit()
+        refresh_hipo_scores(path)
+        conn.execute("INSERT INTO paddock_attempts VALUES (1, 'fruit')")
+        conn.commit()
+        triggers = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'"
+        ).fetchone()[0]
+        conn.close()
+        assert triggers == 0
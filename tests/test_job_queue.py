@@ -0,0 +1,122 @@
+"""Tests for the persistent SQLite job queue."""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import job_queue
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(tmp_path / "hub.db")
+    yield q
+    q.close()
+
+
+class TestClaim:
+    def test_priority_then_age_and_dedupe(self, queue):
+        first = queue.enqueue("a", {"n": 1}, key="p:1")
+        assert queue.enqueue("a", {"n": 1}, key="p:1") is None
+        urgent = queue.enqueue("a", {"n": 2}, priority=10, key="p:2")
+        queue.enqueue("a", {"n": 3}, key="p:3")
+        order = [queue.claim("w")["id"] for _ in range(3)]
+        assert order[:2] == [urgent, first]
+        assert queue.claim("w") is None
+        assert queue.keys("p:") == {"p:1", "p:2", "p:3"}
+
+    def test_concurrency_limit_per_kind(self, queue):
+        for i in range(3):
+            queue.enqueue("heavy", {"i": i})
+        queue.enqueue("light", {})
+        kinds = [queue.claim("w", limits={"heavy": 1})["kind"] for _ in range(2)]
+        assert sorted(kinds) == ["heavy", "light"]
+        assert queue.claim("other", limits={"heavy": 1}) is None
+        running = [r for r in sqlite3.connect(queue.db_path).execute(
+            "SELECT id FROM job_queue WHERE kind = 'heavy' "
+            "AND status = 'running'")]
+        assert queue.complete(running[0][0], "w")
+        assert queue.claim("other", limits={"heavy": 1})["kind"] == "heavy"
+
+    def test_claims_are_exclusive_across_threads(self, queue):
+        for i in range(40):
+            queue.enqueue("k", {"i": i})
+        claimed, lock = [], threading.Lock()
+
+        def worker(name):
+            while True:
+                job = queue.claim(name)
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job["id"])
+
+        threads = [threading.Thread(target=worker, args=("w{}".format(i),))
+                   for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(claimed) == list(range(1, 41))
+
+
+class TestLeasesAndRetries:
+    def test_expired_lease_is_reclaimed(self, queue):
+        job_id = queue.enqueue("k", {}, max_attempts=2)
+        queue.claim("dead", lease_seconds=-1)  # worker died mid-job
+        job = queue.claim("alive")
+        assert (job["id"], job["attempts"]) == (job_id, 2)
+        assert not queue.complete(job_id, "dead")  # stale owner
+        assert queue.complete(job_id, "alive")
+        assert queue.counts() == {"done": 1}
+
+    def test_failures_back_off_then_fail(self, queue, monkeypatch):
+        job_id = queue.enqueue("k", {}, max_attempts=2)
+        queue.claim("w")
+        assert queue.fail(job_id, "w", "boom") == "queued"
+        assert queue.claim("w") is None  # backing off
+        assert 0 < queue.next_due() <= job_queue.RETRY_BASE_SECONDS
+
+        conn = sqlite3.connect(queue.db_path)
+        conn.execute("UPDATE job_queue SET available_at = 0")
+        conn.commit()
+        conn.close()
+        queue.claim("w")
+        assert queue.fail(job_id, "w", "boom again") == "failed"
+        assert queue.counts() == {"failed": 1}
+        assert queue.next_due() is None
+
+
+class TestWait:
+    def test_enqueue_wakes_waiter(self, queue):
+        generation = queue.generation()
+        threading.Timer(0.1, queue.enqueue, args=("k",)).start()
+        start = time.monotonic()
+        assert queue.wait(generation, timeout=5)
+        assert time.monotonic() - start < 1
+
+    def test_commit_from_another_process_wakes_waiter(self, queue, monkeypatch):
+        monkeypatch.setattr(job_queue, "WAKE_CHECK_SECONDS", 0.05)
+        queue.wait(queue.generation(), timeout=0.01)  # baseline version
+
+        def insert_elsewhere():
+            conn = sqlite3.connect(queue.db_path)
+            conn.execute("INSERT INTO job_queue (kind, available_at, "
+                         "created_at) VALUES ('k', 0, 0)")
+            conn.commit()
+            conn.close()
+
+        threading.Timer(0.1, insert_elsewhere).start()
+        start = time.monotonic()
+        assert queue.wait(queue.generation(), timeout=5)
+        assert time.monotonic() - start < 1
+
+    def test_times_out_without_work(self, queue):
+        assert not queue.wait(queue.generation(), timeout=0.1)
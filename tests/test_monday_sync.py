@@ -0,0 +1,184 @@
+"""Tests for the Monday.com snapshot sync and the connector that reads it."""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "dashboards"))
+
+from shared import monday_connector, monday_sync
+
+
+def _item(board, n, status="Done"):
+    return {"id": "{}-{}".format(board, n), "name": "Item {}".format(n),
+            "group": {"title": "Group"},
+            "column_values": [{"id": "project_status", "type": "status",
+                               "text": status}]}
+
+
+class _Monday:
+    """A stub GraphQL endpoint serving `boards` {board_id: [items]} in pages,
+    with scripted responses (status, headers, body) served first."""
+
+    def __init__(self, boards, script=None, delay=0.0):
+        self.boards = boards
+        self.script = list(script or [])
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = self.requests = 0
+
+    def page(self, board, start, limit):
+        items = self.boards[board][start:start + limit]
+        more = start + limit < len(self.boards[board])
+        return {"cursor": "{}:{}".format(board, start + limit) if more
+                else None, "items": items}
+
+    def respond(self, body):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            scripted = self.script.pop(0) if self.script else None
+        time.sleep(self.delay)
+        try:
+            if scripted:
+                return scripted
+            variables = body["variables"]
+            if "cursor" in variables:
+                board, start = variables["cursor"].split(":")
+                return 200, {}, {"data": {"next_items_page": self.page(
+                    board, int(start), variables["limit"])}}
+            board = variables["boardId"][0]
+            if board not in self.boards:
+                return 500, {}, {"error_message": "Internal error"}
+            return 200, {}, {"data": {"boards": [{
+                "name": "Board " + board,
+                "items_page": self.page(board, 0, variables["limit"])}]}}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def serve(monkeypatch, tmp_path):
+    monkeypatch.setenv("MONDAY_API_KEY", "test-key")
+    monkeypatch.setattr(monday_sync, "SNAPSHOT_DB", str(tmp_path / "snap.db"))
+    monkeypatch.setattr(monday_sync, "RETRY_BASE_SECONDS", 0.01)
+    servers = []
+
+    def start(monday):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(
+                    int(self.headers["Content-Length"])))
+                status, headers, payload = monday.respond(body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return "http://127.0.0.1:{}/v2".format(server.server_port)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+class TestFetch:
+    def test_follows_cursor_across_pages(self, serve):
+        monday = _Monday({"1": [_item("1", n) for n in range(7)]})
+        name, items = monday_sync.fetch_board(1, serve(monday), page_size=3)
+        assert name == "Board 1"
+        assert [i["item_id"] for i in items] == ["1-{}".format(n)
+                                                 for n in range(7)]
+        assert items[0]["status_category"] == "done"
+        assert monday.requests == 3
+
+    def test_rate_limits_are_retried(self, serve):
+        complexity = {"errors": [{"message": "Complexity budget exhausted",
+                                  "extensions": {"retry_in_seconds": 0}}]}
+        monday = _Monday({"1": [_item("1", 0)]}, script=[
+            (429, {"Retry-After": "0"}, {}),
+            (200, {}, complexity),
+        ])
+        _, items = monday_sync.fetch_board(1, serve(monday))
+        assert len(items) == 1
+        assert monday.requests == 3
+
+    def test_gives_up_after_max_attempts(self, serve, monkeypatch):
+        monkeypatch.setattr(monday_sync, "MAX_ATTEMPTS", 2)
+        monday = _Monday({})
+        with pytest.raises(monday_sync.MondayError):
+            monday_sync.fetch_board(9, serve(monday))
+        assert monday.requests == 2
+
+
+class TestSync:
+    def test_boards_are_fetched_concurrently(self, serve):
+        boards = {"P{}".format(n): n for n in range(1, 5)}
+        monday = _Monday({str(n): [_item(n, i) for i in range(5)]
+                          for n in boards.values()}, delay=0.1)
+        result = monday_sync.sync_boards(boards, api_url=serve(monday),
+                                         page_size=2)
+        assert result["status"] == "synced"
+        assert result["synced"] == {p: 5 for p in boards}
+        assert monday.max_in_flight > 1
+        assert len(monday_sync.load_items(3)) == 5
+
+    def test_failed_board_keeps_previous_items(self, serve, monkeypatch):
+        monkeypatch.setattr(monday_sync, "MAX_ATTEMPTS", 2)
+        monday = _Monday({"1": [_item("1", n) for n in range(4)],
+                          "2": [_item("2", 0)]})
+        url = serve(monday)
+        monday_sync.sync_boards({"P1": 1, "P2": 2}, api_url=url)
+        del monday.boards["1"]
+        monday.boards["2"].append(_item("2", 1))
+        result = monday_sync.sync_boards({"P1": 1, "P2": 2}, api_url=url)
+
+        assert result["failed"].keys() == {"P1"}
+        assert len(monday_sync.load_items(1)) == 4
+        assert len(monday_sync.load_items(2)) == 2
+        boards = monday_sync.load_boards()
+        assert boards["1"]["last_error"]
+        assert boards["1"]["attempted_at"] >= boards["1"]["synced_at"]
+        assert boards["2"]["last_error"] is None
+
+    def test_unconfigured_does_nothing(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("MONDAY_API_KEY", raising=False)
+        assert monday_sync.sync_boards(
+            db_path=str(tmp_path / "snap.db"))["status"] == "unconfigured"
+
+
+class TestConnector:
+    def test_summaries_read_the_snapshot(self, serve, monkeypatch):
+        monday = _Monday({str(b): [_item(b, 0, "Done"),
+                                   _item(b, 1, "Stuck"),
+                                   _item(b, 2, "")]
+                          for b in monday_sync.BOARD_IDS.values()})
+        assert monday_sync.last_synced() is None
+        monday_sync.sync_boards(api_url=serve(monday))
+        requests_made = monday.requests
+
+        summaries = monday_connector.fetch_all_pillar_summaries()
+        assert summaries["P1"]["total"] == 3
+        assert summaries["P5"]["stuck"] == 1
+        assert summaries["P5"]["not_started"] == 1
+        board = monday_sync.BOARD_IDS["P2"]
+        assert monday_connector.fetch_board_name(board) == "Board {}".format(
+            board)
+        assert monday_sync.last_synced() is not None
+        assert monday.requests == requests_made
@@ -0,0 +1,100 @@
+"""Tests for single-scan multi-window period comparison."""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from transaction_layer import COMPARISON_MEASURES, comparison_windows
+
+
+@pytest.fixture
+def ts(sales_store, synthetic_receipts):
+    # Store 40 only opened in FY26; store 44 closed after FY25
+    return sales_store({
+        "FY25": synthetic_receipts(datetime(2024, 7, 1), 365,
+                                   ["10", "28", "44"], seed=1),
+        "FY26": synthetic_receipts(datetime(2025, 7, 1), 120,
+                                   ["10", "28", "40"], seed=2),
+    }, row_group_size=2000)
+
+
+def _separately(ts, start, end, measures, store_id=None, stores=None,
+                group_by=None):
+    """One query per window: what the dashboards used to run."""
+    select = ", ".join(f"{COMPARISON_MEASURES[m]} AS {m}" for m in measures)
+    where = "SaleDate >= CAST(? AS TIMESTAMP) AND SaleDate < CAST(? AS TIMESTAMP)"
+    params = [start, end]
+    if store_id:
+        where += " AND Store_ID = ?"
+        params.append(store_id)
+    if stores is not None:
+        where += " AND Store_ID IN ({})".format(",".join("?" * len(stores)))
+        params += list(stores)
+    group = ", ".join(group_by or [])
+    sql = "SELECT {}{} FROM transactions WHERE {}{}".format(
+        group + ", " if group else "", select, where,
+        " GROUP BY " + group if group else "")
+    return ts.query(sql, params)
+
+
+class TestWindows:
+    def test_comparison_windows(self):
+        windows = comparison_windows("2024-03-01", "2024-03-31")
+        assert windows == {
+            "current": ("2024-03-01", "2024-03-31"),
+            "prior_period": ("2024-01-31", "2024-03-01"),
+            "prior_year": ("2023-03-01", "2023-03-31"),
+        }
+        leap = comparison_windows("2024-02-29", "2024-03-07",
+                                  prior_period=False)
+        assert leap["prior_year"] == ("2023-02-28", "2023-03-07")
+
+
+class TestComparePeriods:
+    def test_matches_one_query_per_window(self, ts):
+        windows = comparison_windows("2025-08-01", "2025-09-15")
+        measures = list(COMPARISON_MEASURES)
+        frames = ts.compare_periods(windows, store_id="28")
+        assert list(frames) == ["current", "prior_period", "prior_year"]
+        for name, (start, end) in windows.items():
+            expected = _separately(ts, start, end, measures, store_id="28")[0]
+            assert frames[name].iloc[0].to_dict() == pytest.approx(expected)
+
+    def test_grouped_frames_are_aligned(self, ts):
+        windows = comparison_windows("2025-07-01", "2025-10-01",
+                                     prior_period=False)
+        frames = ts.compare_periods(windows, measures=["revenue", "quantity"],
+                                    group_by=["Store_ID"])
+        current, prior = frames["current"], frames["prior_year"]
+        assert list(current.index) == list(prior.index) == ["10", "28", "40", "44"]
+        assert current.loc["44", "revenue"] == 0  # closed: aligned with zero
+        assert prior.loc["40", "revenue"] == 0    # not yet open
+        rows = {r["store_id"]: r for r in _separately(
+            ts, *windows["prior_year"], ["revenue"], group_by=["Store_ID"])}
+        assert prior.loc["44", "revenue"] == pytest.approx(rows["44"]["revenue"])
+
+    def test_like_for_like_drops_unmatched_stores(self, ts):
+        windows = comparison_windows("2025-07-01", "2025-10-01",
+                                     prior_period=False)
+        measures = ["revenue", "line_items", "active_stores"]
+        frames = ts.compare_periods(windows, measures=measures,
+                                    like_for_like=True)
+        for name, (start, end) in windows.items():
+            expected = _separately(ts, start, end, measures,
+                                   stores=["10", "28"])[0]
+            assert frames[name].iloc[0].to_dict() == pytest.approx(expected)
+
+    def test_empty_window_and_validation(self, ts):
+        frames = ts.compare_periods({"future": ("2030-01-01", "2030-02-01")},
+                                    measures=["revenue"])
+        assert frames["future"].iloc[0]["revenue"] == 0
+        with pytest.raises(ValueError):
+            ts.compare_periods({"w": ("2025-07-01", "2025-08-01")},
+                               measures=["margin"])
+        with pytest.raises(ValueError):
+            ts.compare_periods({"w": ("2025-07-01", "2025-08-01")},
+                               group_by=["Store_ID; DROP TABLE x"])
@@ -0,0 +1,134 @@
+"""Tests for the parallel, cached Census processing pipeline."""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import process_census
+
+SA1S = {"NSW": ["11001", "11002", "11003"], "ACT": ["81001", "81002"]}
+POSTCODES = {"11001": "2000", "11002": "2000", "11003": "2010",
+             "81001": "2600", "81002": "2000"}
+
+
+def _tables(sa1s, wfh=5.0):
+    """Minimal DataPack tables, each with a column the pipeline never reads."""
+    n = len(sa1s)
+    pop = np.arange(1, n + 1) * 100.0
+    return {
+        "G01": {"Tot_P_P": pop, "Tot_P_M": pop / 2},
+        "G02": {**{c: np.arange(n) + 30.0 for c in process_census.G02_COLUMNS},
+                "Average_num_psns_per_bedroom": [0.9] * n},
+        "G33": {"HI_3000_3499_Tot": [10.0] * n, "HI_4000_more_Tot": [5.0] * n,
+                "HI_1_149_Tot": [20.0] * n, "Tot_Tot": [50.0] * n},
+        "G43": {"P_15_yrs_over_P": pop * 0.8,
+                "Percnt_LabForc_prticipation_P": [60.0] * n,
+                "Percent_Unem_loyment_P": [4.0] * n,
+                "non_sch_qual_PostGrad_Dgre_P": [5.0] * n,
+                "non_sch_qual_Gr_Dip_Gr_Crt_P": [2.0] * n,
+                "non_sch_qual_Bchelr_Degree_P": [10.0] * n,
+                "Y12_P": [40.0] * n},
+        "G60B": {"P_Tot_Managers": [8.0] * n, "P_Tot_Professionals": [12.0] * n,
+                 "P_Tot_Tot": [50.0] * n, "P_Tot_Labourers": [3.0] * n},
+        "G62": {"Worked_home_P": [wfh] * n, "Tot_P": [40.0] * n,
+                "Train_P": [6.0] * n},
+    }
+
+
+def _write_state(state_dir, state, wfh=5.0):
+    state_dir.mkdir(parents=True, exist_ok=True)
+    for table, cols in _tables(SA1S[state], wfh).items():
+        df = pd.DataFrame({"SA1_CODE_2021": SA1S[state], **cols})
+        df.to_csv(process_census._csv(state_dir, table, state), index=False)
+
+
+@pytest.fixture
+def env(tmp_path):
+    states = {s: tmp_path / s for s in SA1S}
+    for state, state_dir in states.items():
+        _write_state(state_dir, state)
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    pd.DataFrame({
+        "MB_CODE_2021": ["m{}".format(i) for i in range(len(POSTCODES))],
+        "SA1_CODE_2021": list(POSTCODES),
+        "POA_CODE_2021": list(POSTCODES.values()),
+    }).to_excel(raw / "MB_2021_AUST.xlsx", index=False)
+    pd.DataFrame({"MB_CODE_2021": ["m0"], "POA_CODE_2021": ["2000"]}).to_excel(
+        raw / "POA_2021_AUST.xlsx", index=False)
+    return {"states": states, "raw": raw, "out": tmp_path / "processed",
+            "workers": 2}
+
+
+def _aggregate_by_loop(sa1_poa):
+    """The per-postcode loop the pipeline used before vectorising."""
+    sa1_poa = sa1_poa.assign(weight=sa1_poa["total_population"].fillna(0))
+    rows = []
+    for postcode, grp in sa1_poa.groupby("postcode"):
+        row = {"postcode": postcode,
+               "total_population": grp["total_population"].sum(),
+               "num_sa1s": grp["sa1_code"].nunique(),
+               "state": grp["state"].mode().iloc[0]}
+        for col in process_census.AGG_COLS:
+            v, w = grp.get(col), grp["weight"]
+            mask = (v.notna() & (w > 0)) if v is not None else None
+            row[col] = (np.average(v[mask], weights=w[mask])
+                        if mask is not None and mask.sum() else np.nan)
+        for col in process_census.SUM_COLS:
+            row[col] = grp[col].sum()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class TestPipeline:
+    def test_outputs(self, env):
+        rebuilt = process_census.main(**env)
+        assert len(rebuilt) == 2 * len(process_census.TABLES) + 2
+        out = env["out"]
+        sa1 = pd.read_parquet(out / "census_sa1_demographics.parquet")
+        assert len(sa1) == 5
+        assert sa1["SA1_CODE_2021"].tolist() == SA1S["NSW"] + SA1S["ACT"]
+        # Only the columns the profile needs were read
+        assert "Tot_P_M" not in sa1 and "Train_P" not in sa1
+        assert sa1["pct_high_income_hh"].iloc[0] == pytest.approx(30.0)
+        assert sa1["pct_wfh"].iloc[0] == pytest.approx(12.5)
+
+        postcodes = pd.read_parquet(out / "census_postcode_demographics.parquet")
+        assert postcodes["postcode"].tolist() == ["2000", "2010", "2600"]
+        row = postcodes.set_index("postcode").loc["2000"]
+        assert row["total_population"] == 100 + 200 + 200
+        assert row["state"] == "NSW"
+        assert (out / "census_postcode_demographics.csv").exists()
+
+    def test_vectorised_aggregation_matches_loop(self, env):
+        process_census.main(**env)
+        out = env["out"]
+        sa1 = pd.read_parquet(out / "census_sa1_demographics.parquet")
+        sa1.loc[1, "median_age"] = np.nan          # skipped in the weighting
+        sa1.loc[2, "total_population"] = 0          # zero weight -> NaN
+        sa1_poa = pd.read_parquet(out / "sa1_postcode_concordance.parquet").merge(
+            sa1, left_on="sa1_code", right_on="SA1_CODE_2021")
+        expected = _aggregate_by_loop(sa1_poa)
+        actual = process_census.aggregate_postcodes(sa1_poa)
+        pd.testing.assert_frame_equal(actual[expected.columns], expected,
+                                      check_dtype=False)
+
+    def test_only_changed_parts_rebuild(self, env):
+        process_census.main(**env)
+        parts = env["out"] / "parts"
+        stamp = (parts / "NSW.G01.parquet").stat().st_mtime_ns
+        assert process_census.main(**env) is None
+
+        _write_state(env["states"]["ACT"], "ACT", wfh=20.0)
+        assert process_census.main(**env) == ["ACT.G62"]
+        assert (parts / "NSW.G01.parquet").stat().st_mtime_ns == stamp
+        manifest = json.loads((parts / "manifest.json").read_text())
+        assert manifest["ACT.G62"]["rows"] == 2
+        sa1 = pd.read_parquet(env["out"] / "census_sa1_demographics.parquet")
+        assert sa1.loc[sa1["state"] == "ACT", "pct_wfh"].tolist() == [50.0, 50.0]
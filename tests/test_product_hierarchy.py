@@ -411,6 +411,94 @@ class TestSearchHierarchy:
         assert len(results) <= 50
 
 
+# ============================================================================
+# SEARCH INDEX TESTS
+# ============================================================================
+
+def _synthetic_hierarchy():
+    import pandas as pd
+    rows = [
+        ("4322", "Banana Cavendish", "Active", "10", "Fruit & Veg", "1", "Fruit", "5", "Tropical", "900", "Banana"),
+        ("43221", "Banana Lady Finger", "Active", "10", "Fruit & Veg", "1", "Fruit", "5", "Tropical", "900", "Banana"),
+        ("12", "Orange Navel", "Active", "10", "Fruit & Veg", "1", "Fruit", "2", "Citrus", "901", "Orange"),
+        ("120", "Bread Sourdough", "Active", "30", "Bakery", "15", "Bread", "16", "Loaves", "902", "Sourdough"),
+        ("121", "Banana Bread", "Deleted", "30", "Bakery", "15", "Bread", "16", "Loaves", "902", "Sourdough"),
+        ("555", "Milk 2L", "Active", "40", "Dairy", "20", "Milk", "21", "Fresh Milk", "903", "Milk"),
+    ]
+    return pd.DataFrame(rows, columns=[
+        "ProductNumber", "ProductName", "ProductLifecycleStateId",
+        "DepartmentCode", "DepartmentDesc", "MajorGroupCode",
+        "MajorGroupDesc", "MinorGroupCode", "MinorGroupDesc",
+        "HFMItem", "HFMItemDesc",
+    ])
+
+
+class TestHierarchyIndex:
+    """HierarchyIndex n-gram search, ranking and browse tree."""
+
+    def test_ngram_search_matches_substring_scan(self):
+        import random
+        from product_hierarchy import _NgramIndex
+        rng = random.Random(3)
+        texts = ["".join(rng.choice("abc 12") for _ in range(rng.randint(0, 12)))
+                 for _ in range(300)]
+        index = _NgramIndex(texts)
+        for q in ["ab", "ca", "a b", "abc", "1 2", "cab1", "bbbb", "zz", "c"]:
+            expected = [i for i, t in enumerate(texts) if q in t]
+            assert index.search(q).tolist() == expected, q
+
+    def test_ranked_exact_prefix_name_then_level(self):
+        from product_hierarchy import HierarchyIndex
+        index = HierarchyIndex(_synthetic_hierarchy())
+        hits = [index.record(i)["product_number"]
+                for i in index.search("12", limit=10)]
+        assert hits == ["12", "120"]  # 121 is Deleted
+        hits = [index.record(i)["product_number"]
+                for i in index.search("banana", limit=10)]
+        assert hits == ["4322", "43221"]
+        hits = [index.record(i)["product_number"]
+                for i in index.search("  citrus ", limit=10)]
+        assert hits == ["12"]
+        assert index.search("fruit", limit=2) == [0, 1]
+
+    def test_tree_lookups(self):
+        from product_hierarchy import HierarchyIndex
+        index = HierarchyIndex(_synthetic_hierarchy())
+        assert [d["code"] for d in index.departments] == ["10", "30", "40"]
+        assert index.departments[0]["total_products"] == 3
+        assert index.minors[("10", "1")] == [
+            {"code": "5", "name": "Tropical", "total_products": 2},
+            {"code": "2", "name": "Citrus", "total_products": 1},
+        ]
+        assert [p["product_number"]
+                for p in index.products[("10", "1", "5", "900")]] == [
+            "4322", "43221"]
+        assert index.products[("30", "15", "16", "902")][0][
+            "product_name"] == "Bread Sourdough"
+
+    def test_rebuilt_when_parquet_changes(self, tmp_path, monkeypatch):
+        import os
+        import product_hierarchy as ph
+        path = tmp_path / "hierarchy.parquet"
+        df = _synthetic_hierarchy()
+        df.to_parquet(path, index=False)
+        monkeypatch.setattr(ph, "HIERARCHY_PARQUET", path)
+        monkeypatch.setattr(ph, "_index", None)
+        ph.load_hierarchy.cache_clear()
+        try:
+            first = ph.get_hierarchy_index()
+            assert ph.get_hierarchy_index() is first
+            assert ph.search_hierarchy("milk")[0]["product_number"] == "555"
+
+            df.loc[df["ProductNumber"] == "555", "ProductName"] = "Oat Milk"
+            df.to_parquet(path, index=False)
+            os.utime(path, ns=(1, 1))
+            assert ph.get_hierarchy_index() is not first
+            assert ph.search_hierarchy("oat")[0]["product_number"] == "555"
+        finally:
+            ph.load_hierarchy.cache_clear()
+
+
 # ============================================================================
 # JOIN COVERAGE TESTS
 # ============================================================================
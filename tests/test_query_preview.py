@@ -0,0 +1,133 @@
+"""Tests for approximate preview queries over the receipt sample."""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import query_preview
+from query_preview import approximate_distinct, merge_replicates
+from transaction_queries import run_query
+
+WINDOW = {"start": "2025-08-01", "end": "2026-01-01"}
+
+
+@pytest.fixture
+def ts(sales_store, synthetic_receipts):
+    # ~40k receipts over two stores, 1-6 lines each
+    return sales_store({"FY26": synthetic_receipts(
+        datetime(2025, 7, 1), 200, ["10", "28", "28"], seed=3, n=40_000,
+        max_lines=6, plus=["4001", "4002", "4003", "4004"])})
+
+
+class TestApproximateDistinct:
+    def test_rewrites_single_argument(self):
+        sql = ("SELECT COUNT(DISTINCT t.Reference2) AS n, "
+               "count( distinct CAST(a AS INT)) FROM x")
+        assert approximate_distinct(sql) == (
+            "SELECT APPROX_COUNT_DISTINCT(t.Reference2) AS n, "
+            "APPROX_COUNT_DISTINCT(CAST(a AS INT)) FROM x")
+
+    def test_leaves_other_counts(self):
+        for sql in ("SELECT COUNT(DISTINCT a, b) FROM x",
+                    "SELECT COUNT(*), my_count(DISTINCT a) FROM x",
+                    "SELECT COUNT(DISTINCT (a)) FILTER (WHERE b = ')')"):
+            rewritten = approximate_distinct(sql)
+            assert ("APPROX" in rewritten) == sql.startswith(
+                "SELECT COUNT(DISTINCT (a))")
+
+
+class TestMergeReplicates:
+    def test_scales_and_bounds(self):
+        results = [
+            [{"k": "a", "n": 10, "avg": 2.0}, {"k": "b", "n": 1, "avg": 4.0}],
+            [{"k": "a", "n": 12, "avg": 3.0}],
+            [{"k": "a", "n": 11, "avg": 2.5}, {"k": "b", "n": 3, "avg": 2.0}],
+            [{"k": "a", "n": 11, "avg": 2.5}],
+        ]
+        rows = merge_replicates(results, ["k"], ["n"])
+        m = query_preview.MODULUS
+        assert [r["k"] for r in rows] == ["a", "b"]
+        assert rows[0]["n"] == pytest.approx(11 * m)
+        assert rows[0]["avg"] == pytest.approx(2.5)
+        # b is missing from two sub-samples: they count as zero
+        assert rows[1]["n"] == pytest.approx(1 * m)
+        assert rows[1]["avg"] == pytest.approx(3.0)
+        sd = np.std([10, 12, 11, 11], ddof=1) * m
+        assert rows[0]["n_moe"] == pytest.approx(
+            query_preview._T95 * sd / 2)
+
+    def test_omit_columns(self):
+        results = [[{"n": 1, "skus": 5}]] * query_preview.REPLICATES
+        rows = merge_replicates(results, [], ["n"], ["skus"])
+        assert rows[0]["skus"] is None
+        assert rows[0]["n_moe"] == 0
+
+
+class TestPreviewQueries:
+    def test_without_sample_is_hll_only(self, ts):
+        exact = run_query(ts, "store_monthly_trend", store_id="28", **WINDOW)
+        rows = run_query(ts, "store_monthly_trend", store_id="28",
+                         preview=True, **WINDOW)
+        assert len(rows) == len(exact)
+        for e, p in zip(exact, rows):
+            assert p["revenue"] == pytest.approx(e["revenue"])
+            # DuckDB's HyperLogLog is only good to ~5-10%
+            assert p["transactions"] == pytest.approx(e["transactions"],
+                                                      rel=0.25)
+            assert p["revenue_moe"] is None
+
+    def test_sampled_estimates_within_bounds(self, ts, tmp_path):
+        result = query_preview.build_preview_sample(
+            ts, preview_dir=tmp_path / "preview")
+        assert result["status"] == "built"
+        assert result["built"]["FY26"] > 0
+
+        sql = """
+            SELECT COUNT(*) AS line_items,
+                   COUNT(DISTINCT Reference2) AS transactions,
+                   SUM(SalesIncGST) AS revenue
+            FROM transactions
+            WHERE SaleDate >= CAST(? AS TIMESTAMP)
+              AND SaleDate < CAST(? AS TIMESTAMP)
+        """
+        params = [WINDOW["start"], WINDOW["end"]]
+        exact = ts.query(sql, params)[0]
+        spec = {"scale": ["line_items", "transactions", "revenue"]}
+        approx = ts.query(sql, params, preview=spec)[0]
+        for col in spec["scale"]:
+            assert approx[col + "_moe"] > 0
+            # Loose: 3x the 95% margin keeps the test deterministic-safe
+            assert abs(approx[col] - exact[col]) < 3 * approx[col + "_moe"]
+            assert approx[col] == pytest.approx(exact[col], rel=0.15)
+
+    def test_grouped_template(self, ts, tmp_path):
+        query_preview.build_preview_sample(
+            ts, preview_dir=tmp_path / "preview")
+        exact = run_query(ts, "store_monthly_trend", store_id="28", **WINDOW)
+        rows = run_query(ts, "store_monthly_trend", store_id="28",
+                         preview=True, **WINDOW)
+        assert [r["period"] for r in rows] == [r["period"] for r in exact]
+        for e, p in zip(exact, rows):
+            assert p["revenue"] == pytest.approx(e["revenue"], rel=0.3)
+
+    def test_stale_sample_is_ignored(self, ts, tmp_path):
+        query_preview.build_preview_sample(
+            ts, preview_dir=tmp_path / "preview")
+        assert query_preview.sample_files(
+            ts.available_fys, tmp_path / "preview")
+        assert ts.has_preview_sample()
+        os.utime(tmp_path / "FY26.parquet", ns=(0, 0))
+        assert query_preview.sample_files(
+            ts.available_fys, tmp_path / "preview") is None
+        assert not ts.has_preview_sample()
+        again = query_preview.build_preview_sample(
+            ts, preview_dir=tmp_path / "preview")
+        assert again["status"] == "built"
+        assert len(list((tmp_path / "preview").glob("*.parquet"))) == 1
+        assert query_preview.build_preview_sample(
+            ts, preview_dir=tmp_path / "preview")["status"] == "up_to_date"
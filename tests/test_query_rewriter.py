@@ -0,0 +1,145 @@
+"""Tests for the sargable SaleDate rewriter and the query catalog benchmark."""
+
+import os
+import sys
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import query_benchmark
+from query_rewriter import rewrite_sargable
+from transaction_queries import build_query
+
+
+class TestRewriteRules:
+    def test_date_cast_range_becomes_half_open(self):
+        sql = ("WHERE CAST(t.SaleDate AS DATE) >= CAST(? AS DATE)\n"
+               "  AND CAST(t.SaleDate AS DATE) <= CAST(? AS DATE)")
+        out = rewrite_sargable(sql)
+        assert "CAST(t.SaleDate AS DATE)" not in out
+        assert "t.SaleDate >= CAST(CAST(? AS DATE) AS TIMESTAMP)" in out
+        assert ("t.SaleDate < CAST(CAST(? AS DATE) AS TIMESTAMP) "
+                "+ INTERVAL 1 DAY") in out
+        assert out.count("?") == 2
+
+    def test_local_time_shift_moves_to_constant_side(self):
+        out = rewrite_sargable(
+            "WHERE SaleDate + INTERVAL '11' HOUR < CAST(? AS TIMESTAMP)")
+        assert out == ("WHERE SaleDate < CAST(? AS TIMESTAMP) "
+                       "- INTERVAL '11' HOUR")
+
+    def test_untouched_forms(self):
+        for sql in [
+            # would duplicate the placeholder
+            "WHERE CAST(SaleDate AS DATE) = ?",
+            # join condition, not a constant
+            "JOIN fc ON CAST(t.SaleDate AS DATE) = fc.TheDate",
+            # cyclic hour-of-day
+            "WHERE EXTRACT(HOUR FROM t.SaleDate + INTERVAL '11' HOUR) >= 7",
+            # operand of arithmetic on either side
+            "WHERE CAST(SaleDate AS DATE) >= CAST(? AS DATE) - INTERVAL 7 DAY",
+            "WHERE 1 + CAST(SaleDate AS DATE) > DATE '2026-01-01'",
+            "WHERE CAST(SaleDate AS DATE) <> DATE '2026-01-01'",
+            "SELECT CAST(SaleDate AS DATE) AS d FROM transactions",
+        ]:
+            assert rewrite_sargable(sql) == sql, sql
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = duckdb.connect()
+    conn.execute("""
+        CREATE TABLE transactions AS
+        SELECT TIMESTAMP '2026-01-01 00:00:00'
+               + INTERVAL (i * 17) MINUTE AS SaleDate
+        FROM range(0, 2000) r(i)
+    """)
+    conn.execute("INSERT INTO transactions VALUES "
+                 "(TIMESTAMP '2026-01-05 23:59:59.999999'), (NULL)")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def fixture(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "FY.parquet"
+    return query_benchmark.build_fixture(path, rows=30_000, row_group_size=500)
+
+
+class TestEquivalence:
+    @pytest.mark.parametrize("predicate,params", [
+        ("CAST(SaleDate AS DATE) >= CAST(? AS DATE)", ["2026-01-05"]),
+        ("CAST(SaleDate AS DATE) > CAST(? AS DATE)", ["2026-01-05"]),
+        ("CAST(SaleDate AS DATE) < ?", ["2026-01-05"]),
+        ("CAST(SaleDate AS DATE) <= '2026-01-05'", []),
+        ("CAST(SaleDate AS DATE) = DATE '2026-01-05'", []),
+        ("CAST(SaleDate AS DATE) BETWEEN ? AND ?", ["2026-01-03", "2026-01-05"]),
+        ("CAST(SaleDate + INTERVAL '11' HOUR AS DATE) <= CAST(? AS DATE)",
+         ["2026-01-05"]),
+        ("CAST(SaleDate + INTERVAL '11' HOUR AS DATE) > DATE '2026-01-05'", []),
+        ("SaleDate + INTERVAL '11' HOUR >= TIMESTAMP '2026-01-05 10:00:00'", []),
+        ("NOT CAST(SaleDate AS DATE) >= ?", ["2026-01-05"]),
+    ])
+    def test_same_rows(self, conn, predicate, params):
+        sql = "SELECT COUNT(*), MIN(SaleDate), MAX(SaleDate) " \
+              "FROM transactions WHERE " + predicate
+        rewritten = rewrite_sargable(sql)
+        assert rewritten != sql
+        assert conn.execute(rewritten, params).fetchall() == \
+            conn.execute(sql, params).fetchall()
+
+
+class TestFiscalYearRange:
+    def test_fiscal_year_templates_get_saledate_bounds(self):
+        sql, params = build_query("fiscal_weekly_trend", fin_year=2026)
+        assert params == [2026]
+        assert ("t.SaleDate >= TIMESTAMP '2025-06-30' "
+                "AND t.SaleDate < TIMESTAMP '2026-06-29'") in sql
+
+        sql, _ = build_query("fiscal_yoy_monthly", fin_year=2026,
+                             fin_year_2=2025)
+        assert "TIMESTAMP '2024-07-01'" in sql
+
+    def test_only_years_the_template_uses(self):
+        sql, _ = build_query("fiscal_quarter_summary", fin_year=2026,
+                             fin_year_2=2019)
+        assert "TIMESTAMP '2025-06-30'" in sql
+
+    def test_unknown_year_or_disabled_leaves_sql(self):
+        plain, _ = build_query("fiscal_weekly_trend", sargable=False,
+                               fin_year=2026)
+        assert "TIMESTAMP" not in plain
+        assert build_query("fiscal_weekly_trend", fin_year=1990)[0] == plain
+
+
+class TestBenchmark:
+    def test_catalog_templates_prune(self, fixture):
+        names = ["top_items_by_revenue", "fiscal_weekly_trend",
+                 "yoy_store_monthly", "oos_summary"]
+        results = query_benchmark.run_benchmark(fixture, repeat=1,
+                                                queries=names)
+        for name in names:
+            assert "error" not in results[name], results[name]
+        assert not results["top_items_by_revenue"]["unpruned"]
+        assert not results["fiscal_weekly_trend"]["unpruned"]
+        # No date params: a full scan is expected, not flagged
+        r = results["yoy_store_monthly"]
+        assert r["row_groups_scanned"] == r["row_groups_total"]
+        assert not r["unpruned"]
+
+        raw = query_benchmark.run_benchmark(
+            fixture, rewrite=False, repeat=1, queries=["fiscal_weekly_trend"])
+        assert raw["fiscal_weekly_trend"]["unpruned"]
+        assert ("fiscal_weekly_trend: no longer prunes row groups"
+                in query_benchmark.compare(raw, results))
+
+    def test_compare_flags_latency_and_errors(self):
+        base = {"q": {"latency_ms": 10.0, "row_groups_scanned": 4,
+                      "row_groups_total": 40, "unpruned": False}}
+        slow = {"q": dict(base["q"], latency_ms=40.0)}
+        assert query_benchmark.compare(slow, base) == ["q: 40.0ms (was 10.0ms)"]
+        noisy = {"q": dict(base["q"], latency_ms=14.0)}
+        assert query_benchmark.compare(noisy, base) == []
+        assert query_benchmark.compare({"q": {"error": "boom"}}, base) == [
+            "q: now fails (boom)"]
@@ -0,0 +1,115 @@
+"""Tests for the shared disk-backed result cache."""
+
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+import result_cache
+from transaction_layer import TransactionStore
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+class TestStorage:
+    def test_dataframe_round_trip(self, cache_dir):
+        df = pd.DataFrame({"store": ["10", "28"],
+                           "revenue": [1.5, 2.25],
+                           "day": pd.to_datetime(["2025-07-01", "2025-07-02"])},
+                          index=pd.Index([3, 7], name="rank"))
+        path = result_cache.put("ns", "k", df)
+        assert path.suffix == ".arrow"
+        pd.testing.assert_frame_equal(result_cache.get("ns", "k"), df)
+
+    def test_records_and_pickle_fallback(self, cache_dir):
+        rows = [{"store_id": "10", "revenue": Decimal("12.50"),
+                 "day": datetime(2025, 7, 1, 9, 30), "note": None},
+                {"store_id": "28", "revenue": Decimal("3.10"),
+                 "day": datetime(2025, 7, 2), "note": "x"}]
+        assert result_cache.put("ns", "rows", rows).suffix == ".arrow"
+        assert result_cache.get("ns", "rows") == rows
+        other = {"summary": [1, 2], "total": 3}
+        assert result_cache.put("ns", "dict", other).suffix == ".pkl"
+        assert result_cache.get("ns", "dict") == other
+        assert result_cache.get("ns", "missing") is result_cache.MISS
+
+    def test_visible_to_other_processes(self, cache_dir):
+        code = ("import sys; sys.path.insert(0, {!r}); import result_cache; "
+                "from pathlib import Path; result_cache.put('ns', 'k', "
+                "[{{'a': 1}}], cache_dir=Path({!r}))").format(
+                    BACKEND, str(cache_dir))
+        subprocess.run([sys.executable, "-c", code], check=True)
+        assert result_cache.get("ns", "k") == [{"a": 1}]
+
+    def test_ttl(self, cache_dir):
+        path = result_cache.put("ns", "k", [{"a": 1}])
+        old = time.time() - 600
+        os.utime(path, (old, old))
+        assert result_cache.get("ns", "k", ttl=300) is result_cache.MISS
+        assert result_cache.get("ns", "k") == [{"a": 1}]
+
+    def test_lru_eviction(self, cache_dir):
+        df = pd.DataFrame({"x": range(5000)})
+        paths = [result_cache.put("ns", "k{}".format(i), df)
+                 for i in range(4)]
+        for age, path in zip((400, 300, 200, 100), paths):
+            stamp = time.time() - age
+            os.utime(path, (stamp, stamp))
+        result_cache.get("ns", "k0")  # k0 is now the most recent
+        size = paths[0].stat().st_size
+        assert result_cache.evict(max_bytes=int(size * 2.5)) == 2
+        assert sorted(p.name for p in (cache_dir / "ns").iterdir()) == [
+            "k0.arrow", "k3.arrow"]
+
+
+class TestDecorator:
+    def test_hits_versions_and_shared_namespace(self, cache_dir):
+        calls = []
+        version = {"v": 1}
+
+        def compute(name, **kwargs):
+            calls.append((name, kwargs))
+            return [{"name": name, "limit": kwargs.get("limit")}]
+
+        first = result_cache.cached(namespace="queries",
+                                    version=lambda: version["v"])(compute)
+        second = result_cache.cached(namespace="queries",
+                                     version=lambda: version["v"])(compute)
+        assert first("top", limit=5) == [{"name": "top", "limit": 5}]
+        assert first("top", limit=5) == [{"name": "top", "limit": 5}]
+        assert second("top", limit=5) == [{"name": "top", "limit": 5}]
+        assert len(calls) == 1
+        first("top", limit=6)
+        version["v"] = 2
+        first("top", limit=5)
+        assert len(calls) == 3
+        first.clear()
+        assert list((cache_dir / "queries").iterdir()) == []
+
+    def test_data_version_follows_builds(self, tmp_path):
+        source = tmp_path / "FY26.parquet"
+        pd.DataFrame({"Store_ID": ["10"], "SalesIncGST": [1.0]}).to_parquet(
+            source)
+        store = TransactionStore(parquet_files={"FY26": source},
+                                 presence_dir=tmp_path / "derived",
+                                 enriched_dir=tmp_path / "enriched",
+                                 customer_dir=tmp_path / "derived",
+                                 preview_dir=tmp_path / "preview")
+        before = store.data_version()
+        assert store.data_version() == before
+        (tmp_path / "derived").mkdir()
+        (tmp_path / "derived" / "customer_meta.json").write_text("{}")
+        assert store.data_version() != before
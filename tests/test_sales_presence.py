@@ -0,0 +1,153 @@
+"""Tests for the materialised store x PLU daily sales presence table."""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import sales_presence
+from transaction_queries import run_query
+
+PLUS = ["1001", "2002", "3003", "4004"]
+STORES = ["10", "28"]
+FIRST_DAY = date(2025, 9, 1)
+LAST_DAY = date(2026, 1, 20)
+
+OOS_QUERIES = ["oos_by_department", "oos_by_major_group",
+               "oos_by_minor_group", "oos_summary", "oos_top_products"]
+WINDOW = {"start": "2026-01-01", "end": "2026-01-16"}
+
+
+def _sales():
+    """Daily lines with random gaps, some returns and a late-launch PLU."""
+    rng = np.random.default_rng(7)
+    rows = []
+    day = FIRST_DAY
+    while day <= LAST_DAY:
+        for store in STORES:
+            for i, plu in enumerate(PLUS):
+                if plu == "4004" and day < date(2025, 12, 1):
+                    continue
+                if rng.random() < 0.25 + 0.1 * i:
+                    continue
+                ts = datetime(day.year, day.month, day.day, 9 + i)
+                rows.append((store, plu, ts, 2.0, round(rng.uniform(5, 50), 2)))
+                if rng.random() < 0.05:
+                    rows.append((store, plu, ts, -1.0, -3.0))
+        day += timedelta(days=1)
+    return pd.DataFrame(rows, columns=["Store_ID", "PLUItem_ID", "SaleDate",
+                                       "Quantity", "SalesIncGST"])
+
+
+@pytest.fixture
+def ts(sales_store):
+    return sales_store({"FY26": _sales()})
+
+
+def _oos_results(store):
+    out = {}
+    for name in OOS_QUERIES:
+        rows = run_query(store, name, store_id="28", limit=50, **WINDOW)
+        out[name] = pd.DataFrame(rows)
+    return out
+
+
+def _baseline(store, as_of):
+    return pd.DataFrame(store.query(
+        "SELECT * FROM plu_baseline(CAST(? AS DATE), 90) "
+        "ORDER BY Store_ID, PLUItem_ID", [as_of]))
+
+
+def _daily(store, derived_dir):
+    conn = store._get_connection()
+    try:
+        sales_presence.install_macros(conn, derived_dir)
+        return conn.execute("SELECT * FROM store_plu_daily "
+                            "ORDER BY Store_ID, PLUItem_ID, sale_date").df()
+    finally:
+        conn.close()
+
+
+class TestMacros:
+    def test_raw_fallback_without_build(self, ts, tmp_path):
+        conn = ts._get_connection()
+        assert sales_presence.install_macros(
+            conn, tmp_path / "presence") is False
+        conn.close()
+        summary = run_query(ts, "oos_summary", **WINDOW)[0]
+        assert summary["analysis_days"] == 15
+        assert summary["active_products"] > 0
+
+    def test_materialised_matches_raw(self, ts, tmp_path, assert_same):
+        raw = _oos_results(ts)
+        raw_baselines = [_baseline(ts, d) for d in
+                         ("2025-10-15", "2026-01-01", "2026-01-18")]
+
+        # Coverage ends inside the analysis window so the raw tail is used
+        result = sales_presence.refresh_sales_presence(
+            ts, through="2026-01-10", derived_dir=tmp_path / "presence")
+        assert result["status"] == "refreshed"
+        conn = ts._get_connection()
+        assert sales_presence.install_macros(
+            conn, tmp_path / "presence") is True
+        conn.close()
+
+        assert_same(raw, _oos_results(ts))
+        for expected, as_of in zip(raw_baselines, ("2025-10-15", "2026-01-01",
+                                                   "2026-01-18")):
+            pd.testing.assert_frame_equal(expected, _baseline(ts, as_of),
+                                          check_dtype=False, rtol=1e-9)
+
+
+class TestRefresh:
+    def test_incremental_equals_full_rebuild(self, ts, tmp_path):
+        derived = tmp_path / "presence"
+        sales_presence.refresh_sales_presence(ts, through="2025-11-15",
+                                              derived_dir=derived)
+        result = sales_presence.refresh_sales_presence(
+            ts, through="2026-01-19", derived_dir=derived)
+        assert result["days_added"] == 65
+        incremental = _daily(ts, derived)
+
+        full_dir = tmp_path / "full"
+        sales_presence.refresh_sales_presence(
+            ts, through="2026-01-19", derived_dir=full_dir)
+        full = _daily(ts, full_dir)
+        pd.testing.assert_frame_equal(incremental, full, rtol=1e-9)
+
+    def test_up_to_date_and_default_through(self, ts, tmp_path):
+        derived = tmp_path / "presence"
+        result = sales_presence.refresh_sales_presence(ts, derived_dir=derived)
+        assert result["through"] == (LAST_DAY - timedelta(days=1)).isoformat()
+        again = sales_presence.refresh_sales_presence(ts, derived_dir=derived)
+        assert again["status"] == "up_to_date"
+        assert again["rows_added"] == 0
+
+    def test_first_build_with_no_complete_day(self, sales_store, tmp_path):
+        # A single day of sales: that day may be partial, so nothing to add
+        one_day = _sales().query("SaleDate < '2025-09-02'")
+        store = sales_store({"FY26": one_day})
+        derived = tmp_path / "presence"
+        for full in (False, True):
+            result = sales_presence.refresh_sales_presence(
+                store, full=full, derived_dir=derived)
+            assert result["status"] == "up_to_date"
+            assert result["through"] is None
+            assert result["parts"] == 0
+        assert sales_presence.load_meta(derived) is None
+
+    def test_compaction_and_cleanup(self, ts, tmp_path, monkeypatch):
+        monkeypatch.setattr(sales_presence, "MAX_PARTS", 2)
+        derived = tmp_path / "presence"
+        sales_presence.refresh_sales_presence(ts, through="2025-10-31",
+                                              derived_dir=derived)
+        result = sales_presence.refresh_sales_presence(
+            ts, through="2025-12-31", derived_dir=derived)
+        assert result["parts"] == 1
+        assert len(list((derived / "store_plu_daily").glob("*.parquet"))) == 1
+        assert len(list(derived.glob("store_plu_pairs-*.parquet"))) == 1
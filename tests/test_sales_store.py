@@ -0,0 +1,128 @@
+"""Tests for the wide weekly-sales store."""
+
+import os
+import sqlite3
+import sys
+
+import duckdb
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "dashboards"))
+
+from shared import bq_mirror, data_access, sales_store
+from shared.bigquery_connector import BQ_PROJECT
+
+STORES = ["10 - HFM Pennant Hills", "28 - HFM Mosman"]
+WEEKS = ["2024-06-02", "2024-06-09", "2024-06-16", "2024-06-23"]
+
+
+def _long_sales():
+    """The extract's long measure/value rows, with gaps and a promo split."""
+    rows = []
+    for w, week in enumerate(WEEKS):
+        for s, store in enumerate(STORES):
+            for group in ("Citrus", "Apples"):
+                for m, measure in enumerate(sales_store.MEASURES):
+                    if group == "Apples" and measure.startswith("Bgt"):
+                        continue  # no budget for this group
+                    for promo in ("N", "Y"):
+                        rows.append({
+                            "store": store, "channel": "Retail",
+                            "department": "10 - Fruit & Vegetables",
+                            "major_group": group, "is_promotion": promo,
+                            "measure": measure, "week_ending": week,
+                            "value": float(100 * (w + 1) + 10 * s + m
+                                           + (0.5 if promo == "Y" else 0)),
+                            "fy_lol": 1, "rolling_13wk_lol": 1, "fv_store": 1})
+    rows.append(dict(rows[0], measure="Customer Count"))  # unmapped
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def long_db(tmp_path):
+    path = tmp_path / "harris_farm.db"
+    with sqlite3.connect(path) as conn:
+        _long_sales().to_sql("sales", conn, index=False)
+    return path
+
+
+@pytest.fixture
+def wide_db(long_db):
+    with sqlite3.connect(long_db) as conn:
+        sales_store.build_weekly_sales(conn)
+    return long_db
+
+
+def _sorted(df):
+    return df.sort_values(sales_store.KEYS).reset_index(drop=True)
+
+
+class TestBuild:
+    def test_one_row_per_group_week(self, wide_db):
+        with sqlite3.connect(wide_db) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM sales_weekly").fetchone()[0]
+            plan = " ".join(r[-1] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM sales_weekly "
+                "WHERE week_ending >= ? AND week_ending <= ?",
+                (WEEKS[1], WEEKS[2])))
+        assert count == len(WEEKS) * len(STORES) * 2 * 2  # groups x promo
+        assert "PRIMARY KEY" in plan
+
+    def test_rebuild_replaces_table(self, wide_db):
+        with sqlite3.connect(wide_db) as conn:
+            conn.execute("DELETE FROM sales WHERE week_ending = ?", (WEEKS[0],))
+            conn.commit()
+            assert sales_store.build_weekly_sales(conn) == 3 * len(STORES) * 4
+
+
+class TestRead:
+    def test_matches_pandas_pivot(self, wide_db):
+        expected = sales_store.pivot_measures(
+            _long_sales().query("is_promotion == 'N' and channel == 'Retail' "
+                                "and week_ending >= @WEEKS[1]"))
+        df = sales_store.load_weekly_sales(WEEKS[1], WEEKS[-1], db_path=wide_db)
+        assert list(df.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(_sorted(df), _sorted(expected))
+        # Groups without a budget read as missing, not zero
+        assert df.loc[df["major_group"] == "Apples", "budget_sales"].isna().all()
+
+    def test_filters_and_legacy_database(self, tmp_path, wide_db):
+        kwargs = dict(stores=[STORES[1]], major_groups=["Citrus"], promo="Y")
+        wide = sales_store.load_weekly_sales(WEEKS[0], WEEKS[1],
+                                             db_path=wide_db, **kwargs)
+        legacy = tmp_path / "legacy.db"
+        with sqlite3.connect(legacy) as conn:
+            _long_sales().to_sql("sales", conn, index=False)
+        old = sales_store.load_weekly_sales(WEEKS[0], WEEKS[1],
+                                            db_path=legacy, **kwargs)
+        assert len(wide) == 2
+        pd.testing.assert_frame_equal(_sorted(wide), _sorted(old))
+
+    def test_get_sales_data_reads_measure_column(self, wide_db, monkeypatch):
+        monkeypatch.setattr(data_access, "_DB_PATH_CACHE", wide_db)
+        rows = data_access.get_sales_data(stores=[STORES[0]],
+                                          date_from=WEEKS[2],
+                                          measure="Bgt Sales - Val")
+        long = _long_sales()
+        expected = long[(long["store"] == STORES[0])
+                        & (long["measure"] == "Bgt Sales - Val")
+                        & (long["is_promotion"] == "N")
+                        & (long["week_ending"] >= WEEKS[2])]
+        assert sorted(r["value"] for r in rows) == sorted(expected["value"])
+        assert {r["major_group"] for r in rows} == {"Citrus"}
+
+    def test_pivot_sql_runs_in_duckdb(self):
+        long = _long_sales()
+        sql, _ = bq_mirror.to_duckdb(
+            "SELECT store, department, major_group, week_ending, {} "
+            "FROM `{}.trading.weekly_sales` WHERE is_promotion = 'N' "
+            "GROUP BY store, department, major_group, week_ending".format(
+                sales_store.pivot_sql(), BQ_PROJECT),
+            lambda name: "long")
+        conn = duckdb.connect()
+        conn.register("long", long)
+        df = sales_store.finish_frame(conn.execute(sql).df())
+        conn.close()
+        expected = sales_store.pivot_measures(long[long["is_promotion"] == "N"])
+        pd.testing.assert_frame_equal(_sorted(df), _sorted(expected))
@@ -0,0 +1,100 @@
+"""Tests for the hierarchy-backed entity recogniser in schema_context."""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "dashboards", "shared"))
+
+import schema_context as sc
+from schema_context import EntityMatcher
+
+
+def _entity(name, level="hfm_item", codes=()):
+    return name, {"name": name.lower(), "level": level, "codes": list(codes)}
+
+
+class TestEntityMatcher:
+    def test_finds_every_phrase_in_one_pass(self):
+        matcher = EntityMatcher([
+            _entity("POTATO"), _entity("SWEET POTATO"), _entity("OIL"),
+            _entity("OLIVE OIL"), _entity("FRUIT & VEGETABLES", "department"),
+        ])
+        found = matcher.find("Sweet potatoes, olive oil and fruit and "
+                             "vegetables vs potato")
+        assert [(e["name"], e["term"]) for e in found] == [
+            ("sweet potato", "Sweet potatoes"),
+            ("olive oil", "olive oil"),
+            ("fruit & vegetables", "fruit and vegetables"),
+            ("potato", "potato"),
+        ]
+
+    def test_overlapping_suffix_phrases(self):
+        # "b c d" is only reachable through a failure link from "a b c"
+        matcher = EntityMatcher([_entity("A B C X"), _entity("B C D"),
+                                 _entity("C")])
+        assert [e["name"] for e in matcher.find("a b c d c")] == [
+            "b c d", "c"]
+
+    def test_plural_folding_prefers_exact_spelling(self):
+        matcher = EntityMatcher([_entity("ROSE", "minor_group"),
+                                 _entity("ROSES"), _entity("STRAWBERRIES")])
+        assert [e["level"] for e in matcher.find("roses")] == ["hfm_item"]
+        assert [e["level"] for e in matcher.find("rose")] == ["minor_group"]
+        assert matcher.find("a strawberry")[0]["name"] == "strawberries"
+
+    def test_generic_single_words_are_not_entities(self):
+        matcher = EntityMatcher([_entity("BASKET"), _entity("SALES"),
+                                 _entity("GIFT BASKET")])
+        assert matcher.find("average basket size and sales") == []
+        assert matcher.find("gift baskets")[0]["name"] == "gift basket"
+
+
+class TestEntityFilterSql:
+    def test_exact_code_filters(self):
+        entities = [
+            {"level": "minor_group", "codes": [
+                {"dept_code": "10", "major_code": "2", "minor_code": "4"},
+                {"dept_code": "20", "major_code": "3", "minor_code": "31"}]},
+            {"level": "product", "codes": [{"product_number": "50277"}]},
+        ]
+        assert sc.entity_filter_sql(entities) == (
+            "((t.MajorGroupCode = '2' AND t.MinorGroupCode = '4') OR "
+            "(t.MajorGroupCode = '3' AND t.MinorGroupCode = '31') OR "
+            "t.PLUItem_ID IN ('50277'))")
+
+    def test_uncoded_entity_needs_name_search(self):
+        assert sc.entity_filter_sql([
+            {"level": "department", "codes": [{"dept_code": "10"}]},
+            {"level": "product", "codes": []}]) is None
+        assert sc.entity_filter_sql([]) is None
+
+
+@pytest.mark.skipif(
+    not os.path.exists(os.path.join(ROOT, "data", "product_hierarchy.parquet")),
+    reason="product hierarchy not available")
+class TestHierarchyRouting:
+    def test_product_and_category_detection(self):
+        info = sc.detect_product_query("How many bananas did we sell?")
+        assert info["is_product_query"] and info["needs_duckdb"]
+        assert info["search_terms"] == ["bananas"]
+        assert {c["minor_code"] for c in info["entities"][0]["codes"]} == {
+            "4", "31"}
+
+        info = sc.detect_product_query("Fruit and vegetables sales by store")
+        assert info["is_category_query"]
+        assert info["entities"][0]["codes"] == [{"dept_code": "10"}]
+
+        assert sc.classify_query_intent("top selling roses") == \
+            "product_specific"
+        assert sc.classify_query_intent("Which store has the most "
+                                        "customers?") == "customers"
+
+    def test_schema_prompt_uses_exact_codes(self):
+        prompt, db = sc.get_schema_for_page("sales", "bananas sold last week")
+        assert db == "duckdb"
+        assert "t.MinorGroupCode = '4'" in prompt
+        assert "HIERARCHY MATCH" in prompt
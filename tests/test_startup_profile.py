@@ -0,0 +1,68 @@
+"""Tests for the start-up profiler and the API's deferred imports."""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+import startup_profile
+
+
+class TestPhases:
+    def test_phase_records_duration_and_error(self):
+        with startup_profile.phase("unit_ok"):
+            time.sleep(0.01)
+        with pytest.raises(ValueError):
+            with startup_profile.phase("unit_fail"):
+                raise ValueError("boom")
+        phases = {p["name"]: p for p in startup_profile.report()["phases"]}
+        assert phases["unit_ok"]["ms"] >= 10
+        assert phases["unit_ok"]["error"] is None
+        assert phases["unit_fail"]["error"] == "boom"
+
+    def test_warm_up_runs_in_order_past_failures(self):
+        ran = []
+
+        def fail():
+            ran.append("fail")
+            raise RuntimeError("no data")
+
+        thread = startup_profile.warm_up([
+            ("unit_first", lambda: ran.append("first")),
+            ("unit_broken", fail),
+            ("unit_last", lambda: ran.append("last")),
+        ], name="unit-warm-up")
+        thread.join(5)
+        assert ran == ["first", "fail", "last"]
+        assert startup_profile.warm_up_state()["state"] == "done"
+        threads = {p["name"]: p["thread"]
+                   for p in startup_profile.report()["phases"]}
+        assert threads["unit_last"] == "unit-warm-up"
+
+
+class TestImports:
+    def test_profile_imports(self):
+        entries = startup_profile.profile_imports(["json"])
+        names = [e["module"] for e in entries]
+        assert "json" in names
+        summary = startup_profile.summarise(entries, top=5)
+        assert summary["total_ms"] > 0
+        assert len(summary["packages"]) <= 5
+        assert "Total import time" in startup_profile.format_report(summary)
+
+    def test_unknown_module_raises(self):
+        with pytest.raises(RuntimeError):
+            startup_profile.profile_imports(["no_such_module_here"])
+
+    def test_api_defers_llm_sdks(self):
+        code = ("import sys; sys.path.insert(0, {!r}); import app; "
+                "print(sorted(m for m in ('anthropic', 'openai', 'pandas', "
+                "'pyarrow', 'duckdb') if m in sys.modules))").format(BACKEND)
+        out = subprocess.run([sys.executable, "-c", code], check=True,
+                             capture_output=True, text=True).stdout
+        assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,127 @@
+"""Tests for the synthetic fixture generator and the load-test runner."""
+
+import os
+import sqlite3
+import sys
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import load_test
+import plu_layer
+import synthetic_data
+
+
+@pytest.fixture(scope="module")
+def fixtures(tmp_path_factory):
+    out = tmp_path_factory.mktemp("synthetic")
+    synthetic_data.generate(out, scale=0.0002, only=["transactions", "plu"])
+    return out
+
+
+class TestTransactions:
+    def test_schema_rows_and_order(self, fixtures):
+        conn = duckdb.connect()
+        path = str(fixtures / "transactions" / "FY25.parquet")
+        cols = [r[0] for r in conn.execute(
+            "DESCRIBE SELECT * FROM read_parquet(?)", [path]).fetchall()]
+        assert cols == ["Store_ID", "PLUItem_ID", "SaleDate", "Reference2",
+                        "CustomerCode", "Quantity", "SalesIncGST", "GST",
+                        "EstimatedCOGS"]
+        rows, unsorted, first, last = conn.execute(
+            "SELECT COUNT(*), COUNT(*) FILTER (WHERE prev > SaleDate), "
+            "MIN(SaleDate), MAX(SaleDate) FROM (SELECT SaleDate, "
+            "LAG(SaleDate) OVER () AS prev FROM read_parquet(?))",
+            [path]).fetchone()
+        assert rows == 29_800
+        assert unsorted == 0
+        assert str(first.date()) >= "2024-06-30"
+        assert str(last.date()) <= "2025-06-29"
+
+    def test_baskets_customers_and_popularity_are_skewed(self, fixtures):
+        conn = duckdb.connect()
+        path = str(fixtures / "transactions" / "FY24.parquet")
+        mean_lines, max_lines, stores_per_basket = conn.execute(
+            "SELECT AVG(n), MAX(n), MAX(s) FROM (SELECT Reference2, "
+            "COUNT(*) n, COUNT(DISTINCT Store_ID) s FROM read_parquet(?) "
+            "GROUP BY 1)", [path]).fetchone()
+        assert 7 < mean_lines < 11 and max_lines > 30
+        assert stores_per_basket == 1
+        loyalty = conn.execute(
+            "SELECT AVG((CustomerCode <> 'NULL')::INT) FROM read_parquet(?)",
+            [path]).fetchone()[0]
+        assert 0.08 < loyalty < 0.16
+        top_share = conn.execute(
+            "SELECT MAX(n) / SUM(n) FROM (SELECT PLUItem_ID, COUNT(*) n "
+            "FROM read_parquet(?) GROUP BY 1)", [path]).fetchone()[0]
+        assert top_share > 0.01
+
+    def test_same_seed_same_data(self, tmp_path):
+        a = synthetic_data.write_transactions(
+            tmp_path / "a", scale=0.00005, fiscal_years=["FY26"])
+        b = synthetic_data.write_transactions(
+            tmp_path / "b", scale=0.00005, fiscal_years=["FY26"])
+        assert a["FY26"].read_bytes() == b["FY26"].read_bytes()
+
+
+class TestPluDb:
+    def test_plu_layer_queries_run(self, fixtures, monkeypatch):
+        monkeypatch.setattr(plu_layer, "PLU_DB",
+                            str(fixtures / "harris_farm_plu.db"))
+        assert plu_layer.get_fiscal_years() == [2024, 2025, 2026]
+        assert len(plu_layer.get_stores()) == synthetic_data.PLU_STORE_COUNT
+        summary = plu_layer.department_summary(2025)
+        assert summary and all(d["sales"] > 0 for d in summary)
+        conn = sqlite3.connect(str(fixtures / "harris_farm_plu.db"))
+        rows, online = conn.execute(
+            "SELECT COUNT(*), SUM(channel = 'Online') "
+            "FROM weekly_plu_results").fetchone()
+        conn.close()
+        assert abs(rows - synthetic_data.PLU_DB_ROWS * 0.0002) < 600
+        assert 0 < online < rows * 0.1
+
+
+class TestHubDb:
+    def test_startup_schema_and_history(self, tmp_path):
+        import app as hub_app
+
+        hub_db = hub_app.config.HUB_DB
+        path = synthetic_data.write_hub_db(tmp_path / "hub_data.db",
+                                           scale=0.001)
+        assert hub_app.config.HUB_DB == hub_db
+        conn = sqlite3.connect(str(path))
+        tables = {r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"queries", "page_views", "users", "mdhe_data_sources",
+                "job_queue"} <= tables
+        assert len(tables) > 100
+        views, days = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM page_views), "
+            "(SELECT SUM(views) FROM page_view_daily)").fetchone()
+        conn.close()
+        assert views == days == 1_500
+
+
+class TestLoadTest:
+    def test_dashboard_mix_reports_every_request(self, fixtures):
+        results = load_test.run_load(fixtures, mix="dashboard",
+                                     concurrency=2, duration=2, warmup=0)
+        total = results.pop("ALL")
+        assert total["errors"] == 0
+        assert total["count"] == sum(r["count"] for r in results.values())
+        assert set(results) <= {name for name, _, _ in load_test.DASHBOARD_MIX}
+        assert total["p50_ms"] <= total["p95_ms"] <= total["max_ms"]
+
+    def test_compare_flags_regressions(self):
+        base = load_test.summarise(
+            [("a", 0.010, True)] * 99 + [("a", 0.020, True)], duration=10)
+        slow = load_test.summarise(
+            [("a", 0.050, True)] * 90 + [("a", 0.050, False)] * 10,
+            duration=10)
+        assert base["a"]["p95_ms"] == 10.0 and base["ALL"]["rps"] == 10.0
+        assert load_test.compare(base, base) == []
+        problems = load_test.compare(slow, base)
+        assert any("error rate" in p for p in problems)
+        assert any("p95 50.0ms" in p for p in problems)
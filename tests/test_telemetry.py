@@ -0,0 +1,158 @@
+"""Tests for request / query / LLM latency telemetry."""
+
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import telemetry
+
+
+@pytest.fixture(autouse=True)
+def ring(tmp_path, monkeypatch):
+    db = str(tmp_path / "telemetry.db")
+    monkeypatch.setattr(telemetry, "TELEMETRY_DB", db)
+    telemetry.reset()
+    yield db
+    telemetry.reset()
+
+
+def _series(kind=None):
+    return {s["name"]: s for s in telemetry.summary(kind=kind)}
+
+
+class TestRecording:
+    def test_timed_blocks_and_percentiles(self):
+        for ms in range(1, 101):
+            telemetry.observe("llm", "anthropic:model", ms / 1000)
+        with pytest.raises(RuntimeError):
+            with telemetry.timed("llm", "openai:model"):
+                raise RuntimeError("timeout")
+        series = _series("llm")
+        assert (series["anthropic:model"]["p50_ms"],
+                series["anthropic:model"]["p95_ms"],
+                series["anthropic:model"]["p99_ms"]) == (50.0, 95.0, 99.0)
+        assert series["openai:model"]["errors"] == 1
+
+    def test_ring_buffer_keeps_the_newest(self, ring, monkeypatch):
+        monkeypatch.setattr(telemetry, "RING_SIZE", 5)
+        for i in range(4):
+            telemetry.observe("http", "GET /a", 0.001 * (i + 1))
+        telemetry.flush()
+        for i in range(4):
+            telemetry.observe("http", "GET /a", 0.1 * (i + 1))
+        telemetry.flush()
+        conn = sqlite3.connect(ring)
+        slots = conn.execute("SELECT slot, seq FROM telemetry_ring "
+                             "ORDER BY seq").fetchall()
+        conn.close()
+        assert slots == [(3, 3), (4, 4), (0, 5), (1, 6), (2, 7)]
+        assert _series()["GET /a"]["count"] == 5
+
+    def test_prometheus_text(self):
+        telemetry.observe("duckdb", 'top "items"', 0.02, rows=10, nbytes=500)
+        telemetry.observe("duckdb", 'top "items"', 3.0, rows=5, nbytes=250,
+                          status="error")
+        text = telemetry.prometheus_text()
+        label = 'name="top \\"items\\""'
+        assert "# TYPE hub_duckdb_query_duration_seconds histogram" in text
+        assert (f'hub_duckdb_query_duration_seconds_bucket{{{label},le="0.025"}}'
+                " 1") in text
+        assert (f'hub_duckdb_query_duration_seconds_bucket{{{label},le="+Inf"}}'
+                " 2") in text
+        assert f"hub_duckdb_query_duration_seconds_count{{{label}}} 2" in text
+        assert f"hub_duckdb_query_rows_total{{{label}}} 15" in text
+        assert f"hub_duckdb_query_bytes_total{{{label}}} 750" in text
+        assert f"hub_duckdb_query_errors_total{{{label}}} 1" in text
+
+
+class TestQueries:
+    def test_fingerprint_ignores_literals(self):
+        a = telemetry.fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) "
+                                  "AND name = 'x'  -- note")
+        b = telemetry.fingerprint("select * from t\nwhere id in (7) "
+                                  "and name = 'it''s'")
+        assert a[0] == b[0]
+        assert a[1] == "SELECT * FROM t WHERE id IN (?) AND name = ?"
+
+    def test_sqlite_connections_are_timed(self, tmp_path, monkeypatch):
+        db = str(tmp_path / "data.db")
+        conn = telemetry.connect(db)
+        conn.execute("CREATE TABLE sales (store TEXT, value REAL)")
+        conn.executemany("INSERT INTO sales VALUES (?, ?)",
+                         [("10", 1.0), ("28", 2.0), ("28", 3.0)])
+        conn.commit()
+        with telemetry.template("sales_by_store"):
+            rows = conn.execute("SELECT store, SUM(value) FROM sales "
+                                "GROUP BY store").fetchall()
+        assert rows == [("10", 1.0), ("28", 5.0)]
+        assert [r[0] for r in conn.execute("SELECT store FROM sales")] == [
+            "10", "28", "28"]
+        conn.close()
+
+        series = _series("sqlite")
+        assert series["sales_by_store"]["rows"] == 2
+        assert series["sales_by_store"]["bytes"] > 0
+        iterated = [s for s in series.values()
+                    if s["sql"] == "SELECT store FROM sales"]
+        assert iterated[0]["rows"] == 3
+
+    def test_read_sql_is_timed(self, tmp_path):
+        conn = telemetry.connect(str(tmp_path / "data.db"))
+        conn.execute("CREATE TABLE sales (store TEXT, value REAL)")
+        conn.execute("INSERT INTO sales VALUES ('10', 1.0), ('28', 2.0)")
+        with telemetry.template("read_sql_sales"):
+            df = pd.read_sql("SELECT * FROM sales WHERE value > ?", conn,
+                             params=[0])
+        conn.close()
+        assert len(df) == 2
+        assert _series("sqlite")["read_sql_sales"]["rows"] == 2
+
+    def test_slow_queries_are_logged_with_plans(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(telemetry, "SLOW_QUERY_MS", 0)
+        monkeypatch.setattr(telemetry, "SLOW_SAMPLE_RATE", 1.0)
+        db = str(tmp_path / "data.db")
+        conn = telemetry.connect(db)
+        conn.execute("CREATE TABLE sales (store TEXT, value REAL)")
+        conn.execute("CREATE INDEX idx_store ON sales(store)")
+        conn.commit()
+        conn.execute("SELECT value FROM sales WHERE store = ?",
+                     ("10",)).fetchall()
+        conn.close()
+
+        slow = [q for q in telemetry.slow_queries()
+                if q["sql"].startswith("SELECT value")]
+        assert "idx_store" in slow[0]["plan"]
+
+        monkeypatch.setattr(telemetry, "SLOW_SAMPLE_RATE", 0.0)
+        telemetry.record_query("duckdb", "SELECT 1", 10.0)
+        assert all(q["sql"] != "SELECT 1" for q in telemetry.slow_queries())
+
+
+class TestMiddleware:
+    def test_routes_are_labelled_by_template(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        app = FastAPI()
+        app.add_middleware(telemetry.TelemetryMiddleware)
+
+        @app.get("/api/stores/{store_id}")
+        async def store(store_id: str):
+            if store_id == "0":
+                raise RuntimeError("boom")
+            return {"id": store_id}
+
+        client = TestClient(app, raise_server_exceptions=False)
+        for store_id in ("10", "28", "0"):
+            client.get(f"/api/stores/{store_id}")
+        client.get("/nowhere")
+
+        series = _series("http")
+        assert series["GET /api/stores/{store_id}"]["count"] == 3
+        assert series["GET /api/stores/{store_id}"]["errors"] == 1
+        assert series["GET unmatched"]["count"] == 1
@@ -13,7 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
 from plu_lookup import load_plu_names, resolve_plu, enrich_items, plu_coverage_stats
 from transaction_layer import TransactionStore
-from transaction_queries import run_query, get_query_catalog, QUERIES
+from transaction_queries import build_query, run_query, get_query_catalog, QUERIES
 
 
 # ---------------------------------------------------------------------------
@@ -463,15 +463,16 @@ class TestHFMFilterPlaceholder:
 
 
 class TestDayTypeFilter:
-    """Tests for {day_type_filter} and {fiscal_join} substitution."""
+    """Tests for {day_type_filter} substitution on the enriched view."""
 
     def test_day_type_filter_in_filtered_kpis(self):
         q = QUERIES["filtered_kpis"]
         assert "{day_type_filter}" in q["sql"]
 
-    def test_fiscal_join_in_filtered_kpis(self):
+    def test_filtered_kpis_reads_enriched_view(self):
         q = QUERIES["filtered_kpis"]
-        assert "{fiscal_join}" in q["sql"]
+        assert "FROM transactions_enriched t" in q["sql"]
+        assert "fiscal_calendar" not in q["sql"]
 
     def test_day_type_filter_in_hourly_queries(self):
         for name in ["fiscal_day_of_week", "fiscal_hourly_by_day_type",
@@ -809,20 +810,17 @@ class TestTimeFilterQueryHandlers:
                 assert placeholder in sql, \
                     f"{placeholder} missing from {qname}"
 
-    def test_fiscal_join_activates_for_dow(self):
-        """fiscal_join activates when day_of_week_names present."""
-        sql = QUERIES["filtered_kpis"]["sql"]
-        assert "{fiscal_join}" in sql
-        # Simulate handler
-        result = sql.replace("{fiscal_join}",
-            "JOIN fiscal_calendar fc ON CAST(t.SaleDate AS DATE) = fc.TheDate")
-        assert "JOIN fiscal_calendar fc" in result
-
-    def test_fiscal_join_empty_when_no_filters(self):
-        """fiscal_join is empty string when no time filters."""
-        sql = QUERIES["filtered_kpis"]["sql"]
-        result = sql.replace("{fiscal_join}", "")
-        assert "fiscal_calendar" not in result
+    def test_dow_filter_uses_enriched_columns(self):
+        """Day-of-week filter reads the pre-joined calendar columns."""
+        sql, _ = build_query("filtered_kpis", start="2025-07-01",
+                             end="2025-08-01", day_of_week_names=["Saturday"])
+        assert "AND t.DayOfWeekName IN ('Saturday')" in sql
+
+    def test_no_calendar_join_when_no_filters(self):
+        """No live calendar join, with or without time filters."""
+        sql, _ = build_query("filtered_kpis", start="2025-07-01",
+                             end="2025-08-01")
+        assert "fiscal_calendar" not in sql
 
 
 class TestQuickPeriodResolve:
@@ -906,23 +904,23 @@ class TestFilterPropagation:
 
     def test_department_revenue_has_time_placeholders(self):
         sql = QUERIES["department_revenue"]["sql"]
-        for ph in ["{fiscal_join}", "{day_type_filter}", "{hour_filter}",
+        for ph in ["{day_type_filter}", "{hour_filter}",
                    "{season_filter}", "{quarter_filter}", "{month_filter}"]:
             assert ph in sql, f"{ph} missing from department_revenue"
 
     def test_major_group_revenue_has_time_placeholders(self):
         sql = QUERIES["major_group_revenue"]["sql"]
-        for ph in ["{fiscal_join}", "{hour_filter}", "{season_filter}"]:
+        for ph in ["{hour_filter}", "{season_filter}"]:
             assert ph in sql, f"{ph} missing from major_group_revenue"
 
     def test_minor_group_revenue_has_time_placeholders(self):
         sql = QUERIES["minor_group_revenue"]["sql"]
-        for ph in ["{fiscal_join}", "{hour_filter}", "{season_filter}"]:
+        for ph in ["{hour_filter}", "{season_filter}"]:
             assert ph in sql, f"{ph} missing from minor_group_revenue"
 
     def test_gst_category_split_has_all_placeholders(self):
         sql = QUERIES["gst_category_split"]["sql"]
-        for ph in ["{fiscal_join}", "{dept_filter}", "{major_filter}",
+        for ph in ["{dept_filter}", "{major_filter}",
                    "{minor_filter}", "{hfm_filter}", "{product_filter}",
                    "{day_type_filter}", "{hour_filter}", "{season_filter}",
                    "{quarter_filter}", "{month_filter}"]:
@@ -930,13 +928,13 @@ class TestFilterPropagation:
 
     def test_gst_category_monthly_trend_has_all_placeholders(self):
         sql = QUERIES["gst_category_monthly_trend"]["sql"]
-        for ph in ["{fiscal_join}", "{dept_filter}", "{hour_filter}",
+        for ph in ["{dept_filter}", "{hour_filter}",
                    "{season_filter}", "{quarter_filter}", "{month_filter}"]:
             assert ph in sql, f"{ph} missing from gst_category_monthly_trend"
 
     def test_anomaly_candidates_has_hierarchy_placeholders(self):
         sql = QUERIES["anomaly_candidates"]["sql"]
-        for ph in ["{fiscal_join}", "{dept_filter}", "{major_filter}",
+        for ph in ["{dept_filter}", "{major_filter}",
                    "{hour_filter}", "{season_filter}"]:
             assert ph in sql, f"{ph} missing from anomaly_candidates"
 
@@ -0,0 +1,112 @@
+"""Tests for the enriched transaction layout and its live-join fallback."""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import query_benchmark
+from transaction_enrichment import (
+    build_enriched, fresh_files, install_enriched_view,
+)
+from transaction_layer import TransactionStore
+from transaction_queries import build_query
+
+QUERIES = [
+    ("department_revenue", {"start": "2026-01-05", "end": "2026-01-25"}),
+    ("fiscal_weekly_trend", {"fin_year": 2026}),
+    ("fiscal_hourly_heatmap", {"start": "2026-01-05", "end": "2026-01-25"}),
+    ("top_items_filtered", {"start": "2026-01-05", "end": "2026-01-25",
+                            "department": "10"}),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    source = query_benchmark.build_fixture(tmp_path / "FY26.parquet",
+                                           rows=20_000, row_group_size=1_000)
+    return TransactionStore(parquet_files={"FY26": source},
+                            presence_dir=tmp_path / "derived",
+                            enriched_dir=tmp_path / "enriched")
+
+
+def _results(store):
+    # Rounded: summation order differs between the two layouts
+    return {name: [{k: round(v, 6) if isinstance(v, float) else v
+                    for k, v in row.items()}
+                   for row in store.query(*build_query(name, **params))]
+            for name, params in QUERIES}
+
+
+class TestEnrichedLayout:
+    def test_build_matches_live_join(self, store, tmp_path):
+        live = _results(store)
+        assert any(live.values())
+
+        result = build_enriched(store, enriched_dir=tmp_path / "enriched")
+        assert result["status"] == "built"
+        assert result["built"] == {"FY26": 20_000}
+        assert list(fresh_files(store.available_fys,
+                                tmp_path / "enriched")) == ["FY26"]
+        assert _results(store) == live
+
+    def test_second_run_is_up_to_date(self, store, tmp_path):
+        build_enriched(store, enriched_dir=tmp_path / "enriched")
+        again = build_enriched(store, enriched_dir=tmp_path / "enriched")
+        assert again["status"] == "up_to_date"
+        assert again["fresh"] == ["FY26"]
+        forced = build_enriched(store, force=True,
+                                enriched_dir=tmp_path / "enriched")
+        assert forced["status"] == "built"
+        assert len(list((tmp_path / "enriched").glob("*.parquet"))) == 1
+
+    def test_changed_source_falls_back(self, store, tmp_path):
+        build_enriched(store, enriched_dir=tmp_path / "enriched")
+        source = store.available_fys["FY26"]
+        st = source.stat()
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        conn = store._get_connection()
+        try:
+            served = install_enriched_view(conn, store.available_fys,
+                                           tmp_path / "enriched")
+            assert served == []
+            assert conn.execute("SELECT COUNT(*) FROM transactions_enriched"
+                                ).fetchone()[0] == 20_000
+        finally:
+            conn.close()
+
+    def test_enriched_file_is_dictionary_encoded(self, store, tmp_path):
+        build_enriched(store, enriched_dir=tmp_path / "enriched")
+        path = fresh_files(store.available_fys, tmp_path / "enriched")["FY26"]
+        conn = store._get_connection()
+        try:
+            rows = conn.execute("""
+                SELECT path_in_schema, encodings, compression
+                FROM parquet_metadata(?)
+                WHERE path_in_schema IN ('DepartmentDesc', 'FinWeekOfYearName')
+            """, [str(path)]).fetchall()
+        finally:
+            conn.close()
+        assert rows
+        for column, encodings, compression in rows:
+            assert "DICTIONARY" in encodings, column
+            assert compression == "ZSTD", column
+
+    def test_local_date_and_hour_share_one_timestamp(self, store, tmp_path):
+        build_enriched(store, enriched_dir=tmp_path / "enriched")
+        conn = store._get_connection()
+        try:
+            rows = conn.execute("""
+                SELECT COUNT(*) FILTER (WHERE local_date <> sale_date_utc),
+                       COUNT(*) FILTER (WHERE local_date <> CAST(
+                           SaleDate + INTERVAL '11' HOUR AS DATE)),
+                       COUNT(*) FILTER (WHERE (local_date > sale_date_utc)
+                                        <> (local_hour < 11))
+                FROM transactions_enriched
+            """).fetchone()
+        finally:
+            conn.close()
+        evening, mismatched, inconsistent = rows
+        assert evening > 0
+        assert mismatched == 0 and inconsistent == 0